@@ -0,0 +1,319 @@
+# aio_reader.py
+"""
+Acquisition du gant en asyncio, pour les outils (enregistreurs, passerelles
+réseau, analyses) : plusieurs sources dans une seule boucle, sans thread.
+
+    reader = AsyncHandReader("/dev/cu.usbmodem1201")
+    async for batch in reader.frames():      # List[HandState]
+        ...
+
+Sources :
+  - port série ou pty : descripteur non bloquant surveillé par la boucle
+    (loop.add_reader), lignes découpées par hand_state.CsvLineBuffer
+  - fichier de séance (CSV de session.py) : rejoué au rythme de ses t_ms
+    (speed=2 : deux fois plus vite, speed=0 : aussi vite que possible)
+
+Chaque source a une file bornée (queue_size lots). Si le consommateur ne
+suit pas :
+  - policy="block" : la source est suspendue (le port n'est plus lu, les
+    octets attendent dans le tampon du système ; le rejeu attend)
+  - policy="drop"  : le lot le plus ancien est jeté (compté dans dropped) ;
+    pour un affichage, mieux vaut des données fraîches que complètes
+
+frames() regroupe ce qui est déjà arrivé (jusqu'à max_batch échantillons)
+en un lot. Annuler la tâche qui itère, ou sortir de la boucle, ferme la
+source. merge() itère plusieurs lecteurs ensemble : (nom, lot).
+
+POSIX seulement pour les ports (add_reader n'existe pas sur la boucle
+Proactor de Windows) ; le rejeu de fichier marche partout.
+
+    python aio_reader.py /dev/cu.usbmodem1201 sessions/p01/seance.csv --speed 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+import serial
+
+from hand_state import CsvLineBuffer, HandState
+from serial_reader import SERIAL_BAUD
+
+_END = None   # fin de flux dans la file
+
+
+class AsyncHandReader:
+
+    def __init__(self, source: str, baudrate: int = SERIAL_BAUD, name: Optional[str] = None,
+                 queue_size: int = 64, max_batch: int = 256, policy: str = "block",
+                 speed: float = 1.0):
+        if policy not in ("block", "drop"):
+            raise ValueError(f"policy inconnue : {policy}")
+        self.source = source
+        self.baudrate = baudrate
+        self.name = name or os.path.basename(source)
+        self.queue_size = queue_size
+        self.max_batch = max_batch
+        self.policy = policy
+        self.speed = speed
+
+        self.received = 0      # échantillons valides lus
+        self.delivered = 0     # échantillons rendus par frames()
+        self.dropped = 0       # échantillons jetés (policy="drop")
+        self.paused = 0        # suspensions de la source (policy="block")
+
+        self._lines = CsvLineBuffer(self.name)
+        self._backlog: list = []   # lots (et fin de flux) en attente de place dans la file
+        self._queue: Optional[asyncio.Queue] = None
+        self._ser: Optional[serial.Serial] = None
+        self._fd = -1
+        self._reading = False
+        self._eof = False
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def is_file(self) -> bool:
+        return os.path.isfile(self.source)
+
+    @property
+    def rejected(self) -> int:
+        return self._lines.rejected
+
+    # ----- Ouverture / fermeture -----
+
+    def open(self):
+        """Ouvre la source dans la boucle courante (appelé par frames())."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(self.queue_size)
+        if self.is_file:
+            self._task = self._loop.create_task(self._replay())
+            return
+        self._ser = serial.Serial(self.source, self.baudrate, timeout=0)
+        self._fd = self._ser.fileno()
+        self._eof = False
+        self._resume()
+
+    def close(self):
+        self._pause()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._ser is not None:
+            self._ser.close()
+            self._ser = None
+            self._fd = -1
+
+    # ----- Port / pty -----
+
+    def _resume(self):
+        if not self._reading and not self._eof and self._fd >= 0:
+            self._loop.add_reader(self._fd, self._on_readable)
+            self._reading = True
+
+    def _pause(self):
+        if self._reading:
+            self._loop.remove_reader(self._fd)
+            self._reading = False
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            # port fermé (gant débranché) : fin du flux
+            self._eof = True
+            self._pause()
+            self._end()
+            return
+        states = self._lines.feed(data)
+        if states:
+            self._offer(states)
+
+    def _offer(self, states: List[HandState]):
+        self.received += len(states)
+        queue = self._queue
+        if queue.full():
+            if self.policy == "drop":
+                self.dropped += len(queue.get_nowait())
+            else:
+                # file pleine : le lot attend, et le port n'est plus lu
+                self._backlog.append(states)
+                self._pause()
+                self.paused += 1
+                return
+        queue.put_nowait(states)
+
+    def _end(self):
+        if self._queue.full() or self._backlog:
+            self._backlog.append(_END)
+        else:
+            self._queue.put_nowait(_END)
+
+    def _refill(self):
+        """Après une lecture du consommateur : remet en file ce qui attendait, relance le port."""
+        queue = self._queue
+        while self._backlog and not queue.full():
+            queue.put_nowait(self._backlog.pop(0))
+        if not self._backlog:
+            self._resume()
+
+    # ----- Fichier de séance -----
+
+    async def _replay(self):
+        """Lit le fichier ligne à ligne et rend les échantillons à l'heure de leur t_ms."""
+        t0_ms = None
+        wall0 = time.perf_counter()
+        batch: List[HandState] = []
+        try:
+            with open(self.source, "r", encoding="utf-8", errors="ignore") as f:
+                for line in f:
+                    state = HandState.from_csv_line(line)
+                    if state is None:
+                        continue
+                    state.device = self.name
+                    if t0_ms is None:
+                        t0_ms = state.t_ms
+                    if self.speed > 0:
+                        due = wall0 + (state.t_ms - t0_ms) / 1000.0 / self.speed
+                        wait = due - time.perf_counter()
+                        if wait > 0.001 and batch:
+                            await self._put(batch)
+                            batch = []
+                            wait = due - time.perf_counter()
+                        if wait > 0.001:
+                            await asyncio.sleep(wait)
+                    batch.append(state)
+                    if len(batch) >= self.max_batch:
+                        await self._put(batch)
+                        batch = []
+            if batch:
+                await self._put(batch)
+        finally:
+            self._end()
+
+    async def _put(self, states: List[HandState]):
+        self.received += len(states)
+        if self.policy == "drop" and self._queue.full():
+            self.dropped += len(self._queue.get_nowait())
+        await self._queue.put(states)   # policy="block" : attend le consommateur
+        # rend la main à chaque lot : sans attente (speed=0, file non pleine),
+        # le consommateur ne serait jamais ordonnancé et "drop" jetterait tout
+        await asyncio.sleep(0)
+
+    # ----- Consommation -----
+
+    async def frames(self) -> AsyncIterator[List[HandState]]:
+        """
+        Lots d'échantillons, dans l'ordre, jusqu'à la fin de la source.
+        Un lot regroupe tout ce qui est arrivé depuis le lot précédent
+        (max_batch échantillons au plus).
+        """
+        self._backlog = []
+        self.open()
+        queue = self._queue
+        try:
+            while True:
+                first = await queue.get()
+                if first is _END:
+                    return
+                batch = list(first)
+                ended = False
+                while len(batch) < self.max_batch and not queue.empty():
+                    more = queue.get_nowait()
+                    if more is _END:
+                        ended = True
+                        break
+                    batch.extend(more)
+                self._refill()
+                self.delivered += len(batch)
+                yield batch
+                if ended:
+                    return
+        finally:
+            self.close()
+
+    def stats(self) -> dict:
+        return {"name": self.name, "received": self.received, "delivered": self.delivered,
+                "dropped": self.dropped, "paused": self.paused, "rejected": self.rejected}
+
+
+async def merge(readers: Sequence[AsyncHandReader]) -> AsyncIterator[Tuple[str, List[HandState]]]:
+    """(nom, lot) de plusieurs lecteurs, au fil de l'eau, dans la même boucle."""
+    out: asyncio.Queue = asyncio.Queue(len(readers) * 4)
+
+    async def pump(reader: AsyncHandReader):
+        async for batch in reader.frames():
+            await out.put((reader.name, batch))   # backpressure jusqu'aux sources
+
+    tasks = [asyncio.ensure_future(pump(r)) for r in readers]
+    waiter = asyncio.ensure_future(asyncio.gather(*tasks, return_exceptions=True))
+    try:
+        while True:
+            get = asyncio.ensure_future(out.get())
+            done, _ = await asyncio.wait({get, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            if get in done:
+                yield get.result()
+                continue
+            get.cancel()
+            while not out.empty():
+                yield out.get_nowait()
+            return
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        waiter.cancel()
+
+
+# ---------- Outil en ligne de commande ----------
+
+async def _monitor(sources: Sequence[str], speed: float, seconds: float, policy: str) -> int:
+    readers = [AsyncHandReader(s, speed=speed, policy=policy) for s in sources]
+    for i, r in enumerate(readers):
+        if any(o.name == r.name for o in readers[:i]):
+            r.name = f"{r.name}#{i + 1}"
+    counts = {r.name: 0 for r in readers}
+    t0 = last = time.perf_counter()
+
+    async def run():
+        nonlocal last
+        async for name, batch in merge(readers):
+            counts[name] += len(batch)
+            now = time.perf_counter()
+            if now - last >= 1.0:
+                rates = "  ".join(f"{n}: {c / (now - last):.0f}/s" for n, c in counts.items())
+                print(f"[{now - t0:5.1f} s] {rates}")
+                for n in counts:
+                    counts[n] = 0
+                last = now
+
+    try:
+        await asyncio.wait_for(run(), seconds if seconds > 0 else None)
+    except asyncio.TimeoutError:
+        pass
+    for r in readers:
+        print(r.stats())
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Lit un ou plusieurs gants / séances en asyncio.")
+    parser.add_argument("sources", nargs="+", help="ports série, pty ou fichiers de séance")
+    parser.add_argument("--speed", type=float, default=1.0, help="vitesse de rejeu des fichiers (0 : max)")
+    parser.add_argument("--seconds", type=float, default=0.0, help="durée (0 : jusqu'à la fin)")
+    parser.add_argument("--policy", choices=("block", "drop"), default="block")
+    args = parser.parse_args(argv)
+    return asyncio.run(_monitor(args.sources, args.speed, args.seconds, args.policy))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,381 @@
+# audio.py
+"""
+Moteur audio basse latence (piano).
+
+  - les WAV sont décodés une seule fois en mémoire (float32)
+  - un mixeur numpy joue plusieurs voix à la fois, chacune avec son
+    enveloppe (attaque courte anti-clic, relâche quand la voix est volée) :
+    une note n'en coupe plus une autre
+  - chaque note est programmée à l'échantillon près par rapport à
+    l'horodatage du capteur (t_ms du gant) + une latence cible constante
+  - la latence capteur -> sortie est mesurée sur chaque note : instant
+    (horloge DAC de PortAudio) du premier bloc qui pouvait la jouer, moins
+    l'instant du geste. Elle ne dépend pas de la latence cible et dit si
+    celle-ci est tenable ; l'écart à l'instant voulu est mesuré à part
+
+Sortie : sounddevice (PortAudio, callback à petits blocs) s'il est installé
+et que la sortie s'ouvre. Sinon (module absent, pas de carte son, erreur
+PortAudio) repli sur SoundLoader de Kivy (quelques instances par note pour
+permettre le chevauchement, sans programmation ni mesure). Le choix est
+fait par start() ; load() peut être appelé avant ou après.
+
+Usage (mesures) :
+    python audio.py --bench          # coût du mixeur, hors carte son
+    python audio.py --live           # latence réelle sur la carte son
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import wave
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import sounddevice
+except ImportError:  # optionnel : repli sur Kivy
+    sounddevice = None
+
+from hand_state import HandState
+
+
+SAMPLE_RATE = 44100
+BLOCK_SIZE = 256          # 5.8 ms à 44.1 kHz
+MAX_VOICES = 16
+
+
+def load_wav(path: str, rate: int = SAMPLE_RATE, channels: int = 2) -> np.ndarray:
+    """Décode un WAV PCM 8/16/32 bits en float32 (frames x channels), rééchantillonné si besoin."""
+    with wave.open(path, "rb") as w:
+        n_ch, width, src_rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+        raw = w.readframes(w.getnframes())
+
+    if width == 1:
+        data = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        data = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    elif width == 4:
+        data = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"{path} : {8 * width} bits non supporté")
+    data = data.reshape(-1, n_ch)
+
+    if src_rate != rate:
+        n_out = int(round(len(data) * rate / float(src_rate)))
+        x = np.linspace(0.0, len(data) - 1, n_out)
+        data = np.stack([np.interp(x, np.arange(len(data)), data[:, c]) for c in range(n_ch)], axis=1)
+
+    if n_ch == 1 and channels == 2:
+        data = np.repeat(data, 2, axis=1)
+    elif n_ch > channels:
+        data = data[:, :channels]
+    return np.ascontiguousarray(data, dtype=np.float32)
+
+
+# ---------- Mixeur ----------
+
+class Voice:
+    __slots__ = ("name", "buf", "gain", "pos", "start_t", "event_t", "release_at", "started")
+
+    def __init__(self, name: str, buf: np.ndarray, gain: float, start_t: float, event_t: float):
+        self.name = name
+        self.buf = buf
+        self.gain = gain
+        self.pos = 0                 # prochaine frame du buffer à jouer
+        self.start_t = start_t       # instant voulu du 1er échantillon (horloge du flux)
+        self.event_t = event_t       # instant du geste (horloge du flux)
+        self.release_at = None       # frame (dans la voix) où commence la relâche
+        self.started = False
+
+
+class Mixer:
+    """
+    Mélange les voix actives bloc par bloc. Ne dépend d'aucune carte son :
+    render(frames, t0) produit le bloc qui commence à l'instant t0 (s).
+    """
+
+    def __init__(self, rate: int = SAMPLE_RATE, channels: int = 2, max_voices: int = MAX_VOICES,
+                 attack_ms: float = 2.0, release_ms: float = 30.0):
+        self.rate = rate
+        self.channels = channels
+        self.max_voices = max_voices
+        self.attack = max(1, int(rate * attack_ms / 1000.0))
+        self.release = max(1, int(rate * release_ms / 1000.0))
+        self.voices: List[Voice] = []
+        self._pending: deque = deque()       # voix ajoutées par trigger(), prises par render()
+        self.latencies_ms: deque = deque(maxlen=500)   # geste -> 1er bloc (DAC) qui pouvait jouer la note
+        self.delays_ms: deque = deque(maxlen=500)      # départ réel - instant voulu (programmation)
+        self.late = 0                        # notes parties après leur instant voulu
+
+    def trigger(self, name: str, buf: np.ndarray, start_t: float, event_t: float, gain: float = 1.0):
+        """Thread-safe (deque) : appelé depuis le jeu, consommé par le callback audio."""
+        self._pending.append(Voice(name, buf, gain, start_t, event_t))
+
+    def render(self, frames: int, t0: float) -> np.ndarray:
+        out = np.zeros((frames, self.channels), dtype=np.float32)
+
+        while self._pending:
+            v = self._pending.popleft()
+            # t0 : instant où le 1er échantillon de ce bloc sort du DAC, le plus tôt
+            # possible pour cette note (la latence cible s'y ajoute si elle le permet)
+            self.latencies_ms.append(1000.0 * (t0 - v.event_t))
+            self.voices.append(v)
+        if len(self.voices) > self.max_voices:
+            # vol de voix : les plus anciennes s'éteignent en fondu
+            for v in self.voices[:len(self.voices) - self.max_voices]:
+                if v.release_at is None:
+                    v.release_at = v.pos
+
+        alive = []
+        for v in self.voices:
+            offset = 0
+            if not v.started:
+                offset = int(round((v.start_t - t0) * self.rate))
+                if offset >= frames:
+                    alive.append(v)      # pas encore l'heure
+                    continue
+                if offset < 0:
+                    offset = 0
+                    self.late += 1
+                v.started = True
+                played_at = t0 + offset / float(self.rate)
+                self.delays_ms.append(1000.0 * (played_at - v.start_t))
+
+            n = min(frames - offset, len(v.buf) - v.pos)
+            if n > 0:
+                idx = np.arange(v.pos, v.pos + n, dtype=np.float32)
+                env = np.minimum(1.0, (idx + 1.0) / self.attack)
+                if v.release_at is not None:
+                    env *= np.clip(1.0 - (idx - v.release_at) / self.release, 0.0, 1.0)
+                out[offset:offset + n] += v.buf[v.pos:v.pos + n] * (env * v.gain)[:, np.newaxis]
+                v.pos += n
+
+            finished = v.pos >= len(v.buf) or (
+                v.release_at is not None and v.pos >= v.release_at + self.release)
+            if not finished:
+                alive.append(v)
+        self.voices = alive
+
+        np.clip(out, -1.0, 1.0, out=out)
+        return out
+
+
+# ---------- Horloge du gant -> horloge du PC ----------
+
+class DeviceClock:
+    """
+    Convertit t_ms (horloge du gant) en temps monotonic du PC.
+    Décalage = minimum de (réception - t_ms) sur les derniers échantillons :
+    le transport le plus rapide observé, sans la gigue USB / thread.
+    """
+
+    def __init__(self, window: int = 512):
+        self._offsets: deque = deque(maxlen=window)
+        self._offset: Optional[float] = None
+        self._dirty = False
+
+    def observe(self, state: HandState):
+        """Listener de SerialHandReader (appelé à la réception)."""
+        self._offsets.append(time.monotonic() - state.t_ms / 1000.0)
+        self._dirty = True
+
+    def reset(self):
+        self._offsets.clear()
+        self._offset = None
+        self._dirty = False
+
+    def to_host(self, t_ms: float) -> Optional[float]:
+        if self._dirty:
+            self._offset = min(self._offsets)
+            self._dirty = False
+        if self._offset is None:
+            return None
+        return t_ms / 1000.0 + self._offset
+
+
+# ---------- Moteur ----------
+
+class AudioEngine:
+    """
+    Notes préchargées + mixeur + sortie. play(nom, t_ms) programme la note à
+    (instant du geste + target_latency_ms) : latence constante plutôt que
+    « dès que possible », pour que les séquences rapides gardent leur rythme.
+    """
+
+    def __init__(self, rate: int = SAMPLE_RATE, blocksize: int = BLOCK_SIZE,
+                 max_voices: int = MAX_VOICES, target_latency_ms: float = 30.0):
+        self.rate = rate
+        self.blocksize = blocksize
+        self.target_latency_ms = target_latency_ms
+        self.mixer = Mixer(rate, max_voices=max_voices)
+        self.clock = DeviceClock()
+        self.backend: Optional[str] = None     # "sounddevice" ou "kivy", choisi par start()
+
+        self._buffers: Dict[str, np.ndarray] = {}
+        self._gains: Dict[str, float] = {}
+        self._paths: Dict[str, tuple] = {}     # nom -> (fichier, instances Kivy)
+        self._kivy_sounds: Dict[str, list] = {}
+        self._kivy_next: Dict[str, int] = {}
+        self._stream = None
+        self._stream_error: Optional[str] = None   # échec de sounddevice, pas retenté
+
+    def load(self, name: str, path: str, volume: float = 1.0, kivy_copies: int = 3):
+        """Décode le WAV une fois pour le mixeur ; les instances Kivy sont préparées au repli."""
+        self._gains[name] = volume
+        self._paths[name] = (path, kivy_copies)
+        if sounddevice is not None:
+            self._buffers[name] = load_wav(path, self.rate)
+        if self.backend == "kivy":
+            self._load_kivy(name)
+
+    def _load_kivy(self, name: str):
+        from kivy.core.audio import SoundLoader
+        path, copies = self._paths[name]
+        sounds = [s for s in (SoundLoader.load(path) for _ in range(copies)) if s]
+        for s in sounds:
+            s.volume = self._gains[name]
+        self._kivy_sounds[name] = sounds
+        self._kivy_next[name] = 0
+
+    # ----- Flux -----
+
+    def start(self):
+        """Ouvre la sortie sounddevice, ou passe en repli Kivy si elle est indisponible."""
+        if self._stream is not None:
+            return
+        if sounddevice is not None and self._stream_error is None:
+            try:
+                self._stream = sounddevice.OutputStream(
+                    samplerate=self.rate, blocksize=self.blocksize, channels=2,
+                    dtype="float32", latency="low", callback=self._callback,
+                )
+                self._stream.start()
+                self.backend = "sounddevice"
+                return
+            except Exception as e:
+                print(f"[AUDIO] sortie indisponible ({e}) : repli sur Kivy")
+                self._stream = None
+                self._stream_error = str(e)
+        self.backend = "kivy"
+        for name in self._paths:
+            if name not in self._kivy_sounds:
+                self._load_kivy(name)
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def _callback(self, outdata, frames, time_info, status):
+        outdata[:] = self.mixer.render(frames, time_info.outputBufferDacTime)
+
+    # ----- Notes -----
+
+    def play(self, name: str, t_ms: Optional[float] = None, gain: float = 1.0):
+        """Joue la note `name` pour un geste horodaté t_ms (horloge du gant), ou maintenant."""
+        now = time.monotonic()
+        event = self.clock.to_host(t_ms) if t_ms is not None else None
+        if event is None or event > now:
+            event = now
+
+        stream = self._stream
+        if stream is not None and name in self._buffers:
+            to_stream = stream.time - time.monotonic()
+            event_t = event + to_stream
+            self.mixer.trigger(name, self._buffers[name], event_t + self.target_latency_ms / 1000.0,
+                               event_t, gain * self._gains.get(name, 1.0))
+            return
+
+        sounds = self._kivy_sounds.get(name)
+        if sounds:
+            # instance suivante (tourniquet) : la note précédente continue de sonner
+            i = self._kivy_next[name]
+            self._kivy_next[name] = (i + 1) % len(sounds)
+            sounds[i].play()
+
+    def latency_stats(self) -> dict:
+        """
+        Latence geste -> sortie (mean/p95/max_ms, horloge DAC, indépendante de
+        target_latency_ms) et retard des notes sur leur instant voulu
+        (late_max_ms, notes parties en retard : late).
+        """
+        lat = np.asarray(self.mixer.latencies_ms, dtype=np.float64)
+        if lat.size == 0:
+            return {"n": 0, "backend": self.backend}
+        delays = np.asarray(self.mixer.delays_ms, dtype=np.float64)
+        return {
+            "n": int(lat.size),
+            "backend": self.backend,
+            "target_ms": self.target_latency_ms,
+            "mean_ms": round(float(lat.mean()), 1),
+            "p95_ms": round(float(np.percentile(lat, 95)), 1),
+            "max_ms": round(float(lat.max()), 1),
+            "late": self.mixer.late,
+            "late_max_ms": round(float(delays.max()), 1) if delays.size else 0.0,
+        }
+
+
+# ---------- Mesures ----------
+
+def bench_mixer(seconds: float = 10.0, notes_per_s: float = 8.0, blocksize: int = BLOCK_SIZE):
+    """Coût du mixeur seul, avec une note toutes les 1/notes_per_s secondes (voix qui se chevauchent)."""
+    buf = load_wav("assets/note_index.wav")
+    mixer = Mixer()
+    block_s = blocksize / float(SAMPLE_RATE)
+    n_blocks = int(seconds / block_s)
+    next_note = 0.0
+    costs = []
+    peak_voices = 0
+    for b in range(n_blocks):
+        t0 = b * block_s
+        while next_note < t0 + block_s:
+            mixer.trigger("index", buf, next_note, next_note)
+            next_note += 1.0 / notes_per_s
+        c = time.perf_counter()
+        mixer.render(blocksize, t0)
+        costs.append(time.perf_counter() - c)
+        peak_voices = max(peak_voices, len(mixer.voices))
+    costs_us = 1e6 * np.asarray(costs)
+    print(f"bloc {blocksize} frames = {1000 * block_s:.2f} ms, {notes_per_s:g} notes/s, "
+          f"jusqu'à {peak_voices} voix")
+    print(f"mixage : {costs_us.mean():.0f} µs/bloc en moyenne, p99 {np.percentile(costs_us, 99):.0f} µs "
+          f"({100 * costs_us.mean() / (1e6 * block_s):.1f} % du temps réel)")
+    delays = np.asarray(mixer.delays_ms)
+    print(f"précision de programmation : écart max {np.abs(delays).max():.3f} ms (1 frame = {1000 / SAMPLE_RATE:.3f} ms)")
+
+
+def live_test(n: int = 20, interval_s: float = 0.15):
+    engine = AudioEngine()
+    engine.load("index", "assets/note_index.wav")
+    engine.start()
+    if engine._stream is None:
+        print("sounddevice absent ou sortie indisponible : pas de mesure")
+        return
+    for _ in range(n):
+        engine.play("index")
+        time.sleep(interval_s)
+    time.sleep(0.5)
+    engine.stop()
+    print(engine.latency_stats())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mesures du moteur audio.")
+    parser.add_argument("--bench", action="store_true", help="coût du mixeur (sans carte son)")
+    parser.add_argument("--live", action="store_true", help="latence déclenchement -> son sur la carte son")
+    parser.add_argument("--notes-per-s", type=float, default=8.0)
+    args = parser.parse_args(argv)
+    if args.live:
+        live_test()
+    else:
+        bench_mixer(notes_per_s=args.notes_per_s)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+# batch_analytics.py
+"""
+Analyse nocturne de toutes les séances enregistrées (sans Kivy).
+
+Arborescence attendue :
+    <dossier>/<patient>/*.csv          (séances, format du firmware)
+    <dossier>/<patient>/calibration.txt  (optionnel, sinon --calib)
+    <dossier>/<poste>/<séance>/chunk_*.csv  (ingest_server.py : une séance)
+
+Une ligne par séance : métriques cliniques (metrics.py) et tremblement sur
+la séance entière (DSP de Welch, spectral.py), colonnes tremor_<canal>_*.
+
+Usage :
+    python batch_analytics.py sessions/ -o resume.csv --workers 8
+    python batch_analytics.py sessions/ --bench
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from typing import List, Optional, Tuple
+
+from hand_state import HandCalibrator
+from metrics import MetricsEngine, SessionMetrics
+from session import is_chunk, is_session_csv, iter_session_chunks
+from spectral import SessionTremor
+
+
+TREMOR_CHANNELS = {"gyro": "gyro", "flex": "flex_index"}   # préfixe de colonne -> canal
+TREMOR_COLUMNS = [f"tremor_{p}_{k}" for p in TREMOR_CHANNELS for k in ("hz", "amp", "ratio")]
+COLUMNS = ["patient", "session"] + [f.name for f in fields(SessionMetrics)] + TREMOR_COLUMNS
+
+
+def find_sessions(root: str) -> List[Tuple[str, str]]:
+    """
+    Renvoie (patient, chemin) pour chaque séance CSV sous root, triés. Un
+    dossier de blocs chunk_*.csv est une seule séance (chemin = le dossier,
+    patient = son parent), relue bout à bout par session.py. Les autres CSV
+    (sortie -o d'une nuit précédente, scores de headless.py...) sont ignorés.
+    """
+    found = []
+    for dirpath, _, filenames in os.walk(root):
+        rel = os.path.relpath(dirpath, root)
+        patient = "" if rel == "." else rel.replace(os.sep, "/")
+        if any(is_chunk(name) for name in filenames):
+            parent = os.path.dirname(patient)
+            found.append((parent, dirpath))
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if name.endswith(".csv") and not is_chunk(name) and is_session_csv(path):
+                found.append((patient, path))
+    found.sort()
+    return found
+
+
+def _load_calib(session_path: str, default_calib: Optional[str]) -> HandCalibrator:
+    calib = HandCalibrator()
+    local = os.path.join(os.path.dirname(session_path), "calibration.txt")
+    if os.path.exists(local):
+        calib.load_txt(local)
+    elif default_calib:
+        calib.load_txt(default_calib)
+    return calib
+
+
+def analyze_session(job: Tuple[str, str, Optional[str], int]) -> dict:
+    """Worker : une séance -> une ligne de métriques (lecture par blocs)."""
+    patient, path, default_calib, chunk_size = job
+    calib = _load_calib(path, default_calib)
+    engine = MetricsEngine(calib)
+    tremor = SessionTremor(calib, channels=tuple(TREMOR_CHANNELS.values()))
+    for cols in iter_session_chunks(path, chunk_size):
+        engine.update_arrays(cols)
+        tremor.update_arrays(cols)
+    row = {"patient": patient, "session": os.path.basename(path)}
+    row.update(engine.snapshot().as_dict())
+    results = tremor.results()
+    for prefix, channel in TREMOR_CHANNELS.items():
+        r = results[channel]
+        row[f"tremor_{prefix}_hz"] = round(r.freq_hz, 2)
+        row[f"tremor_{prefix}_amp"] = round(r.amplitude, 3)
+        row[f"tremor_{prefix}_ratio"] = round(r.band_ratio, 3)
+    return row
+
+
+def run(root: str, workers: int, default_calib: Optional[str] = None,
+        chunk_size: int = 50_000) -> List[dict]:
+    jobs = [(patient, path, default_calib, chunk_size) for patient, path in find_sessions(root)]
+    if workers <= 1:
+        return [analyze_session(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(analyze_session, jobs, chunksize=1))
+
+
+def write_rows(rows: List[dict], out):
+    writer = csv.DictWriter(out, fieldnames=COLUMNS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+
+
+def bench(root: str, max_workers: int, default_calib: Optional[str], chunk_size: int):
+    """Débit (échantillons/s) pour 1, 2, 4... workers."""
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+
+    if not find_sessions(root):
+        print(f"{root} : aucune séance")
+        return
+
+    base = None
+    print(f"{'workers':>8} {'temps (s)':>10} {'échant./s':>12} {'accél.':>7}")
+    for n in counts:
+        t0 = time.perf_counter()
+        rows = run(root, n, default_calib, chunk_size)
+        elapsed = time.perf_counter() - t0
+        samples = sum(r["n_samples"] for r in rows)
+        rate = samples / elapsed if elapsed > 0 else 0.0
+        base = base or rate
+        speedup = rate / base if base else 0.0
+        print(f"{n:>8} {elapsed:>10.2f} {rate:>12.0f} {speedup:>6.2f}x")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Métriques par séance pour toutes les séances d'un dossier.")
+    parser.add_argument("root", help="dossier des séances (un sous-dossier par patient)")
+    parser.add_argument("-o", "--output", help="fichier CSV de sortie (stdout par défaut)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--calib", help="calibration.txt par défaut si le patient n'en a pas")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="échantillons par bloc de lecture")
+    parser.add_argument("--bench", action="store_true", help="mesure le débit selon le nombre de workers")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        bench(args.root, args.workers, args.calib, args.chunk_size)
+        return 0
+
+    rows = run(args.root, args.workers, args.calib, args.chunk_size)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            write_rows(rows, f)
+    else:
+        write_rows(rows, sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
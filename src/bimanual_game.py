@@ -0,0 +1,125 @@
+# bimanual_game.py
+
+from kivy.app import App
+from kivy.uix.screenmanager import Screen
+from kivy.properties import NumericProperty, StringProperty, BooleanProperty
+from kivy.lang import Builder
+
+from gloves import shared_reader
+from frame_scheduler import StreamWaker
+from simulation import FixedStepClock
+from game_logic import BimanualCore
+
+# Règles KV de l'écran, chargées à l'import (donc au 1er passage sur l'écran)
+Builder.load_file("bimanual_game.kv")
+
+# Texte affiché après chaque flexion
+RESULT_TEXT = {"sync": "ENSEMBLE !", "solo": "L'autre main…"}
+
+
+def pick_hands(names):
+    """Les deux gants de l'exercice : "gauche" et "droite" s'ils existent, sinon les deux premiers."""
+    if "gauche" in names and "droite" in names:
+        return ("gauche", "droite")
+    return tuple(names[:2])
+
+
+class BimanualScreen(Screen):
+    """
+    Exercice à deux mains (deux gants dans devices.txt) : fléchir les deux
+    index en même temps. Les deux gants sont lus par la boucle d'E/S commune
+    (gloves.py) ; leur flux fusionné, sur une horloge commune, alimente une
+    FixedStepClock comme dans les autres jeux. Logique : BimanualCore.
+    """
+
+    left_name = StringProperty("")
+    right_name = StringProperty("")
+    left_level = NumericProperty(0.0)      # niveau d'index normalisé 0..1
+    right_level = NumericProperty(0.0)
+    left_threshold = NumericProperty(0.6)
+    right_threshold = NumericProperty(0.6)
+    left_active = BooleanProperty(False)
+    right_active = BooleanProperty(False)
+
+    score = NumericProperty(0)             # flexions synchronisées
+    misses = NumericProperty(0)            # flexions d'une seule main
+    last_lag_ms = NumericProperty(0.0)
+    symmetry = NumericProperty(0.0)
+    result = StringProperty("")
+    status = StringProperty("")
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.gloves = shared_reader()
+        self.hands = pick_hands(self.gloves.names)
+        self.core = BimanualCore(self.gloves.calibs(), hands=self.hands)
+        self.sim = FixedStepClock(self.step_game)
+        self.waker = StreamWaker(self.update_game)
+        self._started = []
+
+    # ----- Cycle de vie de l'écran -----
+
+    def on_pre_enter(self):
+        self.core.calibs = self.gloves.calibs()   # calibrations refaites depuis
+        self.core.reset()
+        self.sim.reset()
+        self.score = self.misses = 0
+        self.result = ""
+
+        if len(self.hands) < 2:
+            self.left_name = self.hands[0] if self.hands else ""
+            self.right_name = ""
+            self.status = "Deux gants nécessaires : déclarez-les dans devices.txt"
+            return
+        self.left_name, self.right_name = self.hands
+        for hand, prop in zip(self.hands, ("left_threshold", "right_threshold")):
+            setattr(self, prop, getattr(self.core.calibs.get(hand), "index_threshold", 0.6))
+
+        self.gloves.add_listener(self.sim.push)
+        self.gloves.add_listener(self.waker.on_state)
+        self.status = "Fléchissez les deux index ensemble"
+        for hand in self.hands:
+            stream = self.gloves.stream(hand)
+            try:
+                stream.start()
+                self._started.append(stream)
+            except Exception as e:
+                self.status = f"Gant {hand} : {e}"
+        self.waker.start()
+
+    def on_leave(self):
+        self.waker.stop()
+        self.gloves.remove_listener(self.sim.push)
+        self.gloves.remove_listener(self.waker.on_state)
+        for stream in self._started:
+            stream.stop()
+        self._started = []
+        if self.core.score or self.core.misses:
+            print(f"[DEUX MAINS] {self.core.stats()}")
+
+    # ----- Boucle de jeu -----
+
+    def update_game(self, dt: float):
+        """Frames où un gant a envoyé des données : avance la simulation, met à jour les barres."""
+        self.sim.advance(dt)
+        if self.sim.playing:
+            self.waker.poke()
+        if len(self.hands) == 2:
+            left, right = self.hands
+            self.left_level = self.core.levels[left]
+            self.right_level = self.core.levels[right]
+            self.left_active = self.core.active[left]
+            self.right_active = self.core.active[right]
+
+    def step_game(self, dt: float, samples: list):
+        """Un pas fixe avec les échantillons des deux gants (state.device)."""
+        self.core.step(dt, samples)
+        events = self.core.drain_events()
+        App.get_running_app().publish_events("bimanual", events)
+        for event in events:
+            self.result = RESULT_TEXT.get(event.kind, "")
+            if event.kind == "sync":
+                self.last_lag_ms = event.value
+        self.score = self.core.score
+        self.misses = self.core.misses
+        self.symmetry = self.core.symmetry
@@ -0,0 +1,162 @@
+# build_assets.py
+"""
+Étape de build des textures (à relancer quand assets/ change).
+
+  - sprites et icônes réduits puis regroupés dans un atlas Kivy par variante
+    (une seule texture GPU au lieu d'une par image)
+  - fonds d'écran réduits à la largeur utile de chaque variante
+  - assets/build/manifest.json : image d'origine -> source à utiliser,
+    lu à l'exécution par textures.py (sans manifest : images d'origine)
+
+Variantes : "sd" (portables de la clinique, écrans <= 1600 px) et "hd".
+Nécessite Pillow (comme kivy.atlas).
+
+Usage :
+    python build_assets.py
+    python build_assets.py --variants sd
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from typing import Dict, List
+
+ASSETS_DIR = "assets"
+BUILD_DIR = os.path.join(ASSETS_DIR, "build")
+MANIFEST = os.path.join(BUILD_DIR, "manifest.json")
+
+# Images affichées petites (icônes, boutons, sprites) -> atlas
+SPRITES = [
+    "icon_car.png", "icon_jump.png", "icon_followup.png",
+    "icon_poignet.png", "icon_flex.png", "icon_fsr.png",
+    "piano_keys.png", "index_bouton.png", "majeur_bouton.png",
+    "car.png", "avatar_jump.png",
+    "obstacle_cone.png", "obstacle_pothole.png", "obstacle_barrel.png",
+]
+
+# Fonds plein écran -> une image réduite par variante
+BACKGROUNDS = [
+    "background.png", "background_jump.png", "menu_background.png",
+    "bg_calibration.jpg", "piano_bg.jpg",
+]
+
+# variante -> (plus grand côté d'un sprite, largeur max d'un fond, taille d'une page d'atlas)
+VARIANTS = {
+    "sd": (256, 1280, 1024),
+    "hd": (512, 1920, 2048),
+}
+
+
+def _asset(name: str) -> str:
+    return f"{ASSETS_DIR}/{name}"
+
+
+def _downscale(src: str, dst: str, max_w: int, max_h: int) -> tuple:
+    from PIL import Image
+
+    with Image.open(src) as im:
+        im.load()
+        w, h = im.size
+        scale = min(1.0, max_w / float(w), max_h / float(h))
+        if scale < 1.0:
+            im = im.resize((max(1, round(w * scale)), max(1, round(h * scale))), Image.LANCZOS)
+        if dst.lower().endswith(".jpg"):
+            im.convert("RGB").save(dst, quality=90)
+        else:
+            im.save(dst, optimize=True)
+        return im.size
+
+
+def build_variant(variant: str) -> Dict[str, str]:
+    from kivy.atlas import Atlas
+
+    sprite_max, bg_width, page = VARIANTS[variant]
+    mapping: Dict[str, str] = {}
+
+    # 1) sprites réduits dans un dossier temporaire, puis atlas
+    tmp = tempfile.mkdtemp(prefix="gant_atlas_")
+    try:
+        small: List[str] = []
+        for name in SPRITES:
+            src = _asset(name)
+            if not os.path.exists(src):
+                print(f"  (absent) {src}")
+                continue
+            dst = os.path.join(tmp, name)
+            _downscale(src, dst, sprite_max, sprite_max)
+            small.append(dst)
+        atlas_name = f"sprites-{variant}"
+        Atlas.create(os.path.join(BUILD_DIR, atlas_name), small, page)
+        for path in small:
+            name = os.path.basename(path)
+            mapping[_asset(name)] = f"atlas://{ASSETS_DIR}/build/{atlas_name}/{os.path.splitext(name)[0]}"
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    # 2) fonds réduits
+    for name in BACKGROUNDS:
+        src = _asset(name)
+        if not os.path.exists(src):
+            print(f"  (absent) {src}")
+            continue
+        base, ext = os.path.splitext(name)
+        out = f"{ASSETS_DIR}/build/{base}-{variant}{ext}"
+        _downscale(src, out, bg_width, bg_width)
+        mapping[src] = out
+    return mapping
+
+
+def gpu_bytes(paths: List[str]) -> int:
+    """Mémoire texture (RGBA 8 bits) des images, pages d'atlas comprises."""
+    from PIL import Image
+
+    total = 0
+    for path in paths:
+        with Image.open(path) as im:
+            w, h = im.size
+        total += w * h * 4
+    return total
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Construit les atlas et les textures réduites.")
+    parser.add_argument("--variants", nargs="+", choices=sorted(VARIANTS), default=sorted(VARIANTS))
+    args = parser.parse_args(argv)
+    logging.getLogger("PIL").setLevel(logging.INFO)  # sinon Kivy affiche le détail des PNG
+
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    manifest = {"variants": {}}
+    if os.path.exists(MANIFEST):  # on garde les variantes non reconstruites
+        with open(MANIFEST, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    originals = [_asset(n) for n in SPRITES + BACKGROUNDS if os.path.exists(_asset(n))]
+    before = gpu_bytes(originals)
+
+    for variant in args.variants:
+        print(f"variante {variant} ...")
+        mapping = build_variant(variant)
+        manifest["variants"][variant] = mapping
+
+        built = sorted({
+            os.path.join(BUILD_DIR, f) for f in os.listdir(BUILD_DIR)
+            if f.endswith(f"-{variant}.png") or f.endswith(f"-{variant}.jpg")
+            or (f.startswith(f"sprites-{variant}-") and f.endswith(".png"))
+        })
+        after = gpu_bytes(built)
+        print(f"  {len(mapping)} images -> {len(built)} textures, "
+              f"mémoire GPU {before / 2**20:.1f} Mo -> {after / 2**20:.1f} Mo")
+
+    with open(MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"manifest : {MANIFEST}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
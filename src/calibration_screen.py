@@ -1,24 +1,31 @@
 # calibration_screen.py
 import os
+import time
 from kivy.uix.screenmanager import Screen
 from kivy.properties import NumericProperty, StringProperty, BooleanProperty
 from kivy.clock import Clock
 from kivy.app import App
 
-from serial_reader import SerialHandReader
+from frame_scheduler import StreamWaker
+from serial_reader import SerialHandReader, open_reader
+from gloves import GloveStream, shared_reader
 from hand_state import HandState, HandCalibrator
+from device_protocol import MAX_RATE_HZ
 
 
 class CalibrationScreen(Screen):
     progress = NumericProperty(0.0)
     status = StringProperty("Posez la main au repos puis cliquez sur Démarrer.")
     calibrated = BooleanProperty(False)
+    device = StringProperty("")            # gant calibré (gloves.py)
+    several_devices = BooleanProperty(False)
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.serial_reader: SerialHandReader | None = None
         self._evt = None
-        self._t = 0.0
+        self._waker = StreamWaker(self._show_progress)  # barre de progression, au rythme des données
+        self._t0 = 0.0
         self._duration = 3.0
         self._samples: list[HandState] = []
         self._phase = 0
@@ -26,11 +33,18 @@ class CalibrationScreen(Screen):
 
         
 
+    def _stream(self) -> GloveStream:
+        return shared_reader().stream(self.device)
+
     def _calib_path(self) -> str:
-        # Simple: fichier dans le dossier du projet
-        return os.path.join(os.getcwd(), "calibration.txt")
+        # Simple: fichier dans le dossier du projet (calibration.txt pour le gant principal)
+        return os.path.join(os.getcwd(), self._stream().calib_path)
 
     def on_pre_enter(self):
+        gloves = shared_reader()
+        if self.device not in gloves.streams:
+            self.device = gloves.primary.name
+        self.several_devices = len(gloves.names) > 1
         self.progress = 0.0
         self.calibrated = False
         self.status = "Posez la main au repos puis cliquez sur Démarrer."
@@ -39,49 +53,60 @@ class CalibrationScreen(Screen):
         self.status = "Main ouverte (repos). Cliquez sur Démarrer."
 
 
-    def start_calibration(self):
-        app = App.get_running_app()
-        if not hasattr(app, "calib"):
-            app.calib = HandCalibrator()
+    def next_device(self):
+        """Passe au gant suivant de devices.txt (calibration reprise à zéro)."""
+        if self._evt is not None:
+            return  # phase en cours
+        names = shared_reader().names
+        self.device = names[(names.index(self.device) + 1) % len(names)]
+        self.serial_reader = None
+        self.on_pre_enter()
 
-        # utilise le même port que ta voiture si tu veux
+    def start_calibration(self):
         if self.serial_reader is None:
-            self.serial_reader = SerialHandReader(
-                port="/dev/cu.usbmodem1201",  # <-- mets le même que GameScreen
-                baudrate=115200
-            )
+            stream = self._stream()
+            self.serial_reader = open_reader(stream.port_name, stream.baudrate)
 
+        self._samples.clear()
+        self.serial_reader.add_listener(self._collect)
+        self.serial_reader.add_listener(self._waker.on_state)
         try:
             self.serial_reader.start()
         except Exception as e:
             self.status = f"Erreur port série: {e}"
             return
+        # plus d'échantillons pour les min/max (le firmware borne à sa fréquence max)
+        self.serial_reader.configure(rate_hz=MAX_RATE_HZ)
 
-        self._samples.clear()
-        self._t = 0.0
+        self._t0 = time.perf_counter()
         self.progress = 0.0
         self.calibrated = False
         self.status = "Calibration en cours… ne bougez pas."
 
         if self._evt is not None:
             self._evt.cancel()
-        self._evt = Clock.schedule_interval(self._collect, 1.0 / 60.0)
+        self._evt = Clock.schedule_once(self._end_phase, self._duration)
+        self._waker.start()
 
-    def _collect(self, dt: float):
-        self._t += dt
-        self.progress = min(1.0, self._t / self._duration)
+    def _collect(self, state: HandState):
+        """Listener (thread série) : tous les échantillons de la phase, pas seulement le dernier."""
+        self._samples.append(state)
 
-        state = self.serial_reader.get_latest_state() if self.serial_reader else None
-        if state is not None:
-            self._samples.append(state)
+    def _show_progress(self, dt: float):
+        self.progress = min(1.0, (time.perf_counter() - self._t0) / self._duration)
 
-        if self._t >= self._duration:
-            self._finish()
-            return False  # stop schedule
-        return True
+    def _end_phase(self, dt: float):
+        self._evt = None
+        self._waker.stop()
+        if self.serial_reader is not None:
+            self.serial_reader.remove_listener(self._collect)
+            self.serial_reader.remove_listener(self._waker.on_state)
+        self.progress = 1.0
+        self._finish()
 
     def _finish(self):
         if self.serial_reader is not None:
+            self.serial_reader.reset_device()
             self.serial_reader.stop()
 
         if not self._samples:
@@ -100,10 +125,8 @@ class CalibrationScreen(Screen):
         # Phase 1 : main fermée (max)
         closed_samples = self._samples[:]
 
-        app = App.get_running_app()
-        if not hasattr(app, "calib") or app.calib is None:
-            app.calib = HandCalibrator()
-        calib: HandCalibrator = app.calib
+        # calibration du gant choisi (celle du gant principal est app.calib)
+        calib: HandCalibrator = self._stream().calib
 
         # --- calc moyennes ---
         def avg(vals):
@@ -0,0 +1,589 @@
+# device_protocol.py
+"""
+Commandes de l'hôte vers le gant (firmware src/main.cpp), et décodage des
+trames qu'il envoie selon sa configuration.
+
+Commandes : une ligne ASCII, réponse "#OK ..." ou "#ERR ..." dans le flux
+(les lignes "#..." ne sont jamais des échantillons) :
+
+    !HELLO        -> #OK HELLO proto=1 fw=3 max_hz=1000 ch=3FF fmt=csv,bin [sd=1]
+    !RATE <hz>    -> #OK RATE <hz appliqués>   (borné à max_hz)
+    !CH <masque>  -> #OK CH <masque>           (hex, bit 0 = flex_thumb ... bit 9 = gz)
+    !FMT CSV|BIN  -> #OK FMT CSV|BIN
+    !RESET        -> #OK RESET                 (100 Hz, tous les canaux, CSV)
+
+et, pour la carte SD du gant (sd_download.py) : !IDLE, !LS, !GET, !RM.
+
+Formats :
+  - CSV : t_ms puis les canaux actifs, dans l'ordre de CHANNELS (avec tous
+    les canaux : la ligne habituelle du firmware)
+  - binaire : A5 5A, masque u16, t_ms u32, un int16 par canal actif
+    (analogiques bruts, accéléro en mg, gyro en 0,1 °/s), somme u8 des
+    octets masque..valeurs ; little-endian. La trame porte son masque.
+
+Un canal désactivé garde, dans les HandState, sa dernière valeur reçue
+(0 au départ) : les écouteurs qui ne s'en servent pas ne voient rien changer.
+Ceux qui supposent le flux par défaut (analyses à 100 Hz, enregistrement)
+passent par NominalGate : suspendus tant que le gant est reconfiguré.
+
+FrameDecoder remplace CsvLineBuffer dans les lecteurs (serial_reader.py,
+gloves.py) : il suit les accusés "#OK CH" du flux, donc le masque change
+exactement entre le dernier échantillon de l'ancienne configuration et le
+premier de la nouvelle. Un firmware sans protocole ignore les commandes
+(pas de réponse : device_info reste None, flux CSV complet à 100 Hz).
+
+SimulatedGlove : le même protocole en Python, sur un pty, pour les tests et
+les démos sans carte.
+"""
+
+from __future__ import annotations
+
+import functools
+import math
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+from hand_state import CsvLineBuffer, HandState
+
+PROTO_VERSION = 1
+DEFAULT_RATE_HZ = 100
+MAX_RATE_HZ = 1000
+SD_GET_MAX = 8192                   # octets par !GET (GET_MAX de main.cpp)
+
+CHANNELS = ("flex_thumb", "flex_index", "fsr_thumb", "fsr_index",
+            "ax", "ay", "az", "gx", "gy", "gz")
+ALL_CHANNELS = (1 << len(CHANNELS)) - 1
+FLEX_ONLY = ("flex_thumb", "flex_index")
+
+# int16 de la trame binaire -> unité de HandState
+_SCALE = (1.0, 1.0, 1.0, 1.0, 1000.0, 1000.0, 1000.0, 10.0, 10.0, 10.0)
+_ANALOG = 4                         # les 4 premiers canaux sont des entiers
+
+SYNC = b"\xa5\x5a"
+_HEAD = struct.Struct("<HI")        # masque, t_ms
+
+
+def channel_mask(channels: Sequence[str]) -> int:
+    mask = 0
+    for name in channels:
+        if name not in CHANNELS:
+            raise ValueError(f"canal inconnu : {name}")
+        mask |= 1 << CHANNELS.index(name)
+    return mask
+
+
+def mask_channels(mask: int) -> List[int]:
+    """Index (dans CHANNELS) des canaux actifs du masque."""
+    return [i for i in range(len(CHANNELS)) if mask >> i & 1]
+
+
+@dataclass
+class DeviceInfo:
+    """Réponse à !HELLO."""
+    proto: int = 0
+    firmware: int = 0
+    max_hz: int = DEFAULT_RATE_HZ
+    channels: int = ALL_CHANNELS
+    formats: tuple = ("csv",)
+    sd: bool = False               # carte SD présente (séances enregistrées sans ordinateur)
+
+    @staticmethod
+    def from_reply(fields: Dict[str, str]) -> "DeviceInfo":
+        return DeviceInfo(proto=int(fields.get("proto", 0)), firmware=int(fields.get("fw", 0)),
+                          max_hz=int(fields.get("max_hz", DEFAULT_RATE_HZ)),
+                          channels=int(fields.get("ch", "3FF"), 16),
+                          formats=tuple(fields.get("fmt", "csv").split(",")),
+                          sd=fields.get("sd") == "1")
+
+
+# ---------- Décodage ----------
+
+class FrameDecoder(CsvLineBuffer):
+    """
+    CsvLineBuffer qui comprend aussi les trames binaires, les lignes CSV
+    réduites aux canaux actifs et les réponses aux commandes.
+    """
+
+    MAX_REPLIES = 32
+
+    def __init__(self, device: str = ""):
+        super().__init__(device)
+        self.replies: "queue.Queue[str]" = queue.Queue(self.MAX_REPLIES)
+        self.reset_config()
+
+    def reset_config(self):
+        """Configuration par défaut du firmware (après !RESET ou à l'ouverture)."""
+        self.mask = ALL_CHANNELS
+        self.rate_hz = DEFAULT_RATE_HZ
+        self.fmt = "csv"
+        self.info: Optional[DeviceInfo] = None
+        self._active = mask_channels(ALL_CHANNELS)
+        self._held = [0, 0, 0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+
+    @property
+    def nominal(self) -> bool:
+        """Flux par défaut (100 Hz, tous les canaux), celui que supposent analyses et séances."""
+        return self.rate_hz == DEFAULT_RATE_HZ and self.mask == ALL_CHANNELS
+
+    @property
+    def channels(self) -> List[str]:
+        return [CHANNELS[i] for i in self._active]
+
+    def feed(self, data: bytes) -> List[HandState]:
+        buf = self._buf
+        buf += data
+        out: List[HandState] = []
+        pos = 0
+        n = len(buf)
+        while pos < n:
+            if buf[pos] == 0xA5:
+                size = self._binary(buf, pos, out)
+                if size == 0:
+                    break              # trame incomplète
+                pos += size
+                continue
+            end = buf.find(b"\n", pos)
+            sync = buf.find(SYNC, pos, end if end >= 0 else n)
+            if sync >= 0:
+                # octets parasites avant une trame binaire
+                self.rejected += 1
+                pos = sync
+                continue
+            if end < 0:
+                break
+            self._text(bytes(buf[pos:end]), out)
+            pos = end + 1
+        del buf[:pos]
+        if len(buf) > self.MAX_LINE:
+            buf.clear()
+            self.rejected += 1
+        self.lines += len(out)
+        return out
+
+    def _binary(self, buf: bytearray, pos: int, out: List[HandState]) -> int:
+        """Décode la trame à pos ; renvoie sa taille (0 si incomplète, 1 si invalide)."""
+        if len(buf) < pos + 2 + _HEAD.size:
+            return 0
+        if buf[pos + 1] != 0x5A:
+            self.rejected += 1
+            return 1
+        mask, t_ms = _HEAD.unpack_from(buf, pos + 2)
+        active = mask_channels(mask & ALL_CHANNELS)
+        size = 2 + _HEAD.size + 2 * len(active) + 1
+        if len(buf) < pos + size:
+            return 0
+        if sum(buf[pos + 2:pos + size - 1]) & 0xFF != buf[pos + size - 1] or not active:
+            self.rejected += 1
+            return 1
+        values = struct.unpack_from(f"<{len(active)}h", buf, pos + 2 + _HEAD.size)
+        held = self._held
+        for i, v in zip(active, values):
+            held[i] = v if i < _ANALOG else v / _SCALE[i]
+        out.append(self._state(t_ms))
+        return size
+
+    def _text(self, raw: bytes, out: List[HandState]):
+        line = raw.decode(errors="ignore").strip()
+        mark = line.find("#")
+        if mark >= 0:
+            self._reply(line[mark:])
+            return
+        if self.mask == ALL_CHANNELS:
+            state = HandState.from_csv_line(line)
+            if state is None:
+                if line and not line.startswith("t_ms"):
+                    self.rejected += 1
+                return
+            state.device = self.device
+            self._held = [state.flex_thumb, state.flex_index, state.fsr_thumb, state.fsr_index,
+                          state.ax, state.ay, state.az, state.gx, state.gy, state.gz]
+            out.append(state)
+            return
+        parts = line.split(",")
+        if len(parts) != 1 + len(self._active):
+            if line:
+                self.rejected += 1
+            return
+        try:
+            t_ms = int(parts[0])
+            values = [int(p) if i < _ANALOG else float(p) for i, p in zip(self._active, parts[1:])]
+        except ValueError:
+            self.rejected += 1
+            return
+        for i, v in zip(self._active, values):
+            self._held[i] = v
+        out.append(self._state(t_ms))
+
+    def _state(self, t_ms: int) -> HandState:
+        state = HandState(t_ms, *self._held)
+        state.device = self.device
+        return state
+
+    def _reply(self, line: str):
+        """Réponse du firmware : met à jour la configuration suivie, puis la rend à send_command."""
+        words = line.split()
+        if len(words) >= 2 and words[0] == "#OK":
+            what, args = words[1], words[2:]
+            try:
+                if what == "RESET":
+                    info = self.info
+                    self.reset_config()
+                    self.info = info
+                elif what == "CH" and args:
+                    self.mask = int(args[0], 16) & ALL_CHANNELS
+                    self._active = mask_channels(self.mask)
+                elif what == "RATE" and args:
+                    self.rate_hz = int(args[0])
+                elif what == "FMT" and args:
+                    self.fmt = args[0].lower()
+                elif what == "HELLO":
+                    self.info = DeviceInfo.from_reply(dict(a.split("=", 1) for a in args if "=" in a))
+            except ValueError:
+                pass
+        try:
+            self.replies.put_nowait(line)
+        except queue.Full:
+            # personne n'attend : on garde les plus récentes
+            self.replies.get_nowait()
+            self.replies.put_nowait(line)
+
+
+# ---------- Commandes (lecteurs) ----------
+
+class DeviceCommands:
+    """
+    Commandes vers le gant, pour un lecteur qui a `ser` (port ouvert ou None)
+    et `_lines` (FrameDecoder, nourri par son thread de lecture).
+
+    Sans timeout, les commandes partent sans attendre la réponse (le thread
+    Kivy ne bloque pas) ; la configuration suivie change à l'arrivée des
+    accusés. Avec timeout, on attend chaque réponse : False si elle n'arrive
+    pas (firmware sans protocole) ou si c'est une erreur.
+    """
+
+    ser = None
+    _lines: FrameDecoder
+
+    @property
+    def device_info(self) -> Optional[DeviceInfo]:
+        """Réponse à !HELLO (envoyé à l'ouverture du port), None tant qu'elle n'est pas arrivée."""
+        return self._lines.info
+
+    @property
+    def device_config(self) -> dict:
+        decoder = self._lines
+        return {"rate_hz": decoder.rate_hz, "channels": decoder.channels, "fmt": decoder.fmt}
+
+    @property
+    def nominal_stream(self) -> bool:
+        return self._lines.nominal
+
+    def send_command(self, command: str, timeout: float = 0.0) -> Optional[str]:
+        """Envoie une commande ("!RATE 500") ; avec timeout, renvoie sa réponse (None : pas de réponse)."""
+        ser = self.ser
+        if ser is None:
+            return None
+        replies = self._lines.replies
+        if timeout > 0:
+            while not replies.empty():
+                replies.get_nowait()
+        ser.write(command.encode("ascii") + b"\n")
+        if timeout <= 0:
+            return None
+        key = command.split()[0].lstrip("!")
+        deadline = time.perf_counter() + timeout
+        while True:
+            left = deadline - time.perf_counter()
+            if left <= 0:
+                return None
+            try:
+                reply = replies.get(timeout=left)
+            except queue.Empty:
+                return None
+            words = reply.split()
+            if len(words) >= 2 and words[1] == key:
+                return reply
+
+    def handshake(self, timeout: float = 0.5) -> Optional[DeviceInfo]:
+        """Version et capacités du firmware ; None s'il ne connaît pas le protocole."""
+        reply = self.send_command("!HELLO", timeout)
+        return self._lines.info if reply and reply.startswith("#OK") else None
+
+    def configure(self, rate_hz: Optional[int] = None, channels: Optional[Sequence[str]] = None,
+                  fmt: Optional[str] = None, timeout: float = 0.0) -> bool:
+        """Fréquence, canaux actifs (noms de CHANNELS) et format ("csv" / "bin")."""
+        commands = []
+        if rate_hz is not None:
+            commands.append(f"!RATE {int(rate_hz)}")
+        if channels is not None:
+            commands.append(f"!CH {channel_mask(channels):X}")
+        if fmt is not None:
+            if fmt not in ("csv", "bin"):
+                raise ValueError(f"format inconnu : {fmt}")
+            commands.append(f"!FMT {fmt.upper()}")
+        ok = True
+        for command in commands:
+            reply = self.send_command(command, timeout)
+            if timeout > 0:
+                ok = ok and reply is not None and reply.startswith("#OK")
+        return ok
+
+    def reset_device(self, timeout: float = 0.0) -> bool:
+        """Configuration par défaut : 100 Hz, tous les canaux, CSV."""
+        reply = self.send_command("!RESET", timeout)
+        return timeout <= 0 or (reply is not None and reply.startswith("#OK"))
+
+    def _sync_device(self):
+        """À l'ouverture du port : le gant a pu garder la configuration d'une autre séance."""
+        self._lines.reset_config()
+        self.send_command("!RESET")
+        self.send_command("!HELLO")
+
+
+class NominalGate:
+    """
+    Listeners d'un lecteur écrits pour le flux par défaut : métriques et
+    tremblement (fs fixe), gestes (fenêtre en échantillons), orientation et
+    télémétrie (tous les canaux), enregistrement de la séance. wrap(fn) ne
+    leur passe les échantillons que si le gant est dans cette configuration :
+    un écran qui le reconfigure (piano : 500 Hz, flexions seules) les
+    suspend jusqu'à son !RESET. on_change(nominal, config) à chaque bascule.
+    """
+
+    def __init__(self, reader: DeviceCommands,
+                 on_change: Optional[Callable[[bool, dict], None]] = None):
+        self.reader = reader
+        self.on_change = on_change
+        self.nominal = True
+        self.skipped = 0        # échantillons retenus (appels de listeners)
+        self._wrapped: Dict[Callable, Callable] = {}
+
+    def wrap(self, fn: Callable[[HandState], None]) -> Callable[[HandState], None]:
+        """Le même enveloppant pour le même fn : add_listener reste sans doublon."""
+        gated = self._wrapped.get(fn)
+        if gated is None:
+            @functools.wraps(fn)
+            def gated(state: HandState):
+                if self.check():
+                    fn(state)
+                else:
+                    self.skipped += 1
+            self._wrapped[fn] = gated
+        return gated
+
+    def check(self) -> bool:
+        nominal = self.reader.nominal_stream
+        if nominal != self.nominal:
+            self.nominal = nominal
+            if self.on_change is not None:
+                self.on_change(nominal, self.reader.device_config)
+        return nominal
+
+
+# ---------- Gant simulé ----------
+
+def _default_signal(t: float) -> List[float]:
+    s = math.sin(2 * math.pi * 0.5 * t)
+    return [500 + 250 * s, 500 - 250 * s, 400 + 100 * s, 300, 0.01, -0.02, 0.98, 40 * s, -1.0, 0.5]
+
+
+class SimulatedGlove:
+    """
+    Le firmware en Python (mêmes commandes, mêmes formats que main.cpp).
+    command()/frame() se testent sans port ; serve_pty() le branche sur un
+    pty, comme un vrai gant (POSIX).
+
+    sd_files : carte SD simulée (nom -> contenu), remplie par record_sd().
+    Pannes de transfert : corrupt_gets (numéros de !GET dont un octet est
+    faussé), mute_after (plus de réponse après ce nombre de !GET).
+    """
+
+    def __init__(self, firmware: int = 3, max_hz: int = MAX_RATE_HZ,
+                 signal: Callable[[float], List[float]] = _default_signal, sd: bool = True):
+        self.firmware = firmware
+        self.max_hz = max_hz
+        self.signal = signal
+        self.sd = sd
+        self.sd_files: Dict[str, bytes] = {}
+        self.corrupt_gets: set = set()
+        self.mute_after: Optional[int] = None
+        self.gets = 0
+        self.commands: List[str] = []
+        self.idle = False
+        self.reset()
+        self._cmd = bytearray()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._master = -1
+
+    def reset(self):
+        self.rate_hz = DEFAULT_RATE_HZ
+        self.mask = ALL_CHANNELS
+        self.binary = False
+
+    def command(self, line: str) -> str:
+        line = line.strip()
+        self.commands.append(line)
+        if line == "!HELLO":
+            return (f"#OK HELLO proto={PROTO_VERSION} fw={self.firmware} max_hz={self.max_hz} "
+                    f"ch={ALL_CHANNELS:X} fmt=csv,bin" + (" sd=1" if self.sd else ""))
+        if line.startswith("!RATE "):
+            try:
+                hz = int(line[6:])
+            except ValueError:
+                hz = 0
+            if hz < 1:
+                return f"#ERR RATE {line[6:]}"
+            self.rate_hz = min(hz, self.max_hz)
+            return f"#OK RATE {self.rate_hz}"
+        if line.startswith("!CH "):
+            try:
+                mask = int(line[4:], 16) & ALL_CHANNELS
+            except ValueError:
+                mask = 0
+            if not mask:
+                return f"#ERR CH {line[4:]}"
+            self.mask = mask
+            return f"#OK CH {mask:X}"
+        if line in ("!FMT CSV", "!FMT BIN"):
+            self.binary = line.endswith("BIN")
+            return "#OK " + line[1:]
+        if line == "!RESET":
+            self.reset()
+            self.idle = False
+            return "#OK RESET"
+        if line == "!IDLE":
+            self.idle = True
+            return "#OK IDLE"
+        if self.idle and self.sd and line.startswith("!LS "):
+            start = int(line[4:])
+            names = sorted(self.sd_files)
+            page = " ".join(f"{n}:{len(self.sd_files[n])}" for n in names[start:start + 8])
+            return f"#OK LS {start} {len(names)}" + (" " + page if page else "")
+        if self.idle and self.sd and line.startswith("!RM "):
+            name = line[4:]
+            if self.sd_files.pop(name, None) is None:
+                return f"#ERR RM {name}"
+            return f"#OK RM {name}"
+        return f"#ERR {line}"
+
+    def _get(self, line: str) -> bytes:
+        """!GET <nom> <offset> <n> : en-tête, octets, CRC-32 (comme sendBlock de main.cpp)."""
+        self.gets += 1
+        if self.mute_after is not None and self.gets > self.mute_after:
+            return b""
+        try:
+            name, offset, n = line.split()[1:4]
+            data = self.sd_files[name]
+            offset, n = int(offset), int(n)
+        except (ValueError, KeyError):
+            return f"#ERR {line}\r\n".encode()
+        if offset > len(data):
+            return f"#ERR GET {name}\r\n".encode()
+        block = data[offset:offset + min(n, SD_GET_MAX)]
+        crc = zlib.crc32(block)
+        if self.gets in self.corrupt_gets and block:
+            block = bytes((block[0] ^ 0xFF,)) + block[1:]
+        return f"#OK GET {offset} {len(block)}\r\n".encode() + block + struct.pack("<I", crc)
+
+    def record_sd(self, name: str, n_samples: int, rate_hz: float = DEFAULT_RATE_HZ, t0_ms: int = 0):
+        """Ajoute à la carte un fichier de n_samples trames (tous les canaux, binaire)."""
+        mask, binary = self.mask, self.binary
+        self.mask, self.binary = ALL_CHANNELS, True
+        self.sd_files[name] = b"".join(self.frame(t0_ms + int(k * 1000 / rate_hz)) for k in range(n_samples))
+        self.mask, self.binary = mask, binary
+
+    def receive(self, data: bytes) -> bytes:
+        """Octets de l'hôte -> réponses (lignes complètes seulement)."""
+        self._cmd += data
+        out = []
+        while True:
+            end = self._cmd.find(b"\n")
+            if end < 0:
+                break
+            line = self._cmd[:end].decode(errors="ignore").strip()
+            del self._cmd[:end + 1]
+            if line.startswith("!GET ") and self.idle and self.sd:
+                self.commands.append(line)
+                out.append(self._get(line))
+            elif line:
+                out.append((self.command(line) + "\r\n").encode())
+        return b"".join(out)
+
+    def frame(self, t_ms: int, values: Optional[Sequence[float]] = None) -> bytes:
+        """Un échantillon dans le format et avec les canaux courants."""
+        values = self.signal(t_ms / 1000.0) if values is None else values
+        active = mask_channels(self.mask)
+        if self.binary:
+            q = [int(round(values[i] * _SCALE[i])) if i >= _ANALOG else int(values[i]) for i in active]
+            body = _HEAD.pack(self.mask, t_ms & 0xFFFFFFFF) + struct.pack(f"<{len(q)}h", *q)
+            return SYNC + body + bytes((sum(body) & 0xFF,))
+        fields = [str(t_ms)] + [str(int(values[i])) if i < _ANALOG else f"{values[i]:.6f}" for i in active]
+        return (",".join(fields) + "\r\n").encode()
+
+    # ----- Sur un pty -----
+
+    def serve_pty(self) -> str:
+        """Démarre le gant sur un pty ; renvoie le chemin du port à ouvrir."""
+        import tty  # Unix seulement
+        master, slave = os.openpty()
+        tty.setraw(slave)
+        self._master = master
+        self._slave = slave
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="simulated-glove", daemon=True)
+        self._thread.start()
+        return os.ttyname(slave)
+
+    def _run(self):
+        import select
+        master = self._master
+        t0 = time.perf_counter()
+        sent = 0
+        while not self._stop.is_set():
+            ready, _, _ = select.select([master], [], [], 0.002)
+            if ready:
+                try:
+                    data = os.read(master, 1024)
+                except OSError:
+                    return
+                replies = self.receive(data)
+                if replies and not self._write_all(replies):
+                    return
+            if self.idle:
+                sent = (time.perf_counter() - t0) * 1000.0   # pas de rattrapage à la reprise
+                continue
+            # échantillons dus depuis le dernier passage, au rythme courant
+            elapsed_ms = (time.perf_counter() - t0) * 1000.0
+            period_ms = 1000.0 / self.rate_hz
+            out = []
+            while sent + period_ms <= elapsed_ms:
+                sent += period_ms
+                out.append(self.frame(int(sent)))
+            if out and not self._write_all(b"".join(out)):
+                return
+
+    def _write_all(self, data: bytes) -> bool:
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[os.write(self._master, view):]
+            except OSError:
+                return False
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        for fd in (self._master, getattr(self, "_slave", -1)):
+            if fd >= 0:
+                os.close(fd)
+        self._master = self._slave = -1
@@ -0,0 +1,204 @@
+# frame_scheduler.py
+"""
+Redessin à la demande pour les widgets coûteux (Hand3DView, graphes...).
+
+  - request() marque le widget "sale" ; plusieurs demandes dans la même
+    frame ne donnent qu'un seul appel du callback (trigger Kivy).
+  - Si l'écran (Screen) qui contient le widget n'est pas l'écran courant,
+    rien n'est exécuté : la demande est gardée et jouée au retour sur l'écran.
+  - max_fps (optionnel) limite la cadence des redessins.
+
+Sans demande, aucun callback n'est planifié : CPU nul au repos.
+
+StreamWaker applique la même idée aux écrans alimentés par le gant : le
+thread série les réveille quand des échantillons arrivent, au lieu d'un
+Clock.schedule_interval qui tourne même gant débranché.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from kivy.clock import Clock
+from kivy.uix.screenmanager import Screen
+
+
+class FrameScheduler:
+
+    def __init__(self, widget, callback: Callable[[], None], max_fps: float = 0.0):
+        self.widget = widget
+        self.callback = callback
+        self.max_fps = max_fps
+
+        self._dirty = False
+        self._last = 0.0
+        self._screen: Optional[Screen] = None
+        self._trigger = Clock.create_trigger(self._fire, 0)
+
+    # ----- Écran propriétaire -----
+
+    def _find_screen(self) -> Optional[Screen]:
+        if self._screen is not None:
+            return self._screen
+        w = self.widget.parent
+        while w is not None and not isinstance(w, Screen):
+            w = w.parent
+        if w is not None:
+            self._screen = w
+            w.bind(on_enter=self._on_screen_enter)
+        return w
+
+    def _visible(self) -> bool:
+        screen = self._find_screen()
+        if screen is None:
+            return True  # widget hors ScreenManager : toujours actif
+        return screen.manager is not None and screen.manager.current_screen is screen
+
+    def _on_screen_enter(self, *args):
+        if self._dirty:
+            self._schedule()
+
+    # ----- Demandes -----
+
+    @property
+    def paused(self) -> bool:
+        return not self._visible()
+
+    def request(self, *args):
+        self._dirty = True
+        if self._visible():
+            self._schedule()
+
+    def _schedule(self):
+        wait = 0.0
+        if self.max_fps > 0:
+            wait = self._last + 1.0 / self.max_fps - time.perf_counter()
+        self._trigger.cancel()
+        self._trigger.timeout = max(0.0, wait)
+        self._trigger()
+
+    def _fire(self, dt):
+        if not self._dirty or not self._visible():
+            return
+        self._dirty = False
+        self._last = time.perf_counter()
+        self.callback()
+
+
+class StreamWaker:
+    """
+    Boucle d'écran pilotée par les données :
+
+      - on_state est un listener de SerialHandReader (thread série) : il arme
+        un trigger Kivy, donc une rafale d'échantillons dans la même frame ne
+        donne qu'un appel de callback(dt), à la frame suivante (pas de latence
+        ajoutée par rapport à un schedule_interval à 60 Hz)
+      - sans échantillon, rien n'est planifié : l'écran ne coûte rien
+      - poke() / keep_alive(s) : réveil depuis le thread Kivy (clavier,
+        animation à finir) ; continuous=True : à chaque frame (sans gant)
+      - max_fps limite la cadence (graphes), dt est plafonné à max_dt après
+        une pause
+    """
+
+    def __init__(self, callback: Callable[[float], None], max_fps: float = 0.0, max_dt: float = 0.25):
+        self.callback = callback
+        self.max_fps = max_fps
+        self.max_dt = max_dt
+        self.running = False
+        self.continuous = False
+        self.frames = 0          # appels de callback depuis start()
+        self.wakeups = 0         # échantillons reçus depuis start() (fusionnés en frames)
+
+        self._last = 0.0
+        self._alive_until = 0.0
+        self._deferred = None
+        self._lock = threading.Lock()   # on_state : un thread par gant / lecteur
+        self._trigger = Clock.create_trigger(self._fire, 0)
+
+    def start(self, continuous: bool = False):
+        self.running = True
+        self.continuous = continuous
+        self.frames = 0
+        self.wakeups = 0
+        self._last = time.perf_counter()
+        self._alive_until = 0.0
+        if continuous:
+            self._trigger()
+
+    def stop(self):
+        self.running = False
+        self._trigger.cancel()
+        if self._deferred is not None:
+            self._deferred.cancel()
+            self._deferred = None
+
+    # ----- Réveils -----
+
+    def on_state(self, state=None):
+        """Listener de SerialHandReader (thread série)."""
+        if self.running:
+            with self._lock:
+                self.wakeups += 1
+            self._trigger()  # les triggers Kivy peuvent être armés depuis un autre thread
+
+    def poke(self):
+        if self.running:
+            self._trigger()
+
+    def keep_alive(self, seconds: float):
+        """Frames continues pendant `seconds`, même sans données."""
+        self._alive_until = max(self._alive_until, time.perf_counter() + seconds)
+        self.poke()
+
+    # ----- Thread Kivy -----
+
+    def _fire(self, dt):
+        if not self.running:
+            return
+        now = time.perf_counter()
+        if self.max_fps > 0:
+            wait = self._last + 1.0 / self.max_fps - now
+            if wait > 0:
+                if self._deferred is None:
+                    self._deferred = Clock.schedule_once(self._fire_deferred, wait)
+                return
+        frame_dt = min(self.max_dt, now - self._last)
+        self._last = now
+        self.frames += 1
+        self.callback(frame_dt)
+        if self.running and (self.continuous or now < self._alive_until):
+            self._trigger()
+
+    def _fire_deferred(self, dt):
+        self._deferred = None
+        self._fire(dt)
+
+
+class CpuMeter:
+    """
+    Affiche l'usage CPU du process toutes les `period` secondes
+    (activé par la variable d'environnement GANT_CPU_LOG=1).
+    """
+
+    def __init__(self, period: float = 5.0, label: Callable[[], str] = lambda: ""):
+        self.period = period
+        self.label = label
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        self._event = None
+
+    @staticmethod
+    def enabled() -> bool:
+        return os.environ.get("GANT_CPU_LOG", "") not in ("", "0")
+
+    def start(self):
+        self._event = Clock.schedule_interval(self._log, self.period)
+
+    def _log(self, dt):
+        cpu, wall = time.process_time(), time.perf_counter()
+        pct = 100.0 * (cpu - self._cpu) / max(1e-6, wall - self._wall)
+        self._cpu, self._wall = cpu, wall
+        print(f"[CPU] {pct:5.1f} %  {self.label()}")
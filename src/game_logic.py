@@ -0,0 +1,884 @@
+# game_logic.py
+"""
+Logique des mini-jeux, sans Kivy.
+
+Chaque "core" avance par pas fixes via step(dt, samples) (cf. simulation.py)
+et expose son état (positions, score...) et une liste d'événements. Les
+écrans Kivy ne font que l'afficher ; headless.py le fait tourner sans
+fenêtre à partir de séances enregistrées.
+"""
+
+from __future__ import annotations
+
+import random
+import struct
+from collections import deque
+from math import exp
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from hand_state import HandState, HandCalibrator
+from level import ROCK, STAR, LevelStream
+
+
+class GameEvent(NamedTuple):
+    t: float        # temps simulé (s)
+    kind: str       # "jump", "collision", "note_ok", "note_miss"...
+    value: float = 0.0
+    label: str = ""
+    t_ms: float = -1.0  # horodatage gant de l'échantillon déclencheur (-1 : aucun)
+
+
+# ---------- Utilitaires capteurs ----------
+
+def _norm(value: float, vmin: float, vmax: float) -> float:
+    """Normalise value entre 0 et 1 avec saturation."""
+    if vmax <= vmin:
+        return 0.0
+    x = (value - vmin) / float(vmax - vmin)
+    if x < 0.0:
+        return 0.0
+    if x > 1.0:
+        return 1.0
+    return x
+
+
+def finger_levels(state: HandState, calib: Optional[HandCalibrator]) -> Tuple[float, float, float, float]:
+    """(niveau index, niveau majeur, seuil index, seuil majeur), niveaux normalisés 0..1."""
+    if calib is None:
+        # fallback : ancien comportement
+        index_norm = _norm(state.flex_index, vmin=300, vmax=800)
+        majeur_norm = _norm(state.flex_thumb, vmin=300, vmax=800)
+        return index_norm, majeur_norm, 0.6, 0.6
+    index_norm = _norm(state.flex_index, calib.flex_index_min, calib.flex_index_max)
+    majeur_norm = _norm(state.flex_thumb, calib.flex_thumb_min, calib.flex_thumb_max)
+    seuil_i = getattr(calib, "index_threshold", 0.6)
+    seuil_m = getattr(calib, "majeur_threshold", 0.6)
+    return index_norm, majeur_norm, seuil_i, seuil_m
+
+
+def fingers_pressed(state: HandState, calib: Optional[HandCalibrator]) -> Tuple[bool, bool]:
+    """(index, majeur) fléchis, avec discrimination + dominance (évite double déclenchement)."""
+    index_norm, majeur_norm, seuil_i, seuil_m = finger_levels(state, calib)
+    index_pressed = (index_norm > seuil_i) and (index_norm > majeur_norm)
+    majeur_pressed = (majeur_norm > seuil_m) and (majeur_norm > index_norm)
+    return index_pressed, majeur_pressed
+
+
+def png_ratio(path: str, default: float = 1.0) -> float:
+    """Ratio h/w d'un PNG lu dans l'en-tête IHDR (sans décoder l'image ni GL)."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(24)
+        w, h = struct.unpack(">II", head[16:24])
+        return h / float(w) if w else default
+    except (OSError, struct.error):
+        return default
+
+
+class _GameCore:
+    """Base commune : liste d'événements du pas courant."""
+
+    events: List[GameEvent]
+    # True : step() reçoit un seul état par pas, interpolé au temps simulé
+    # (FixedStepClock(interpolate=True)) ; False : les échantillons bruts du pas
+    interpolated_input = False
+    # True (avec interpolated_input) : cet état est prédit à l'heure d'affichage
+    # (prediction.py) ; jamais en rejeu headless
+    predicted_input = False
+
+    def drain_events(self) -> List[GameEvent]:
+        """Renvoie les événements depuis le dernier appel et vide la liste."""
+        out, self.events = self.events, []
+        return out
+
+
+# ---------- Pool d'obstacles (voiture) ----------
+
+class ObstaclePool:
+    """
+    Pool de `capacity` obstacles dans des tableaux numpy. spawn() réutilise
+    un emplacement libre, step() déplace tout le monde d'un coup, collide()
+    teste tous les obstacles contre un rectangle. Le rendu est dans obstacles.py.
+    """
+
+    def __init__(self, ratios: Sequence[float], capacity: int = 256):
+        self.ratios = list(ratios)
+        self.capacity = capacity
+        self.x = np.zeros(capacity, dtype=np.float32)      # coin bas-gauche
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.w = np.zeros(capacity, dtype=np.float32)
+        self.h = np.zeros(capacity, dtype=np.float32)
+        self.kind = np.zeros(capacity, dtype=np.int32)
+        self.active = np.zeros(capacity, dtype=bool)
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+
+    @property
+    def count(self) -> int:
+        return self.capacity - len(self._free)
+
+    def spawn(self, x: float, y: float, size: float, kind: int) -> bool:
+        """Place un obstacle (taille = côté du carré englobant, ratio conservé)."""
+        if not self._free:
+            return False
+        i = self._free.pop()
+        ratio = self.ratios[kind]
+        if ratio <= 1.0:
+            w, h = size, size * ratio
+        else:
+            w, h = size / ratio, size
+        self.x[i] = x + (size - w) / 2.0
+        self.y[i] = y + (size - h) / 2.0
+        self.w[i] = w
+        self.h[i] = h
+        self.kind[i] = kind
+        self.active[i] = True
+        return True
+
+    def _release(self, mask: np.ndarray):
+        idx = np.flatnonzero(mask)
+        if idx.size:
+            self.active[idx] = False
+            self._free.extend(idx.tolist())
+
+    def step(self, dy: float):
+        """Fait descendre tous les obstacles de dy px et libère ceux sortis de l'écran."""
+        self.y[self.active] -= dy
+        self._release(self.active & (self.y + self.h < 0.0))
+
+    def collide(self, left: float, bottom: float, right: float, top: float) -> int:
+        """AABB contre tous les obstacles actifs ; les obstacles touchés sont retirés."""
+        hit = (
+            self.active
+            & (self.x < right) & (self.x + self.w > left)
+            & (self.y < top) & (self.y + self.h > bottom)
+        )
+        n = int(np.count_nonzero(hit))
+        if n:
+            self._release(hit)
+        return n
+
+    def clear(self):
+        self.active[:] = False
+        self._free = list(range(self.capacity - 1, -1, -1))
+
+
+# ---------- Voiture ----------
+
+class CarGameCore(_GameCore):
+
+    interpolated_input = True     # direction continue : pas de marche d'escalier à 100 Hz
+    predicted_input = True        # et anticipée sur la latence gant -> écran
+
+    def __init__(self, width: float, height: float, ratios: Sequence[float] = (1.0, 1.0),
+                 dp: float = 1.0, seed: Optional[int] = None):
+        self.width = width
+        self.height = height
+        self.dp = dp
+        self.rng = random.Random(seed)
+
+        self.forward_speed = 200      # vitesse du décor (px/s)
+        self.spawn_every = 1.2        # secondes (diminue => + d’obstacles)
+        self.road_width_ratio = 0.40  # ajuste si besoin
+        self.steer_sensitivity = 45.0
+        self.steer_gain = 400         # px/s à braquage max
+        # constante de temps du filtre = ancien alpha 0.3 par frame à 60 fps
+        self.steer_tau = 0.0467
+
+        self.obstacles = ObstaclePool(ratios)
+        self.reset()
+
+    def reset(self):
+        self.t = 0.0
+        self.car_x = self.width / 2
+        self.scroll = 0.0
+        self.distance = 0.0
+        self.collisions = 0
+        self.spawn_timer = 0.0
+        self.steer_filtered = 0.0
+        self.last_state: Optional[HandState] = None
+        self.events: List[GameEvent] = []
+        self.obstacles.clear()
+
+    def resize(self, width: float, height: float):
+        self.width = width
+        self.height = height
+        self.car_x = width / 2
+
+    def road_bounds(self) -> Tuple[float, float]:
+        center_x = self.width / 2
+        road_width = self.width * self.road_width_ratio
+        return center_x - road_width / 2, center_x + road_width / 2
+
+    def car_rect(self) -> Tuple[float, float, float, float]:
+        """Rectangle de la voiture (mêmes dimensions que dans game.kv)."""
+        w, h = 80 * self.dp, 160 * self.dp
+        left = self.car_x - w / 2
+        bottom = 50 * self.dp
+        return left, bottom, left + w, bottom + h
+
+    def move_car_pixels(self, delta_px: float):
+        self.car_x += delta_px
+        margin = self.width * 0.05
+        if self.car_x < margin:
+            self.car_x = margin
+        if self.car_x > self.width - margin:
+            self.car_x = self.width - margin
+
+    def spawn_obstacle(self):
+        road_left, road_right = self.road_bounds()
+        size = self.dp * self.rng.choice([55, 65, 75])
+        x = self.rng.uniform(road_left, road_right - size)
+        y = self.height + size
+        kind = self.rng.randrange(len(self.obstacles.ratios))
+        self.obstacles.spawn(x, y, size, kind)
+
+    def step(self, dt: float, samples: Sequence[HandState]):
+        self.t += dt
+
+        # 1) Scroll fond
+        self.scroll += self.forward_speed * dt
+        self.distance += (self.forward_speed * dt) / 100.0
+
+        # 2) Obstacles (spawn + move) -> TOUJOURS, même si pas de gant
+        self.spawn_timer += dt
+        while self.spawn_timer >= self.spawn_every:
+            self.spawn_timer -= self.spawn_every
+            self.spawn_obstacle()
+        self.obstacles.step(self.forward_speed * dt)
+        hits = self.obstacles.collide(*self.car_rect())
+        if hits:
+            self.collisions += hits
+            self.events.append(GameEvent(self.t, "collision", hits))
+
+        # 3) Lecture main : dernier échantillon reçu
+        if samples:
+            self.last_state = samples[-1]
+        state = self.last_state
+
+        # 4) Direction voiture
+        if state is not None:
+            steer_raw = state.steering_from_gyro(sensitivity_deg_per_s=self.steer_sensitivity)
+            alpha = 1.0 - exp(-dt / self.steer_tau)
+            self.steer_filtered = (1 - alpha) * self.steer_filtered + alpha * steer_raw
+            self.move_car_pixels(self.steer_filtered * self.steer_gain * dt)
+
+
+# ---------- Jump ----------
+
+class JumpGameCore(_GameCore):
+    """
+    Saut à amplitude variable (FSR index) dans un niveau procédural
+    (level.py) : rochers à franchir, étoiles à attraper, plateformes.
+    Score = rochers franchis + étoiles ; hits = rochers touchés.
+    """
+
+    def __init__(self, calib: Optional[HandCalibrator] = None, ground_y: float = 100.0,
+                 dp: float = 1.0, seed: Optional[int] = 0, view_w: float = 800.0):
+        self.calib = calib
+        self.ground_y = ground_y
+        self.dp = dp
+        self.scroll_speed = 220.0  # px/s
+
+        # Détection appui (FSR index seul)
+        self.INDEX_T = 0.30          # seuil normalisé (0..1) - écrasé par calibration si dispo
+        self.P_MIN = 100             # fallback si pas de calibration
+        self.P_MAX = 900
+        self.JUMP_COOLDOWN = 0.25
+
+        # Physique saut à amplitude variable
+        self.gravity = -1800.0
+        self.min_impulse = 520.0
+        self.max_impulse = 980.0
+        self.strength_exp = 1.3
+
+        # Hitbox de l'avatar (image dp(200) carrée, sprite centré plus étroit)
+        self.hit_x = 60 * dp
+        self.hit_w = 80 * dp
+        self.hit_h = 170 * dp
+
+        self.level = LevelStream(self.apex, ground_y, seed=seed or 0,
+                                 hit_w=self.hit_w, hit_h=self.hit_h, view_w=view_w)
+        self.reset()
+
+    def reset(self):
+        self.t = 0.0
+        self.y = self.ground_y
+        self.vy = 0.0
+        self.floor = self.ground_y   # sol ou dessus de la plateforme sous l'avatar
+        self.scroll = 0.0
+        self.score = 0
+        self.hits = 0
+        self.index_active = False
+        self._was_pressed = False
+        self._last_jump_time = -999.0
+        self._t_ms = -1.0
+        self._strengths: deque = deque(maxlen=20)   # forces des derniers sauts
+        self.events: List[GameEvent] = []
+        self.level.speed = self.scroll_speed
+        self.level.reset()
+        self.tune_level()
+        self.level.update(self.scroll)
+
+    def resize(self, view_w: float):
+        self.level.view_w = view_w
+
+    # ----- Réglage du niveau sur la force du patient -----
+
+    def apex(self, strength: float) -> float:
+        """Hauteur (px) atteinte par un saut de cette force."""
+        s = max(0.0, min(1.0, strength)) ** self.strength_exp
+        v = self.min_impulse + s * (self.max_impulse - self.min_impulse)
+        return v * v / (2.0 * -self.gravity)
+
+    def tune_level(self):
+        """
+        Plage de force des prochains tronçons : du seuil d'appui (calibration)
+        jusqu'au 80e centile des derniers sauts du patient.
+        """
+        lo = self.INDEX_T
+        if self._strengths:
+            hi = float(np.percentile(np.fromiter(self._strengths, dtype=np.float64), 80))
+        else:
+            hi = lo + 0.3
+        self.level.strength_range = (lo, min(1.0, max(lo + 0.15, hi)))
+        self.level.gravity = -self.gravity
+
+    # ----- Entrée -----
+
+    def read_index_pressure(self, state: HandState) -> float:
+        """
+        ATTENTION HARDWARE:
+        Le FSR index est physiquement branché sur A2,
+        mais à cause d'un défaut de soudure Arduino,
+        la valeur arrive dans la 4e colonne du serial => fsr_thumb.
+        """
+        calib = self.calib
+        if calib is None:
+            return _norm(state.fsr_thumb, self.P_MIN, self.P_MAX)
+        self.INDEX_T = getattr(calib, "index_fsr_threshold", self.INDEX_T)
+        return _norm(state.fsr_thumb, calib.fsr_thumb_min, calib.fsr_thumb_max)
+
+    def press_event(self, index_n: float) -> Tuple[bool, float]:
+        pressed = index_n > self.INDEX_T
+        self.index_active = pressed
+
+        # front montant + cooldown
+        if pressed and (not self._was_pressed) and (self.t - self._last_jump_time) >= self.JUMP_COOLDOWN:
+            self._was_pressed = True
+            self._last_jump_time = self.t
+            return True, index_n  # strength = index_n (0..1)
+
+        if not pressed:
+            self._was_pressed = False
+        return False, 0.0
+
+    def do_jump(self, strength: float = 1.0) -> bool:
+        """Saute seulement si l’avatar est près de son appui, avec amplitude variable."""
+        if self.y > self.floor + 200.0:
+            return False
+        s = max(0.0, min(1.0, strength))
+        self._strengths.append(s)
+        s = s ** self.strength_exp
+        self.vy = self.min_impulse + s * (self.max_impulse - self.min_impulse)
+        self.events.append(GameEvent(self.t, "jump", strength, t_ms=self._t_ms))
+        return True
+
+    # ----- Physique et niveau -----
+
+    def avatar_box(self) -> Tuple[float, float, float, float]:
+        """(gauche, bas, droite, haut) de la hitbox, en coordonnées monde."""
+        left = self.scroll + self.hit_x
+        return left, self.y, left + self.hit_w, self.y + self.hit_h
+
+    def update_physics(self, dt: float):
+        prev_y = self.y
+        self.vy += self.gravity * dt
+        self.y += self.vy * dt
+
+        # atterrissage sur une plateforme (traversable par-dessous) ou le sol
+        left, _, right, _ = self.avatar_box()
+        floor = self.ground_y
+        if self.vy <= 0.0:
+            top = self.level.support(left, right, prev_y)
+            if top is not None and top > floor:
+                floor = top
+        self.floor = floor
+        if self.y < floor:
+            self.y = floor
+            self.vy = 0.0
+
+    def _collide(self, prev_left: float):
+        level = self.level
+        left, bottom, right, top = self.avatar_box()
+        for chunk, i in level.overlaps(left, bottom, right, top):
+            kind = chunk.kind[i]
+            if kind == ROCK:
+                chunk.alive[i] = False
+                self.hits += 1
+                self.events.append(GameEvent(self.t, "collision", chunk.strength[i]))
+            elif kind == STAR:
+                chunk.alive[i] = False
+                self.score += 1
+                self.events.append(GameEvent(self.t, "star", chunk.strength[i]))
+        for chunk, i in level.passed_since(prev_left, left):
+            self.score += 1
+            self.events.append(GameEvent(self.t, "clear", chunk.strength[i]))
+
+    def step(self, dt: float, samples: Sequence[HandState]):
+        self.t += dt
+        prev_left = self.scroll + self.hit_x
+        self.scroll += self.scroll_speed * dt
+
+        # Chaque échantillon est évalué (pas seulement le dernier)
+        jumped = False
+        for state in samples:
+            pressed, strength = self.press_event(self.read_index_pressure(state))
+            if pressed:
+                self._t_ms = state.t_ms
+                jumped = self.do_jump(strength) or jumped
+        self._t_ms = -1.0
+        if jumped:
+            self.tune_level()
+
+        # la physique DOIT toujours s’exécuter
+        self.update_physics(dt)
+        self.level.update(self.scroll)
+        self._collide(prev_left)
+
+
+# ---------- Piano ----------
+
+class PianoGameCore(_GameCore):
+    """
+    Piano tour par tour : une séquence de "index" / "majeur", un doigt
+    attendu par tour, note_window secondes pour le fléchir.
+    """
+
+    def __init__(self, calib: Optional[HandCalibrator] = None, seed: Optional[int] = None,
+                 has_input: bool = True):
+        self.calib = calib
+        self.rng = random.Random(seed)
+        self.has_input = has_input
+        self.note_window = 2.0      # durée max d'un tour (en secondes)
+        self.reset()
+
+    def reset(self):
+        self.t = 0.0
+        self.score = 0
+        self.misses = 0
+        self.sequence: List[str] = []
+        self.current_step = 0
+        self.expected_finger = "index"
+        self.note_timer = 0.0
+        self.note_resolved = False
+        self.badge_blink_timer = 0.0
+        self.index_badge_visible = False
+        self.majeur_badge_visible = False
+        self.index_active = False
+        self.majeur_active = False
+        self.prev_index_pressed = False
+        self.prev_majeur_pressed = False
+        self._t_ms = -1.0
+        self.events: List[GameEvent] = []
+        self.generate_new_sequence()
+        self.start_new_note()
+
+    def generate_new_sequence(self, length: int = 16):
+        self.sequence = [self.rng.choice(["index", "majeur"]) for _ in range(length)]
+        self.current_step = 0
+
+    def start_new_note(self):
+        if not self.sequence or self.current_step >= len(self.sequence):
+            self.generate_new_sequence()
+        self.expected_finger = self.sequence[self.current_step]
+        self.note_timer = 0.0
+        self.note_resolved = False
+        self.badge_blink_timer = 0.0
+
+    def advance_to_next_note(self):
+        self.current_step += 1
+        self.start_new_note()
+
+    def validate_current_note(self):
+        if self.note_resolved:
+            return
+        self.note_resolved = True
+        self.score += 1
+        self.events.append(GameEvent(self.t, "note_ok", self.note_timer, self.expected_finger, self._t_ms))
+        self.advance_to_next_note()
+
+    def fail_current_note(self):
+        """Temps écoulé: on ne passe PAS à la note suivante, on redonne la même note."""
+        if self.note_resolved:
+            return
+        self.misses += 1
+        self.events.append(GameEvent(self.t, "note_miss", self.note_window, self.expected_finger))
+        self.note_timer = 0.0
+        self.note_resolved = False
+        self.badge_blink_timer = 0.0
+
+    def step(self, dt: float, samples: Sequence[HandState]):
+        self.t += dt
+
+        # --- Gestion du temps du tour ---
+        self.note_timer += dt
+        if self.note_timer >= self.note_window and not self.note_resolved:
+            self.fail_current_note()
+            return
+
+        # --- Clignement du badge du doigt attendu (~2 fois par seconde) ---
+        self.badge_blink_timer += dt
+        blink_on = int(self.badge_blink_timer * 2) % 2 == 0
+        self.index_badge_visible = blink_on and self.expected_finger == "index"
+        self.majeur_badge_visible = blink_on and self.expected_finger == "majeur"
+
+        if not self.has_input:
+            return
+
+        for state in samples:
+            self._t_ms = state.t_ms
+            index_pressed, majeur_pressed = fingers_pressed(state, self.calib)
+            self.index_active = index_pressed
+            self.majeur_active = majeur_pressed
+
+            if not self.note_resolved:
+                if self.expected_finger == "index" and index_pressed:
+                    self.validate_current_note()
+                elif self.expected_finger == "majeur" and majeur_pressed:
+                    self.validate_current_note()
+
+            self.prev_index_pressed = index_pressed
+            self.prev_majeur_pressed = majeur_pressed
+
+
+# ---------- Piano : mode rythme ----------
+
+LATENCY_FILE = "latency.txt"
+RESYNC_MS = 1000.0   # saut d'horloge du gant au-delà duquel on repart (rebranchement)
+
+
+def load_latency(path: str = LATENCY_FILE, default: float = 0.0) -> float:
+    """Compensation de latence (ms) mesurée sur ce poste (gant + PC + écran), ou default."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                k, _, v = line.partition("=")
+                if k.strip() == "latency_ms":
+                    return float(v.strip())
+    except (OSError, ValueError):
+        pass
+    return default
+
+
+def save_latency(latency_ms: float, path: str = LATENCY_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"latency_ms={latency_ms}\n")
+
+
+def _crossing(t0: float, v0: float, t1: float, v1: float, threshold: float) -> float:
+    """Instant où le niveau passe threshold entre deux échantillons (interpolation linéaire)."""
+    if v0 < threshold <= v1 and t1 > t0:
+        return t0 + (threshold - v0) / (v1 - v0) * (t1 - t0)
+    return t1
+
+
+class RhythmNote:
+    __slots__ = ("target_ms", "finger", "judgement", "offset_ms")
+
+    def __init__(self, target_ms: float, finger: str):
+        self.target_ms = target_ms  # instant cible, horloge du gant
+        self.finger = finger
+        self.judgement = ""         # "" en attente, puis "perfect" / "good" / "miss"
+        self.offset_ms = 0.0        # écart corrigé de la flexion (> 0 : en retard)
+
+
+class RhythmCore(_GameCore):
+    """
+    Piano en rythme : les notes tombent sur une grille (bpm x subdivision)
+    dans l'horloge du gant. Chaque flexion est datée à l'échantillon près
+    (passage du seuil interpolé entre deux échantillons), moins latency_ms
+    (compensation propre au poste), puis comparée à la note la plus proche
+    du même doigt : |écart| <= perfect_ms -> "perfect", <= good_ms -> "good".
+    Une note non jouée à cible + good_ms -> "miss". Le jugement ne dépend
+    ni de la cadence d'affichage ni du pas de simulation.
+    """
+
+    FINGERS = ("index", "majeur")
+
+    def __init__(self, calib: Optional[HandCalibrator] = None, seed: Optional[int] = None,
+                 bpm: float = 120.0, subdivision: int = 2, latency_ms: float = 0.0,
+                 perfect_ms: float = 35.0, good_ms: float = 80.0,
+                 fingers: Sequence[str] = FINGERS,
+                 lead_in_ms: float = 2000.0, lookahead_ms: float = 3000.0):
+        self.calib = calib
+        self.seed = seed
+        self.bpm = bpm
+        self.subdivision = subdivision
+        self.latency_ms = latency_ms
+        self.perfect_ms = perfect_ms
+        self.good_ms = good_ms
+        self.fingers = tuple(fingers)
+        self.lead_in_ms = lead_in_ms      # silence avant la 1re note
+        self.lookahead_ms = lookahead_ms  # notes générées à l'avance (affichage)
+        self.reset()
+
+    @property
+    def interval_ms(self) -> float:
+        return 60000.0 / (self.bpm * self.subdivision)
+
+    @property
+    def notes_per_s(self) -> float:
+        return 1000.0 / self.interval_ms
+
+    def reset(self):
+        self.rng = random.Random(self.seed)
+        self.t = 0.0
+        self.now_ms: Optional[float] = None   # temps simulé, horloge du gant
+        self.start_ms = 0.0
+        self.notes: deque = deque()           # notes à venir ou jugeables, dans l'ordre
+        self._next_index = 0
+        self.score = 0
+        self.combo = 0
+        self.max_combo = 0
+        self.misses = 0
+        self.stray = 0                        # flexions sans note à portée
+        self.counts = {"perfect": 0, "good": 0, "miss": 0}
+        self.offsets: List[float] = []        # écarts corrigés des notes jouées (ms)
+        self.expected_finger = self.fingers[0]
+        self.index_active = False
+        self.majeur_active = False
+        self.index_badge_visible = False
+        self.majeur_badge_visible = False
+        self._prev: Optional[Tuple[float, float, float]] = None   # (t_ms, niveau index, niveau majeur)
+        self.events: List[GameEvent] = []
+
+    def start(self, now_ms: float):
+        """Démarre (ou redémarre) la grille : 1re note à now_ms + lead_in_ms."""
+        self.notes.clear()
+        self._next_index = 0
+        self._prev = None
+        self.now_ms = now_ms
+        self.start_ms = now_ms + self.lead_in_ms
+        self._schedule()
+
+    def _schedule(self):
+        horizon = self.now_ms + self.lookahead_ms
+        interval = self.interval_ms
+        while True:
+            target = self.start_ms + self._next_index * interval
+            if target > horizon:
+                break
+            self.notes.append(RhythmNote(target, self.rng.choice(self.fingers)))
+            self._next_index += 1
+
+    # ----- Jugement -----
+
+    def press(self, finger: str, t_ms: float):
+        """Flexion de `finger` à t_ms (horloge du gant) : juge la note la plus proche."""
+        t = t_ms - self.latency_ms
+        best = None
+        best_offset = 0.0
+        for note in self.notes:
+            if note.target_ms - self.good_ms > t:
+                break
+            if note.judgement or note.finger != finger:
+                continue
+            offset = t - note.target_ms
+            if abs(offset) <= self.good_ms and (best is None or abs(offset) < abs(best_offset)):
+                best, best_offset = note, offset
+        if best is None:
+            self.stray += 1
+            self.events.append(GameEvent(self.t, "stray", 0.0, finger, t_ms))
+            return
+
+        kind = "perfect" if abs(best_offset) <= self.perfect_ms else "good"
+        best.judgement = kind
+        best.offset_ms = best_offset
+        self.counts[kind] += 1
+        self.offsets.append(best_offset)
+        self.score += 2 if kind == "perfect" else 1
+        self.combo += 1
+        self.max_combo = max(self.max_combo, self.combo)
+        self.events.append(GameEvent(self.t, kind, best_offset, finger, t_ms))
+
+    def _expire(self, limit: Optional[float] = None):
+        # plus aucune flexion à venir (t >= now) ne peut toucher ces notes
+        if limit is None:
+            limit = self.now_ms - self.latency_ms - self.good_ms
+        notes = self.notes
+        while notes and notes[0].target_ms < limit:
+            note = notes.popleft()
+            if not note.judgement:
+                note.judgement = "miss"
+                self.counts["miss"] += 1
+                self.misses += 1
+                self.combo = 0
+                self.events.append(GameEvent(self.t, "miss", 0.0, note.finger))
+
+    def _detect(self, state: HandState):
+        """Fronts montants index / majeur, datés au passage du seuil."""
+        li, lm, si, sm = finger_levels(state, self.calib)
+        index_pressed = (li > si) and (li > lm)
+        majeur_pressed = (lm > sm) and (lm > li)
+        prev = self._prev
+        if prev is not None:
+            t0, li0, lm0 = prev
+            if index_pressed and not self.index_active:
+                self.press("index", _crossing(t0, li0, state.t_ms, li, si))
+            if majeur_pressed and not self.majeur_active:
+                self.press("majeur", _crossing(t0, lm0, state.t_ms, lm, sm))
+        self.index_active = index_pressed
+        self.majeur_active = majeur_pressed
+        self._prev = (state.t_ms, li, lm)
+
+    # ----- Pas -----
+
+    def step(self, dt: float, samples: Sequence[HandState]):
+        self.t += dt
+        if self.now_ms is None:
+            self.start(samples[0].t_ms if samples else 0.0)
+        now = self.now_ms + dt * 1000.0
+
+        for state in samples:
+            if abs(state.t_ms - now) > RESYNC_MS:
+                # gant rebranché / horloge recalée : les notes déjà jouables à
+                # l'ancienne horloge sont manquées, les suivantes abandonnées
+                self._expire(now - self.latency_ms + self.good_ms)
+                self.start(state.t_ms)
+                now = state.t_ms
+            self._detect(state)
+        if samples:
+            now = max(now, samples[-1].t_ms)
+
+        self.now_ms = now
+        self._expire()
+        self._schedule()
+
+        # note attendue + badge allumé autour de son instant
+        heard = now - self.latency_ms
+        self.index_badge_visible = self.majeur_badge_visible = False
+        for note in self.notes:
+            if not note.judgement:
+                self.expected_finger = note.finger
+                on_beat = abs(note.target_ms - heard) <= self.good_ms
+                self.index_badge_visible = on_beat and note.finger == "index"
+                self.majeur_badge_visible = on_beat and note.finger == "majeur"
+                break
+
+    # ----- Bilan -----
+
+    def stats(self) -> dict:
+        off = np.asarray(self.offsets, dtype=np.float64)
+        judged = sum(self.counts.values())
+        return {
+            **self.counts,
+            "stray": self.stray,
+            "accuracy": round((self.counts["perfect"] + self.counts["good"]) / judged, 3) if judged else 0.0,
+            "mean_offset_ms": round(float(off.mean()), 1) if off.size else 0.0,
+            "std_offset_ms": round(float(off.std()), 1) if off.size else 0.0,
+            "max_combo": self.max_combo,
+        }
+
+    def measured_latency(self, min_notes: int = 8) -> Optional[float]:
+        """Latence du poste estimée sur les notes jouées : latency_ms + médiane des écarts."""
+        if len(self.offsets) < min_notes:
+            return None
+        return self.latency_ms + float(np.median(self.offsets))
+
+
+# ---------- Deux mains ----------
+
+class BimanualCore(_GameCore):
+    """
+    Exercice à deux gants : fléchir les deux index ensemble.
+
+    Les échantillons viennent du flux fusionné de gloves.MultiGloveReader :
+    state.device donne la main, t_ms est dans l'horloge commune. Chaque main
+    est normalisée avec sa propre calibration. Une flexion (passage du seuil,
+    interpolé) attend celle de l'autre main pendant window_ms : "sync" (value
+    = écart en ms, label = main en avance), sinon "solo" (label = main seule).
+    La symétrie compare les niveaux des deux index à chaque échantillon.
+    """
+
+    def __init__(self, calibs: Optional[Dict[str, HandCalibrator]] = None,
+                 hands: Sequence[str] = ("gauche", "droite"), window_ms: float = 250.0,
+                 release: float = 0.8):
+        self.calibs = dict(calibs or {})
+        self.hands = tuple(hands)
+        self.window_ms = window_ms
+        self.release = release            # hystérésis : relâché sous release x seuil
+        self.reset()
+
+    def reset(self):
+        self.t = 0.0
+        self.now_ms: Optional[float] = None
+        self.score = 0
+        self.misses = 0
+        self.lags: List[float] = []       # écarts des flexions synchronisées (ms)
+        self.levels = {h: 0.0 for h in self.hands}
+        self.active = {h: False for h in self.hands}
+        self._prev: Dict[str, Tuple[float, float]] = {}   # main -> (t_ms, niveau)
+        self._pending: Optional[Tuple[str, float]] = None  # 1re main fléchie, en attente de l'autre
+        self._asym_sum = 0.0
+        self._asym_n = 0
+        self.events: List[GameEvent] = []
+
+    @property
+    def symmetry(self) -> float:
+        """1 - écart moyen des niveaux d'index des deux mains (1 : mouvements identiques)."""
+        return 1.0 - self._asym_sum / self._asym_n if self._asym_n else 0.0
+
+    def _onset(self, hand: str, t_ms: float):
+        pending = self._pending
+        if pending is not None and pending[0] != hand and t_ms - pending[1] <= self.window_ms:
+            lag = t_ms - pending[1]
+            self._pending = None
+            self.score += 1
+            self.lags.append(lag)
+            self.events.append(GameEvent(self.t, "sync", lag, pending[0], t_ms))
+            return
+        if pending is not None:
+            self._solo()
+        self._pending = (hand, t_ms)
+
+    def _solo(self):
+        hand, t_ms = self._pending
+        self._pending = None
+        self.misses += 1
+        self.events.append(GameEvent(self.t, "solo", 0.0, hand, t_ms))
+
+    def step(self, dt: float, samples: Sequence[HandState]):
+        self.t += dt
+        for state in samples:
+            hand = state.device
+            if hand not in self.levels:
+                continue
+            level, _, threshold, _ = finger_levels(state, self.calibs.get(hand))
+            prev = self._prev.get(hand)
+            if not self.active[hand] and level > threshold:
+                self.active[hand] = True
+                t_on = state.t_ms if prev is None else _crossing(prev[0], prev[1], state.t_ms, level, threshold)
+                self._onset(hand, t_on)
+            elif self.active[hand] and level < threshold * self.release:
+                self.active[hand] = False
+            self._prev[hand] = (state.t_ms, level)
+            self.levels[hand] = level
+            self.now_ms = state.t_ms
+            if len(self._prev) == len(self.hands):
+                self._asym_sum += abs(self.levels[self.hands[0]] - self.levels[self.hands[1]])
+                self._asym_n += 1
+
+        if self._pending is not None and self.now_ms is not None \
+                and self.now_ms - self._pending[1] > self.window_ms:
+            self._solo()
+
+    def stats(self) -> dict:
+        lags = np.asarray(self.lags, dtype=np.float64)
+        return {
+            "sync": self.score,
+            "solo": self.misses,
+            "mean_lag_ms": round(float(lags.mean()), 1) if lags.size else 0.0,
+            "symmetry": round(self.symmetry, 3),
+        }
@@ -0,0 +1,303 @@
+# gestures.py
+"""
+Reconnaissance de gestes par modèles (templates) + DTW.
+
+  - GestureLibrary   : modèles enregistrés par le thérapeute (gestures.json)
+  - GestureRecognizer: compare la fenêtre live à tous les modèles
+                       (LB_Keogh pour élaguer, DTW avec abandon anticipé)
+                       et notifie les abonnés par nom de geste.
+
+Enregistrer un modèle depuis le gant (sans Kivy) :
+    python gestures.py record pince --seconds 2        # gant trouvé tout seul (--port pour l'imposer)
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from hand_state import HandState, HandCalibrator
+
+
+GESTURES_PATH = "gestures.json"
+TEMPLATE_LEN = 50       # échantillons après rééchantillonnage
+BAND_RADIUS = 5         # fenêtre de Sakoe-Chiba
+GYRO_SCALE = 180.0      # deg/s -> ~[-1, 1]
+
+
+# ---------- Caractéristiques ----------
+
+def _norm(value: float, vmin: float, vmax: float) -> float:
+    if vmax <= vmin:
+        return 0.0
+    x = (value - vmin) / float(vmax - vmin)
+    return 0.0 if x < 0.0 else (1.0 if x > 1.0 else x)
+
+
+def state_features(state: HandState, calib: HandCalibrator) -> Tuple[float, ...]:
+    """Vecteur décrivant la main : flexions, pressions (0..1) et rotation."""
+    return (
+        _norm(state.flex_thumb, calib.flex_thumb_min, calib.flex_thumb_max),
+        _norm(state.flex_index, calib.flex_index_min, calib.flex_index_max),
+        _norm(state.fsr_thumb, calib.fsr_thumb_min, calib.fsr_thumb_max),
+        _norm(state.fsr_index, calib.fsr_index_min, calib.fsr_index_max),
+        (state.gx - calib.gx_offset) / GYRO_SCALE,
+        (state.gy - calib.gy_offset) / GYRO_SCALE,
+        (state.gz - calib.gz_offset) / GYRO_SCALE,
+    )
+
+
+def resample(seq: np.ndarray, length: int = TEMPLATE_LEN) -> np.ndarray:
+    """Rééchantillonne une séquence (N x D) à `length` points (interp. linéaire)."""
+    seq = np.asarray(seq, dtype=np.float64)
+    if seq.shape[0] == length:
+        return seq.copy()
+    src = np.linspace(0.0, 1.0, seq.shape[0])
+    dst = np.linspace(0.0, 1.0, length)
+    return np.stack([np.interp(dst, src, seq[:, d]) for d in range(seq.shape[1])], axis=1)
+
+
+# ---------- DTW ----------
+
+def envelope(seq: np.ndarray, radius: int = BAND_RADIUS) -> Tuple[np.ndarray, np.ndarray]:
+    """Enveloppes haute/basse (pour LB_Keogh) sur une fenêtre de +-radius."""
+    padded = np.pad(seq, ((radius, radius), (0, 0)), mode="edge")
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1, axis=0)
+    return windows.max(axis=-1), windows.min(axis=-1)
+
+
+def lb_keogh(query: np.ndarray, upper: np.ndarray, lower: np.ndarray) -> float:
+    """Borne inférieure de la DTW (distance au carré hors de l'enveloppe)."""
+    over = np.maximum(query - upper, 0.0)
+    under = np.maximum(lower - query, 0.0)
+    return float(np.sum(over * over) + np.sum(under * under))
+
+
+def dtw_distance(a: np.ndarray, b: np.ndarray, radius: int = BAND_RADIUS,
+                 best_so_far: float = math.inf) -> float:
+    """
+    DTW (somme des distances au carré) avec bande de Sakoe-Chiba.
+    Abandon anticipé : si toute une ligne dépasse best_so_far, renvoie inf.
+    """
+    n, m = a.shape[0], b.shape[0]
+    diff = a[:, np.newaxis, :] - b[np.newaxis, :, :]
+    cost = np.einsum("ijk,ijk->ij", diff, diff).tolist()
+
+    inf = math.inf
+    prev = [inf] * (m + 1)
+    prev[0] = 0.0
+    for i in range(1, n + 1):
+        cur = [inf] * (m + 1)
+        lo = max(1, i - radius)
+        hi = min(m, i + radius)
+        row_cost = cost[i - 1]
+        row_min = inf
+        for j in range(lo, hi + 1):
+            best = prev[j - 1]
+            if prev[j] < best:
+                best = prev[j]
+            if cur[j - 1] < best:
+                best = cur[j - 1]
+            v = row_cost[j - 1] + best
+            cur[j] = v
+            if v < row_min:
+                row_min = v
+        if row_min >= best_so_far:
+            return inf
+        prev = cur
+    return prev[m]
+
+
+# ---------- Modèles ----------
+
+@dataclass
+class GestureTemplate:
+    name: str
+    data: np.ndarray                 # TEMPLATE_LEN x D
+    threshold: float = 0.05          # distance DTW max par point pour valider
+    upper: np.ndarray = field(init=False, repr=False)
+    lower: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.data = np.asarray(self.data, dtype=np.float64)
+        self.upper, self.lower = envelope(self.data)
+
+
+class GestureLibrary:
+    """Ensemble de modèles ; plusieurs modèles peuvent porter le même nom."""
+
+    def __init__(self):
+        self.templates: List[GestureTemplate] = []
+
+    def add(self, name: str, states: Sequence[HandState], calib: HandCalibrator,
+            threshold: float = 0.05) -> GestureTemplate:
+        feats = np.array([state_features(s, calib) for s in states], dtype=np.float64)
+        if feats.shape[0] < 2:
+            raise ValueError("enregistrement trop court pour un modèle")
+        tpl = GestureTemplate(name, resample(feats), threshold)
+        self.templates.append(tpl)
+        return tpl
+
+    def names(self) -> List[str]:
+        return sorted({t.name for t in self.templates})
+
+    def save(self, path: str = GESTURES_PATH):
+        payload = [
+            {"name": t.name, "threshold": t.threshold, "data": t.data.tolist()}
+            for t in self.templates
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+
+    def load(self, path: str = GESTURES_PATH) -> bool:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self.templates = [
+            GestureTemplate(p["name"], np.array(p["data"]), p.get("threshold", 0.05))
+            for p in payload
+        ]
+        return True
+
+    def match(self, query: np.ndarray) -> Tuple[Optional[GestureTemplate], float]:
+        """
+        Meilleur modèle pour une requête (TEMPLATE_LEN x D) et sa distance par point.
+        Les modèles sont visités par LB_Keogh croissant ; on s'arrête dès que
+        la borne dépasse la meilleure DTW trouvée.
+        """
+        if not self.templates:
+            return None, math.inf
+
+        bounds = sorted(
+            ((lb_keogh(query, t.upper, t.lower), k) for k, t in enumerate(self.templates)),
+        )
+        best_tpl = None
+        best = math.inf
+        for lb, k in bounds:
+            if lb >= best:
+                break
+            d = dtw_distance(query, self.templates[k].data, best_so_far=best)
+            if d < best:
+                best = d
+                best_tpl = self.templates[k]
+        return best_tpl, best / query.shape[0]
+
+
+# ---------- Reconnaissance live ----------
+
+class GestureRecognizer:
+    """
+    Compare en continu les `window` derniers échantillons aux modèles.
+
+    update() est un listener de SerialHandReader (thread de lecture) ;
+    les callbacks abonnés sont donc appelés depuis ce thread.
+    """
+
+    def __init__(self, library: GestureLibrary, calib: HandCalibrator,
+                 window: int = 100, hop: int = 5, refractory_s: float = 0.8):
+        self.library = library
+        self.calib = calib
+        self.window = window
+        self.hop = hop
+        self.refractory_ms = refractory_s * 1000.0
+
+        self._buf: deque = deque(maxlen=window)
+        self._count = 0
+        self._last_fire_ms = -math.inf
+        self._subs: Dict[str, List[Callable[[str, float], None]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, name: str, fn: Callable[[str, float], None]):
+        """fn(name, distance) est appelé à chaque reconnaissance de `name`."""
+        with self._lock:
+            self._subs.setdefault(name, []).append(fn)
+
+    def unsubscribe(self, name: str, fn: Callable[[str, float], None]):
+        with self._lock:
+            if fn in self._subs.get(name, []):
+                self._subs[name].remove(fn)
+
+    def reset(self):
+        self._buf.clear()
+        self._count = 0
+
+    def update(self, state: HandState):
+        self._buf.append(state_features(state, self.calib))
+        self._count += 1
+        if len(self._buf) < self.window or self._count % self.hop:
+            return
+        if state.t_ms - self._last_fire_ms < self.refractory_ms:
+            return
+        with self._lock:
+            if not any(self._subs.values()):
+                return  # personne n'écoute : pas de calcul
+
+        query = resample(np.array(self._buf, dtype=np.float64))
+        tpl, dist = self.library.match(query)
+        if tpl is None or dist > tpl.threshold:
+            return
+
+        self._last_fire_ms = state.t_ms
+        self._buf.clear()
+        with self._lock:
+            callbacks = list(self._subs.get(tpl.name, []))
+        for fn in callbacks:
+            fn(tpl.name, dist)
+
+
+# ---------- Enregistrement en ligne de commande ----------
+
+def _record_cli(argv=None) -> int:
+    import argparse
+    import time
+    from serial_reader import SERIAL_BAUD, SerialHandReader, default_port
+
+    parser = argparse.ArgumentParser(description="Bibliothèque de gestes du gant")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record", help="enregistre un modèle depuis le gant")
+    rec.add_argument("name")
+    rec.add_argument("--port", default=None, help="port du gant (défaut : recherche automatique)")
+    rec.add_argument("--baud", type=int, default=SERIAL_BAUD)
+    rec.add_argument("--seconds", type=float, default=2.0)
+    rec.add_argument("--threshold", type=float, default=0.05)
+    rec.add_argument("--calib", default="calibration.txt")
+    rec.add_argument("--library", default=GESTURES_PATH)
+    sub.add_parser("list", help="liste les modèles").add_argument("--library", default=GESTURES_PATH)
+    args = parser.parse_args(argv)
+
+    library = GestureLibrary()
+    library.load(args.library)
+
+    if args.cmd == "list":
+        for name in library.names():
+            n = sum(1 for t in library.templates if t.name == name)
+            print(f"{name}: {n} modèle(s)")
+        return 0
+
+    calib = HandCalibrator()
+    calib.load_txt(args.calib)
+    states: List[HandState] = []
+    reader = SerialHandReader(port=args.port or default_port(args.baud), baudrate=args.baud)
+    reader.add_listener(states.append)
+    reader.start()
+    print(f"Faites le geste '{args.name}' ({args.seconds:.1f} s)...")
+    time.sleep(args.seconds)
+    reader.stop()
+
+    tpl = library.add(args.name, states, calib, args.threshold)
+    library.save(args.library)
+    print(f"Modèle '{tpl.name}' enregistré ({len(states)} échantillons).")
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(_record_cli())
@@ -0,0 +1,364 @@
+# gloves.py
+"""
+Plusieurs gants lus par une seule boucle d'E/S (selectors), au lieu d'un
+thread par port.
+
+Les gants sont déclarés dans devices.txt (même format clé=valeur que
+calibration.txt), le premier étant le gant principal des jeux :
+
+    droite=/dev/cu.usbmodem1201
+    gauche=auto,115200
+
+"auto" : port trouvé par port_discovery (gants branchés et pas déjà
+déclarés). Sans devices.txt : un seul gant, "gant", sur
+serial_reader.default_port() (GANT_PORT ou recherche automatique).
+
+  - chaque gant a un GloveStream, qui a l'interface de SerialHandReader
+    (listeners, start/stop, get_latest_state, commandes de device_protocol) :
+    les écrans s'en servent tels quels (cf. serial_reader.open_reader)
+  - chaque gant a sa calibration : calibration.txt pour le gant principal,
+    calibration_<nom>.txt pour les autres (repli sur calibration.txt)
+  - MultiGloveReader.add_listener() reçoit les échantillons de tous les gants,
+    marqués (state.device) et recalés sur une horloge commune (les gants ont
+    chacun leur millis()) : exercices à deux mains
+
+Les ports sont lus sans blocage (os.read sur le descripteur du port) quand
+select() les signale prêts ; un pipe réveille la boucle quand un gant est
+ouvert ou fermé. POSIX seulement (select() ne sait pas attendre un port COM
+Windows) : open_reader revient alors à un SerialHandReader par port.
+"""
+
+from __future__ import annotations
+
+import os
+import selectors
+import threading
+import time
+import traceback
+from dataclasses import replace
+from typing import Callable, Dict, List, Optional, Tuple
+
+import serial
+
+from device_protocol import DeviceCommands, FrameDecoder
+from hand_state import HandCalibrator, HandState
+from serial_reader import FALLBACK_PORT, SERIAL_BAUD, default_port
+
+DEVICES_FILE = "devices.txt"
+PRIMARY_CALIB = "calibration.txt"
+DEFAULT_DEVICE = "gant"
+RESET_MS = 1000          # recul d'horloge au-delà duquel le gant a redémarré
+
+
+def load_devices(path: str = DEVICES_FILE) -> List[Tuple[str, str, int]]:
+    """[(nom, port, baudrate)] lus dans devices.txt ; le gant par défaut si absent ou vide."""
+    devices = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if "=" not in line:
+                    continue
+                name, value = (p.strip() for p in line.split("=", 1))
+                port, _, baud = value.partition(",")
+                devices.append((name, port.strip(), int(baud) if baud.strip() else SERIAL_BAUD))
+    except (OSError, ValueError):
+        devices = []
+    if not devices:
+        return [(DEFAULT_DEVICE, default_port(), SERIAL_BAUD)]
+    return _resolve_auto(devices)
+
+
+def _resolve_auto(devices: List[Tuple[str, str, int]]) -> List[Tuple[str, str, int]]:
+    """Remplace les ports "auto" par les gants trouvés, dans l'ordre (FALLBACK_PORT s'il en manque)."""
+    auto = [i for i, (_, port, _) in enumerate(devices) if port.lower() == "auto"]
+    if not auto:
+        return devices
+    from port_discovery import find_gloves
+    declared = [port for _, port, _ in devices if port.lower() != "auto"]
+    found = find_gloves(len(auto), devices[auto[0]][2], exclude=declared)
+    resolved = list(devices)
+    for k, i in enumerate(auto):
+        name, _, baud = devices[i]
+        resolved[i] = (name, found[k] if k < len(found) else FALLBACK_PORT, baud)
+    return resolved
+
+
+def calib_path(name: str, primary: bool) -> str:
+    return PRIMARY_CALIB if primary else f"calibration_{name}.txt"
+
+
+# ---------- Un gant ----------
+
+class GloveStream(DeviceCommands):
+    """
+    Flux d'un gant dans MultiGloveReader, avec l'interface de SerialHandReader.
+    start()/stop() sont comptés : deux écrans qui se relaient (on_pre_enter du
+    suivant avant on_leave du précédent) gardent le port ouvert. Un gant
+    débranché (port fermé par la boucle) est rouvert au start() suivant.
+    """
+
+    def __init__(self, owner: "MultiGloveReader", name: str, port: str,
+                 baudrate: int = SERIAL_BAUD, primary: bool = False):
+        self.owner = owner
+        self.name = name
+        self.port_name = port
+        self.baudrate = baudrate
+        self.primary = primary
+        self.calib_path = calib_path(name, primary)
+        self.calib = HandCalibrator()
+        if not self.calib.load_txt(self.calib_path) and not primary:
+            self.calib.load_txt(PRIMARY_CALIB)
+
+        self.ser: Optional[serial.Serial] = None
+        self.users = 0
+        self.offset_ms: Optional[float] = None   # horloge commune - horloge du gant
+
+        self._lines = FrameDecoder(name)
+        self._last_t: Optional[int] = None
+        self._latest_state: Optional[HandState] = None
+        self._listeners: List[Callable[[HandState], None]] = []
+
+    @property
+    def running(self) -> bool:
+        return self.ser is not None
+
+    def add_listener(self, fn: Callable[[HandState], None]):
+        """fn est appelé depuis le thread d'E/S, pour chaque état reçu de ce gant."""
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    def remove_listener(self, fn: Callable[[HandState], None]):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def start(self):
+        """Ouvre le port (lève serial.SerialException comme SerialHandReader)."""
+        if self.users == 0 or self.ser is None:
+            self.owner._open(self)
+        self.users += 1
+
+    def stop(self):
+        if self.users == 0:
+            return
+        self.users -= 1
+        if self.users == 0:
+            self.owner._close(self)
+
+    def get_latest_state(self) -> Optional[HandState]:
+        return self._latest_state
+
+    @property
+    def lines(self) -> int:
+        """Lignes valides reçues."""
+        return self._lines.lines
+
+    @property
+    def rejected(self) -> int:
+        """Lignes invalides ou trop longues."""
+        return self._lines.rejected
+
+    # ----- Thread d'E/S -----
+
+    def _align(self, state: HandState, recv_ms: float) -> float:
+        """
+        Horodatage de l'échantillon dans l'horloge commune (monotonic, ms).
+        Le décalage retenu est le plus petit recv_ms - t_ms observé : le trajet
+        le plus court (USB sans attente) ; il repart à zéro si le gant redémarre.
+        """
+        if self._last_t is not None and state.t_ms < self._last_t - RESET_MS:
+            self.offset_ms = None
+        self._last_t = state.t_ms
+        offset = recv_ms - state.t_ms
+        if self.offset_ms is None or offset < self.offset_ms:
+            self.offset_ms = offset
+        return state.t_ms + self.offset_ms
+
+
+# ---------- Boucle d'E/S ----------
+
+class MultiGloveReader:
+    """
+    Tous les gants dans un thread : un sélecteur sur les ports ouverts.
+    Le thread tourne tant qu'au moins un gant est ouvert.
+    """
+
+    def __init__(self):
+        self.streams: Dict[str, GloveStream] = {}
+        self._sel: Optional[selectors.BaseSelector] = None   # créé à la 1re ouverture
+        self._lock = threading.Lock()
+        self._wake_w = -1
+        self._thread: Optional[threading.Thread] = None
+        self._merged: List[Callable[[HandState], None]] = []
+        self._last_common = -1e18
+        self._failed: set = set()  # listeners déjà signalés en erreur
+        self.wakeups = 0          # retours de select() (stat)
+
+    @classmethod
+    def from_file(cls, path: str = DEVICES_FILE) -> "MultiGloveReader":
+        reader = cls()
+        for name, port, baud in load_devices(path):
+            reader.add_device(name, port, baud)
+        return reader
+
+    # ----- Gants -----
+
+    def add_device(self, name: str, port: str, baudrate: int = SERIAL_BAUD) -> GloveStream:
+        stream = GloveStream(self, name, port, baudrate, primary=not self.streams)
+        self.streams[name] = stream
+        return stream
+
+    @property
+    def primary(self) -> GloveStream:
+        return next(iter(self.streams.values()))
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.streams)
+
+    def stream(self, name: str) -> GloveStream:
+        return self.streams[name]
+
+    def stream_for(self, port: str, baudrate: int = SERIAL_BAUD) -> GloveStream:
+        """Flux du gant branché sur port (déclaré à la volée s'il n'est pas dans devices.txt)."""
+        for stream in self.streams.values():
+            if stream.port_name == port:
+                return stream
+        return self.add_device(os.path.basename(port), port, baudrate)
+
+    def calibs(self) -> Dict[str, HandCalibrator]:
+        return {name: s.calib for name, s in self.streams.items()}
+
+    # ----- Flux fusionné -----
+
+    def add_listener(self, fn: Callable[[HandState], None]):
+        """
+        fn reçoit les états de tous les gants : copies avec state.device et
+        t_ms dans l'horloge commune, croissant d'un gant à l'autre
+        (utilisable tel quel par une FixedStepClock).
+        """
+        if fn not in self._merged:
+            self._merged.append(fn)
+
+    def remove_listener(self, fn: Callable[[HandState], None]):
+        if fn in self._merged:
+            self._merged.remove(fn)
+
+    # ----- Ouverture / fermeture (thread Kivy) -----
+
+    def _open(self, stream: GloveStream):
+        ser = serial.Serial(stream.port_name, stream.baudrate, timeout=0)
+        stream._lines.clear()
+        with self._lock:
+            if self._sel is None:
+                self._sel = selectors.DefaultSelector()
+                wake_r, self._wake_w = os.pipe()
+                os.set_blocking(wake_r, False)
+                self._sel.register(wake_r, selectors.EVENT_READ, None)
+            stream.ser = ser
+            self._sel.register(ser.fileno(), selectors.EVENT_READ, stream)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="gloves", daemon=True)
+                self._thread.start()
+        stream._sync_device()
+        os.write(self._wake_w, b"\x01")
+
+    def _close(self, stream: GloveStream):
+        with self._lock:
+            ser, stream.ser = stream.ser, None
+            if ser is not None:
+                self._sel.unregister(ser.fileno())
+                ser.close()
+        os.write(self._wake_w, b"\x01")   # la boucle s'arrête si plus aucun gant n'est ouvert
+
+    def _active(self) -> bool:
+        return any(s.ser is not None for s in self.streams.values())
+
+    def stop(self):
+        for stream in self.streams.values():
+            stream.users = 0
+            if stream.ser is not None:
+                self._close(stream)
+
+    # ----- Thread d'E/S -----
+
+    def _loop(self):
+        try:
+            self._serve()
+        finally:
+            # erreur inattendue : le thread s'arrête, un prochain start() le relance
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def _serve(self):
+        while True:
+            events = self._sel.select(timeout=1.0)
+            self.wakeups += 1
+            ready: List[Tuple[GloveStream, List[HandState]]] = []
+            with self._lock:
+                if not self._active():
+                    self._thread = None
+                    return
+                for key, _ in events:
+                    stream = key.data
+                    if stream is None:
+                        try:
+                            os.read(key.fd, 512)
+                        except BlockingIOError:
+                            pass
+                        continue
+                    if stream.ser is None:
+                        continue   # fermé entre select() et ici
+                    try:
+                        data = os.read(key.fd, 4096)
+                    except OSError:
+                        data = b""
+                    if not data:
+                        # gant débranché : on ferme ce port, les autres continuent
+                        print(f"[GANTS] {stream.name} : port {stream.port_name} fermé")
+                        self._sel.unregister(key.fd)
+                        stream.ser.close()
+                        stream.ser = None
+                        continue
+                    states = stream._lines.feed(data)
+                    if states:
+                        ready.append((stream, states))
+            # listeners hors du verrou : ils peuvent ouvrir ou fermer un gant (start/stop)
+            for stream, states in ready:
+                self._dispatch(stream, states)
+
+    def _dispatch(self, stream: GloveStream, states: List[HandState]):
+        recv_ms = time.monotonic() * 1000.0
+        merged = self._merged
+        for state in states:
+            stream._latest_state = state
+            for fn in stream._listeners:
+                self._notify(fn, state)
+            if merged:
+                t = max(stream._align(state, recv_ms), self._last_common)
+                self._last_common = t
+                common = replace(state, t_ms=t)
+                for fn in merged:
+                    self._notify(fn, common)
+
+    def _notify(self, fn: Callable[[HandState], None], state: HandState):
+        """Un listener qui lève ne doit pas arrêter la lecture des autres gants."""
+        try:
+            fn(state)
+        except Exception:
+            if fn not in self._failed:
+                self._failed.add(fn)
+                print(f"[GANTS] erreur dans le listener {getattr(fn, '__qualname__', fn)} :")
+                traceback.print_exc()
+
+
+_shared: Optional[MultiGloveReader] = None
+
+
+def shared_reader() -> MultiGloveReader:
+    """La boucle d'E/S de l'application (gants de devices.txt), créée au premier appel."""
+    global _shared
+    if _shared is None:
+        _shared = MultiGloveReader.from_file()
+    return _shared
@@ -1,17 +1,19 @@
 from kivy.uix.screenmanager import Screen
 from kivy.properties import NumericProperty
-from kivy.clock import Clock
+from kivy.lang import Builder
 from kivy.app import App
 
 from collections import deque
 
-from serial_reader import SerialHandReader
+from frame_scheduler import StreamWaker
+from serial_reader import open_reader
 from kivy_garden.graph import Graph, LinePlot
 
+# Règles KV des écrans de suivi, chargées à l'import (donc au 1er passage sur l'écran)
+Builder.load_file("graph.kv")
+
 
 USE_ARDUINO = True
-SERIAL_PORT = "/dev/cu.usbmodem1201"
-SERIAL_BAUD = 115200
 
 
 class WristFollowUpScreen(Screen):
@@ -24,13 +26,15 @@ class WristFollowUpScreen(Screen):
     window_s = 10.0
     current_angle = NumericProperty(0.0)
     current_rate = NumericProperty(0.0)   # deg/s
+    tremor_freq = NumericProperty(0.0)    # Hz (bande 3-12 Hz)
+    tremor_amp = NumericProperty(0.0)     # deg/s RMS dans la bande
 
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
         self.serial_reader = None
-        self._event = None
+        self._waker = StreamWaker(self._update, max_fps=30.0)  # réveillé par le gant, 30 Hz max
 
         self._t = 0.0
         self._angle_deg = 0.0
@@ -85,18 +89,15 @@ class WristFollowUpScreen(Screen):
         self._ensure_graph()
 
         if USE_ARDUINO:
-            self.serial_reader = SerialHandReader(
-                port=SERIAL_PORT,
-                baudrate=SERIAL_BAUD
-            )
+            self.serial_reader = open_reader()
+            App.get_running_app().attach_stream(self.serial_reader)
+            self.serial_reader.add_listener(self._waker.on_state)
             self.serial_reader.start()
 
-        self._event = Clock.schedule_interval(self._update, 1.0 / 30.0)
+        self._waker.start()
 
     def on_leave(self):
-        if self._event is not None:
-            self._event.cancel()
-            self._event = None
+        self._waker.stop()
 
         if self.serial_reader is not None:
             self.serial_reader.stop()
@@ -124,8 +125,15 @@ class WristFollowUpScreen(Screen):
         self.current_rate = float(gx_deg_s)
         self.current_angle = float(self._angle_deg)
 
-        if "hand3d" in self.ids:
-            self.ids.hand3d.wrist_yaw = self.current_angle
+        tremor = getattr(App.get_running_app(), "tremor_gyro", None)
+        if tremor is not None:
+            self.tremor_freq = tremor.result.freq_hz
+            self.tremor_amp = tremor.result.amplitude
+
+        orientation = getattr(App.get_running_app(), "orientation", None)
+        if "hand3d" in self.ids and orientation is not None:
+            self.ids.hand3d.wrist_roll = orientation.roll
+            self.ids.hand3d.wrist_pitch = orientation.pitch
 
 
         # Limiter pour lisibilité
@@ -158,13 +166,16 @@ class FlexFollowUpScreen(Screen):
     window_s = 10.0
     current_index = NumericProperty(0.0)   # 0..1
     current_majeur = NumericProperty(0.0)  # 0..1
+    tremor_freq = NumericProperty(0.0)     # Hz (bande 3-12 Hz)
+    tremor_amp = NumericProperty(0.0)      # RMS brut du flex index dans la bande
 
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.serial_reader = None
-        self._event = None
+        self._waker = StreamWaker(self._update, max_fps=30.0)  # réveillé par le gant, 30 Hz max
         self._t = 0.0
+        self._last_state = None
         self._samples = deque()
 
         self.graph = None
@@ -202,19 +213,20 @@ class FlexFollowUpScreen(Screen):
 
     def on_pre_enter(self):
         self._t = 0.0
+        self._last_state = None
         self._samples.clear()
         self._ensure_graph()
 
         if USE_ARDUINO:
-            self.serial_reader = SerialHandReader(port=SERIAL_PORT, baudrate=SERIAL_BAUD)
+            self.serial_reader = open_reader()
+            App.get_running_app().attach_stream(self.serial_reader)
+            self.serial_reader.add_listener(self._waker.on_state)
             self.serial_reader.start()
 
-        self._event = Clock.schedule_interval(self._update, 1.0 / 30.0)
+        self._waker.start()
 
     def on_leave(self):
-        if self._event is not None:
-            self._event.cancel()
-            self._event = None
+        self._waker.stop()
         if self.serial_reader is not None:
             self.serial_reader.stop()
             self.serial_reader = None
@@ -225,8 +237,9 @@ class FlexFollowUpScreen(Screen):
 
         self._t += dt
         state = self.serial_reader.get_latest_state()
-        if state is None:
-            return
+        if state is None or state is self._last_state:
+            return  # rien de nouveau : pas de reconstruction du graphe
+        self._last_state = state
 
         calib = getattr(App.get_running_app(), "calib", None)
 
@@ -242,9 +255,14 @@ class FlexFollowUpScreen(Screen):
         self.current_index = float(index_n)
         self.current_majeur = float(majeur_n)
 
+        tremor = getattr(App.get_running_app(), "tremor_flex", None)
+        if tremor is not None:
+            self.tremor_freq = tremor.result.freq_hz
+            self.tremor_amp = tremor.result.amplitude
+
         if "hand3d" in self.ids:
             self.ids.hand3d.flex_index = self.current_index
-            self.ids.hand3d.flex_index = 0.5
+            self.ids.hand3d.flex_majeur = self.current_majeur
 
 
 
@@ -267,8 +285,9 @@ class PressureFollowUpScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.serial_reader = None
-        self._event = None
+        self._waker = StreamWaker(self._update, max_fps=30.0)  # réveillé par le gant, 30 Hz max
         self._t = 0.0
+        self._last_state = None
         self._samples = deque()
 
         self.graph = None
@@ -303,19 +322,20 @@ class PressureFollowUpScreen(Screen):
 
     def on_pre_enter(self):
         self._t = 0.0
+        self._last_state = None
         self._samples.clear()
         self._ensure_graph()
 
         if USE_ARDUINO:
-            self.serial_reader = SerialHandReader(port=SERIAL_PORT, baudrate=SERIAL_BAUD)
+            self.serial_reader = open_reader()
+            App.get_running_app().attach_stream(self.serial_reader)
+            self.serial_reader.add_listener(self._waker.on_state)
             self.serial_reader.start()
 
-        self._event = Clock.schedule_interval(self._update, 1.0 / 30.0)
+        self._waker.start()
 
     def on_leave(self):
-        if self._event is not None:
-            self._event.cancel()
-            self._event = None
+        self._waker.stop()
         if self.serial_reader is not None:
             self.serial_reader.stop()
             self.serial_reader = None
@@ -326,8 +346,9 @@ class PressureFollowUpScreen(Screen):
 
         self._t += dt
         state = self.serial_reader.get_latest_state()
-        if state is None:
-            return
+        if state is None or state is self._last_state:
+            return  # rien de nouveau : pas de reconstruction du graphe
+        self._last_state = state
 
         calib = getattr(App.get_running_app(), "calib", None)
 
@@ -338,6 +359,9 @@ class PressureFollowUpScreen(Screen):
 
         self.current_pressure = float(p_n)
 
+        if "hand3d" in self.ids:
+            self.ids.hand3d.pinch = self.current_pressure
+
 
         self._samples.append((self._t, p_n))
         while self._samples and (self._t - self._samples[0][0]) > self.window_s:
@@ -6,52 +6,172 @@ from kivy.graphics import RenderContext, Mesh, Callback
 from kivy.graphics.opengl import glEnable, glDisable, GL_DEPTH_TEST
 from kivy.graphics.transformation import Matrix
 
+from frame_scheduler import FrameScheduler
+
 
 # GLSL core (macOS): in/out + version
+#
+# Skinning rigide dans le vertex shader : chaque sommet connaît son doigt
+# (vBone.x), sa phalange (vBone.y, 0 = paume), les longueurs des phalanges
+# de son doigt (vLens) et la base du doigt (vBase.xyz + rotation vBase.w).
+# La pose ne passe que par des uniforms (u_curl, u_thumb, u_mv) : changer
+# de pose ne reconstruit jamais la géométrie.
 VERT_SHADER = """
 #version 150
 
 in vec3 vPosition;
+in vec3 vNormal;
+in vec2 vBone;
+in vec3 vLens;
+in vec4 vBase;
 
 uniform mat4 u_mv;
 uniform mat4 u_proj;
+uniform vec4 u_curl;    // index, majeur, annulaire, auriculaire (0..1)
+uniform float u_thumb;  // pouce (0..1)
+
+out float v_light;
+
+// flexion max par articulation : MCP, PIP, DIP (radians)
+const vec3 JOINT_MAX = vec3(1.45, 1.65, 1.15);
+
+mat3 rot_x(float a) {
+    float c = cos(a);
+    float s = sin(a);
+    return mat3(1.0, 0.0, 0.0,  0.0, c, s,  0.0, -s, c);
+}
+
+mat3 rot_z(float a) {
+    float c = cos(a);
+    float s = sin(a);
+    return mat3(c, s, 0.0,  -s, c, 0.0,  0.0, 0.0, 1.0);
+}
 
 void main() {
-    gl_Position = u_proj * u_mv * vec4(vPosition, 1.0);
+    int finger = int(vBone.x + 0.5);
+    int seg = int(vBone.y + 0.5);
+
+    float curl = u_thumb;
+    if (finger == 1) curl = u_curl.x;
+    else if (finger == 2) curl = u_curl.y;
+    else if (finger == 3) curl = u_curl.z;
+    else if (finger == 4) curl = u_curl.w;
+
+    vec3 p = vPosition;
+    vec3 n = vNormal;
+
+    // chaîne articulaire : de la phalange du sommet jusqu'à la base du doigt
+    for (int k = 3; k >= 1; k--) {
+        if (k > seg) continue;
+        mat3 r = rot_x(-curl * JOINT_MAX[k - 1]);
+        p = r * p;
+        n = r * n;
+        if (k > 1) p.y += vLens[k - 2];
+    }
+    if (seg > 0) {
+        mat3 rz = rot_z(vBase.w);
+        p = rz * p + vBase.xyz;
+        n = rz * n;
+    }
+
+    vec3 n_eye = normalize(mat3(u_mv) * n);
+    v_light = 0.35 + 0.65 * max(dot(n_eye, normalize(vec3(0.3, 0.5, 1.0))), 0.0);
+    gl_Position = u_proj * u_mv * vec4(p, 1.0);
 }
 """
 
 FRAG_SHADER = """
 #version 150
 
+in float v_light;
 out vec4 fragColor;
 uniform vec4 u_color;
 
 void main() {
-    fragColor = u_color;
+    fragColor = vec4(u_color.rgb * v_light, u_color.a);
 }
 """
 
 
-def cube_vertices(size=1.0):
-    s = size / 2.0
-    verts = [
-        -s, -s, -s,   s, -s, -s,   s,  s, -s,  -s,  s, -s,
-        -s, -s,  s,   s, -s,  s,   s,  s,  s,  -s,  s,  s,
-    ]
-    idx = [
-        0, 1, 2,  2, 3, 0,
-        4, 5, 6,  6, 7, 4,
-        0, 4, 7,  7, 3, 0,
-        1, 5, 6,  6, 2, 1,
-        3, 2, 6,  6, 7, 3,
-        0, 1, 5,  5, 4, 0,
-    ]
+# ---------- Géométrie (construite une seule fois) ----------
+
+# (base x, base y, rotation de la base en rad, longueurs MCP/PIP/DIP, largeur)
+# 0 = pouce, 1 = index, 2 = majeur, 3 = annulaire, 4 = auriculaire
+FINGERS = [
+    (-0.42, -0.20, 0.75, (0.30, 0.26, 0.20), 0.17),
+    (-0.30, 0.50, 0.05, (0.38, 0.24, 0.18), 0.15),
+    (-0.10, 0.52, 0.00, (0.42, 0.27, 0.19), 0.15),
+    (0.10, 0.50, -0.04, (0.39, 0.25, 0.18), 0.14),
+    (0.29, 0.45, -0.10, (0.30, 0.19, 0.16), 0.12),
+]
+PALM = ((-0.42, -0.50, -0.10), (0.40, 0.50, 0.10))
+VERTEX_FORMAT = [
+    ("vPosition", 3, "float"),
+    ("vNormal", 3, "float"),
+    ("vBone", 2, "float"),
+    ("vLens", 3, "float"),
+    ("vBase", 4, "float"),
+]
+
+# 6 faces : (normale, 4 coins en indices min/max par axe)
+_FACES = [
+    ((0, 0, -1), ((0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0))),
+    ((0, 0, 1), ((0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1))),
+    ((-1, 0, 0), ((0, 0, 0), (0, 1, 0), (0, 1, 1), (0, 0, 1))),
+    ((1, 0, 0), ((1, 0, 0), (1, 1, 0), (1, 1, 1), (1, 0, 1))),
+    ((0, -1, 0), ((0, 0, 0), (1, 0, 0), (1, 0, 1), (0, 0, 1))),
+    ((0, 1, 0), ((0, 1, 0), (1, 1, 0), (1, 1, 1), (0, 1, 1))),
+]
+
+
+def _box(verts, idx, lo, hi, bone, lens, base):
+    """Ajoute une boîte (normales par face) avec ses attributs de skinning."""
+    for normal, corners in _FACES:
+        start = len(verts) // 15
+        for c in corners:
+            pos = [hi[a] if c[a] else lo[a] for a in range(3)]
+            verts.extend(pos)
+            verts.extend(normal)
+            verts.extend(bone)
+            verts.extend(lens)
+            verts.extend(base)
+        idx.extend([start, start + 1, start + 2, start + 2, start + 3, start])
+
+
+def hand_geometry():
+    """Main low-poly : paume + 5 doigts à 3 phalanges (positions locales)."""
+    verts, idx = [], []
+    _box(verts, idx, PALM[0], PALM[1], (0, 0), (0, 0, 0), (0, 0, 0, 0))
+    for f, (bx, by, angle, lens, width) in enumerate(FINGERS):
+        w = width / 2.0
+        t = 0.85 * w
+        for seg in (1, 2, 3):
+            length = lens[seg - 1] * 0.96  # petit jour entre phalanges
+            _box(verts, idx, (-w, 0.0, -t), (w, length, t), (f, seg), lens, (bx, by, 0.0, angle))
+            w *= 0.9
+            t *= 0.9
     return verts, idx
 
 
 class Hand3DView(Widget):
-    wrist_yaw = NumericProperty(0.0)  # degrés
+    """
+    Main 3D articulée. Les entrées sont de simples propriétés ; chacune ne
+    fait qu'envoyer un ou deux uniforms.
+      - flex_index / flex_majeur / pinch : 0..1
+      - wrist_roll / wrist_pitch / wrist_yaw : degrés (cf. orientation.py)
+    Annulaire et auriculaire suivent le majeur (synergie), le pouce suit la pince.
+
+    Les changements sont regroupés et envoyés au plus une fois par frame,
+    seulement quand l'écran qui contient la vue est affiché (FrameScheduler).
+    """
+
+    wrist_roll = NumericProperty(0.0)   # degrés, autour de l'avant-bras
+    wrist_pitch = NumericProperty(0.0)  # degrés, flexion / extension
+    wrist_yaw = NumericProperty(0.0)    # degrés, inclinaison radiale / ulnaire
+    flex_index = NumericProperty(0.0)   # 0..1
+    flex_majeur = NumericProperty(0.0)  # 0..1
+    pinch = NumericProperty(0.0)        # 0..1
+    max_fps = NumericProperty(0.0)      # 0 = pas de limite
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -71,14 +191,14 @@ class Hand3DView(Widget):
                 pass
             raise
 
-        verts, idx = cube_vertices(size=1.0)
+        verts, idx = hand_geometry()
 
         with self.canvas:
             Callback(self._enable_depth)
             self._mesh = Mesh(
                 vertices=verts,
                 indices=idx,
-                fmt=[("vPosition", 3, "float")],
+                fmt=VERTEX_FORMAT,
                 mode="triangles",
             )
             Callback(self._disable_depth)
@@ -86,11 +206,16 @@ class Hand3DView(Widget):
         # Couleur “peau” claire
         self.canvas["u_color"] = (0.92, 0.88, 0.82, 1.0)
 
-        self.bind(pos=self._update_matrices, size=self._update_matrices)
-        self.bind(wrist_yaw=self._update_matrices)
-        Clock.schedule_interval(lambda dt: setattr(self, "wrist_yaw", self.wrist_yaw + 30*dt), 1/60)
+        # uniforms à renvoyer au prochain redessin
+        self._dirty = {"proj", "mv", "pose"}
+        self._frames = FrameScheduler(self, self._flush, self.max_fps)
+
+        self.bind(pos=self._mark_proj, size=self._mark_proj)
+        self.bind(wrist_roll=self._mark_mv, wrist_pitch=self._mark_mv, wrist_yaw=self._mark_mv)
+        self.bind(flex_index=self._mark_pose, flex_majeur=self._mark_pose, pinch=self._mark_pose)
+        self.bind(max_fps=lambda *_: setattr(self._frames, "max_fps", self.max_fps))
 
-        Clock.schedule_once(lambda *_: self._update_matrices(), 0)
+        Clock.schedule_once(lambda *_: self._frames.request(), 0)
 
     def _enable_depth(self, *args):
         glEnable(GL_DEPTH_TEST)
@@ -98,16 +223,48 @@ class Hand3DView(Widget):
     def _disable_depth(self, *args):
         glDisable(GL_DEPTH_TEST)
 
-    def _update_matrices(self, *args):
+    def _mark_proj(self, *args):
+        self._dirty.add("proj")
+        self._frames.request()
+
+    def _mark_mv(self, *args):
+        self._dirty.add("mv")
+        self._frames.request()
+
+    def _mark_pose(self, *args):
+        self._dirty.add("pose")
+        self._frames.request()
+
+    def _flush(self):
+        dirty, self._dirty = self._dirty, set()
+        if "proj" in dirty:
+            self._update_projection()
+        if "mv" in dirty:
+            self._update_modelview()
+        if "pose" in dirty:
+            self._update_pose()
+
+    def _update_projection(self, *args):
         aspect = max(1e-3, self.width / float(self.height if self.height else 1))
-        proj = Matrix().perspective(45.0, aspect, 0.1, 100.0)
+        self.canvas["u_proj"] = Matrix().perspective(45.0, aspect, 0.1, 100.0)
 
+    def _update_modelview(self, *args):
+        deg = 0.01745329252
         mv = Matrix().identity()
-        mv = mv.translate(0, 0, -3.0)
+        mv = mv.translate(0, -0.25, -3.4)
         mv = mv.rotate(-0.5, 1, 0, 0)  # tilt
-        mv = mv.rotate(self.wrist_yaw * 0.01745329252, 0, 0, 1)
+        mv = mv.rotate(self.wrist_yaw * deg, 0, 0, 1)
+        mv = mv.rotate(self.wrist_pitch * deg, 1, 0, 0)
+        mv = mv.rotate(self.wrist_roll * deg, 0, 1, 0)
         mv = mv.scale(1.4, 1.4, 1.4)
-
-        self.canvas["u_proj"] = proj
         self.canvas["u_mv"] = mv
 
+    def _update_pose(self, *args):
+        index = _clamp01(self.flex_index)
+        majeur = _clamp01(self.flex_majeur)
+        self.canvas["u_curl"] = (index, majeur, 0.9 * majeur, 0.8 * majeur)
+        self.canvas["u_thumb"] = 0.25 + 0.6 * _clamp01(self.pinch)
+
+
+def _clamp01(x: float) -> float:
+    return 0.0 if x < 0.0 else (1.0 if x > 1.0 else float(x))
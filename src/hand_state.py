@@ -16,6 +16,7 @@ class HandState:
     gx: float
     gy: float
     gz: float
+    device: str = ""   # nom du gant (gloves.py), vide avec un seul gant
 
     @staticmethod
     def from_csv_line(line: str) -> Optional["HandState"]:
@@ -55,6 +56,15 @@ class HandState:
             # Une des valeurs ne se convertit pas -> on ignore
             return None
 
+    def to_csv_line(self) -> str:
+        """
+        Inverse de from_csv_line (même format que le firmware).
+        """
+        return (
+            f"{self.t_ms},{self.flex_thumb},{self.flex_index},{self.fsr_thumb},{self.fsr_index},"
+            f"{self.ax:.6f},{self.ay:.6f},{self.az:.6f},{self.gx:.6f},{self.gy:.6f},{self.gz:.6f}"
+        )
+
     def steering_from_gyro(self, sensitivity_deg_per_s: float = 90.0) -> float:
         """
         Calcule une commande de direction à partir du gyroscope.
@@ -70,6 +80,48 @@ class HandState:
         return raw
 
 
+class CsvLineBuffer:
+    """
+    Découpe un flux d'octets (port série, pty, socket) en HandState : les
+    lignes incomplètes sont gardées pour le prochain feed(). Pour les lecteurs
+    non bloquants (gloves.py, aio_reader.py).
+    """
+
+    MAX_LINE = 256   # ligne sans fin de ligne plus longue : bruit, jetée
+
+    def __init__(self, device: str = ""):
+        self.device = device
+        self.lines = 0      # lignes valides
+        self.rejected = 0   # lignes invalides ou trop longues
+        self._buf = bytearray()
+
+    def clear(self):
+        self._buf.clear()
+
+    def feed(self, data: bytes) -> List[HandState]:
+        buf = self._buf
+        buf += data
+        out = []
+        start = 0
+        while True:
+            end = buf.find(b"\n", start)
+            if end < 0:
+                break
+            state = HandState.from_csv_line(buf[start:end].decode(errors="ignore"))
+            start = end + 1
+            if state is None:
+                self.rejected += 1
+                continue
+            state.device = self.device
+            out.append(state)
+        del buf[:start]
+        if len(buf) > self.MAX_LINE:
+            buf.clear()
+            self.rejected += 1
+        self.lines += len(out)
+        return out
+
+
 class HandCalibrator:
     """
     Gère les min/max pour normaliser les valeurs des capteurs en [0, 1].
@@ -0,0 +1,220 @@
+# headless.py
+"""
+Rejeu des séances enregistrées dans les trois jeux, sans fenêtre ni GL.
+
+Chaque séance CSV est poussée dans la même FixedStepClock que l'écran Kivy
+(même grille de pas, mêmes échantillons par pas) puis la logique de jeu
+(game_logic.py) tourne aussi vite que possible. Sert aux tests de
+non-régression (score, événements) et au profilage de la logique seule.
+
+Usage :
+    python headless.py sessions/ -o scores.csv --events evenements.csv
+    python headless.py sessions/ --game jump --seed 3 -j 4
+    python headless.py sessions/ --game rhythm --events jugements.csv
+    python headless.py sessions/ --bench
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from batch_analytics import _load_calib, find_sessions
+from game_logic import CarGameCore, JumpGameCore, PianoGameCore, RhythmCore, load_latency, png_ratio
+from session import read_session
+from simulation import STEP_HZ, FixedStepClock
+
+
+GAMES = ("car", "jump", "piano", "rhythm")
+
+# Taille de la fenêtre Kivy par défaut (le jeu voiture dépend de la largeur)
+SCREEN_SIZE = (800.0, 600.0)
+OBSTACLE_SOURCES = ["assets/obstacle_cone.png", "assets/obstacle_pothole.png"]
+
+COLUMNS = [
+    "patient", "session", "game", "n_samples", "sim_s", "ticks",
+    "score", "faults", "n_events",
+    "tick_mean_us", "tick_p99_us", "tick_max_us", "speedup",
+]
+EVENT_COLUMNS = ["patient", "session", "game", "t", "kind", "value", "label", "t_ms"]
+
+
+def make_core(game: str, calib, seed: int):
+    if game == "car":
+        ratios = [png_ratio(src) for src in OBSTACLE_SOURCES]
+        return CarGameCore(*SCREEN_SIZE, ratios=ratios, seed=seed)
+    if game == "jump":
+        return JumpGameCore(calib, seed=seed, view_w=SCREEN_SIZE[0])
+    if game == "piano":
+        return PianoGameCore(calib, seed=seed)
+    if game == "rhythm":
+        return RhythmCore(calib, seed=seed, latency_ms=load_latency())
+    raise ValueError(f"jeu inconnu : {game}")
+
+
+def _score(game: str, core) -> Tuple[float, int]:
+    """(score, fautes) : distance et collisions pour la voiture, rochers touchés (jump), notes ratées (piano)."""
+    if game == "car":
+        return round(core.distance, 2), core.collisions
+    if game in ("piano", "rhythm"):
+        return core.score, core.misses
+    return core.score, core.hits
+
+
+def simulate(game: str, states, calib, seed: int = 0, step_hz: float = STEP_HZ):
+    """
+    Rejoue states dans un jeu. Renvoie (core, durées des pas en ns).
+    Pas de retard de lecture (delay_ms=0) : la grille de pas est la même
+    qu'à l'écran, mais tous les échantillons sont consommés.
+    """
+    core = make_core(game, calib, seed)
+    step = core.step
+    timings: List[int] = []
+    clock_ns = time.perf_counter_ns
+
+    def on_step(dt, samples):
+        t0 = clock_ns()
+        step(dt, samples)
+        timings.append(clock_ns() - t0)
+
+    sim = FixedStepClock(on_step, step_s=1.0 / step_hz, delay_ms=0.0, realtime=False,
+                         interpolate=core.interpolated_input)
+    for state in states:
+        sim.push(state)
+    sim.advance(0.0)
+    return core, timings
+
+
+def replay_session(job: Tuple[str, str, str, Optional[str], int, bool]) -> Tuple[dict, List[dict]]:
+    """Worker : une séance x un jeu -> une ligne de résultats (+ événements si demandés)."""
+    patient, path, game, default_calib, seed, keep_events = job
+    states = read_session(path)
+    calib = _load_calib(path, default_calib)
+
+    t0 = time.perf_counter()
+    core, timings = simulate(game, states, calib, seed)
+    wall = time.perf_counter() - t0
+
+    ticks = np.asarray(timings, dtype=np.float64) / 1000.0
+    score, faults = _score(game, core)
+    session = os.path.basename(path)
+    row = {
+        "patient": patient,
+        "session": session,
+        "game": game,
+        "n_samples": len(states),
+        "sim_s": round(core.t, 3),
+        "ticks": ticks.size,
+        "score": score,
+        "faults": faults,
+        "n_events": len(core.events),
+        "tick_mean_us": round(float(ticks.mean()), 2) if ticks.size else 0.0,
+        "tick_p99_us": round(float(np.percentile(ticks, 99)), 2) if ticks.size else 0.0,
+        "tick_max_us": round(float(ticks.max()), 2) if ticks.size else 0.0,
+        "speedup": round(core.t / wall, 1) if wall > 0 else 0.0,
+    }
+    events = []
+    if keep_events:
+        events = [
+            {"patient": patient, "session": session, "game": game,
+             "t": round(e.t, 4), "kind": e.kind, "value": round(e.value, 4), "label": e.label,
+             "t_ms": e.t_ms}
+            for e in core.events
+        ]
+    return row, events
+
+
+def run(root: str, games, workers: int, default_calib: Optional[str] = None,
+        seed: int = 0, keep_events: bool = False) -> Tuple[List[dict], List[dict]]:
+    jobs = [
+        (patient, path, game, default_calib, seed, keep_events)
+        for patient, path in find_sessions(root)
+        for game in games
+    ]
+    if workers <= 1:
+        results = [replay_session(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(replay_session, jobs, chunksize=1))
+    rows = [r for r, _ in results]
+    events = [e for _, evs in results for e in evs]
+    return rows, events
+
+
+def write_rows(rows: List[dict], out, columns=COLUMNS):
+    writer = csv.DictWriter(out, fieldnames=columns)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+
+
+def bench(root: str, games, max_workers: int, default_calib: Optional[str], seed: int):
+    """Pas simulés par seconde et facteur temps réel pour 1, 2, 4... workers."""
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+
+    base = None
+    print(f"{'workers':>8} {'temps (s)':>10} {'pas/s':>12} {'x temps réel':>13} {'accél.':>7}")
+    for n in counts:
+        t0 = time.perf_counter()
+        rows, _ = run(root, games, n, default_calib, seed)
+        elapsed = time.perf_counter() - t0
+        ticks = sum(r["ticks"] for r in rows)
+        sim_s = sum(r["sim_s"] for r in rows)
+        rate = ticks / elapsed if elapsed > 0 else 0.0
+        base = base or rate
+        print(f"{n:>8} {elapsed:>10.2f} {rate:>12.0f} {sim_s / elapsed:>12.0f}x {rate / base:>6.2f}x")
+
+    # coût d'un pas par jeu (séquentiel, même machine)
+    rows, _ = run(root, games, 1, default_calib, seed)
+    for game in games:
+        mine = [r for r in rows if r["game"] == game]
+        if mine:
+            mean = sum(r["tick_mean_us"] * r["ticks"] for r in mine) / max(1, sum(r["ticks"] for r in mine))
+            p99 = max(r["tick_p99_us"] for r in mine)
+            print(f"{game:>8} : {mean:.1f} µs/pas en moyenne, p99 max {p99:.1f} µs")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rejoue les séances enregistrées dans les jeux, sans fenêtre.")
+    parser.add_argument("root", help="dossier des séances (un sous-dossier par patient)")
+    parser.add_argument("--game", choices=GAMES + ("all",), default="all")
+    parser.add_argument("-o", "--output", help="fichier CSV des scores (stdout par défaut)")
+    parser.add_argument("--events", help="fichier CSV des événements (sauts, collisions, notes...)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--calib", help="calibration.txt par défaut si le patient n'en a pas")
+    parser.add_argument("--seed", type=int, default=0, help="graine des obstacles / séquences de notes")
+    parser.add_argument("--bench", action="store_true", help="mesure le débit selon le nombre de workers")
+    args = parser.parse_args(argv)
+
+    games = GAMES if args.game == "all" else (args.game,)
+
+    if args.bench:
+        bench(args.root, games, args.workers, args.calib, args.seed)
+        return 0
+
+    rows, events = run(args.root, games, args.workers, args.calib, args.seed, bool(args.events))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            write_rows(rows, f)
+    else:
+        write_rows(rows, sys.stdout)
+    if args.events:
+        with open(args.events, "w", encoding="utf-8", newline="") as f:
+            write_rows(events, f, EVENT_COLUMNS)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
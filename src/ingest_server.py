@@ -0,0 +1,607 @@
+# ingest_server.py
+"""
+Serveur de collecte de la clinique : les postes (un gant chacun) envoient
+leur flux en TCP, le serveur range tout par séance.
+
+    python ingest_server.py serve --root collecte/ --workers 8
+    python ingest_server.py load --host serveur --stations 300 --rate 500
+    python ingest_server.py bench --stations 200 --rate 0     # débit selon workers
+
+Protocole : une connexion = une séance. Flux du firmware (lignes CSV,
+réduites aux canaux actifs ou trames binaires : device_protocol.FrameDecoder),
+précédé éventuellement de
+    #GANT station=<poste> session=<séance>
+Sans cette ligne : poste = adresse du client, séance = heure de connexion
+(un pont série -> TCP comme socat suffit pour un poste sans l'app). Le
+serveur envoie alors !RESET au gant : il a pu garder le format ou les
+canaux d'une autre séance.
+
+Stockage : <root>/<poste>/<séance>/chunk_00000.csv, chunk_00001.csv...
+(chunk_samples échantillons par bloc, en-tête CSV de session.py : le
+dossier de séance se relit d'un bloc avec read_session / iter_session_chunks
+et compte pour une séance dans batch_analytics). Une reconnexion à la même
+séance ouvre un nouveau bloc.
+
+Écritures groupées : les connexions ne touchent pas au disque, elles
+ajoutent leurs lignes à la séance. Toutes les commit_ms, une tâche prend
+tout ce qui attend, pour toutes les séances, et l'écrit d'un bloc dans un
+thread (la boucle continue de lire ; fsync en option, une fois par séance
+et par commit). Une séance qui a plus de max_pending lignes en attente
+(disque en retard) n'est plus lue jusqu'au commit suivant : TCP ralentit
+le poste au lieu de remplir la mémoire.
+
+Plusieurs cœurs : `workers` processus, chacun avec sa boucle asyncio, sur
+le même port (SO_REUSEPORT : le noyau répartit les connexions). Sans
+SO_REUSEPORT (Windows) : un seul worker.
+
+Par connexion (stats(), agrégées toutes les report_s) : échantillons/s,
+ko/s, retard du flux (heure du serveur - t_ms du poste, par rapport au
+premier échantillon : grandit si le poste, le réseau ou le serveur ne
+suit pas) et lignes pas encore écrites.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import queue
+import re
+import signal
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from device_protocol import FrameDecoder
+from hand_state import HandState
+from session import CSV_HEADER
+
+DEFAULT_PORT = 9760
+HELLO = b"#GANT"
+CHUNK_SAMPLES = 60_000            # 1 min à 1 kHz par bloc
+MAX_HELLO = 256
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def safe_name(text: str) -> str:
+    """Nom de poste / séance utilisable comme dossier (pas de '..' ni de '/')."""
+    name = _UNSAFE.sub("_", text).strip("._")
+    return name[:64] or "inconnu"
+
+
+def parse_hello(line: bytes) -> Dict[str, str]:
+    """'#GANT station=p01 session=s1' -> {'station': 'p01', 'session': 's1'}."""
+    fields = {}
+    for item in line.decode("utf-8", errors="ignore").split()[1:]:
+        key, sep, value = item.partition("=")
+        if sep:
+            fields[key] = value
+    return fields
+
+
+# ---------- Stockage ----------
+
+class SessionStore:
+    """
+    Une séance sur disque. append()/take() dans la boucle, write() dans le
+    thread d'écriture (un seul : les commits d'un worker sont en série).
+    """
+
+    def __init__(self, directory: str, chunk_samples: int = CHUNK_SAMPLES, fsync: bool = False):
+        self.directory = directory
+        self.chunk_samples = chunk_samples
+        self.fsync = fsync
+        self.pending: List[str] = []
+        self.refs = 0              # connexions ouvertes sur la séance
+        self.committed = 0
+        self.chunks = 0
+        self._file = None
+        self._in_chunk = 0
+
+    def append(self, lines: List[str]):
+        self.pending.extend(lines)
+
+    def take(self) -> List[str]:
+        lines, self.pending = self.pending, []
+        return lines
+
+    def write(self, lines: List[str]):
+        while lines:
+            if self._file is None or self._in_chunk >= self.chunk_samples:
+                self._next_chunk()
+            room = self.chunk_samples - self._in_chunk
+            part, lines = lines[:room], lines[room:]
+            self._file.write("\n".join(part) + "\n")
+            self._in_chunk += len(part)
+            self.committed += len(part)
+        if self._file is not None:
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def _next_chunk(self):
+        self.close()
+        os.makedirs(self.directory, exist_ok=True)
+        index = sum(1 for name in os.listdir(self.directory) if name.startswith("chunk_"))
+        # "x" : un autre worker (SO_REUSEPORT) peut créer le même morceau entre-temps
+        while True:
+            try:
+                self._file = open(os.path.join(self.directory, f"chunk_{index:05d}.csv"), "x", encoding="utf-8")
+                break
+            except FileExistsError:
+                index += 1
+        self._file.write(CSV_HEADER + "\n")
+        self._in_chunk = 0
+        self.chunks += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _write_group(group: List[Tuple[SessionStore, List[str]]], closing: List[SessionStore]):
+    """Thread d'écriture : un commit groupé."""
+    for store, lines in group:
+        store.write(lines)
+    for store in closing:
+        store.close()
+
+
+# ---------- Connexions ----------
+
+class IngestConnection(asyncio.Protocol):
+    """Un poste : découpe les lignes, les passe à sa séance, mesure débit et retard."""
+
+    def __init__(self, server: "IngestServer"):
+        self.server = server
+        self.transport = None
+        self.peer = "?"
+        self.station = ""
+        self.session = ""
+        self.store: Optional[SessionStore] = None
+        self.samples = 0
+        self.bytes = 0
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.paused = False
+        self.pauses = 0
+        self._lines: Optional[FrameDecoder] = None
+        self._head = bytearray()          # avant la 1re ligne : ligne #GANT ou pas ?
+        self._offset_ms: Optional[float] = None
+        self._opened = time.perf_counter()
+        self._win = (self._opened, 0, 0)  # (instant, échantillons, octets) au dernier stats()
+
+    # ----- asyncio.Protocol -----
+
+    def connection_made(self, transport):
+        self.transport = transport
+        peer = transport.get_extra_info("peername")
+        self.peer = f"{peer[0]}:{peer[1]}" if peer else "?"
+        self.server.connections.add(self)
+
+    def data_received(self, data: bytes):
+        self.bytes += len(data)
+        if self.store is None:
+            self._head += data
+            end = self._head.find(b"\n")
+            if end < 0 and len(self._head) < MAX_HELLO:
+                return
+            data, self._head = bytes(self._head), None
+            fields = {}
+            if data.startswith(HELLO):
+                fields = parse_hello(data[:end])
+                data = data[end + 1:]
+            self._start(fields)
+
+        states = self._lines.feed(data)
+        if not states:
+            return
+        now_ms = time.perf_counter() * 1000.0
+        if self._offset_ms is None:
+            self._offset_ms = now_ms - states[0].t_ms
+        self.lag_ms = now_ms - self._offset_ms - states[-1].t_ms
+        self.max_lag_ms = max(self.max_lag_ms, self.lag_ms)
+        self.samples += len(states)
+
+        store = self.store
+        store.append([s.to_csv_line() for s in states])
+        if len(store.pending) > self.server.max_pending and not self.paused:
+            # le disque ne suit pas : on ne lit plus ce poste jusqu'au commit
+            self.transport.pause_reading()
+            self.paused = True
+            self.pauses += 1
+
+    def connection_lost(self, exc):
+        self.server.connections.discard(self)
+        if self.store is not None:
+            self.store.refs -= 1
+
+    # ----- Interne -----
+
+    def _start(self, fields: Dict[str, str]):
+        self.station = safe_name(fields.get("station") or self.peer.rpartition(":")[0])
+        self.session = safe_name(fields.get("session") or time.strftime("session_%Y%m%d_%H%M%S"))
+        self._lines = FrameDecoder(self.station)
+        if not fields:
+            self.transport.write(b"!RESET\n")   # pont série -> TCP : le gant lui-même
+        self.store = self.server.open_session(self.station, self.session)
+
+    def resume_if_drained(self):
+        if self.paused and len(self.store.pending) <= self.server.max_pending:
+            self.paused = False
+            self.transport.resume_reading()
+
+    def stats(self) -> dict:
+        now = time.perf_counter()
+        t, samples, nbytes = self._win
+        dt = max(now - t, 1e-6)
+        self._win = (now, self.samples, self.bytes)
+        return {"peer": self.peer, "station": self.station, "session": self.session,
+                "samples": self.samples, "rate": (self.samples - samples) / dt,
+                "kbps": (self.bytes - nbytes) * 8 / 1000.0 / dt,
+                "lag_ms": round(self.lag_ms, 1), "max_lag_ms": round(self.max_lag_ms, 1),
+                "pending": len(self.store.pending) if self.store is not None else 0,
+                "pauses": self.pauses,
+                "rejected": self._lines.rejected if self._lines is not None else 0}
+
+
+# ---------- Serveur (un worker) ----------
+
+class IngestServer:
+    """Une boucle asyncio : accepte les postes et fait les commits groupés."""
+
+    def __init__(self, root: str, commit_ms: float = 50.0, max_pending: int = 20_000,
+                 chunk_samples: int = CHUNK_SAMPLES, fsync: bool = False):
+        self.root = root
+        self.commit_s = commit_ms / 1000.0
+        self.max_pending = max_pending
+        self.chunk_samples = chunk_samples
+        self.fsync = fsync
+
+        self.connections: Set[IngestConnection] = set()
+        self.sessions: Dict[Tuple[str, str], SessionStore] = {}
+        self.commits = 0
+        self.committed = 0            # lignes écrites
+        self.commit_ms = 0.0          # durée du dernier commit (thread d'écriture)
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._committer: Optional[asyncio.Task] = None
+        self._disk = ThreadPoolExecutor(1, thread_name_prefix="ingest-disk")
+
+    def open_session(self, station: str, session: str) -> SessionStore:
+        key = (station, session)
+        store = self.sessions.get(key)
+        if store is None:
+            store = SessionStore(os.path.join(self.root, station, session), self.chunk_samples, self.fsync)
+            self.sessions[key] = store
+        store.refs += 1
+        return store
+
+    async def start(self, host: str = "0.0.0.0", port: int = DEFAULT_PORT, reuse_port: bool = False):
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(lambda: IngestConnection(self), host, port,
+                                                reuse_port=reuse_port or None, backlog=1024)
+        self._committer = loop.create_task(self._commit_loop())
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def _commit_loop(self):
+        while True:
+            await asyncio.sleep(self.commit_s)
+            await self.commit()
+
+    async def commit(self):
+        """Écrit d'un bloc ce qui attend dans toutes les séances ; ferme les séances quittées."""
+        group = [(store, store.take()) for store in self.sessions.values() if store.pending]
+        closing = [store for store in self.sessions.values() if store.refs <= 0]
+        if group or closing:
+            t0 = time.perf_counter()
+            await asyncio.get_running_loop().run_in_executor(self._disk, _write_group, group, closing)
+            self.commit_ms = (time.perf_counter() - t0) * 1000.0
+            self.commits += 1
+            self.committed += sum(len(lines) for _, lines in group)
+        for key, store in list(self.sessions.items()):
+            # rouverte pendant l'écriture : on la garde (elle rouvrira un bloc)
+            if store.refs <= 0 and not store.pending:
+                del self.sessions[key]
+        for conn in list(self.connections):
+            if conn.store is not None:
+                conn.resume_if_drained()
+
+    async def close(self):
+        """Arrête d'accepter, coupe les postes et écrit ce qui reste."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for conn in list(self.connections):
+            conn.transport.close()
+        await asyncio.sleep(0)
+        if self._committer is not None:
+            self._committer.cancel()
+            self._committer = None
+        await self.commit()
+        self._disk.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        conns = [c.stats() for c in self.connections if c.store is not None]
+        return {"pid": os.getpid(), "connections": conns, "sessions": len(self.sessions),
+                "commits": self.commits, "committed": self.committed,
+                "commit_ms": round(self.commit_ms, 2),
+                "pending": sum(len(s.pending) for s in self.sessions.values())}
+
+
+# ---------- Workers ----------
+
+def reuse_port_supported() -> bool:
+    return hasattr(socket, "SO_REUSEPORT") and sys.platform != "win32"
+
+
+def _worker(host: str, port: int, root: str, options: dict, reuse_port: bool, report_s: float,
+            stats_queue, ready):
+    try:
+        asyncio.run(_worker_main(host, port, root, options, reuse_port, report_s, stats_queue, ready))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _worker_main(host, port, root, options, reuse_port, report_s, stats_queue, ready):
+    server = IngestServer(root, **options)
+    await server.start(host, port, reuse_port=reuse_port)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    ready.set()
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), report_s)
+        except asyncio.TimeoutError:
+            pass
+        if stop.is_set():
+            break
+        stats_queue.put(server.stats())
+    await server.close()
+    stats = server.stats()
+    stats["final"] = True
+    stats_queue.put(stats)
+
+
+class WorkerPool:
+    """Les processus serveurs, et la file où ils publient leurs stats()."""
+
+    def __init__(self, root: str, host: str = "0.0.0.0", port: int = DEFAULT_PORT, workers: int = 1,
+                 report_s: float = 1.0, **options):
+        if workers > 1 and not reuse_port_supported():
+            print("SO_REUSEPORT indisponible : un seul worker")
+            workers = 1
+        self.host, self.port, self.workers = host, port, workers
+        ctx = mp.get_context("spawn")
+        self.stats_queue = ctx.Queue()
+        self.latest: Dict[int, dict] = {}
+        self._ready = [ctx.Event() for _ in range(workers)]
+        self._procs = [ctx.Process(target=_worker, daemon=True,
+                                   args=(host, port, root, options, workers > 1, report_s,
+                                         self.stats_queue, ready))
+                       for ready in self._ready]
+
+    def start(self, timeout: float = 10.0):
+        for proc in self._procs:
+            proc.start()
+        for ready in self._ready:
+            if not ready.wait(timeout):
+                raise RuntimeError("worker pas prêt (port déjà pris ?)")
+
+    def poll(self, timeout: float = 0.0) -> bool:
+        """Lit les stats publiées ; True si au moins une est arrivée."""
+        got = False
+        try:
+            while True:
+                stats = self.stats_queue.get(timeout=timeout) if not got else self.stats_queue.get_nowait()
+                self.latest[stats["pid"]] = stats
+                got = True
+        except queue.Empty:
+            return got
+
+    def stop(self, timeout: float = 10.0):
+        """SIGTERM : chaque worker écrit ce qui reste et publie ses stats finales."""
+        for proc in self._procs:
+            if proc.is_alive():
+                proc.terminate()
+        deadline = time.perf_counter() + timeout
+        finals = 0
+        while finals < len(self._procs) and time.perf_counter() < deadline:
+            if self.poll(0.2):
+                finals = sum(1 for s in self.latest.values() if s.get("final"))
+        for proc in self._procs:
+            proc.join(timeout=1.0)
+
+    def totals(self) -> dict:
+        stats = list(self.latest.values())
+        conns = [c for s in stats for c in s["connections"]]
+        return {"workers": len(stats), "connections": len(conns),
+                "committed": sum(s["committed"] for s in stats),
+                "pending": sum(s["pending"] for s in stats),
+                "rate": sum(c["rate"] for c in conns),
+                "max_lag_ms": max((c["lag_ms"] for c in conns), default=0.0),
+                "paused": sum(1 for c in conns if c["pauses"])}
+
+
+# ---------- Charge (postes simulés) ----------
+
+_TAILS = [HandState(0, 480, 500 + int(250 * ((k % 50) - 25) / 25), 400 + 4 * k, 300,
+                    0.01, -0.02, 0.98, 0.5 * k - 25, -1.0, 0.5).to_csv_line().partition(",")[2]
+          for k in range(100)]
+
+
+async def _station(host: str, port: int, name: str, rate: float, seconds: float,
+                   batch_ms: float) -> int:
+    """Un poste : lignes du firmware à `rate` Hz (0 : au plus vite) ; renvoie le nombre envoyé."""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"#GANT station={name} session=charge\n".encode())
+    sent = 0
+    t0 = time.perf_counter()
+    end = t0 + seconds
+    try:
+        while True:
+            now = time.perf_counter()
+            if now >= end:
+                break
+            due = int((now - t0) * rate) if rate > 0 else sent + 200
+            if due > sent:
+                if rate > 0:
+                    lines = [f"{int(k * 1000 / rate)},{_TAILS[k % 100]}\n" for k in range(sent, due)]
+                else:
+                    lines = [f"{k},{_TAILS[k % 100]}\n" for k in range(sent, due)]
+                writer.write("".join(lines).encode())
+                sent = due
+                await writer.drain()     # backpressure du serveur
+            if rate > 0:
+                await asyncio.sleep(batch_ms / 1000.0)
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+    return sent
+
+
+async def _load_main(host, port, names, rate, seconds, batch_ms) -> int:
+    results = await asyncio.gather(*(_station(host, port, n, rate, seconds, batch_ms) for n in names),
+                                   return_exceptions=True)
+    failed = [r for r in results if isinstance(r, BaseException)]
+    if failed:
+        print(f"{len(failed)} poste(s) en erreur : {failed[0]!r}")
+    return sum(r for r in results if not isinstance(r, BaseException))
+
+
+def _load_proc(args) -> int:
+    return asyncio.run(_load_main(*args))
+
+
+def run_load(host: str, port: int, stations: int, rate: float, seconds: float,
+             procs: int = 1, batch_ms: float = 10.0) -> int:
+    """Simule `stations` postes répartis sur `procs` processus ; renvoie les lignes envoyées."""
+    names = [f"poste{k:04d}" for k in range(stations)]
+    procs = max(1, min(procs, stations))
+    jobs = [(host, port, names[i::procs], rate, seconds, batch_ms) for i in range(procs)]
+    if procs == 1:
+        return _load_proc(jobs[0])
+    with mp.get_context("spawn").Pool(procs) as pool:
+        return sum(pool.map(_load_proc, jobs))
+
+
+# ---------- Outils en ligne de commande ----------
+
+def _serve(args) -> int:
+    pool = WorkerPool(args.root, args.host, args.port, args.workers, args.report_s,
+                      commit_ms=args.commit_ms, max_pending=args.max_pending,
+                      chunk_samples=args.chunk_samples, fsync=args.fsync)
+    pool.start()
+    print(f"Collecte TCP :{args.port} -> {args.root}, {pool.workers} worker(s) (Ctrl+C pour quitter)")
+    try:
+        while True:
+            if not pool.poll(args.report_s):
+                continue
+            tot = pool.totals()
+            print(f"{tot['connections']:4d} postes {tot['rate']:9.0f} éch/s écrits {tot['committed']:10d} "
+                  f"en attente {tot['pending']:6d} retard max {tot['max_lag_ms']:7.1f} ms")
+            if args.verbose:
+                conns = sorted((c for s in pool.latest.values() for c in s["connections"]),
+                               key=lambda c: -c["lag_ms"])
+                for c in conns[:args.verbose]:
+                    print(f"    {c['station']:>12} {c['session']:>16} {c['rate']:7.0f}/s {c['kbps']:7.1f} kbit/s "
+                          f"retard {c['lag_ms']:7.1f} ms attente {c['pending']:5d} rejets {c['rejected']}")
+    except KeyboardInterrupt:
+        pass
+    pool.stop()
+    print(f"écrits : {pool.totals()['committed']} échantillons")
+    return 0
+
+
+def _load(args) -> int:
+    t0 = time.perf_counter()
+    sent = run_load(args.host, args.port, args.stations, args.rate, args.seconds, args.procs)
+    elapsed = time.perf_counter() - t0
+    print(f"{args.stations} postes, {sent} lignes en {elapsed:.1f} s : {sent / elapsed:.0f} lignes/s")
+    return 0
+
+
+def bench(root: str, max_workers: int, stations: int, rate: float, seconds: float, procs: int):
+    """Débit écrit (échantillons/s) pour 1, 2, 4... workers, postes simulés sur la même machine."""
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+
+    print(f"{stations} postes à {'max' if rate <= 0 else f'{rate:.0f} Hz'}, {seconds:.0f} s, "
+          f"{procs} process de charge, {os.cpu_count()} cœur(s)")
+    print(f"{'workers':>8} {'envoyés':>10} {'écrits':>10} {'échant./s':>12} {'retard max':>11} {'accél.':>7}")
+    base = None
+    for n in counts:
+        pool = WorkerPool(os.path.join(root, f"w{n}"), "127.0.0.1", DEFAULT_PORT + 1, n, report_s=0.5)
+        pool.start()
+        t0 = time.perf_counter()
+        sent = run_load("127.0.0.1", DEFAULT_PORT + 1, stations, rate, seconds, procs)
+        pool.poll()
+        lag = pool.totals()["max_lag_ms"]
+        pool.stop()
+        elapsed = time.perf_counter() - t0
+        written = pool.totals()["committed"]
+        rate_w = written / elapsed if elapsed > 0 else 0.0
+        base = base or rate_w
+        print(f"{n:>8} {sent:>10} {written:>10} {rate_w:>12.0f} {lag:>9.0f}ms {rate_w / base:>6.2f}x")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Collecte centrale des flux des gants (TCP, asyncio).")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    serve = sub.add_parser("serve", help="serveur de collecte")
+    serve.add_argument("--root", default="collecte", help="dossier des séances")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    serve.add_argument("--commit-ms", type=float, default=50.0, help="période des écritures groupées")
+    serve.add_argument("--max-pending", type=int, default=20_000, help="lignes en attente avant de suspendre un poste")
+    serve.add_argument("--chunk-samples", type=int, default=CHUNK_SAMPLES)
+    serve.add_argument("--fsync", action="store_true", help="fsync à chaque commit")
+    serve.add_argument("--report-s", type=float, default=1.0)
+    serve.add_argument("-v", "--verbose", type=int, default=0, metavar="N", help="détail des N postes les plus en retard")
+
+    load = sub.add_parser("load", help="postes simulés")
+    load.add_argument("--host", default="127.0.0.1")
+    load.add_argument("--port", type=int, default=DEFAULT_PORT)
+    load.add_argument("--stations", type=int, default=100)
+    load.add_argument("--rate", type=float, default=500.0, help="Hz par poste (0 : au plus vite)")
+    load.add_argument("--seconds", type=float, default=10.0)
+    load.add_argument("--procs", type=int, default=1, help="processus de charge")
+
+    b = sub.add_parser("bench", help="débit selon le nombre de workers (serveur + charge en local)")
+    b.add_argument("--root", default="collecte_bench")
+    b.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    b.add_argument("--stations", type=int, default=200)
+    b.add_argument("--rate", type=float, default=1000.0, help="Hz par poste (0 : au plus vite)")
+    b.add_argument("--seconds", type=float, default=5.0)
+    b.add_argument("--procs", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+
+    args = parser.parse_args(argv)
+    if args.cmd == "serve":
+        return _serve(args)
+    if args.cmd == "load":
+        return _load(args)
+    bench(args.root, args.workers, args.stations, args.rate, args.seconds, args.procs)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
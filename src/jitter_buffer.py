@@ -0,0 +1,200 @@
+# jitter_buffer.py
+"""
+Tampon de gigue des échantillons du gant, rejoués à retard fixe.
+
+L'USB CDC livre les trames à 100 Hz par rafales : plusieurs trames d'un
+coup, puis rien pendant 20 à 40 ms. Un jeu qui suit le dernier échantillon
+reçu avance donc par à-coups. JitterBuffer range les échantillons par
+horodatage du gant (t_ms) et les rend à l'heure de lecture, régulière
+sur l'horloge du PC :
+
+    lecture = maintenant - décalage - playout_ms     (dans l'horloge du gant)
+
+  - décalage : min(arrivée - t_ms) sur les dernières secondes (la trame
+    arrivée le plus vite), renouvelé par fenêtres : suit la dérive lente
+    entre le quartz du gant et celui du PC
+  - playout_ms : retard volontaire, le compromis latence / fluidité
+    (GANT_PLAYOUT_MS) ; quand la lecture dépasse le dernier échantillon
+    reçu (rafale plus en retard que playout_ms), c'est un underrun : la
+    dernière valeur est gardée
+  - sample(t) interpole linéairement entre les deux échantillons qui
+    encadrent t (valeurs float, y compris pour les capteurs entiers)
+
+stats() : occupation (échantillons en attente et ms d'avance sur la
+lecture), underruns, trames tardives, dupliquées, réordonnées.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import fields, replace
+from typing import Callable, List, Optional
+
+from hand_state import HandState
+
+PLAYOUT_MS = float(os.environ.get("GANT_PLAYOUT_MS", "30"))
+OFFSET_WINDOW_S = 2.0
+RESET_MS = 1000.0      # recul d'horloge au-delà duquel le gant a redémarré
+
+_VALUES = [f.name for f in fields(HandState) if f.name not in ("t_ms", "device")]
+
+
+def interpolate(a: HandState, b: HandState, t_ms: float) -> HandState:
+    """État à t_ms entre a et b (bornes comprises)."""
+    span = b.t_ms - a.t_ms
+    if span <= 0 or t_ms <= a.t_ms:
+        return a
+    if t_ms >= b.t_ms:
+        return b
+    f = (t_ms - a.t_ms) / span
+    return replace(a, t_ms=t_ms, **{n: getattr(a, n) + (getattr(b, n) - getattr(a, n)) * f for n in _VALUES})
+
+
+class JitterBuffer:
+
+    def __init__(self, playout_ms: float = PLAYOUT_MS, capacity: Optional[int] = 512,
+                 window_s: float = OFFSET_WINDOW_S, clock: Callable[[], float] = time.monotonic):
+        self.playout_ms = playout_ms
+        self.capacity = capacity
+        self.window_ms = window_s * 1000.0
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._queue: List[HandState] = []   # triés par t_ms ; rendus avant _head
+            self._times: List[float] = []       # leurs t_ms (bisect)
+            self._head = 0
+            self._last: Optional[HandState] = None   # dernier rendu par take()
+            self._released_ms = -math.inf
+            self._clear_offset()
+        self.received = 0
+        self.late = 0          # arrivés après leur heure de lecture : ignorés
+        self.duplicates = 0
+        self.reordered = 0     # insérés avant un échantillon déjà reçu
+        self.overflows = 0     # jetés faute de lecture (capacity)
+        self.underruns = 0     # épisodes où la lecture a rattrapé le dernier échantillon
+        self._starved = False
+
+    def _clear_offset(self):
+        self.offset_ms: Optional[float] = None
+        self._win_start = -math.inf
+        self._win_min = math.inf
+        self._prev_min = math.inf
+
+    # ----- Entrée (thread série) -----
+
+    def push(self, state: HandState):
+        arrival = self.clock() * 1000.0
+        t = state.t_ms
+        with self._lock:
+            newest = max(self._times[-1] if self._times else -math.inf, self._released_ms)
+            if t < newest - RESET_MS:
+                # le gant a redémarré (millis() repart de 0) : nouvelle horloge
+                self._queue.clear()
+                self._times.clear()
+                self._head = 0
+                self._last = None
+                self._released_ms = -math.inf
+                self._clear_offset()
+            if t <= self._released_ms:
+                self.late += 1
+                return
+            i = bisect_left(self._times, t, lo=self._head)
+            if i < len(self._times):
+                if self._times[i] == t:
+                    self.duplicates += 1
+                    return
+                self.reordered += 1
+                self._queue.insert(i, state)
+                self._times.insert(i, t)
+            else:
+                self._queue.append(state)
+                self._times.append(t)
+            self.received += 1
+            if self.capacity is not None and len(self._queue) - self._head > self.capacity:
+                self._last = self._queue[self._head]
+                self._released_ms = self._times[self._head]
+                self._head += 1
+                self.overflows += 1
+
+            # décalage horloge gant -> horloge PC : minimum glissant sur deux fenêtres
+            if arrival - self._win_start > self.window_ms:
+                self._prev_min, self._win_min = self._win_min, math.inf
+                self._win_start = arrival
+            self._win_min = min(self._win_min, arrival - t)
+            self.offset_ms = min(self._win_min, self._prev_min)
+
+    # ----- Lecture (thread Kivy, ou boucle headless) -----
+
+    def playout_time(self, now: Optional[float] = None) -> Optional[float]:
+        """Heure de lecture dans l'horloge du gant (None avant le 1er échantillon)."""
+        if self.offset_ms is None:
+            return None
+        now = self.clock() if now is None else now
+        return now * 1000.0 - self.offset_ms - self.playout_ms
+
+    def take(self, until_ms: float) -> List[HandState]:
+        """Échantillons d'horodatage <= until_ms, dans l'ordre ; compte les underruns."""
+        with self._lock:
+            head = self._head
+            n = bisect_left(self._times, until_ms + 1e-9, lo=head)
+            out = self._queue[head:n]
+            if out:
+                self._last = out[-1]
+                self._head = n
+                if n > 1024 and 2 * n > len(self._queue):
+                    del self._queue[:n], self._times[:n]   # compactage, amorti
+                    self._head = 0
+            self._released_ms = max(self._released_ms, until_ms)
+            starved = self._head == len(self._queue) and self._last is not None and until_ms > self._last.t_ms
+        if starved and not self._starved:
+            self.underruns += 1
+        self._starved = starved
+        return out
+
+    def sample(self, t_ms: float) -> Optional[HandState]:
+        """État interpolé à t_ms (après take(t_ms)) : dernier rendu + suivant en attente."""
+        with self._lock:
+            a = self._last
+            b = self._queue[self._head] if self._head < len(self._queue) else None
+        if a is None:
+            return None
+        return a if b is None else interpolate(a, b, t_ms)
+
+    # ----- Mesures -----
+
+    @property
+    def occupancy(self) -> int:
+        return len(self._queue) - self._head
+
+    def ahead_ms(self, until_ms: Optional[float] = None) -> float:
+        """Avance du tampon sur la lecture : ms de données reçues mais pas encore jouées."""
+        until = self._released_ms if until_ms is None else until_ms
+        with self._lock:
+            if self._head == len(self._times) or until == -math.inf:
+                return 0.0
+            return max(0.0, self._times[-1] - until)
+
+    def stats(self) -> dict:
+        return {
+            "playout_ms": self.playout_ms,
+            "occupancy": self.occupancy,
+            "ahead_ms": round(self.ahead_ms(), 1),
+            "received": self.received,
+            "underruns": self.underruns,
+            "late": self.late,
+            "duplicates": self.duplicates,
+            "reordered": self.reordered,
+            "overflows": self.overflows,
+        }
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (f"retard {s['playout_ms']:.0f} ms, {s['received']} échantillons, "
+                f"{s['underruns']} underrun(s), {s['late']} tardif(s), {s['reordered']} réordonné(s)")
@@ -1,27 +1,27 @@
+import random
+
 from kivy.uix.screenmanager import Screen
 from kivy.properties import NumericProperty, BooleanProperty
 from kivy.clock import Clock
+from kivy.lang import Builder
 from kivy.core.window import Window
 from kivy.metrics import dp
 from kivy.app import App
 
-from serial_reader import SerialHandReader
-from hand_state import HandState
+from serial_reader import SerialHandReader, open_reader
+from frame_scheduler import StreamWaker
+from prediction import predictor_for
+from simulation import FixedStepClock, RenderState
+from game_logic import JumpGameCore
+from obstacles import LevelRenderer
 
-USE_ARDUINO = True
-SERIAL_PORT = "/dev/cu.usbmodem1201"
-SERIAL_BAUD = 115200
+# Règles KV de l'écran, chargées à l'import (donc au 1er passage sur l'écran)
+Builder.load_file("jump_game.kv")
 
+USE_ARDUINO = True
 
-def _norm(value: float, vmin: float, vmax: float) -> float:
-    if vmax <= vmin:
-        return 0.0
-    x = (value - vmin) / float(vmax - vmin)
-    if x < 0.0:
-        return 0.0
-    if x > 1.0:
-        return 1.0
-    return x
+# Geste (gestures.json) qui déclenche aussi un saut, si le thérapeute l'a enregistré
+JUMP_GESTURE = "pince"
 
 
 class JumpGameScreen(Screen):
@@ -32,7 +32,8 @@ class JumpGameScreen(Screen):
     scroll_speed = NumericProperty(220.0)  # px/s
 
     # ===== UI / Game =====
-    score = NumericProperty(0)
+    score = NumericProperty(0)   # rochers franchis + étoiles
+    hits = NumericProperty(0)    # rochers touchés
 
     # Avatar (bind KV)
     avatar_y = NumericProperty(0.0)
@@ -50,38 +51,24 @@ class JumpGameScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self._bg_inited = False
-        self._t = 0.0
+
+        # --------- Simulation à pas fixe ----------
+        # Toute la logique (détection d'appui, physique du saut) est dans
+        # JumpGameCore (game_logic.py, sans Kivy) ; avatar_y / bg*_x ne sont
+        # que l'affichage interpolé de son état.
+        self.ground_y = dp(100)
+        self.core = JumpGameCore(ground_y=self.ground_y, dp=dp(1))
+        self.level_renderer = LevelRenderer(self.ids.level_layer.canvas)
+        # échantillons bruts (appuis détectés sur chacun) : ni interpolés ni prédits par défaut
+        self.sim = FixedStepClock(self.step_game, interpolate=self.core.interpolated_input,
+                                  predictor=predictor_for(self.core))
+        self.waker = StreamWaker(self.update_game)  # boucle d'affichage pilotée par les données
+        self.render = RenderState()
 
         # --------- Série Arduino ----------
         self.serial_reader: SerialHandReader | None = None
         if USE_ARDUINO:
-            self.serial_reader = SerialHandReader(port=SERIAL_PORT, baudrate=SERIAL_BAUD)
-
-       # --------- Détection appui (FSR index seul) ----------
-        self.INDEX_T = 0.30          # seuil normalisé (0..1) - sera écrasé par calibration si dispo
-        self.P_MIN = 100             # fallback si pas de calibration
-        self.P_MAX = 900
-
-        self._was_pressed = False
-        self.JUMP_COOLDOWN = 0.25
-        self._last_jump_time = -999.0
-
-        # Debug print rate-limit
-        self._dbg_timer = 0.0
-
-        # --------- Physique saut ----------
-        self.vy = 0.0
-        self.gravity = -1800.0
-        self.ground_y = dp(100)
-
-        # ===== Saut à amplitude variable =====
-        self.min_impulse = 520.0
-        self.max_impulse = 980.0
-        self.strength_exp = 1.3
-        self.last_pinch_strength = 0.0
-
-        # Debug print rate-limit
-        self._dbg_timer = 0.0
+            self.serial_reader = open_reader()
 
         self._keyboard_bound = False
 
@@ -92,21 +79,19 @@ class JumpGameScreen(Screen):
     def on_size(self, *args):
         if self.width <= 1:
             return
+        self.core.resize(self.width)
         if not self._bg_inited:
             self.bg1_x = 0
             self.bg2_x = self.width
             self._bg_inited = True
 
-    def update_background(self, dt: float):
+    def _place_background(self, scroll: float):
         if not self._bg_inited or self.width <= 1:
             return
         w = self.width
-        self.bg1_x -= self.scroll_speed * dt
-        self.bg2_x -= self.scroll_speed * dt
-        if self.bg1_x <= -w:
-            self.bg1_x = self.bg2_x + w
-        if self.bg2_x <= -w:
-            self.bg2_x = self.bg1_x + w
+        off = scroll % w
+        self.bg1_x = -off
+        self.bg2_x = w - off
 
     # ============================================================
     # Lifecycle
@@ -115,162 +100,93 @@ class JumpGameScreen(Screen):
     def on_pre_enter(self):
         print(">>> JUMP SCREEN OPENED <<<")
 
+        self.core.calib = getattr(App.get_running_app(), "calib", None)
+        self.core.scroll_speed = self.scroll_speed
+        # nouveau niveau à chaque partie ; la graine permet de le rejouer (headless.py --seed)
+        self.core.level.seed = random.randrange(1_000_000)
+        print(f"[JUMP] niveau : graine {self.core.level.seed}")
+        self.core.reset()
         self.score = 0
-        self._t = 0.0
-        self._last_jump_time = -999.0
-
+        self.hits = 0
         self.avatar_y = self.ground_y
-        self.vy = 0.0
-
-        self._dbg_timer = 0.0
+        self.render.snap("y", self.core.y)
+        self.render.snap("scroll", self.core.scroll)
+        self.sim.reset()
 
         if self.serial_reader is not None:
+            App.get_running_app().attach_stream(self.serial_reader)
+            self.serial_reader.add_listener(self.sim.push)
+            self.serial_reader.add_listener(self.waker.on_state)
             self.serial_reader.start()
 
         if not self._keyboard_bound:
             Window.bind(on_key_down=self._on_key_down)
             self._keyboard_bound = True
 
-        Clock.schedule_interval(self.update_game, 1.0 / 60.0)
+        recognizer = getattr(App.get_running_app(), "gesture_recognizer", None)
+        if recognizer is not None:
+            recognizer.subscribe(JUMP_GESTURE, self._on_gesture)
+
+        # Boucle réveillée par les échantillons du gant ; sans lecteur (démo), à chaque frame
+        self.waker.start(continuous=self.serial_reader is None)
 
     def on_leave(self):
-        Clock.unschedule(self.update_game)
+        self.waker.stop()
 
         if self.serial_reader is not None:
             self.serial_reader.stop()
+            self.serial_reader.remove_listener(self.sim.push)
+            self.serial_reader.remove_listener(self.waker.on_state)
+            print(f"[JUMP] entrée : {self.sim.buffer.summary()}")
 
         if self._keyboard_bound:
             Window.unbind(on_key_down=self._on_key_down)
             self._keyboard_bound = False
 
-    # ============================================================
-    # Input clavier (test)
-    # ============================================================
-
-    def _on_key_down(self, window, keycode, scancode, codepoint, modifiers):
-        if keycode and len(keycode) > 1 and keycode[1] == "space":
-            self.do_jump(1.0)
-            return True
-        return False
-
-    # ============================================================
-    # Détection pince (Arduino) + calibration Kivy
-    # ============================================================
-
-    def _get_calib(self):
-        app = App.get_running_app()
-        return getattr(app, "calib", None)
-
-    def _read_index_pressure(self, state: HandState) -> float:
-        """
-        ATTENTION HARDWARE:
-        Le FSR index est physiquement branché sur A2,
-        mais à cause d'un défaut de soudure Arduino,
-        la valeur arrive dans la 4e colonne du serial => fsr_thumb.
-        """
-        calib = self._get_calib()
+        recognizer = getattr(App.get_running_app(), "gesture_recognizer", None)
+        if recognizer is not None:
+            recognizer.unsubscribe(JUMP_GESTURE, self._on_gesture)
 
-        if calib is None:
-            index_n = _norm(state.fsr_thumb, self.P_MIN, self.P_MAX)
-        else:
-            index_n = _norm(
-                state.fsr_thumb,
-                calib.fsr_thumb_min,
-                calib.fsr_thumb_max
-            )
-            self.INDEX_T = getattr(calib, "index_fsr_threshold", self.INDEX_T)
-
-        return index_n
-
-
-
-    def _press_event(self, index_n: float) -> tuple[bool, float]:
-        pressed = index_n > self.INDEX_T
-        self.index_active = pressed     # pour debug UI si tu l’utilises
-
-        # front montant + cooldown
-        if pressed and (not self._was_pressed) and (self._t - self._last_jump_time) >= self.JUMP_COOLDOWN:
-            self._was_pressed = True
-            self._last_jump_time = self._t
-            return True, index_n  # strength = index_n (0..1)
-
-        if not pressed:
-            self._was_pressed = False
-
-        return False, 0.0
+    def _on_gesture(self, name: str, distance: float):
+        # appelé depuis le thread série -> on repasse sur le thread Kivy
+        Clock.schedule_once(lambda dt: self._gesture_jump(), 0)
 
+    def _gesture_jump(self):
+        self.core.do_jump(1.0)
 
     # ============================================================
-    # Physique saut
+    # Input clavier (test)
     # ============================================================
 
-    def do_jump(self, strength: float = 1.0):
-        """Saute seulement si l’avatar est au sol, avec amplitude variable."""
-        if self.avatar_y <= self.ground_y + 200.0:
-            s = max(0.0, min(1.0, strength))
-            s = s ** self.strength_exp
-            impulse = self.min_impulse + s * (self.max_impulse - self.min_impulse)
-            self.vy = impulse
-            #print("DO JUMP", self.vy)
-
-
-
-    def update_physics(self, dt: float):
-        self.vy += self.gravity * dt
-        self.avatar_y += self.vy * dt
-
-        if self.avatar_y < self.ground_y:
-            self.avatar_y = self.ground_y
-            self.vy = 0.0
-
-        """# DEBUG: 5 Hz
-        self._dbg_timer += dt
-        if self._dbg_timer >= 0.2:
-            av_y = self.avatar_y
-            img_y = self.ids.avatar.y if "avatar" in self.ids else -1
-            print(f"[PHYS] vy={self.vy:.1f}  avatar_y={av_y:.1f}  image_y={img_y:.1f}")
-            self._dbg_timer = 0.0
-"""
+    def _on_key_down(self, window, key, scancode, codepoint, modifiers):
+        if key == 32:  # espace
+            self.core.do_jump(1.0)
+            self.waker.keep_alive(2.0)  # le saut se termine même sans données du gant
+            return True
+        return False
 
     # ============================================================
     # Boucle jeu
     # ============================================================
 
     def update_game(self, dt: float):
-        self._t += dt
-
-        # Fond
-        self.update_background(dt)
-
-        # Si pas d'Arduino, juste physique
-        if self.serial_reader is None:
-            self.update_physics(dt)
-            return
-
-        state = self.serial_reader.get_latest_state()
-        if state is None:
-            self.update_physics(dt)
-            return
-
-        # Lecture FSR index + calibration
-        index_n = self._read_index_pressure(state)
-
-        # Debug (5 Hz)
-        """self._dbg_timer += dt
-        if self._dbg_timer >= 0.2:
-            print(
-                f"FSR INDEX RAW -> {state.fsr_thumb} | "
-                f"NORM -> {index_n:.3f} | T -> {self.INDEX_T:.2f}"
-            )
-            self._dbg_timer = 0.0"""
-
-        # Appui -> jump
-        pressed, strength = self._press_event(index_n)
-        if pressed:
-            self.do_jump(strength)
-            self.score += 1
-
-        # <<< FIX CRITIQUE : la physique DOIT toujours s’exécuter
-        self.update_physics(dt)
-
-
+        """Boucle d'affichage (dt Kivy variable) : avance la simulation puis interpole."""
+        alpha = self.sim.advance(dt)
+        if self.sim.playing:
+            self.waker.poke()   # frames régulières tant que le tampon de gigue a de l'avance
+        self.avatar_y = self.render.get("y", alpha)
+        scroll = self.render.get("scroll", alpha)
+        self._place_background(scroll)
+        self.level_renderer.redraw(self.core.level, scroll, self.width)
+
+    def step_game(self, dt: float, samples: list):
+        """Un pas fixe de simulation, avec les échantillons du gant de ce pas."""
+        self.render.begin()
+        self.core.step(dt, samples)
+        App.get_running_app().publish_events("jump", self.core.drain_events())
+
+        self.score = self.core.score
+        self.hits = self.core.hits
+        self.index_active = self.core.index_active
+        self.render.set("y", self.core.y)
+        self.render.set("scroll", self.core.scroll)
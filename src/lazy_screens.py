@@ -0,0 +1,94 @@
+# lazy_screens.py
+"""
+ScreenManager à construction paresseuse.
+
+Les écrans sont déclarés par une fabrique et ne sont construits (module
+importé, KV chargé, widgets et shaders créés) qu'au premier passage.
+preload() construit à l'avance les écrans probables, un par frame, quand
+l'interface est au repos, après avoir chargé ses textures en arrière-plan
+(textures.TexturePreloader).
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import Callable, Dict, List, Sequence
+
+from kivy.clock import Clock
+from kivy.uix.screenmanager import ScreenManager
+
+from startup import PROFILE
+
+
+def lazy(module: str, cls: str) -> Callable:
+    """Fabrique d'écran : importe le module (et son KV) seulement à l'appel."""
+
+    def factory(**kwargs):
+        return getattr(importlib.import_module(module), cls)(**kwargs)
+
+    return factory
+
+
+class LazyScreenManager(ScreenManager):
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._factories: Dict[str, Callable] = {}
+        self._textures: Dict[str, Sequence[str]] = {}
+        self._preload: List[str] = []
+        self.textures = None   # TexturePreloader optionnel
+
+    def register(self, name: str, factory: Callable, textures: Sequence[str] = ()):
+        """
+        Déclare l'écran `name`, construit par factory(name=name) au premier besoin.
+        textures : images de l'écran, chargées en arrière-plan avant un preload().
+        """
+        self._factories[name] = factory
+        self._textures[name] = textures
+
+    def _build(self, name: str):
+        factory = self._factories.pop(name)
+        if self.textures is not None:
+            self.textures.pin(self._textures.get(name, ()))
+        with PROFILE.section(f"écran {name}"):
+            screen = factory(name=name)
+            self.add_widget(screen)
+        return screen
+
+    def get_screen(self, name):
+        if name in self._factories:
+            return self._build(name)
+        return super().get_screen(name)
+
+    def has_screen(self, name):
+        return name in self._factories or super().has_screen(name)
+
+    @property
+    def built(self) -> List[str]:
+        return [s.name for s in self.screens]
+
+    # ----- Préchargement au repos -----
+
+    def preload(self, names, delay: float = 0.3):
+        """Construit ces écrans à l'avance, un par frame, après `delay` s."""
+        self._preload.extend(n for n in names if n in self._factories)
+        Clock.schedule_once(self._preload_next, delay)
+
+    def _preload_next(self, dt):
+        while self._preload:
+            name = self._preload.pop(0)
+            if name not in self._factories:
+                continue
+            sources = self._textures.get(name, ())
+            if self.textures is not None and sources:
+                # textures décodées hors du thread Kivy, puis construction de l'écran
+                self.textures.preload(sources, on_done=lambda n=name: self._preload_build(n))
+            else:
+                self._preload_build(name)
+            return
+
+    def _preload_build(self, name: str):
+        if name in self._factories:
+            self._build(name)
+        if self._preload:
+            Clock.schedule_once(self._preload_next, 0.05)
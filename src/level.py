@@ -0,0 +1,229 @@
+# level.py
+"""
+Niveau procédural du jeu Jump, généré par tronçons ("chunks") de largeur
+fixe devant la caméra. Sans Kivy (rendu dans jump_game.py).
+
+  - chaque tronçon est tiré d'un générateur seedé (graine du niveau + numéro
+    du tronçon) : même graine -> même niveau, quel que soit l'écran
+  - les hauteurs sont réglées sur la plage de force du patient : un rocher
+    ou une étoile demande une force tirée dans strength_range, convertie en
+    hauteur par la physique du saut (JumpGameCore.apex)
+  - les tronçons sortis de l'écran retournent dans un pool et sont réutilisés :
+    mémoire constante, même pour une longue séance
+  - chaque tronçon a un index spatial (cases de CELL_W px) : les collisions
+    ne testent que les éléments des cases sous l'avatar
+
+Coordonnées "monde" : x en px depuis le départ (la caméra est à x = scroll),
+y en px depuis le bas de l'écran.
+"""
+
+from __future__ import annotations
+
+import random
+from collections import deque
+from typing import Callable, Iterator, List, Optional, Tuple
+
+ROCK, STAR, PLATFORM = 0, 1, 2
+KIND_NAMES = ("rock", "star", "platform")
+
+CHUNK_W = 1200.0     # largeur d'un tronçon (px monde)
+CELL_W = 100.0       # largeur d'une case de l'index spatial
+MAX_ENTITIES = 16    # éléments max par tronçon
+
+
+class Chunk:
+    """Un tronçon : éléments en listes parallèles + index spatial par cases."""
+
+    def __init__(self):
+        n_cells = int(CHUNK_W // CELL_W) + 1
+        self.cells: List[List[int]] = [[] for _ in range(n_cells)]
+        self.index = -1
+        self.x0 = 0.0
+        self.kind: List[int] = []
+        self.x: List[float] = []
+        self.y: List[float] = []
+        self.w: List[float] = []
+        self.h: List[float] = []
+        self.strength: List[float] = []   # force visée pour cet élément
+        self.alive: List[bool] = []        # False : étoile ramassée / rocher touché
+
+    @property
+    def x1(self) -> float:
+        return self.x0 + CHUNK_W
+
+    def recycle(self, index: int):
+        """Vide le tronçon pour le numéro index (listes réutilisées, pas réallouées)."""
+        self.index = index
+        self.x0 = index * CHUNK_W
+        for lst in (self.kind, self.x, self.y, self.w, self.h, self.strength, self.alive):
+            lst.clear()
+        for cell in self.cells:
+            cell.clear()
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def add(self, kind: int, x: float, y: float, w: float, h: float, strength: float) -> bool:
+        if len(self.kind) >= MAX_ENTITIES or x < self.x0 or x + w > self.x1:
+            return False
+        i = len(self.kind)
+        self.kind.append(kind)
+        self.x.append(x)
+        self.y.append(y)
+        self.w.append(w)
+        self.h.append(h)
+        self.strength.append(strength)
+        self.alive.append(True)
+        for c in self._cell_range(x, x + w):
+            self.cells[c].append(i)
+        return True
+
+    def _cell_range(self, left: float, right: float) -> range:
+        last = len(self.cells) - 1
+        c0 = max(0, min(last, int((left - self.x0) // CELL_W)))
+        c1 = max(0, min(last, int((right - self.x0) // CELL_W)))
+        return range(c0, c1 + 1)
+
+    def query(self, left: float, right: float) -> Iterator[int]:
+        """Éléments vivants dont l'étendue en x peut chevaucher [left, right]."""
+        if right < self.x0 or left > self.x1:
+            return
+        seen = set()
+        for c in self._cell_range(left, right):
+            for i in self.cells[c]:
+                if i not in seen:
+                    seen.add(i)
+                    if self.alive[i]:
+                        yield i
+
+
+class LevelStream:
+    """
+    Tronçons actifs autour de la caméra, générés à la demande et recyclés.
+
+    apex(strength) : hauteur (px) d'un saut de cette force (fournie par le jeu).
+    strength_range : forces (0..1) que le patient produit, pour régler les hauteurs.
+    """
+
+    def __init__(self, apex: Callable[[float], float], ground_y: float, seed: int = 0,
+                 speed: float = 220.0, hit_w: float = 80.0, hit_h: float = 170.0,
+                 view_w: float = 1600.0, pool_size: int = 4):
+        self.apex = apex
+        self.ground_y = ground_y
+        self.seed = seed
+        self.speed = speed                # px/s, pour espacer les éléments selon le temps de vol
+        self.hit_w = hit_w                # hitbox de l'avatar
+        self.hit_h = hit_h
+        self.view_w = view_w
+        self.strength_range = (0.35, 0.75)
+        self.gravity = 1800.0
+        self._pool: List[Chunk] = [Chunk() for _ in range(pool_size)]
+        self.chunks: deque = deque()      # tronçons actifs, de gauche à droite
+        self.generated = 0                # tronçons générés depuis le reset (stat)
+        self.reset()
+
+    def reset(self):
+        while self.chunks:
+            self._pool.append(self.chunks.popleft())
+        self._next = 0
+        self.generated = 0
+
+    # ----- Flux de tronçons -----
+
+    def update(self, scroll: float):
+        """Recycle les tronçons passés à gauche, génère ceux qui entrent à droite."""
+        chunks = self.chunks
+        while chunks and chunks[0].x1 < scroll:
+            self._pool.append(chunks.popleft())
+        while self._next * CHUNK_W < scroll + self.view_w + CHUNK_W:
+            chunk = self._pool.pop() if self._pool else Chunk()
+            chunk.recycle(self._next)
+            self._generate(chunk)
+            chunks.append(chunk)
+            self._next += 1
+            self.generated += 1
+
+    def _generate(self, chunk: Chunk):
+        # graine par tronçon : niveau reproductible, indépendant de la taille d'écran
+        rng = random.Random(self.seed * 1_000_003 + chunk.index)
+        lo, hi = self.strength_range
+        x = chunk.x0 + (600.0 if chunk.index == 0 else 150.0)   # départ dégagé
+        end = chunk.x1 - 150.0
+        while x < end:
+            s = rng.uniform(lo, hi)
+            apex = self.apex(s)
+            roll = rng.random()
+            if roll < 0.5:
+                w = rng.choice((40.0, 50.0, 60.0))
+                h = self.rock_height(apex, w)
+                if not chunk.add(ROCK, x, self.ground_y, w, h, s):
+                    break
+            elif roll < 0.8:
+                size = 48.0   # au-dessus de la tête : attrapée avec un saut d'au moins 85 % de apex
+                y = self.ground_y + self.hit_h + max(0.0, 0.85 * apex - size)
+                if not chunk.add(STAR, x, y, size, size, s):
+                    break
+                w = size
+            else:
+                w = rng.choice((220.0, 300.0, 380.0))
+                top = self.ground_y + 0.7 * apex
+                if not chunk.add(PLATFORM, x, top - 16.0, w, 16.0, s):
+                    break
+            # assez de place pour retomber avant l'élément suivant
+            x += w + self.airtime(apex) * self.speed + rng.uniform(60.0, 200.0)
+
+    # ----- Physique utile au réglage -----
+
+    def airtime(self, apex: float) -> float:
+        return 2.0 * (2.0 * apex / self.gravity) ** 0.5
+
+    def rock_height(self, apex: float, w: float) -> float:
+        """Rocher franchissable avec un saut de hauteur apex : au-dessus assez longtemps pour passer."""
+        t_over = (self.hit_w + w) / self.speed
+        h = apex - 0.5 * self.gravity * (t_over / 2.0) ** 2
+        return max(15.0, 0.75 * h)
+
+    # ----- Requêtes -----
+
+    def chunks_under(self, left: float, right: float) -> Iterator[Chunk]:
+        """Tronçon(s) couvrant [left, right] (deux au plus, à la jonction)."""
+        for chunk in self.chunks:
+            if chunk.x0 > right:
+                break
+            if chunk.x1 >= left:
+                yield chunk
+
+    def overlaps(self, left: float, bottom: float, right: float, top: float) -> Iterator[Tuple[Chunk, int]]:
+        """Éléments vivants dont le rectangle touche la boîte (tronçons sous la boîte seulement)."""
+        for chunk in self.chunks_under(left, right):
+            for i in chunk.query(left, right):
+                x, y = chunk.x[i], chunk.y[i]
+                if x < right and x + chunk.w[i] > left and y < top and y + chunk.h[i] > bottom:
+                    yield chunk, i
+
+    def support(self, left: float, right: float, feet: float) -> Optional[float]:
+        """Dessus de plateforme le plus haut sous les pieds (<= feet), ou None."""
+        best = None
+        for chunk in self.chunks_under(left, right):
+            for i in chunk.query(left, right):
+                if chunk.kind[i] != PLATFORM:
+                    continue
+                if chunk.x[i] < right and chunk.x[i] + chunk.w[i] > left:
+                    top = chunk.y[i] + chunk.h[i]
+                    if top <= feet + 0.5 and (best is None or top > best):
+                        best = top
+        return best
+
+    def passed_since(self, x_from: float, x_to: float) -> Iterator[Tuple[Chunk, int]]:
+        """Rochers vivants dont le bord droit est passé dans ]x_from, x_to] (franchis)."""
+        for chunk in self.chunks_under(x_from - CELL_W, x_to):
+            for i in chunk.query(x_from - CELL_W, x_to):
+                if chunk.kind[i] == ROCK and x_from < chunk.x[i] + chunk.w[i] <= x_to:
+                    yield chunk, i
+
+    def visible(self, left: float, right: float) -> Iterator[Tuple[int, float, float, float, float]]:
+        """(type, x, y, w, h) des éléments vivants entre left et right, pour le rendu."""
+        for chunk in self.chunks_under(left, right):
+            for i in range(len(chunk)):
+                if chunk.alive[i] and chunk.x[i] < right and chunk.x[i] + chunk.w[i] > left:
+                    yield chunk.kind[i], chunk.x[i], chunk.y[i], chunk.w[i], chunk.h[i]
@@ -7,15 +7,27 @@
 #include <Arduino.h>
 #include <Arduino_BMI270_BMM150.h>
 
-// ---- BONUS : logging sur carte SD ----
-// Mettre à 1 si tu as un module SD et que la bibliothèque SD est installée
+// ---- BONUS : enregistrement sur carte SD (séances à la maison, sans ordinateur) ----
+// Mettre à 1 si tu as un module SD et que la bibliothèque SD est installée.
+// Un fichier LOGnnnnn.BIN par mise sous tension : trames binaires (format
+// ci-dessous, tous les canaux) accumulées en RAM et écrites par blocs de
+// 512 octets (un secteur) ; la carte n'est synchronisée que toutes les
+// SD_SYNC_MS (une coupure perd au plus ~1 s). Récupération sur l'ordinateur :
+// python sd_download.py <port> (commandes !IDLE, !LS, !GET, !RM).
 #define ENABLE_SD_LOGGING 0
 
 #if ENABLE_SD_LOGGING
   #include <SPI.h>
   #include <SD.h>
   const int SD_CS_PIN = 10;    // Pin CS de la carte SD (à adapter selon ton câblage)
+  const int SD_BLOCK = 512;
+  const unsigned long SD_SYNC_MS = 1000;
+  const unsigned long GET_MAX = 8192;   // octets par bloc de transfert
+  bool sdReady = false;
   File logFile;
+  uint8_t sdBlock[SD_BLOCK];
+  int sdFill = 0;
+  unsigned long lastSync = 0;
 #endif
 
 // Broches capteurs
@@ -24,22 +36,176 @@ const int FLEX_INDEX_PIN  = A1;
 const int FSR_THUMB_PIN   = A2;
 const int FSR_INDEX_PIN   = A3;
 
-// Période d'échantillonnage (ms) → 100 Hz
-const unsigned long SAMPLE_INTERVAL_MS = 10;
-unsigned long lastSampleTime = 0;
+// ---- Commandes de l'hôte (une ligne ; cf. device_protocol.py) ----
+//   !HELLO        -> #OK HELLO proto=1 fw=3 max_hz=1000 ch=3FF fmt=csv,bin [sd=1]
+//   !RATE <hz>    -> #OK RATE <hz appliqués>  (borné à MAX_RATE_HZ)
+//   !CH <masque>  -> #OK CH <masque>          (hex, bit 0 = flex_thumb ... bit 9 = gz)
+//   !FMT CSV|BIN  -> #OK FMT CSV|BIN
+//   !RESET        -> #OK RESET                (100 Hz, tous les canaux, CSV ; reprend
+//                                              l'acquisition et un nouveau fichier SD)
+//   !IDLE         -> #OK IDLE                 (plus d'échantillons, fichier SD fermé)
+//   !LS <i>       -> #OK LS <i> <total> NOM:taille ...   (8 fichiers à partir du i-ème)
+//   !GET <nom> <offset> <n> -> #OK GET <offset> <n>, puis n octets et leur CRC-32 (u32)
+//   !RM <nom>     -> #OK RM <nom>
+// (!LS, !GET, !RM : carte SD, après !IDLE)
+// Trame binaire : A5 5A, masque u16, t_ms u32, un int16 par canal actif
+// (analogiques bruts, accéléro en mg, gyro en 0,1 deg/s), somme u8 des
+// octets masque..valeurs. Little-endian (nRF52).
+const int PROTO_VERSION = 1;
+const int FW_VERSION = 3;
+const unsigned long DEFAULT_RATE_HZ = 100;
+const unsigned long MAX_RATE_HZ = 1000;
+const uint16_t ALL_CHANNELS = 0x3FF;
+const int N_CHANNELS = 10;
+const int FRAME_MAX = 2 + 2 + 4 + 2 * N_CHANNELS + 1;
+
+// Configuration courante (modifiée par les commandes)
+unsigned long sampleIntervalUs = 1000000UL / DEFAULT_RATE_HZ;   // 100 Hz par défaut
+uint16_t channelMask = ALL_CHANNELS;
+bool binaryFormat = false;
+bool idle = false;                  // !IDLE : transfert en cours, pas d'échantillons
+unsigned long lastSampleTime = 0;   // micros()
+
+char cmdBuf[48];
+uint8_t cmdLen = 0;
 
 // Variables IMU
 float ax = 0, ay = 0, az = 0;     // Accélération (g)
 float gx = 0, gy = 0, gz = 0;     // Vitesse angulaire (deg/s)
 
+// =====================================================================
+// CARTE SD
+// =====================================================================
+#if ENABLE_SD_LOGGING
+// Nouveau fichier LOGnnnnn.BIN (premier numéro libre)
+void openLogFile() {
+  char name[13];
+  for (long i = 1; i < 100000; i++) {
+    snprintf(name, sizeof(name), "LOG%05ld.BIN", i);
+    if (!SD.exists(name)) {
+      logFile = SD.open(name, FILE_WRITE);
+      if (!logFile) {
+        Serial.print("ERREUR : impossible d'ouvrir ");
+        Serial.println(name);
+      }
+      sdFill = 0;
+      lastSync = millis();
+      return;
+    }
+  }
+}
+
+// Ajoute une trame au bloc en RAM ; un bloc plein part sur la carte d'un coup
+void logAppend(const uint8_t *data, int n) {
+  while (n > 0) {
+    int k = min(n, SD_BLOCK - sdFill);
+    memcpy(sdBlock + sdFill, data, k);
+    sdFill += k;
+    data += k;
+    n -= k;
+    if (sdFill == SD_BLOCK) {
+      logFile.write(sdBlock, SD_BLOCK);
+      sdFill = 0;
+    }
+  }
+}
+
+void closeLogFile() {
+  if (!logFile) return;
+  if (sdFill > 0) {
+    logFile.write(sdBlock, sdFill);
+    sdFill = 0;
+  }
+  logFile.close();
+}
+
+// CRC-32 (même valeur que zlib.crc32 côté Python)
+uint32_t crc32Update(uint32_t crc, const uint8_t *data, int n) {
+  crc = ~crc;
+  for (int i = 0; i < n; i++) {
+    crc ^= data[i];
+    for (int k = 0; k < 8; k++) {
+      crc = (crc >> 1) ^ (0xEDB88320UL & (0UL - (crc & 1)));
+    }
+  }
+  return ~crc;
+}
+
+bool isLogName(const char *name) {
+  return strncmp(name, "LOG", 3) == 0 && strstr(name, ".BIN") != NULL;
+}
+
+void listFiles(long start) {
+  File root = SD.open("/");
+  long total = 0;
+  int shown = 0;
+  String out = "";
+  for (File f = root.openNextFile(); f; f = root.openNextFile()) {
+    if (!f.isDirectory() && isLogName(f.name())) {
+      if (total >= start && shown < 8) {
+        out += " ";
+        out += f.name();
+        out += ":";
+        out += String(f.size());
+        shown++;
+      }
+      total++;
+    }
+    f.close();
+  }
+  root.close();
+  Serial.print("#OK LS ");
+  Serial.print(start);
+  Serial.print(" ");
+  Serial.print(total);
+  Serial.println(out);
+}
+
+// Un bloc du fichier : en-tête, octets, CRC-32 des octets
+void sendBlock(const char *name, unsigned long offset, unsigned long n) {
+  File f = SD.open(name, FILE_READ);
+  if (!f || offset > f.size()) {
+    Serial.print("#ERR GET ");
+    Serial.println(name);
+    if (f) f.close();
+    return;
+  }
+  n = min(n, min(GET_MAX, (unsigned long)f.size() - offset));
+  f.seek(offset);
+  Serial.print("#OK GET ");
+  Serial.print(offset);
+  Serial.print(" ");
+  Serial.println(n);
+  uint32_t crc = 0;
+  unsigned long left = n;
+  while (left > 0) {
+    int k = f.read(sdBlock, min(left, (unsigned long)SD_BLOCK));
+    if (k <= 0) {
+      // lecture impossible : on complète, le CRC fera refaire le bloc à l'hôte
+      memset(sdBlock, 0, SD_BLOCK);
+      k = min(left, (unsigned long)SD_BLOCK);
+    }
+    crc = crc32Update(crc, sdBlock, k);
+    Serial.write(sdBlock, k);
+    left -= k;
+  }
+  f.close();
+  Serial.write((const uint8_t *)&crc, 4);
+}
+#endif
+
 // =====================================================================
 // SETUP
 // =====================================================================
 void setup() {
   // Série
   Serial.begin(115200);
+  unsigned long t0 = millis();
   while (!Serial) {
     ; // attendre que le port série s'ouvre (utile en USB)
+#if ENABLE_SD_LOGGING
+    if (millis() - t0 > 2000) break;   // pas d'ordinateur : on enregistre quand même sur la carte
+#endif
   }
 
   // Entrées analogiques
@@ -58,35 +224,165 @@ void setup() {
 
 #if ENABLE_SD_LOGGING
   // Initialisation carte SD
-  if (!SD.begin(SD_CS_PIN)) {
+  sdReady = SD.begin(SD_CS_PIN);
+  if (!sdReady) {
     Serial.println("ERREUR : initialisation de la carte SD échouée.");
   } else {
-    logFile = SD.open("log.csv", FILE_WRITE);
-    if (!logFile) {
-      Serial.println("ERREUR : impossible d'ouvrir log.csv pour écriture.");
-    }
+    openLogFile();
   }
 #endif
 
   // En-tête CSV
   Serial.println("t_ms,flex_thumb,flex_index,fsr_thumb,fsr_index,ax_g,ay_g,az_g,gx_dps,gy_dps,gz_dps");
+}
+
+// =====================================================================
+// COMMANDES
+// =====================================================================
+void resetConfig() {
+  sampleIntervalUs = 1000000UL / DEFAULT_RATE_HZ;
+  channelMask = ALL_CHANNELS;
+  binaryFormat = false;
+}
 
+void handleCommand(const char *cmd) {
+  if (strcmp(cmd, "!HELLO") == 0) {
+    Serial.print("#OK HELLO proto=");
+    Serial.print(PROTO_VERSION);
+    Serial.print(" fw=");
+    Serial.print(FW_VERSION);
+    Serial.print(" max_hz=");
+    Serial.print(MAX_RATE_HZ);
+    Serial.print(" ch=");
+    Serial.print(ALL_CHANNELS, HEX);
+    Serial.print(" fmt=csv,bin");
 #if ENABLE_SD_LOGGING
-  if (logFile) {
-    logFile.println("t_ms,flex_thumb,flex_index,fsr_thumb,fsr_index,ax_g,ay_g,az_g,gx_dps,gy_dps,gz_dps");
-    logFile.flush();
-  }
+    if (sdReady) Serial.print(" sd=1");
+#endif
+    Serial.println();
+  } else if (strncmp(cmd, "!RATE ", 6) == 0) {
+    long hz = atol(cmd + 6);
+    if (hz < 1) {
+      Serial.print("#ERR RATE ");
+      Serial.println(cmd + 6);
+      return;
+    }
+    if ((unsigned long)hz > MAX_RATE_HZ) hz = MAX_RATE_HZ;
+    sampleIntervalUs = 1000000UL / hz;
+    Serial.print("#OK RATE ");
+    Serial.println(hz);
+  } else if (strncmp(cmd, "!CH ", 4) == 0) {
+    uint16_t mask = strtoul(cmd + 4, NULL, 16) & ALL_CHANNELS;
+    if (mask == 0) {
+      Serial.print("#ERR CH ");
+      Serial.println(cmd + 4);
+      return;
+    }
+    channelMask = mask;
+    Serial.print("#OK CH ");
+    Serial.println(mask, HEX);
+  } else if (strcmp(cmd, "!FMT CSV") == 0) {
+    binaryFormat = false;
+    Serial.println("#OK FMT CSV");
+  } else if (strcmp(cmd, "!FMT BIN") == 0) {
+    binaryFormat = true;
+    Serial.println("#OK FMT BIN");
+  } else if (strcmp(cmd, "!RESET") == 0) {
+    resetConfig();
+#if ENABLE_SD_LOGGING
+    if (idle && sdReady) openLogFile();
+#endif
+    idle = false;
+    Serial.println("#OK RESET");
+  } else if (strcmp(cmd, "!IDLE") == 0) {
+    idle = true;
+#if ENABLE_SD_LOGGING
+    closeLogFile();
+#endif
+    Serial.println("#OK IDLE");
+#if ENABLE_SD_LOGGING
+  } else if (idle && sdReady && strncmp(cmd, "!LS ", 4) == 0) {
+    listFiles(atol(cmd + 4));
+  } else if (idle && sdReady && strncmp(cmd, "!GET ", 5) == 0) {
+    char name[13];
+    unsigned long offset, n;
+    if (sscanf(cmd + 5, "%12s %lu %lu", name, &offset, &n) == 3) {
+      sendBlock(name, offset, n);
+    } else {
+      Serial.print("#ERR ");
+      Serial.println(cmd);
+    }
+  } else if (idle && sdReady && strncmp(cmd, "!RM ", 4) == 0) {
+    if (SD.remove(cmd + 4)) {
+      Serial.print("#OK RM ");
+    } else {
+      Serial.print("#ERR RM ");
+    }
+    Serial.println(cmd + 4);
 #endif
+  } else {
+    Serial.print("#ERR ");
+    Serial.println(cmd);
+  }
+}
+
+// Lit les commandes reçues sans bloquer (une ligne = une commande)
+void pollCommands() {
+  while (Serial.available() > 0) {
+    char c = Serial.read();
+    if (c == '\n' || c == '\r') {
+      if (cmdLen > 0) {
+        cmdBuf[cmdLen] = '\0';
+        handleCommand(cmdBuf);
+        cmdLen = 0;
+      }
+    } else if (cmdLen < sizeof(cmdBuf) - 1) {
+      cmdBuf[cmdLen++] = c;
+    }
+  }
+}
+
+// Trame binaire des canaux de mask ; renvoie sa taille
+int buildFrame(uint8_t *frame, uint16_t mask, unsigned long now, const int16_t *values) {
+  int n = 0;
+  frame[n++] = 0xA5;
+  frame[n++] = 0x5A;
+  memcpy(frame + n, &mask, 2);
+  n += 2;
+  uint32_t t = now;
+  memcpy(frame + n, &t, 4);
+  n += 4;
+  for (int i = 0; i < N_CHANNELS; i++) {
+    if (mask & (1 << i)) {
+      memcpy(frame + n, &values[i], 2);
+      n += 2;
+    }
+  }
+  uint8_t sum = 0;
+  for (int i = 2; i < n; i++) sum += frame[i];
+  frame[n++] = sum;
+  return n;
 }
 
 // =====================================================================
 // LOOP
 // =====================================================================
 void loop() {
-  unsigned long now = millis();
+  pollCommands();
+
+#if ENABLE_SD_LOGGING
+  // synchronisation périodique de la carte (pas à chaque échantillon)
+  if (logFile && millis() - lastSync >= SD_SYNC_MS) {
+    logFile.flush();
+    lastSync = millis();
+  }
+#endif
 
-  if (now - lastSampleTime >= SAMPLE_INTERVAL_MS) {
-    lastSampleTime = now;
+  unsigned long nowUs = micros();
+
+  if (!idle && nowUs - lastSampleTime >= sampleIntervalUs) {
+    lastSampleTime = nowUs;
+    unsigned long now = millis();
 
     // ---- Lecture analogique ----
     int flexThumb = analogRead(FLEX_THUMB_PIN);   // 0–1023
@@ -104,39 +400,41 @@ void loop() {
       IMU.readGyroscope(gx, gy, gz);             // en deg/s
     }
 
-    // ---- Construction de la ligne CSV ----
-    String line = String(now);           // t_ms
-    line += ",";
-    line += String(flexThumb);
-    line += ",";
-    line += String(flexIndex);
-    line += ",";
-    line += String(fsrThumb);
-    line += ",";
-    line += String(fsrIndex);
-    line += ",";
-    line += String(ax, 6);
-    line += ",";
-    line += String(ay, 6);
-    line += ",";
-    line += String(az, 6);
-    line += ",";
-    line += String(gx, 6);
-    line += ",";
-    line += String(gy, 6);
-    line += ",";
-    line += String(gz, 6);
-
-    // ---- Envoi sur le port série ----
-    Serial.println(line);
+    int16_t values[N_CHANNELS] = {
+      (int16_t)flexThumb, (int16_t)flexIndex, (int16_t)fsrThumb, (int16_t)fsrIndex,
+      (int16_t)lroundf(ax * 1000.0f), (int16_t)lroundf(ay * 1000.0f), (int16_t)lroundf(az * 1000.0f),
+      (int16_t)constrain(lroundf(gx * 10.0f), -32768L, 32767L),
+      (int16_t)constrain(lroundf(gy * 10.0f), -32768L, 32767L),
+      (int16_t)constrain(lroundf(gz * 10.0f), -32768L, 32767L)
+    };
+    uint8_t frame[FRAME_MAX];
 
 #if ENABLE_SD_LOGGING
-    // ---- Écriture sur SD (bonus) ----
+    // ---- Carte SD : tous les canaux, en binaire ----
     if (logFile) {
-      logFile.println(line);
-      // flush à chaque échantillon pour simplifier (à optimiser si besoin de très haut débit)
-      logFile.flush();
+      logAppend(frame, buildFrame(frame, ALL_CHANNELS, now, values));
     }
 #endif
+
+    // ---- Envoi sur le port série (canaux actifs seulement) ----
+    if (binaryFormat) {
+      Serial.write(frame, buildFrame(frame, channelMask, now, values));
+      return;
+    }
+
+    // ---- Construction de la ligne CSV ----
+    String line = String(now);           // t_ms
+    if (channelMask & (1 << 0)) { line += ","; line += String(flexThumb); }
+    if (channelMask & (1 << 1)) { line += ","; line += String(flexIndex); }
+    if (channelMask & (1 << 2)) { line += ","; line += String(fsrThumb); }
+    if (channelMask & (1 << 3)) { line += ","; line += String(fsrIndex); }
+    if (channelMask & (1 << 4)) { line += ","; line += String(ax, 6); }
+    if (channelMask & (1 << 5)) { line += ","; line += String(ay, 6); }
+    if (channelMask & (1 << 6)) { line += ","; line += String(az, 6); }
+    if (channelMask & (1 << 7)) { line += ","; line += String(gx, 6); }
+    if (channelMask & (1 << 8)) { line += ","; line += String(gy, 6); }
+    if (channelMask & (1 << 9)) { line += ","; line += String(gz, 6); }
+
+    Serial.println(line);
   }
 }
@@ -1,251 +1,341 @@
+from startup import PROFILE  # en premier : mesure aussi l'import de Kivy
+
 from kivy.app import App
 from kivy.lang import Builder
-from kivy.uix.screenmanager import ScreenManager, Screen
+from kivy.uix.screenmanager import Screen
 from kivy.properties import NumericProperty
 from kivy.core.window import Window
 from kivy.clock import Clock
-import random
-from collections import deque
-from math import fmod
-from kivy.uix.image import Image
 from kivy.metrics import dp
-from kivy.lang import Builder
 from kivy.factory import Factory
 
+PROFILE.lap("import kivy")
 
 from calibration_screen import CalibrationScreen
 from hand_state import HandCalibrator
-from serial_reader import SerialHandReader
-from piano_game import PianoGameScreen
-from jump_game import JumpGameScreen
-from graph import WristFollowUpScreen, FlexFollowUpScreen, PressureFollowUpScreen
-from hand3d import Hand3DView
-
+from serial_reader import SerialHandReader, open_reader
+from gloves import shared_reader
+from metrics import MetricsEngine
+from session import SessionRecorder
+from device_protocol import NominalGate
+from telemetry import TelemetryPublisher
+from spectral import TremorDetector
+from gestures import GestureLibrary, GestureRecognizer
+from orientation import WristOrientation
+from frame_scheduler import CpuMeter, StreamWaker
+from obstacles import ObstacleRenderer
+from game_logic import CarGameCore, png_ratio
+from prediction import predictor_for
+from simulation import FixedStepClock, RenderState
+from lazy_screens import LazyScreenManager, lazy
+from textures import TexturePreloader
+
+PROFILE.lap("import modules")
+
+# Les écrans piano / jump / suivi (et leur KV, shaders, kivy_garden.graph)
+# ne sont importés qu'au premier passage : cf. GantJeuApp.build
+Factory.register("Hand3DView", module="hand3d")
+
+# Charger le KV (menu, calibration, voiture, suivi)
+Builder.load_file("game.kv")
+PROFILE.lap("game.kv")
 
+# Écrans construits au repos après l'affichage du 1er écran (les plus probables)
+PRELOAD_SCREENS = ["menu", "game", "piano", "jump"]
 
-Factory.register("Hand3DView", cls=Hand3DView)
-
-# Charger le KV
-Builder.load_file("game.kv")
+# Images de chaque écran (décodées en arrière-plan avant sa construction)
+SCREEN_TEXTURES = {
+    "menu": ["assets/menu_background.png", "assets/icon_car.png", "assets/piano_keys.png",
+             "assets/icon_jump.png", "assets/icon_flex.png", "assets/icon_followup.png"],
+    "game": ["assets/background.png", "assets/car.png",
+             "assets/obstacle_cone.png", "assets/obstacle_pothole.png"],
+    "piano": ["assets/piano_bg.jpg", "assets/piano_keys.png",
+              "assets/index_bouton.png", "assets/majeur_bouton.png"],
+    "jump": ["assets/background_jump.png", "assets/avatar_jump.png"],
+    "followup": ["assets/menu_background.png", "assets/icon_poignet.png",
+                 "assets/icon_flex.png", "assets/icon_fsr.png"],
+}
 
 
 class MenuScreen(Screen):
     pass
 class FollowUpScreen(Screen):
-    pass
+    """Menu de suivi + résumé des métriques cliniques de la séance en cours."""
 
-from kivy.uix.screenmanager import Screen
-from kivy.clock import Clock
-from kivy.app import App
+    rom_deg = NumericProperty(0.0)
+    repetitions = NumericProperty(0)
+    peak_force = NumericProperty(0.0)
+    mean_force = NumericProperty(0.0)
+    time_to_peak_s = NumericProperty(0.0)
+    ldlj = NumericProperty(0.0)
+    sparc = NumericProperty(0.0)
 
-from collections import deque
-from math import fmod
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # rafraîchi quand le moteur de métriques reçoit des données (2 fois/s au plus)
+        self.waker = StreamWaker(self.refresh_metrics, max_fps=2.0)
 
-from serial_reader import SerialHandReader
+    def on_pre_enter(self, *args):
+        self.refresh_metrics()
+        engine = getattr(App.get_running_app(), "metrics", None)
+        if engine is not None:
+            engine.add_listener(self.waker.on_state)
+        self.waker.start()
+
+    def on_leave(self, *args):
+        self.waker.stop()
+        engine = getattr(App.get_running_app(), "metrics", None)
+        if engine is not None:
+            engine.remove_listener(self.waker.on_state)
+
+    def refresh_metrics(self, *args):
+        engine = getattr(App.get_running_app(), "metrics", None)
+        if engine is None:
+            return
+        m = engine.snapshot()
+        self.rom_deg = m.rom_deg
+        self.repetitions = m.repetitions
+        self.peak_force = m.peak_force
+        self.mean_force = m.mean_force
+        self.time_to_peak_s = m.time_to_peak_s
+        self.ldlj = m.ldlj
+        self.sparc = m.sparc
 
-# Graph Kivy Garden
-from kivy_garden.graph import Graph, LinePlot
 
 USE_ARDUINO = True
-SERIAL_PORT = "/dev/cu.usbmodem1201"
-SERIAL_BAUD = 115200
 
 
 class GameScreen(Screen):
     car_x = NumericProperty(0)
     scroll_y = NumericProperty(0)
     distance = NumericProperty(0)
+    collisions = NumericProperty(0)
+
+    OBSTACLE_SOURCES = [
+        "assets/obstacle_cone.png",
+        "assets/obstacle_pothole.png",
+    ]
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self._update_event = None
-        self.forward_speed = 200  # vitesse du décor (px/s)
-        self.obstacles = []           # liste d'Image obstacles
-        self.spawn_timer = 0.0
-        self.spawn_every = 1.2        # secondes (diminue => + d’obstacles)
+        self.obstacle_renderer = None   # Mesh des obstacles, créé au 1er passage
 
+        # Logique du jeu (route, obstacles, direction) : game_logic.py, sans Kivy
+        self.core = CarGameCore(
+            self.width, self.height,
+            ratios=[png_ratio(src) for src in self.OBSTACLE_SOURCES],
+            dp=dp(1),
+        )
 
         # ---- LECTURE SERIE + CALIB ----
-        # ADAPTE LE PORT ICI (très important)
-        self.serial_reader = SerialHandReader(
-            port="/dev/cu.usbmodem1201",  # <-- à modifier 
-            baudrate=115200,
-        )
+        # Gant principal : serial_reader.default_port(), ou le 1er de devices.txt
+        self.serial_reader = open_reader()
         self.calib = HandCalibrator()
 
-        # Pour filtrer un peu la commande
-        self._steer_filtered = 0.0
-        self._no_state_logged = False
+        # Simulation à pas fixe : self.core est l'état simulé,
+        # car_x / scroll_y son affichage interpolé
+        self.sim = FixedStepClock(self.step_game, interpolate=self.core.interpolated_input,
+                                  predictor=predictor_for(self.core))
+        self.render = RenderState()
+        # Boucle d'affichage réveillée par les échantillons du gant (rien sans données)
+        self.waker = StreamWaker(self.update_game)
 
     def on_kv_post(self, base_widget):
-        # Initialisation après chargement du KV
+        # Initialisation après chargement du KV (l'état simulé est remis à zéro dans on_pre_enter)
         self.car_x = self.width / 2
         self.scroll_y = 0
         self.distance = 0
 
+    def _reset_sim_state(self):
+        self.core.resize(self.width, self.height)
+        self.core.reset()
+        self.car_x = self.core.car_x
+        self.scroll_y = 0
+        self.distance = 0
+        self.collisions = 0
+        self.render.snap("car_x", self.core.car_x)
+        self.render.snap("scroll", self.core.scroll)
+        self.sim.reset()
+
     def on_pre_enter(self, *args):
         print(">>> ON ENTRE DANS GameScreen")
 
         # clavier (optionnel, pour tester)
         Window.bind(on_key_down=self.on_key_down)
 
+        self._reset_sim_state()
+
         # Démarrer la lecture série
+        App.get_running_app().attach_stream(self.serial_reader)
+        self.serial_reader.add_listener(self.sim.push)
+        self.serial_reader.add_listener(self.waker.on_state)
         try:
             self.serial_reader.start()
             print(">>> SerialHandReader démarré")
         except Exception as e:
             print(f"ERREUR ouverture port série: {e}")
 
-        # Boucle de mise à jour
-        self._update_event = Clock.schedule_interval(self.update_game, 1 / 60)
+        if self.obstacle_renderer is None:
+            # même capacité que le pool : redraw() remplit _verts[:n], n actifs au plus
+            self.obstacle_renderer = ObstacleRenderer(self.ids.obstacles_layer.canvas, self.OBSTACLE_SOURCES,
+                                                      capacity=self.core.obstacles.capacity)
+
+        # Boucle de mise à jour : à chaque frame où le gant a envoyé des données
+        self.waker.start()
+        Clock.schedule_once(self._check_stream, 2.0)
+
+    def _check_stream(self, dt):
+        if self.waker.running and self.waker.wakeups == 0:
+            print(">>> Aucun HandState reçu pour le moment.")
 
     def on_leave(self, *args):
         Window.unbind(on_key_down=self.on_key_down)
         self.serial_reader.stop()
-        if self._update_event is not None:
-            self._update_event.cancel()
-            self._update_event = None
-        layer = self.ids.get("obstacles_layer")
-        if layer:
-            layer.clear_widgets()
-            self.obstacles.clear()
+        self.serial_reader.remove_listener(self.sim.push)
+        self.serial_reader.remove_listener(self.waker.on_state)
+        self.waker.stop()
+        Clock.unschedule(self._check_stream)
+        print(f"[CAR] entrée : {self.sim.buffer.summary()}")
+        if self.sim.predictor is not None:
+            print(f"[CAR] prédiction : {self.sim.predictor.summary()}")
+            self.sim.predictor.close()
+        self.core.obstacles.clear()
+        if self.obstacle_renderer is not None:
+            self.obstacle_renderer.redraw(self.core.obstacles)
 
 
     def on_size(self, *args):
         # Recentrer la voiture si la fenêtre change de taille
-        self.car_x = self.width / 2
+        self.core.resize(self.width, self.height)
+        self.render.snap("car_x", self.core.car_x)
+        self.car_x = self.core.car_x
 
     # --- Contrôle clavier pour debug (flèches gauche/droite) ---
     def on_key_down(self, window, key, scancode, codepoint, modifiers):
         if key == 276:      # gauche
-            self.move_car_pixels(-40)  # 40 px par pression
+            self.core.move_car_pixels(-40)  # 40 px par pression
+            self.waker.keep_alive(1.0)
         elif key == 275:    # droite
-            self.move_car_pixels(40)
-
-    # --- Mouvement de la voiture en pixels ---
-    def move_car_pixels(self, delta_px: float):
-        self.car_x += delta_px
-        self._clamp_car()
-
-    def get_road_bounds(self):
-        road_width_ratio = 0.40  # ajuste si besoin
-        center_x = self.width / 2
-        road_width = self.width * road_width_ratio
-        left = center_x - road_width / 2
-        right = center_x + road_width / 2
-        return left, right
-    
-    def spawn_obstacle(self):
-        layer = self.ids.obstacles_layer
-
-    # Zone "route" (à ajuster selon ton background)
-        road_left, road_right = self.get_road_bounds()
-        road_width = road_right - road_left
-
-    # --- Lanes (positions RELATIVES dans la route) ---
-    # 0.25 = gauche | 0.5 = centre | 0.75 = droite
-        lanes = [0.3,0.5, 0.7]
-        lane = random.choice(lanes)
-        size = dp(random.choice([55, 65, 75]))
-        x = random.uniform(road_left, road_right - size)
-        y = self.height + size
-
-    # 👉 ICI : choix aléatoire de l'obstacle
-        source = random.choice([
-        "assets/obstacle_cone.png",
-        "assets/obstacle_pothole.png",
-        ])
-
-        obs = Image(
-            source=source,   # ← on utilise le choix ici
-            size_hint=(None, None),
-            size=(size, size),
-            pos=(x, y),
-            allow_stretch=True,
-            keep_ratio=True,
-        )
+            self.core.move_car_pixels(40)
+            self.waker.keep_alive(1.0)
 
-        layer.add_widget(obs)
-        self.obstacles.append(obs)
-    
     def update_game(self, dt):
-    # 1) Scroll fond
+        """Boucle d'affichage (dt Kivy variable) : avance la simulation puis interpole."""
+        alpha = self.sim.advance(dt)
+        if self.sim.playing:
+            self.waker.poke()   # frames régulières tant que le tampon de gigue a de l'avance
+        self.car_x = self.render.get("car_x", alpha)
         if self.height > 0:
-            self.scroll_y -= self.forward_speed * dt
-            if self.scroll_y <= -self.height:
-                self.scroll_y += self.height
-        self.distance += (self.forward_speed * dt) / 100.0
-
-    # 2) Obstacles (spawn + move) -> TOUJOURS, même si state None
-        self.spawn_timer += dt
-        if self.spawn_timer >= self.spawn_every:
-            self.spawn_timer = 0.0
-            self.spawn_obstacle()
-
-        to_remove = []
-        for obs in self.obstacles:
-            obs.y -= self.forward_speed * dt
-            if obs.top < 0:
-                to_remove.append(obs)
-
-        for obs in to_remove:
-            self.ids.obstacles_layer.remove_widget(obs)
-            self.obstacles.remove(obs)
-
-    # 3) Lecture main (peut être None)
-        state = self.serial_reader.get_latest_state()
-        if state is None:
-            if not self._no_state_logged:
-                print(">>> Aucun HandState reçu pour le moment.")
-                self._no_state_logged = True
-            return
-
-        self._no_state_logged = False
-
-    # 4) Direction voiture
-        steer_raw = state.steering_from_gyro(sensitivity_deg_per_s=45.0)
-        alpha = 0.3
-        self._steer_filtered = (1 - alpha) * self._steer_filtered + alpha * steer_raw
-
-        gain_px_per_sec = 400
-        delta_px = self._steer_filtered * gain_px_per_sec * dt
-        self.move_car_pixels(delta_px)
+            self.scroll_y = -(self.render.get("scroll", alpha) % self.height)
+        if self.obstacle_renderer is not None:
+            # obstacles affichés à mi-chemin entre le pas précédent et le pas courant
+            dy = (1.0 - alpha) * self.core.forward_speed * self.sim.step_s
+            self.obstacle_renderer.redraw(self.core.obstacles, dy)
 
+    def step_game(self, dt, samples):
+        """Un pas fixe de simulation, avec les échantillons du gant de ce pas."""
+        self.render.begin()
+        self.core.step(dt, samples)
+        App.get_running_app().publish_events("car", self.core.drain_events())
 
-
-    
-    def _clamp_car(self):
-        margin = self.width * 0.05
-        if self.car_x < margin:
-            self.car_x = margin
-        if self.car_x > self.width - margin:
-            self.car_x = self.width - margin
+        self.distance = self.core.distance
+        self.collisions = self.core.collisions
+        self.render.set("car_x", self.core.car_x)
+        self.render.set("scroll", self.core.scroll)
 
 
 class GantJeuApp(App):
 
     def build(self):
-        self.calib = HandCalibrator()
-        # charge calibration.txt si elle existe
-        try:
-            self.calib.load_txt("calibration.txt")
-        except Exception:
-            pass
-
-        sm = ScreenManager()
-        sm.add_widget(CalibrationScreen(name="calibration"))
-        sm.add_widget(MenuScreen(name="menu"))
-        sm.add_widget(GameScreen(name="game")) # voiture
-        sm.add_widget(PianoGameScreen(name="piano")) # piano
-        sm.add_widget(JumpGameScreen(name="jump"))  # jump
-        sm.add_widget(FollowUpScreen(name="followup"))
-        sm.add_widget(WristFollowUpScreen(name="followup_wrist"))
-        sm.add_widget(FlexFollowUpScreen(name="followup_flex"))
-        sm.add_widget(PressureFollowUpScreen(name="followup_pressure"))
-
+        # Gants (devices.txt ou recherche automatique, port_discovery.py),
+        # chacun avec sa calibration ; celle du gant principal
+        # (calibration.txt) sert aux jeux et aux métriques
+        self.gloves = shared_reader()
+        self.calib = self.gloves.primary.calib
+        PROFILE.lap("build : recherche du gant")
+
+        # Métriques cliniques + enregistrement de la séance (flux complet)
+        self.metrics = MetricsEngine(self.calib)
+        self.recorder = SessionRecorder()
+        self.tremor_gyro = TremorDetector("gyro", self.calib)
+        self.tremor_flex = TremorDetector("flex_index", self.calib)
+        self.orientation = WristOrientation(self.calib)
+        self._gates = {}   # lecteur -> NominalGate
+
+        # GANT_TELEMETRY=hôte:port : flux et événements vers le poste du thérapeute
+        self.telemetry = TelemetryPublisher.from_env(self.calib)
+
+        # Gestes enregistrés par le thérapeute (gestures.py record ...)
+        self.gestures = GestureLibrary()
+        self.gestures.load()
+        self.gesture_recognizer = GestureRecognizer(self.gestures, self.calib)
+
+        PROFILE.lap("build : calibration + analyses")
+
+        # Écrans : construits au premier passage (ou au repos, cf. PRELOAD_SCREENS)
+        sm = LazyScreenManager()
+        sm.textures = TexturePreloader()
+        sm.register("calibration", CalibrationScreen)
+        sm.register("menu", MenuScreen, SCREEN_TEXTURES["menu"])
+        sm.register("game", GameScreen, SCREEN_TEXTURES["game"])  # voiture
+        sm.register("piano", lazy("piano_game", "PianoGameScreen"), SCREEN_TEXTURES["piano"])  # piano
+        sm.register("jump", lazy("jump_game", "JumpGameScreen"), SCREEN_TEXTURES["jump"])  # jump
+        sm.register("bimanual", lazy("bimanual_game", "BimanualScreen"))  # deux gants
+        sm.register("followup", FollowUpScreen, SCREEN_TEXTURES["followup"])
+        sm.register("followup_wrist", lazy("graph", "WristFollowUpScreen"))
+        sm.register("followup_flex", lazy("graph", "FlexFollowUpScreen"))
+        sm.register("followup_pressure", lazy("graph", "PressureFollowUpScreen"))
+        sm.current = "calibration"
+        PROFILE.lap("build : 1er écran")
+
+        # GANT_CPU_LOG=1 : CPU du process toutes les 5 s (mesure au repos)
+        if CpuMeter.enabled():
+            CpuMeter(label=lambda: f"écran={sm.current}").start()
 
         return sm
 
+    def on_start(self):
+        # on_flip : la 1re frame est réellement affichée
+        Window.bind(on_flip=self._first_frame)
+
+    def _first_frame(self, *args):
+        Window.unbind(on_flip=self._first_frame)
+        PROFILE.finish()
+        self.root.preload(PRELOAD_SCREENS)
+
+    def attach_stream(self, reader: SerialHandReader):
+        """
+        Branche les métriques et l'enregistrement sur un lecteur série. Ils
+        supposent le flux par défaut (100 Hz, tous les canaux) : suspendus
+        pendant qu'un écran reconfigure le gant (piano), cf. NominalGate.
+        """
+        gate = self._gates.get(reader)
+        if gate is None:
+            gate = self._gates[reader] = NominalGate(reader, self.recorder.mark_stream)
+        listeners = [self.metrics.update, self.tremor_gyro.update, self.tremor_flex.update,
+                     self.orientation.update, self.gesture_recognizer.update]
+        if getattr(reader, "records", False):
+            # lecteur en process séparé : il écrit lui-même la séance, dans le même fichier
+            reader.record_path = self.recorder.path
+        else:
+            listeners.append(self.recorder.write_state)
+        if self.telemetry is not None:
+            listeners.append(self.telemetry.on_state)
+        for fn in listeners:
+            reader.add_listener(gate.wrap(fn))
+
+    def publish_events(self, game: str, events):
+        """Événements d'un jeu vers la télémétrie (s'il y en a une)."""
+        if self.telemetry is not None:
+            for event in events:
+                self.telemetry.publish_event(event, game)
+
+    def on_stop(self):
+        self.gloves.stop()
+        self.recorder.close()
+        if self.telemetry is not None:
+            self.telemetry.close()
+
 
 
 if __name__ == "__main__":
@@ -0,0 +1,364 @@
+# metrics.py
+"""
+Moteur de métriques cliniques du gant.
+
+Deux chemins qui donnent EXACTEMENT les mêmes résultats :
+  - update(state)        : incrémental, échantillon par échantillon (flux live)
+  - update_arrays(cols)  : vectorisé numpy, sur un bloc de données enregistrées
+
+Les deux chemins font les mêmes opérations flottantes dans le même ordre
+(cumsum séquentiel, même formule de normalisation), d'où l'égalité stricte.
+Un bloc peut être suivi d'un autre bloc ou d'échantillons isolés : l'état
+(angle, hystérésis, pic, jerk...) est conservé entre les appels.
+
+SPARC ne porte que sur les sparc_window_s dernières secondes (10 s par
+défaut) : en live, c'est la fluidité des mouvements récents, pas de la
+séance entière (update_arrays garde la même fenêtre, pour l'égalité).
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from hand_state import HandState, HandCalibrator
+
+
+# Fréquence nominale du firmware (SAMPLE_INTERVAL_MS = 10 dans main.cpp)
+NOMINAL_FS = 100.0
+
+# Colonnes d'un HandState, dans l'ordre du CSV
+FIELDS = (
+    "t_ms", "flex_thumb", "flex_index", "fsr_thumb", "fsr_index",
+    "ax", "ay", "az", "gx", "gy", "gz",
+)
+
+
+@dataclass
+class SessionMetrics:
+    n_samples: int = 0
+    duration_s: float = 0.0
+    rom_deg: float = 0.0           # amplitude poignet (max - min de l'angle)
+    angle_min_deg: float = 0.0
+    angle_max_deg: float = 0.0
+    repetitions: int = 0           # nb de flexions complètes de l'index
+    peak_force: float = 0.0        # 0..1
+    mean_force: float = 0.0        # 0..1
+    time_to_peak_s: float = 0.0    # début de l'appui -> pic de force
+    ldlj: float = 0.0              # log dimensionless jerk (plus proche de 0 = plus fluide)
+    sparc: float = 0.0             # spectral arc length, 10 dernières s (plus proche de 0 = plus fluide)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+# ---------- Utilitaires ----------
+
+def states_to_columns(states: Iterable[HandState]) -> Dict[str, np.ndarray]:
+    """Convertit une liste de HandState en colonnes numpy (float64)."""
+    states = list(states)
+    return {
+        name: np.fromiter((getattr(s, name) for s in states), dtype=np.float64, count=len(states))
+        for name in FIELDS
+    }
+
+
+def _norm_scalar(value: float, vmin: float, vmax: float) -> float:
+    if vmax <= vmin:
+        return 0.0
+    x = (value - vmin) / (vmax - vmin)
+    if x < 0.0:
+        x = 0.0
+    if x > 1.0:
+        x = 1.0
+    return x
+
+
+def _norm_array(values: np.ndarray, vmin: float, vmax: float) -> np.ndarray:
+    if vmax <= vmin:
+        return np.zeros_like(values)
+    return np.clip((values - vmin) / (vmax - vmin), 0.0, 1.0)
+
+
+def _ldlj(duration_s: float, v_peak: float, jerk_integral: float) -> float:
+    """Log dimensionless jerk : -ln(T^3 / v_peak^2 * intégrale(jerk^2))."""
+    if duration_s <= 0.0 or v_peak <= 0.0 or jerk_integral <= 0.0:
+        return 0.0
+    return -math.log(duration_s ** 3 / v_peak ** 2 * jerk_integral)
+
+
+def sparc(speed: np.ndarray, fs: float = NOMINAL_FS, padlevel: int = 4,
+          fc: float = 10.0, amp_th: float = 0.05) -> float:
+    """
+    Spectral arc length (Balasubramanian et al. 2015) d'un profil de vitesse.
+    Renvoie 0.0 si le profil est trop court ou nul.
+    """
+    speed = np.asarray(speed, dtype=np.float64)
+    if speed.size < 2:
+        return 0.0
+
+    nfft = int(2 ** (math.ceil(math.log2(speed.size)) + padlevel))
+    f = np.arange(nfft) * (fs / nfft)
+    mf = np.abs(np.fft.fft(speed, nfft))
+    peak = mf.max()
+    if peak <= 0.0:
+        return 0.0
+    mf = mf / peak
+
+    sel = f <= fc
+    f_sel = f[sel]
+    mf_sel = mf[sel]
+
+    # on coupe au-delà du dernier point au-dessus du seuil d'amplitude
+    above = np.nonzero(mf_sel >= amp_th)[0]
+    f_sel = f_sel[above[0]:above[-1] + 1]
+    mf_sel = mf_sel[above[0]:above[-1] + 1]
+    if f_sel.size < 2:
+        return 0.0
+
+    df = np.diff(f_sel) / (f_sel[-1] - f_sel[0])
+    dm = np.diff(mf_sel)
+    return float(-np.sum(np.sqrt(df * df + dm * dm)))
+
+
+# ---------- Moteur ----------
+
+class MetricsEngine:
+    """
+    Calcule ROM poignet, répétitions de flexion, force de pince (pic, moyenne,
+    temps jusqu'au pic) et fluidité (LDLJ + SPARC) sur le flux du gant.
+
+    Thread-safe : update() peut être appelé depuis le thread de lecture série
+    et snapshot() depuis l'UI. add_listener(fn) : fn(state) après chaque
+    update(), dans le même thread (réveil des écrans qui affichent les métriques).
+    """
+
+    def __init__(
+        self,
+        calib: Optional[HandCalibrator] = None,
+        flex_field: str = "flex_index",
+        force_field: str = "fsr_thumb",   # FSR index arrive dans fsr_thumb (cf. jump_game.py)
+        rep_high: Optional[float] = None,
+        rep_low: Optional[float] = None,
+        force_onset: float = 0.1,
+        sparc_window_s: float = 10.0,
+        fs: float = NOMINAL_FS,
+    ):
+        self.calib = calib if calib is not None else HandCalibrator()
+        self.flex_field = flex_field
+        self.force_field = force_field
+        self.rep_high = rep_high if rep_high is not None else getattr(self.calib, "index_threshold", 0.6)
+        self.rep_low = rep_low if rep_low is not None else self.rep_high * 0.5
+        self.force_onset = force_onset
+        self.fs = fs
+        self.sparc_window_n = max(2, int(sparc_window_s * fs))
+
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[HandState], None]] = []
+        self.reset()
+
+    def add_listener(self, fn: Callable[[HandState], None]):
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    def remove_listener(self, fn: Callable[[HandState], None]):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def reset(self):
+        with self._lock:
+            self._n = 0
+            self._t_first = 0.0
+            self._prev_t = 0.0
+
+            # poignet
+            self._angle = 0.0
+            self._angle_min = 0.0
+            self._angle_max = 0.0
+
+            # répétitions (état hystérésis : False = main ouverte)
+            self._flexed = False
+            self._reps = 0
+
+            # force
+            self._force_sum = 0.0
+            self._force_peak = 0.0
+            self._pressing = False
+            self._onset_t = 0.0
+            self._ttp = 0.0
+
+            # fluidité
+            self._prev_v = 0.0
+            self._prev_d1 = 0.0
+            self._v_peak = 0.0
+            self._jerk_int = 0.0
+            self._speed_tail: deque = deque(maxlen=self.sparc_window_n)
+
+    # ----- Bornes de normalisation -----
+
+    def _bounds(self, field: str):
+        return getattr(self.calib, f"{field}_min"), getattr(self.calib, f"{field}_max")
+
+    # ----- Chemin incrémental -----
+
+    def update(self, state: HandState):
+        flex = _norm_scalar(getattr(state, self.flex_field), *self._bounds(self.flex_field))
+        force = _norm_scalar(getattr(state, self.force_field), *self._bounds(self.force_field))
+        v = state.gx - self.calib.gx_offset
+        t = float(state.t_ms)
+
+        with self._lock:
+            n = self._n
+            if n == 0:
+                self._t_first = t
+                dt = 0.0
+            else:
+                dt = (t - self._prev_t) / 1000.0
+
+            # angle poignet (intégration du gyro comme WristFollowUpScreen)
+            self._angle = self._angle + v * dt
+            if self._angle < self._angle_min:
+                self._angle_min = self._angle
+            if self._angle > self._angle_max:
+                self._angle_max = self._angle
+
+            # répétitions
+            if flex >= self.rep_high:
+                if not self._flexed:
+                    self._reps += 1
+                self._flexed = True
+            elif flex <= self.rep_low:
+                self._flexed = False
+
+            # force
+            self._force_sum = self._force_sum + force
+            above = force > self.force_onset
+            if above and not self._pressing:
+                self._onset_t = t
+            self._pressing = above
+            if force > self._force_peak:
+                self._force_peak = force
+                self._ttp = (t - self._onset_t) / 1000.0 if above else 0.0
+
+            # jerk (dérivées finies de la vitesse angulaire)
+            d1 = (v - self._prev_v) / dt if (n >= 1 and dt > 0.0) else 0.0
+            jerk = (d1 - self._prev_d1) / dt if (n >= 2 and dt > 0.0) else 0.0
+            self._jerk_int = self._jerk_int + jerk * jerk * dt
+            speed = abs(v)
+            if speed > self._v_peak:
+                self._v_peak = speed
+            self._speed_tail.append(speed)
+
+            self._prev_v = v
+            self._prev_d1 = d1
+            self._prev_t = t
+            self._n = n + 1
+
+        for fn in self._listeners:
+            fn(state)
+
+    # ----- Chemin vectorisé -----
+
+    def update_arrays(self, cols: Dict[str, np.ndarray]):
+        t = np.asarray(cols["t_ms"], dtype=np.float64)
+        m = t.size
+        if m == 0:
+            return
+
+        flex = _norm_array(np.asarray(cols[self.flex_field], dtype=np.float64), *self._bounds(self.flex_field))
+        force = _norm_array(np.asarray(cols[self.force_field], dtype=np.float64), *self._bounds(self.force_field))
+        v = np.asarray(cols["gx"], dtype=np.float64) - self.calib.gx_offset
+
+        with self._lock:
+            n0 = self._n
+            if n0 == 0:
+                self._t_first = float(t[0])
+            idx = n0 + np.arange(m)
+
+            prev_t = np.empty(m)
+            prev_t[0] = self._prev_t if n0 > 0 else t[0]
+            prev_t[1:] = t[:-1]
+            dt = (t - prev_t) / 1000.0
+            if n0 == 0:
+                dt[0] = 0.0
+
+            # angle : cumsum séquentiel en partant de l'angle courant
+            angle = np.cumsum(np.concatenate(([self._angle], v * dt)))[1:]
+            self._angle = float(angle[-1])
+            self._angle_min = min(self._angle_min, float(angle.min()))
+            self._angle_max = max(self._angle_max, float(angle.max()))
+
+            # répétitions : on ne garde que les événements haut/bas
+            events = np.where(flex >= self.rep_high, 1, np.where(flex <= self.rep_low, -1, 0))
+            events = events[events != 0]
+            if events.size:
+                seq = np.concatenate(([1 if self._flexed else -1], events))
+                self._reps += int(np.count_nonzero((seq[1:] == 1) & (seq[:-1] == -1)))
+                self._flexed = bool(seq[-1] == 1)
+
+            # force : somme séquentielle + début d'appui de chaque échantillon
+            self._force_sum = float(np.cumsum(np.concatenate(([self._force_sum], force)))[-1])
+            above = force > self.force_onset
+            prev_above = np.concatenate(([self._pressing], above[:-1]))
+            onset = above & ~prev_above
+            last_onset = np.maximum.accumulate(np.where(onset, np.arange(m), -1))
+            onset_t = np.where(last_onset >= 0, t[np.maximum(last_onset, 0)], self._onset_t)
+            k = int(np.argmax(force))
+            if force[k] > self._force_peak:
+                self._force_peak = float(force[k])
+                self._ttp = (float(t[k]) - float(onset_t[k])) / 1000.0 if above[k] else 0.0
+            self._pressing = bool(above[-1])
+            self._onset_t = float(onset_t[-1])
+
+            # jerk
+            valid = dt > 0.0
+            pv = np.concatenate(([self._prev_v], v[:-1]))
+            d1 = np.zeros(m)
+            np.divide(v - pv, dt, out=d1, where=valid & (idx >= 1))
+            pd1 = np.concatenate(([self._prev_d1], d1[:-1]))
+            jerk = np.zeros(m)
+            np.divide(d1 - pd1, dt, out=jerk, where=valid & (idx >= 2))
+            self._jerk_int = float(np.cumsum(np.concatenate(([self._jerk_int], jerk * jerk * dt)))[-1])
+            speed = np.abs(v)
+            self._v_peak = max(self._v_peak, float(speed.max()))
+            self._speed_tail.extend(speed[-self.sparc_window_n:].tolist())
+
+            self._prev_v = float(v[-1])
+            self._prev_d1 = float(d1[-1])
+            self._prev_t = float(t[-1])
+            self._n = n0 + m
+
+    # ----- Résultats -----
+
+    def snapshot(self) -> SessionMetrics:
+        with self._lock:
+            n = self._n
+            if n == 0:
+                return SessionMetrics()
+            duration = (self._prev_t - self._t_first) / 1000.0
+            tail = np.fromiter(self._speed_tail, dtype=np.float64, count=len(self._speed_tail))
+            return SessionMetrics(
+                n_samples=n,
+                duration_s=duration,
+                rom_deg=self._angle_max - self._angle_min,
+                angle_min_deg=self._angle_min,
+                angle_max_deg=self._angle_max,
+                repetitions=self._reps,
+                peak_force=self._force_peak,
+                mean_force=self._force_sum / n,
+                time_to_peak_s=self._ttp,
+                ldlj=_ldlj(duration, self._v_peak, self._jerk_int),
+                sparc=sparc(tail, self.fs),
+            )
+
+
+def compute_metrics(cols: Dict[str, np.ndarray], calib: Optional[HandCalibrator] = None, **kwargs) -> SessionMetrics:
+    """Calcul batch sur une séance complète (colonnes numpy)."""
+    engine = MetricsEngine(calib, **kwargs)
+    engine.update_arrays(cols)
+    return engine.snapshot()
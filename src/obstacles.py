@@ -0,0 +1,134 @@
+# obstacles.py
+"""
+Obstacles du jeu voiture : rendu en un seul Mesh.
+
+Les positions vivent dans game_logic.ObstaclePool (tableaux numpy, sans
+Kivy) ; ici tous les obstacles visibles sont dessinés en une instruction :
+un Mesh de quads texturés qui partagent un atlas construit au chargement.
+
+LevelRenderer fait de même pour le niveau du jeu Jump (level.py) : un Mesh
+par type d'élément (rochers, plateformes, étoiles).
+"""
+
+from __future__ import annotations
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from kivy.core.image import Image as CoreImage
+from kivy.graphics import Color, Mesh
+from kivy.graphics.texture import Texture
+
+from game_logic import ObstaclePool
+from level import PLATFORM, ROCK, STAR, LevelStream
+from textures import texture_source
+
+
+def build_atlas(sources: Sequence[str]) -> Tuple[Texture, List[np.ndarray], List[float]]:
+    """
+    Colle les images côte à côte dans une seule texture.
+    Renvoie (texture, coordonnées UV des 4 coins par image, ratio h/w par image).
+    """
+    textures = [CoreImage(texture_source(src)).texture for src in sources]
+    if len({t.id for t in textures}) == 1:
+        # déjà dans la même page d'atlas (build_assets.py) : rien à recoller
+        uvs = [np.array(t.tex_coords, dtype=np.float32).reshape(4, 2) for t in textures]
+        return textures[0], uvs, [t.height / float(t.width) for t in textures]
+
+    width = sum(t.width for t in textures)
+    height = max(t.height for t in textures)
+
+    atlas = Texture.create(size=(width, height), colorfmt="rgba")
+    atlas.blit_buffer(bytes(width * height * 4), colorfmt="rgba", bufferfmt="ubyte")
+
+    uvs, ratios = [], []
+    x = 0
+    for tex in textures:
+        atlas.blit_buffer(tex.pixels, pos=(x, 0), size=tex.size, colorfmt="rgba", bufferfmt="ubyte")
+        # on garde l'orientation de la texture source (tex_coords : bas-g, bas-d, haut-d, haut-g)
+        src = np.array(tex.tex_coords, dtype=np.float32).reshape(4, 2)
+        uv = np.empty_like(src)
+        uv[:, 0] = (x + src[:, 0] * tex.width) / width
+        uv[:, 1] = src[:, 1] * tex.height / height
+        uvs.append(uv)
+        ratios.append(tex.height / float(tex.width))
+        x += tex.width
+    return atlas, uvs, ratios
+
+
+class ObstacleRenderer:
+    """
+    Dessine un ObstaclePool (game_logic.py) : tous les obstacles actifs dans
+    un seul Mesh texturé par l'atlas.
+    """
+
+    def __init__(self, canvas, sources: Sequence[str], capacity: int = 256):
+        self.texture, uvs, self.ratios = build_atlas(sources)
+        self._uvs = np.stack(uvs)                          # kinds x 4 x 2
+
+        # 4 sommets (x, y, u, v) et 6 indices par obstacle, préalloués
+        self._verts = np.zeros((capacity, 4, 4), dtype=np.float32)
+        quad = np.array([0, 1, 2, 2, 3, 0], dtype=np.int64)
+        self._indices = (np.arange(capacity)[:, np.newaxis] * 4 + quad).ravel().tolist()
+
+        with canvas:
+            Color(1, 1, 1, 1)
+            self.mesh = Mesh(vertices=[], indices=[], mode="triangles", texture=self.texture)
+
+    def redraw(self, pool: ObstaclePool, dy: float = 0.0):
+        """Remplit le Mesh ; dy décale tout le monde verticalement (interpolation)."""
+        idx = np.flatnonzero(pool.active)
+        n = idx.size
+        v = self._verts[:n]
+        x0, y0 = pool.x[idx], pool.y[idx] + dy
+        x1, y1 = x0 + pool.w[idx], y0 + pool.h[idx]
+        v[:, 0, 0], v[:, 0, 1] = x0, y0
+        v[:, 1, 0], v[:, 1, 1] = x1, y0
+        v[:, 2, 0], v[:, 2, 1] = x1, y1
+        v[:, 3, 0], v[:, 3, 1] = x0, y1
+        v[:, :, 2:] = self._uvs[pool.kind[idx]]
+        self.mesh.vertices = v.ravel().tolist()
+        self.mesh.indices = self._indices[:n * 6]
+
+
+STAR_SOURCE = "assets/icon_sparkle.png"
+
+
+class LevelRenderer:
+    """
+    Dessine les éléments visibles d'un LevelStream, décalés de la caméra.
+    Quelques dizaines de quads au plus : listes Python, sans numpy.
+    """
+
+    COLORS = {ROCK: (0.45, 0.42, 0.4, 1.0), PLATFORM: (0.55, 0.36, 0.2, 1.0)}
+
+    def __init__(self, canvas):
+        star = CoreImage(texture_source(STAR_SOURCE)).texture
+        self._star_uv = list(star.tex_coords)
+        self.meshes = {}
+        with canvas:
+            for kind in (PLATFORM, ROCK):
+                Color(*self.COLORS[kind])
+                self.meshes[kind] = Mesh(vertices=[], indices=[], mode="triangles")
+            Color(1, 1, 1, 1)
+            self.meshes[STAR] = Mesh(vertices=[], indices=[], mode="triangles", texture=star)
+
+    def redraw(self, level: LevelStream, scroll: float, view_w: float):
+        verts = {kind: [] for kind in self.meshes}
+        no_uv = (0.0, 0.0) * 4
+        for kind, x, y, w, h in level.visible(scroll, scroll + view_w):
+            x0 = x - scroll
+            x1, y1 = x0 + w, y + h
+            u = self._star_uv if kind == STAR else no_uv
+            verts[kind].extend((
+                x0, y, u[0], u[1],
+                x1, y, u[2], u[3],
+                x1, y1, u[4], u[5],
+                x0, y1, u[6], u[7],
+            ))
+        for kind, mesh in self.meshes.items():
+            v = verts[kind]
+            n = len(v) // 16
+            mesh.vertices = v
+            mesh.indices = [i * 4 + k for i in range(n) for k in (0, 1, 2, 2, 3, 0)]
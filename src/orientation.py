@@ -0,0 +1,70 @@
+# orientation.py
+"""
+Orientation du poignet par filtre complémentaire (gyro + accéléromètre).
+
+  - roll  : rotation autour de l'axe X du gant (pronation / supination,
+            celle tracée par WristFollowUpScreen), corrigée par la gravité
+  - pitch : rotation autour de Y, corrigée par la gravité
+  - yaw   : rotation autour de Z, gyro seul (pas de référence, dérive lente)
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Optional
+
+from hand_state import HandState, HandCalibrator
+
+
+class WristOrientation:
+    """
+    Listener de SerialHandReader : intègre chaque échantillon avec le vrai dt
+    (t_ms du firmware), pas le dt de l'horloge Kivy.
+    """
+
+    def __init__(self, calib: Optional[HandCalibrator] = None, alpha: float = 0.98):
+        self.calib = calib
+        self.alpha = alpha   # part du gyro (0.98 -> la gravité corrige en ~0.5 s)
+        self.reset()
+
+    def reset(self):
+        self.roll = 0.0
+        self.pitch = 0.0
+        self.yaw = 0.0
+        self._prev_t: Optional[int] = None
+
+    def update(self, state: HandState):
+        c = self.calib
+        gx = state.gx - (c.gx_offset if c else 0.0)
+        gy = state.gy - (c.gy_offset if c else 0.0)
+        gz = state.gz - (c.gz_offset if c else 0.0)
+
+        # angles "absolus" donnés par la gravité (valables si la main bouge peu)
+        acc_roll = math.degrees(math.atan2(state.ay, state.az))
+        acc_pitch = math.degrees(math.atan2(-state.ax, math.sqrt(state.ay * state.ay + state.az * state.az)))
+
+        if self._prev_t is None:
+            self.roll, self.pitch = acc_roll, acc_pitch
+            self._prev_t = state.t_ms
+            return
+
+        dt = (state.t_ms - self._prev_t) / 1000.0
+        self._prev_t = state.t_ms
+        if dt <= 0.0 or dt > 0.5:
+            # trou dans le flux : on se recale sur la gravité
+            self.roll, self.pitch = acc_roll, acc_pitch
+            return
+
+        a = self.alpha
+        self.roll = a * _unwrap(self.roll + gx * dt, acc_roll) + (1.0 - a) * acc_roll
+        self.pitch = a * (self.pitch + gy * dt) + (1.0 - a) * acc_pitch
+        self.yaw += gz * dt
+
+
+def _unwrap(angle: float, ref: float) -> float:
+    """Ramène angle à +-180° de ref (évite un saut de 360° dans le mélange)."""
+    while angle - ref > 180.0:
+        angle -= 360.0
+    while angle - ref < -180.0:
+        angle += 360.0
+    return angle
@@ -1,57 +1,92 @@
 # piano_game.py
 
 from kivy.uix.screenmanager import Screen
-from kivy.properties import NumericProperty, StringProperty, BooleanProperty
+from kivy.uix.widget import Widget
+from kivy.properties import NumericProperty, StringProperty, BooleanProperty, OptionProperty
+from kivy.graphics import Color, Rectangle
+from kivy.core.window import Window
 from kivy.clock import Clock
-from kivy.core.audio import SoundLoader  # 🔊 pour les sons
+from kivy.lang import Builder
 from kivy.app import App
 
 
-from serial_reader import SerialHandReader
-from hand_state import HandState
+from serial_reader import open_reader
+from device_protocol import FLEX_ONLY
+from frame_scheduler import StreamWaker
+from simulation import FixedStepClock
+from game_logic import PianoGameCore, RhythmCore, load_latency, save_latency
+from audio import AudioEngine  # 🔊 pour les sons
 
-import random
+# Règles KV de l'écran, chargées à l'import (donc au 1er passage sur l'écran)
+Builder.load_file("piano_game.kv")
 
 # Mets True quand tu voudras tester avec l'Arduino branché
 USE_ARDUINO = True
 
+# Le piano ne lit que les deux flexions : le gant les envoie seules, plus vite
+PIANO_RATE_HZ = 500
 
+# Mode rythme : textes des jugements, et mesure de latence (notes jouées avant d'enregistrer)
+JUDGEMENT_TEXT = {"perfect": "PARFAIT", "good": "BIEN", "miss": "RATÉ"}
+LATENCY_NOTES = 12
 
+# Touches clavier (test sans gant) en mode rythme
+RHYTHM_KEYS = {"f": "index", "j": "majeur"}
 
-# ---------- Utilitaires capteurs ----------
 
-def _norm(value, vmin, vmax):
-    """Normalise value entre 0 et 1 avec saturation."""
-    if vmax <= vmin:
-        return 0.0
-    x = (value - vmin) / float(vmax - vmin)
-    if x < 0.0:
-        x = 0.0
-    if x > 1.0:
-        x = 1.0
-    return x
+# ---------- Piste des notes (mode rythme) ----------
 
+class RhythmLane(Widget):
+    """
+    Notes à venir qui descendent vers la ligne de frappe, une colonne par
+    doigt. Rectangles préalloués (pool), repositionnés à chaque frame.
+    """
 
-def detect_fingers_pressed(state: HandState):
-    app = App.get_running_app()
-    calib = getattr(app, "calib", None)
-
-    if calib is None:
-        # fallback : ancien comportement
-        index_norm = _norm(state.flex_index, vmin=300, vmax=800)
-        majeur_norm = _norm(state.flex_thumb, vmin=300, vmax=800)
-        seuil_i = seuil_m = 0.6
-    else:
-        index_norm = _norm(state.flex_index, calib.flex_index_min, calib.flex_index_max)
-        majeur_norm = _norm(state.flex_thumb, calib.flex_thumb_min, calib.flex_thumb_max)
-        seuil_i = getattr(calib, "index_threshold", 0.6)
-        seuil_m = getattr(calib, "majeur_threshold", 0.6)
+    lookahead_ms = NumericProperty(2000.0)   # hauteur de la piste, en temps
+    capacity = 48
 
-    # discrimination + dominance (évite double déclenchement)
-    index_pressed = (index_norm > seuil_i) and (index_norm > majeur_norm)
-    majeur_pressed = (majeur_norm > seuil_m) and (majeur_norm > index_norm)
+    COLORS = {"index": (1.0, 0.85, 0.2, 1.0), "majeur": (1.0, 0.55, 0.1, 1.0)}
 
-    return index_pressed, majeur_pressed
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._slots = []
+        with self.canvas:
+            Color(1, 1, 1, 0.8)
+            self._hit_line = Rectangle()
+            for _ in range(self.capacity):
+                color = Color(1, 1, 1, 1)
+                rect = Rectangle(size=(0, 0))
+                self._slots.append((color, rect))
+
+    def hit_y(self) -> float:
+        return self.y + self.height * 0.1
+
+    def update(self, notes, now_ms: float, latency_ms: float = 0.0):
+        """Place les notes non jugées ; une note touche la ligne quand il faut fléchir."""
+        hit_y = self.hit_y()
+        self._hit_line.pos = (self.x, hit_y - 1)
+        self._hit_line.size = (self.width, 2)
+        col_w = self.width / 2.0
+        note_h = max(6.0, self.height * 0.03)
+        scale = (self.top - hit_y) / self.lookahead_ms
+
+        n = 0
+        for note in notes:
+            if n >= self.capacity:
+                break
+            ahead = note.target_ms + latency_ms - now_ms
+            if ahead > self.lookahead_ms:
+                break
+            if note.judgement:
+                continue
+            color, rect = self._slots[n]
+            color.rgba = self.COLORS.get(note.finger, (1, 1, 1, 1))
+            x = self.x + (0 if note.finger == "index" else col_w)
+            rect.pos = (x + col_w * 0.1, hit_y + ahead * scale - note_h / 2.0)
+            rect.size = (col_w * 0.8, note_h)
+            n += 1
+        for _, rect in self._slots[n:]:
+            rect.size = (0, 0)
 
 
 # ---------- Écran du mini-jeu piano ----------
@@ -64,8 +99,18 @@ class PianoGameScreen(Screen):
       - pour chaque tour, un seul doigt est attendu
       - le patient a une fenêtre de temps pour fléchir le bon doigt
       - si réussi -> note validée + SON de piano
+
+    Mode "rhythm" : les notes défilent en rythme (RhythmCore) et chaque
+    flexion est jugée sur son horodatage gant (parfait / bien / raté).
+    Mode "latency" : une note d'index par temps, pour mesurer la latence
+    du poste (enregistrée dans latency.txt) avant de jouer en rythme.
     """
 
+    mode = OptionProperty("turn", options=["turn", "rhythm", "latency"])
+    judgement = StringProperty("")         # dernier jugement (mode rythme)
+    combo = NumericProperty(0)
+    latency_ms = NumericProperty(0)        # compensation de latence du poste
+
     score = NumericProperty(0)             # nb de notes réussies
     expected_finger = StringProperty("index")  # "index" ou "majeur"
 
@@ -81,169 +126,153 @@ class PianoGameScreen(Screen):
         super().__init__(**kwargs)
 
         if USE_ARDUINO:
-            # ⚠️ adapte le port série à ton PC
-            self.serial_reader = SerialHandReader(
-                port="/dev/cu.usbmodem1201",
-                baudrate=115200,
-            )
+            # gant principal (serial_reader.default_port() ou devices.txt)
+            self.serial_reader = open_reader()
         else:
             self.serial_reader = None
 
-        # Séquence de doigts à jouer : ["index", "majeur", ...]
-        self.sequence: list[str] = []
-        self.current_step: int = 0
-
-        # Gestion d'un "tour"
-        self.note_window = 2.0      # durée max d'un tour (en secondes)
-        self.note_timer = 0.0       # temps écoulé depuis le début du tour
-        self.note_resolved = False  # True si tour déjà validé (ou raté)
-
-        # Pour le clignement visuel
-        self._badge_blink_timer = 0.0
-
-        # Pour détecter des "taps" plus tard si besoin
-        self._prev_index_pressed = False
-        self._prev_majeur_pressed = False
-
-        # 🔊 Chargement des sons (index / majeur)
-        self.sound_index = SoundLoader.load("assets/note_index.wav")
-        self.sound_majeur = SoundLoader.load("assets/note_majeur.wav")
-
-        # Optionnel : régler un volume plus doux
-        if self.sound_index:
-            self.sound_index.volume = 0.8
-        if self.sound_majeur:
-            self.sound_majeur.volume = 0.8
+        # Séquence, tours et détection : PianoGameCore (game_logic.py, sans Kivy)
+        self.turn_core = PianoGameCore(has_input=self.serial_reader is not None)
+        # Mode rythme (4 notes/s) et mesure de latence : RhythmCore
+        self.latency_ms = load_latency()
+        self.rhythm_core = RhythmCore(latency_ms=self.latency_ms)
+        self.latency_core = RhythmCore(bpm=90.0, subdivision=1, fingers=("index",),
+                                       perfect_ms=150.0, good_ms=250.0)
+        self.core = self.turn_core
+        self._keyboard_bound = False
+
+        # Simulation à pas fixe : timers et détection avancent dans step_game()
+        self.sim = FixedStepClock(self.step_game)
+        self.waker = StreamWaker(self.update_game)  # boucle d'affichage pilotée par les données
+
+        # 🔊 Sons décodés une fois en mémoire, mixés à plusieurs voix (audio.py)
+        self.audio = AudioEngine()
+        self.audio.load("index", "assets/note_index.wav", volume=0.8)
+        self.audio.load("majeur", "assets/note_majeur.wav", volume=0.8)
 
     # ----- Cycle de vie de l'écran -----
 
     def on_pre_enter(self):
         """Appelé quand on arrive sur l'écran."""
-        self.score = 0
-        self.generate_new_sequence()
-        self.current_step = 0
-        self.start_new_note()
+        self._restart_core()
+        self.audio.clock.reset()
+        self.audio.start()
 
         if self.serial_reader is not None:
+            App.get_running_app().attach_stream(self.serial_reader)
+            self.serial_reader.add_listener(self.sim.push)
+            self.serial_reader.add_listener(self.waker.on_state)
+            self.serial_reader.add_listener(self.audio.clock.observe)
             self.serial_reader.start()
+            # analyses et séance de l'app suspendues jusqu'au reset_device (NominalGate)
+            self.serial_reader.configure(rate_hz=PIANO_RATE_HZ, channels=FLEX_ONLY, fmt="bin")
 
-        Clock.schedule_interval(self.update_game, 1.0 / 60.0)
+        if not self._keyboard_bound:
+            Window.bind(on_key_down=self._on_key_down)
+            self._keyboard_bound = True
+
+        # Boucle réveillée par les échantillons du gant ; sans lecteur (démo), à chaque frame
+        self.waker.start(continuous=self.serial_reader is None)
 
     def on_leave(self):
         """Appelé quand on quitte l'écran."""
-        Clock.unschedule(self.update_game)
+        self.waker.stop()
 
         if self.serial_reader is not None:
+            self.serial_reader.reset_device()   # les autres écrans veulent tous les canaux
             self.serial_reader.stop()
-
-    # ----- Gestion de la séquence / des tours -----
-
-    def generate_new_sequence(self, length: int = 16):
-        """Crée une nouvelle séquence aléatoire de 'index' / 'majeur'."""
-        self.sequence = [random.choice(["index", "majeur"]) for _ in range(length)]
-        self.current_step = 0
-
-    def start_new_note(self):
-        """
-        Démarre un nouveau "tour" :
-          - fixe le doigt attendu
-          - réinitialise les timers
-        """
-        # Si on est au bout de la séquence, on en recrée une
-        if not self.sequence or self.current_step >= len(self.sequence):
-            self.generate_new_sequence()
-
-        self.expected_finger = self.sequence[self.current_step]
-        self.note_timer = 0.0
-        self.note_resolved = False
-        self._badge_blink_timer = 0.0
-
-    def advance_to_next_note(self):
-        """Passe à la note suivante dans la séquence."""
-        self.current_step += 1
-        self.start_new_note()
-
-    def _play_success_sound(self):
-        """Joue le son correspondant au doigt attendu."""
-        if self.expected_finger == "index" and self.sound_index:
-            # on stop avant play au cas où le son est déjà en cours
-            self.sound_index.stop()
-            self.sound_index.play()
-        elif self.expected_finger == "majeur" and self.sound_majeur:
-            self.sound_majeur.stop()
-            self.sound_majeur.play()
-
-    def validate_current_note(self):
-        """Appelé quand le patient a fléchi le bon doigt dans la fenêtre de temps."""
-        if self.note_resolved:
-            return  # déjà traité
-
-        self.note_resolved = True
-        self.score += 1
-
-        # 🔊 jouer le son correspondant
-        self._play_success_sound()
-
-        # on passe directement à la note suivante
-        self.advance_to_next_note()
-
-    def fail_current_note(self):
-        """Temps écoulé: on ne passe PAS à la note suivante, on redonne la même note."""
-        if self.note_resolved:
-            return
-
-        # (Optionnel) compteur d'erreurs si tu veux
-        # self.misses += 1
-
-        # On relance le même step: reset timers et clignotement
-        self.note_timer = 0.0
-        self.note_resolved = False
-        self._badge_blink_timer = 0.0
+            self.serial_reader.remove_listener(self.sim.push)
+            self.serial_reader.remove_listener(self.waker.on_state)
+            self.serial_reader.remove_listener(self.audio.clock.observe)
+
+        if self._keyboard_bound:
+            Window.unbind(on_key_down=self._on_key_down)
+            self._keyboard_bound = False
+
+        if self.mode == "rhythm":
+            print(f"[RYTHME] {self.core.stats()}")
+
+        self.audio.stop()
+        stats = self.audio.latency_stats()
+        if stats["n"]:
+            print(f"[AUDIO] latence capteur -> son : {stats}")
+
+    # ----- Modes -----
+
+    def set_mode(self, mode: str):
+        """Bascule tour par tour / rythme / mesure de latence (appelé par les boutons)."""
+        self.mode = mode
+        self.core = {"turn": self.turn_core, "rhythm": self.rhythm_core,
+                     "latency": self.latency_core}[mode]
+        self._restart_core()
+
+    def _restart_core(self):
+        self.core.calib = getattr(App.get_running_app(), "calib", None)
+        self.core.reset()
+        self.judgement = ""
+        self._sync_from_core()
+        self.sim.reset()
+
+    def _latency_measured(self, latency_ms: float):
+        self.latency_ms = round(latency_ms, 1)
+        self.rhythm_core.latency_ms = self.latency_ms
+        save_latency(self.latency_ms)
+        print(f"[RYTHME] latence du poste : {self.latency_ms} ms (latency.txt)")
+        self.set_mode("rhythm")
+
+    def _on_key_down(self, window, key, scancode, codepoint, modifiers):
+        finger = RHYTHM_KEYS.get(codepoint or "")
+        if self.mode == "turn" or finger is None:
+            return False
+        self.waker.keep_alive(2.0)  # sans gant, la piste avance tant qu'on joue au clavier
+        if self.core.now_ms is None:
+            return True
+        self.core.press(finger, self.core.now_ms)
+        return True
+
+    # ----- Sons -----
+
+    def _play_success_sound(self, finger: str, t_ms: float = -1.0):
+        """Joue le son du doigt validé, calé sur l'horodatage du geste (sans couper la note précédente)."""
+        self.audio.play(finger, t_ms if t_ms >= 0 else None)
 
     # ----- Boucle de jeu -----
 
     def update_game(self, dt: float):
-        """Boucle appelée ~60 fois par seconde."""
-        # --- Gestion du temps du tour ---
-        self.note_timer += dt
-        if self.note_timer >= self.note_window and not self.note_resolved:
-            # temps écoulé -> note ratée
-            self.fail_current_note()
-            return
-
-        # --- Clignement du badge du doigt attendu ---
-        self._badge_blink_timer += dt
-        blink_on = int(self._badge_blink_timer * 2) % 2 == 0  # ~2 fois par seconde
-
-        if self.expected_finger == "index":
-            self.index_badge_visible = blink_on
-            self.majeur_badge_visible = False
-        else:
-            self.majeur_badge_visible = blink_on
-            self.index_badge_visible = False
-
-        # --- Mode sans Arduino : démo visuelle, pas de contrôle réel ---
-        if self.serial_reader is None:
-            return
-
-        # --- Mode avec Arduino : lecture réelle du gant ---
-        state = self.serial_reader.get_latest_state()
-        if state is None:
-            return
-
-        index_pressed, majeur_pressed = detect_fingers_pressed(state)
-
-        # états pour la partie visuelle
-        self.index_active = index_pressed
-        self.majeur_active = majeur_pressed
-
-        # Vérifier si la note actuelle est réussie
-        if not self.note_resolved:
-            if self.expected_finger == "index" and index_pressed:
-                self.validate_current_note()
-            elif self.expected_finger == "majeur" and majeur_pressed:
-                self.validate_current_note()
-
-        # mémorisation (si plus tard tu veux détecter des "taps")
-        self._prev_index_pressed = index_pressed
-        self._prev_majeur_pressed = majeur_pressed
+        """Boucle d'affichage (frames où le gant a envoyé des données) : avance la simulation à pas fixe."""
+        alpha = self.sim.advance(dt)
+        if self.sim.playing:
+            self.waker.poke()
+        if self.mode != "turn" and self.core.now_ms is not None:
+            now = self.core.now_ms + alpha * self.sim.step_ms
+            self.ids.lane.update(self.core.notes, now, self.core.latency_ms)
+
+    def step_game(self, dt: float, samples: list):
+        """Un pas fixe (1/120 s) avec les échantillons du gant de ce pas."""
+        self.core.step(dt, samples)
+        events = self.core.drain_events()
+        App.get_running_app().publish_events("piano", events)
+        for event in events:
+            if event.kind in ("note_ok", "perfect", "good"):
+                # 🔊 jouer le son correspondant
+                self._play_success_sound(event.label, event.t_ms)
+            if event.kind in JUDGEMENT_TEXT:
+                self.judgement = JUDGEMENT_TEXT[event.kind]
+        self._sync_from_core()
+
+        if self.mode == "latency":
+            measured = self.core.measured_latency(LATENCY_NOTES)
+            if measured is not None:
+                # hors de la boucle de pas : set_mode() remet la simulation à zéro
+                Clock.schedule_once(lambda dt: self._latency_measured(measured), 0)
+                self.core.offsets.clear()
+
+    def _sync_from_core(self):
+        core = self.core
+        self.score = core.score
+        self.expected_finger = core.expected_finger
+        self.index_active = core.index_active
+        self.majeur_active = core.majeur_active
+        self.index_badge_visible = core.index_badge_visible
+        self.majeur_badge_visible = core.majeur_badge_visible
+        self.combo = getattr(core, "combo", 0)
@@ -0,0 +1,221 @@
+# port_discovery.py
+"""
+Trouve le port série du gant, sans configuration.
+
+Au démarrage (serial_reader.default_port, gloves.load_devices) :
+  1. GANT_PORT, s'il est défini, gagne toujours
+  2. le port mémorisé dans port_cache.txt est essayé seul d'abord : le
+     gant est retrouvé en quelques dizaines de ms au lancement suivant
+  3. sinon, tous les ports candidats (serial.tools.list_ports ; USB et
+     cartes Arduino d'abord, ports série de la carte mère seulement s'ils
+     ont un matériel connu) sont sondés en parallèle, timeout court
+
+Sonde : le port est ouvert et écouté ; c'est le gant si on y voit l'en-tête
+CSV du firmware ("t_ms,flex_thumb,..."), des échantillons valides ou, sur
+un port USB resté muet (gant en !IDLE), la réponse à !HELLO
+(device_protocol). Rien n'est écrit sur un port qui n'est pas USB.
+
+    python port_discovery.py            # sonde tout, affiche le détail
+    python port_discovery.py --all      # tous les gants branchés
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import serial
+
+from device_protocol import DeviceInfo, FrameDecoder
+
+PORT_CACHE = "port_cache.txt"
+PROBE_TIMEOUT_S = 0.6
+HEADER = b"t_ms,flex_thumb"
+MIN_SAMPLES = 3                    # échantillons valides pour reconnaître le gant
+ARDUINO_VIDS = {0x2341, 0x2A03}    # Arduino (Nano 33 BLE : 2341)
+
+
+@dataclass
+class ProbeResult:
+    port: str
+    found: bool = False
+    how: str = ""                  # "header", "csv" ou "hello"
+    elapsed_s: float = 0.0
+    info: Optional[DeviceInfo] = None
+    error: str = ""
+
+
+# ---------- Cache ----------
+
+def load_cache(path: str = PORT_CACHE) -> Dict[str, str]:
+    """{nom du gant: port} du dernier lancement (même format clé=valeur que calibration.txt)."""
+    cache = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                key, sep, value = line.strip().partition("=")
+                if sep and value:
+                    cache[key.strip()] = value.strip()
+    except OSError:
+        pass
+    return cache
+
+
+def save_cache(ports: Sequence[str], path: str = PORT_CACHE):
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            for i, port in enumerate(ports):
+                f.write(f"gant{i + 1 if i else ''}={port}\n")
+    except OSError:
+        pass   # dossier en lecture seule : on sondera au prochain lancement
+
+
+# ---------- Ports candidats ----------
+
+def candidate_ports() -> List[Tuple[str, bool]]:
+    """[(port, usb)] à sonder, les plus probables d'abord."""
+    from serial.tools import list_ports
+
+    ranked = []
+    for p in list_ports.comports():
+        name = p.device
+        if "Bluetooth" in name or name.startswith("/dev/tty."):
+            continue   # macOS : /dev/tty.* attend la porteuse à l'ouverture, /dev/cu.* suffit
+        usb = p.vid is not None
+        if not usb and (p.hwid in ("", "n/a") or name.startswith("/dev/ttyS")):
+            continue   # ports série de la carte mère sans matériel : ouverture lente ou inutile
+        rank = 0 if p.vid in ARDUINO_VIDS else (1 if usb else 2)
+        ranked.append((rank, name, usb))
+    ranked.sort()
+    return [(name, usb) for _, name, usb in ranked]
+
+
+# ---------- Sonde ----------
+
+def probe(port: str, baudrate: int = 115200, timeout: float = PROBE_TIMEOUT_S,
+          hello: bool = True) -> ProbeResult:
+    """Ouvre port, écoute au plus timeout s ; found si le gant s'y reconnaît."""
+    result = ProbeResult(port)
+    t0 = time.perf_counter()
+    try:
+        ser = serial.Serial(port, baudrate, timeout=0.02, write_timeout=0.1)
+    except (serial.SerialException, OSError, ValueError) as e:
+        result.error = str(e)
+        result.elapsed_s = time.perf_counter() - t0
+        return result
+
+    decoder = FrameDecoder()
+    head = b""
+    asked = False
+    try:
+        while time.perf_counter() - t0 < timeout:
+            data = ser.read(ser.in_waiting or 1)
+            if data:
+                head = (head + data)[-256:]
+                decoder.feed(data)
+                if HEADER in head:
+                    result.how = "header"
+                elif decoder.info is not None:
+                    result.how = "hello"
+                elif decoder.lines >= MIN_SAMPLES:
+                    result.how = "csv"
+                if result.how:
+                    result.found = True
+                    result.info = decoder.info
+                    break
+            elif hello and not asked and time.perf_counter() - t0 >= timeout / 3:
+                # muet (gant en !IDLE, ou autre appareil USB) : on demande
+                ser.write(b"!HELLO\n")
+                asked = True
+    except (serial.SerialException, OSError) as e:
+        result.error = str(e)
+    finally:
+        ser.close()
+    result.elapsed_s = time.perf_counter() - t0
+    return result
+
+
+def _probe_all(ports: Sequence[Tuple[str, bool]], baudrate: int, timeout: float,
+               wanted: int) -> List[ProbeResult]:
+    """Sonde en parallèle ; rend la main dès que wanted gants sont trouvés."""
+    if not ports:
+        return []
+    results = []
+    pool = ThreadPoolExecutor(max_workers=len(ports), thread_name_prefix="probe")
+    futures = [pool.submit(probe, port, baudrate, timeout, usb) for port, usb in ports]
+    try:
+        for future in as_completed(futures):
+            results.append(future.result())
+            if sum(r.found for r in results) >= wanted:
+                break
+    finally:
+        # les sondes encore en cours finissent seules (timeout court)
+        pool.shutdown(wait=False)
+    return results
+
+
+def discover(baudrate: int = 115200, timeout: float = PROBE_TIMEOUT_S, wanted: int = 1,
+             ports: Optional[Sequence[str]] = None, cache_path: Optional[str] = PORT_CACHE,
+             exclude: Sequence[str] = ()) -> List[ProbeResult]:
+    """
+    Sondes faites, ports mémorisés d'abord. Les ports des gants trouvés
+    (found) sont mémorisés dans cache_path. ports : liste explicite à sonder
+    (tous considérés USB), à la place de l'énumération du système.
+    """
+    candidates = [(p, True) for p in ports] if ports is not None else candidate_ports()
+    candidates = [(p, usb) for p, usb in candidates if p not in exclude]
+    cached = list(load_cache(cache_path).values()) if cache_path else []
+
+    first = [(p, usb) for p, usb in candidates if p in cached]
+    results = _probe_all(first, baudrate, timeout, wanted)
+    found = [r.port for r in results if r.found]
+    if len(found) < wanted:
+        rest = [(p, usb) for p, usb in candidates if p not in cached]
+        results += _probe_all(rest, baudrate, timeout, wanted - len(found))
+        found = [r.port for r in results if r.found]
+    if found and cache_path and found != cached[:len(found)]:
+        save_cache(found, cache_path)
+    return results
+
+
+def find_glove(baudrate: int = 115200, cache_path: Optional[str] = PORT_CACHE) -> Optional[str]:
+    """Port du gant, ou None si aucun gant n'est branché."""
+    found = [r.port for r in discover(baudrate, cache_path=cache_path) if r.found]
+    return found[0] if found else None
+
+
+def find_gloves(count: int, baudrate: int = 115200, exclude: Sequence[str] = (),
+                cache_path: Optional[str] = PORT_CACHE) -> List[str]:
+    """Ports de count gants au plus (devices.txt : entrées "auto")."""
+    results = discover(baudrate, wanted=count, exclude=exclude, cache_path=cache_path)
+    return [r.port for r in results if r.found][:count]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Cherche le gant sur les ports série.")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--timeout", type=float, default=PROBE_TIMEOUT_S)
+    parser.add_argument("--all", action="store_true", help="tous les gants, pas seulement le premier")
+    parser.add_argument("--no-cache", action="store_true", help="ignore et ne modifie pas port_cache.txt")
+    args = parser.parse_args(argv)
+
+    print(f"candidats : {[p for p, _ in candidate_ports()] or 'aucun'}")
+    t0 = time.perf_counter()
+    results = discover(args.baud, args.timeout, wanted=99 if args.all else 1,
+                       cache_path=None if args.no_cache else PORT_CACHE)
+    elapsed = time.perf_counter() - t0
+    for r in results:
+        status = f"GANT ({r.how})" if r.found else (r.error or "pas de gant")
+        extra = f" firmware {r.info.firmware}" if r.info else ""
+        print(f"  {r.port:<28} {r.elapsed_s * 1000:6.0f} ms  {status}{extra}")
+    found = [r.port for r in results if r.found]
+    print(f"{len(found)} gant(s) en {elapsed * 1000:.0f} ms" + (f" ; mémorisé dans {PORT_CACHE}" if found and not args.no_cache else ""))
+    return 0 if found else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
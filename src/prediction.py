@@ -0,0 +1,224 @@
+# prediction.py
+"""
+Prédiction des commandes du gant pour masquer la latence gant -> écran.
+
+Entre la période d'échantillonnage (10 ms), les rafales USB, le retard du
+tampon de gigue (jitter_buffer.py) et la frame à 16 ms, la voiture et
+l'avatar suivent la main avec 50 à 70 ms de retard. InputPredictor estime
+chaque canal de commande (vitesse angulaire, flexions, pressions) à
+l'heure d'affichage prévue :
+
+  - par canal, un filtre alpha-bêta (Kalman à vitesse constante en régime
+    établi) : valeur et dérivée lissées, mises à jour à chaque échantillon
+    reçu (observe, thread série)
+  - predict(t) extrapole valeur + dérivée x (t - dernier échantillon), la
+    durée d'extrapolation étant bornée par max_ms et le résultat par les
+    limites physiques du capteur (CLAMP)
+  - chaque prédiction est confrontée à la mesure quand elle arrive : erreur
+    RMS et max par canal, à côté de celle du "dernier échantillon" pour
+    savoir si la prédiction gagne ; GANT_PREDICT_LOG=fichier.csv garde le
+    détail (t_ms, canal, prédit, mesuré, dernier) pour régler alpha, bêta,
+    horizon
+
+Un jeu s'y abonne avec interpolated_input et predicted_input (game_logic)
+et FixedStepClock(predictor=...) : ses pas reçoivent alors l'état prédit à
+(temps simulé + retard de lecture + horizon_ms). Le rejeu (headless.py)
+n'en utilise pas : toute la séance y est connue d'avance. GANT_PREDICT=0
+désactive la prédiction, GANT_PREDICT_MS règle l'horizon.
+"""
+
+from __future__ import annotations
+
+import csv
+import math
+import os
+import threading
+from collections import deque
+from dataclasses import replace
+from typing import Deque, Dict, Optional, Sequence, Tuple
+
+from hand_state import HandState
+from jitter_buffer import RESET_MS
+
+PREDICT_CHANNELS = ("flex_thumb", "flex_index", "fsr_thumb", "fsr_index", "gx", "gy", "gz")
+HORIZON_MS = float(os.environ.get("GANT_PREDICT_MS", "16"))   # frame affichée après le pas
+MAX_EXTRAPOLATION_MS = 60.0
+GAP_MS = 200.0     # trou dans le flux au-delà duquel le filtre repart de la mesure
+
+# Limites physiques : ADC 10 bits, gyroscope LSM9DS1 +-2000 deg/s
+CLAMP: Dict[str, Tuple[float, float]] = {
+    "flex_thumb": (0.0, 1023.0), "flex_index": (0.0, 1023.0),
+    "fsr_thumb": (0.0, 1023.0), "fsr_index": (0.0, 1023.0),
+    "gx": (-2000.0, 2000.0), "gy": (-2000.0, 2000.0), "gz": (-2000.0, 2000.0),
+}
+
+
+def enabled() -> bool:
+    return os.environ.get("GANT_PREDICT", "1") not in ("", "0")
+
+
+def predictor_for(core) -> Optional["InputPredictor"]:
+    """Prédicteur d'un jeu qui en veut un (core.predicted_input), sauf GANT_PREDICT=0."""
+    if getattr(core, "predicted_input", False) and enabled():
+        return InputPredictor()
+    return None
+
+
+class AlphaBeta:
+    """Valeur + dérivée d'un canal (dérivée en unités par ms)."""
+
+    __slots__ = ("alpha", "beta", "x", "v")
+
+    def __init__(self, alpha: float, beta: float):
+        self.alpha = alpha
+        self.beta = beta
+        self.x: Optional[float] = None
+        self.v = 0.0
+
+    def update(self, z: float, dt_ms: float):
+        if self.x is None:
+            self.x, self.v = z, 0.0
+            return
+        if dt_ms <= 0.0:
+            return
+        pred = self.x + self.v * dt_ms
+        r = z - pred
+        self.x = pred + self.alpha * r
+        self.v += self.beta * r / dt_ms
+
+    def at(self, dt_ms: float) -> float:
+        return self.x + self.v * dt_ms
+
+
+class InputPredictor:
+
+    def __init__(self, channels: Sequence[str] = PREDICT_CHANNELS, horizon_ms: float = HORIZON_MS,
+                 max_ms: float = MAX_EXTRAPOLATION_MS, alpha: float = 0.6, beta: float = 0.15,
+                 log_path: Optional[str] = None):
+        self.channels = tuple(channels)
+        self.horizon_ms = horizon_ms    # au-delà du temps de lecture : affichage prévu
+        self.max_ms = max_ms            # extrapolation max après le dernier échantillon
+        self.alpha = alpha
+        self.beta = beta
+        self.log_path = log_path if log_path is not None else os.environ.get("GANT_PREDICT_LOG", "")
+        self._lock = threading.Lock()
+        self._log = None
+        self._writer = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._filters = {c: AlphaBeta(self.alpha, self.beta) for c in self.channels}
+            self._last: Optional[HandState] = None
+            # prédictions en attente de leur mesure : (t_ms, prédit, dernier échantillon)
+            self._pending: Deque[Tuple[float, Dict[str, float], Dict[str, float]]] = deque(maxlen=256)
+        self.predictions = 0
+        self.extrapolated_ms = 0.0     # somme des durées d'extrapolation (moyenne : stats)
+        self.clamped = 0               # prédictions ramenées dans CLAMP ou à max_ms
+        self._err = {c: [0, 0.0, 0.0, 0.0] for c in self.channels}   # n, somme², max, somme² "dernier"
+
+    # ----- Entrée (thread série) -----
+
+    def observe(self, state: HandState):
+        with self._lock:
+            last = self._last
+            if last is not None and state.t_ms <= last.t_ms:
+                if state.t_ms < last.t_ms - RESET_MS:
+                    last = None          # gant redémarré
+                    self._pending.clear()
+                else:
+                    return               # doublon ou hors ordre : déjà intégré
+            dt = 0.0 if last is None else state.t_ms - last.t_ms
+            for c, f in self._filters.items():
+                if dt > GAP_MS:
+                    f.x = None
+                f.update(float(getattr(state, c)), dt)
+            if last is not None:
+                self._score(last, state)
+            self._last = state
+
+    def _score(self, a: HandState, b: HandState):
+        """Erreur des prédictions faites pour un instant entre a et b (mesure interpolée)."""
+        pending = self._pending
+        while pending and pending[0][0] <= b.t_ms:
+            t, predicted, hold = pending.popleft()
+            if t < a.t_ms:
+                continue
+            f = (t - a.t_ms) / (b.t_ms - a.t_ms)
+            for c in self.channels:
+                actual = getattr(a, c) + (getattr(b, c) - getattr(a, c)) * f
+                err = predicted[c] - actual
+                acc = self._err[c]
+                acc[0] += 1
+                acc[1] += err * err
+                acc[2] = max(acc[2], abs(err))
+                acc[3] += (hold[c] - actual) ** 2
+                if self.log_path:
+                    self._write(t, c, predicted[c], actual, hold[c])
+
+    def _write(self, t: float, channel: str, predicted: float, actual: float, hold: float):
+        if self._writer is None:
+            new = not os.path.exists(self.log_path)
+            self._log = open(self.log_path, "a", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._log)
+            if new:
+                self._writer.writerow(["t_ms", "horizon_ms", "channel", "predicted", "actual", "latest"])
+        self._writer.writerow([round(t, 1), self.horizon_ms, channel,
+                               round(predicted, 3), round(actual, 3), round(hold, 3)])
+
+    # ----- Sortie (thread Kivy) -----
+
+    def predict(self, t_ms: float) -> Optional[HandState]:
+        """État prévu à t_ms (horloge du gant), ou None avant le 1er échantillon."""
+        with self._lock:
+            last = self._last
+            if last is None:
+                return None
+            dt = t_ms - last.t_ms
+            if dt > self.max_ms:
+                dt = self.max_ms
+                self.clamped += 1
+            dt = max(0.0, dt)
+            predicted, hold = {}, {}
+            for c, f in self._filters.items():
+                value = f.at(dt)
+                lo, hi = CLAMP.get(c, (-math.inf, math.inf))
+                if value < lo or value > hi:
+                    value = min(hi, max(lo, value))
+                    self.clamped += 1
+                predicted[c] = value
+                hold[c] = float(getattr(last, c))
+            self._pending.append((last.t_ms + dt, predicted, hold))
+        self.predictions += 1
+        self.extrapolated_ms += dt
+        return replace(last, t_ms=last.t_ms + dt, **predicted)
+
+    # ----- Mesures -----
+
+    def stats(self) -> dict:
+        """Par canal : erreur RMS et max de la prédiction, RMS du dernier échantillon tel quel."""
+        out = {
+            "horizon_ms": self.horizon_ms,
+            "predictions": self.predictions,
+            "mean_extrapolation_ms": round(self.extrapolated_ms / max(1, self.predictions), 1),
+            "clamped": self.clamped,
+        }
+        for c, (n, sq, mx, hold_sq) in self._err.items():
+            if n:
+                out[c] = {"n": n, "rms": round(math.sqrt(sq / n), 2), "max": round(mx, 2),
+                          "rms_latest": round(math.sqrt(hold_sq / n), 2)}
+        return out
+
+    def summary(self, channels: Sequence[str] = ("gx", "flex_index", "fsr_index")) -> str:
+        s = self.stats()
+        parts = [f"horizon {self.horizon_ms:.0f} ms, extrapolation moyenne {s['mean_extrapolation_ms']} ms"]
+        for c in channels:
+            if c in s:
+                parts.append(f"{c} RMS {s[c]['rms']} (dernier : {s[c]['rms_latest']})")
+        return ", ".join(parts)
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = self._writer = None
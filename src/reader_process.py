@@ -0,0 +1,552 @@
+# reader_process.py
+"""
+Acquisition du gant dans un process séparé (mode optionnel, GANT_READER=process).
+
+Le process lecteur lit le port série, décode le flux (lignes CSV, trames
+binaires : device_protocol.FrameDecoder), filtre (horodatages en double ou
+hors ordre) et enregistre la séance (flux par défaut seulement, comme
+NominalGate côté UI). Il publie chaque
+échantillon dans un anneau en mémoire partagée (multiprocessing.shared_memory) :
+
+    en-tête  int64[4]          écrits (séquence), capacité, lignes rejetées, UI en attente
+    seqs     int64[cap]        numéro de séquence de chaque case (-1 pendant l'écriture)
+    rows     float64[cap, 12]  champs de HandState + heure de réception (monotonic, s)
+
+Pas de verrou : l'écrivain marque la case (-1), écrit la ligne, remet le
+numéro puis publie la séquence ; le lecteur copie les cases puis vérifie
+leurs numéros (case réécrite entre-temps -> comptée perdue). Le parsing et
+l'écriture disque ne prennent plus de temps au process Kivy, et un rendu
+lourd (GIL) ne retarde plus la lecture du port.
+
+Côté UI, SharedHandReader a la même interface que SerialHandReader
+(listeners, get_latest_state) ; latest_rows(n) donne les derniers
+échantillons en vue numpy, sans copie. Le process lecteur est ce même
+fichier (--serve), lancé dans un interpréteur neuf : ses pipes servent aux
+commandes vers le gant (stdin, une par ligne ; fermé : arrêt), à leurs
+réponses et aux réveils (stdout), les données passent par l'anneau.
+SharedHandReader est un DeviceCommands comme les autres lecteurs : !RESET
+et !HELLO partent à l'ouverture, configure() passe par le process lecteur.
+
+Bench (port simulé par un pty, charge UI synthétique) :
+    python reader_process.py --bench
+    python reader_process.py --bench --rate 1000 --ui-work-ms 14
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import select
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import serial
+
+from device_protocol import DeviceCommands, FrameDecoder
+from hand_state import HandState
+from session import SessionRecorder
+
+FIELDS = ("t_ms", "flex_thumb", "flex_index", "fsr_thumb", "fsr_index",
+          "ax", "ay", "az", "gx", "gy", "gz")
+N_COLS = len(FIELDS) + 1          # + heure de réception dans le process lecteur
+RING_CAPACITY = 8192              # ~80 s à 100 Hz
+RESET_MS = 1000                   # recul d'horloge au-delà duquel le gant a redémarré
+WAKE_TIMEOUT_S = 0.05             # attente max de l'UI si un réveil se perd malgré tout
+
+# index de l'en-tête
+_SEQ, _CAP, _REJECTED, _UI_WAITING = range(4)
+
+_FENCE = threading.Lock()
+
+
+def _fence():
+    """
+    Barrière mémoire entre l'écriture d'un champ de l'en-tête et la lecture
+    d'un autre (_UI_WAITING puis _SEQ côté UI, _SEQ puis _UI_WAITING côté
+    lecteur). Sans elle, le processeur peut servir la lecture avant d'avoir
+    publié l'écriture : chaque côté voit l'ancienne valeur de l'autre et le
+    réveil se perd. Prendre un verrou passe par une instruction atomique
+    qui ordonne les deux (x86) ; WAKE_TIMEOUT_S borne l'attente ailleurs.
+    """
+    with _FENCE:
+        pass
+
+
+# ---------- Anneau en mémoire partagée ----------
+
+class ShmRing:
+
+    HEADER_BYTES = 4 * 8
+
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int, owner: bool):
+        self.shm = shm
+        self.capacity = capacity
+        self.owner = owner
+        buf = shm.buf
+        self.header = np.ndarray((4,), dtype=np.int64, buffer=buf, offset=0)
+        self.seqs = np.ndarray((capacity,), dtype=np.int64, buffer=buf, offset=self.HEADER_BYTES)
+        self.rows = np.ndarray((capacity, N_COLS), dtype=np.float64, buffer=buf,
+                               offset=self.HEADER_BYTES + 8 * capacity)
+
+    @classmethod
+    def nbytes(cls, capacity: int) -> int:
+        return cls.HEADER_BYTES + 8 * capacity + 8 * N_COLS * capacity
+
+    @classmethod
+    def create(cls, capacity: int = RING_CAPACITY) -> "ShmRing":
+        shm = shared_memory.SharedMemory(create=True, size=cls.nbytes(capacity))
+        ring = cls(shm, capacity, owner=True)
+        ring.header[:] = 0
+        ring.header[_CAP] = capacity
+        ring.seqs[:] = -1
+        return ring
+
+    @classmethod
+    def attach(cls, name: str, capacity: int) -> "ShmRing":
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            # le process UI possède le segment : sinon le resource_tracker du
+            # process lecteur le détruirait à sa sortie (Python < 3.13)
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return cls(shm, capacity, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def written(self) -> int:
+        return int(self.header[_SEQ])
+
+    # ----- Écrivain (process lecteur) -----
+
+    def write(self, values) -> int:
+        seq = int(self.header[_SEQ])
+        i = seq % self.capacity
+        self.seqs[i] = -1
+        self.rows[i] = values
+        self.seqs[i] = seq
+        self.header[_SEQ] = seq + 1
+        return seq
+
+    # ----- Lecteur (process UI) -----
+
+    def read_since(self, since: int) -> Tuple[int, np.ndarray, int]:
+        """(nouvelle séquence, lignes écrites depuis `since` (copie), nb perdues)."""
+        end = int(self.header[_SEQ])
+        lost = 0
+        if end - since > self.capacity:
+            lost = end - self.capacity - since
+            since = end - self.capacity
+        if end <= since:
+            return end, self.rows[:0], lost
+        expected = np.arange(since, end, dtype=np.int64)
+        idx = expected % self.capacity
+        rows = self.rows[idx]
+        ok = self.seqs[idx] == expected
+        if not ok.all():
+            lost += int((~ok).sum())
+            rows = rows[ok]
+        return end, rows, lost
+
+    def latest_rows(self, n: int) -> np.ndarray:
+        """Les n derniers échantillons : vue sans copie, sauf s'ils chevauchent la fin de l'anneau."""
+        end = int(self.header[_SEQ])
+        n = min(n, end, self.capacity)
+        a, b = (end - n) % self.capacity, end % self.capacity
+        if n == 0 or a < b or b == 0:
+            return self.rows[a:a + n]
+        return np.concatenate((self.rows[a:], self.rows[:b]))
+
+    def close(self):
+        self.header = self.seqs = self.rows = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # une vue numpy (latest_rows) est encore tenue : libérée avec elle
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+# ---------- Process lecteur ----------
+
+def _forward_commands(stream, ser, stop: threading.Event):
+    """Commandes de l'UI (une par ligne) vers le gant, jusqu'à la fermeture de stdin."""
+    for line in stream:
+        try:
+            ser.write(line)
+        except (serial.SerialException, OSError):
+            break
+    stop.set()
+
+
+def acquire_main(port: str, baudrate: int, shm_name: str, capacity: int,
+                 record_path: Optional[str]) -> int:
+    """
+    Boucle du process lecteur : port -> décodage -> filtre -> anneau (+ séance).
+
+    stdout : "OK" / "ERR <message>" à l'ouverture du port, puis un octet par
+    réveil demandé par l'UI et les réponses du gant ("#OK ...", une par
+    ligne). stdin : commandes à envoyer au gant ; fermé (arrêt ou mort du
+    process UI) : fin.
+    """
+    out = sys.stdout.buffer
+    try:
+        ser = serial.Serial(port, baudrate, timeout=0.1)
+    except Exception as e:
+        out.write(f"ERR {e}\n".encode())
+        out.flush()
+        return 1
+    ring = ShmRing.attach(shm_name, capacity)
+    recorder = SessionRecorder(record_path) if record_path else None
+    header = ring.header
+    out.write(b"OK\n")
+    out.flush()
+
+    stop = threading.Event()
+    threading.Thread(target=_forward_commands, args=(sys.stdin.buffer, ser, stop), daemon=True).start()
+
+    decoder = FrameDecoder()
+    replies = decoder.replies
+    duplicates = 0
+    last_t = None
+    nominal = True
+    try:
+        while not stop.is_set():
+            raw = ser.read(ser.in_waiting or 1)
+            if not raw:
+                continue
+            states = decoder.feed(raw)
+            if not replies.empty():
+                while not replies.empty():
+                    out.write(replies.get_nowait().encode() + b"\n")
+                out.flush()
+            written = False
+            for state in states:
+                # doublon / hors ordre (mais un gros recul = gant redémarré : on repart)
+                if last_t is not None and last_t - RESET_MS < state.t_ms <= last_t:
+                    duplicates += 1
+                    continue
+                last_t = state.t_ms
+
+                ring.write((state.t_ms, state.flex_thumb, state.flex_index, state.fsr_thumb,
+                            state.fsr_index, state.ax, state.ay, state.az,
+                            state.gx, state.gy, state.gz, time.monotonic()))
+                written = True
+                if recorder is not None:
+                    if decoder.nominal != nominal:
+                        nominal = decoder.nominal
+                        recorder.mark_stream(nominal, {"rate_hz": decoder.rate_hz, "channels": decoder.channels})
+                    if nominal:
+                        recorder.write_state(state)
+            header[_REJECTED] = decoder.rejected + duplicates
+            if written:
+                _fence()
+            if written and header[_UI_WAITING]:
+                header[_UI_WAITING] = 0
+                out.write(b"\x01")
+                out.flush()
+    except BrokenPipeError:
+        pass   # process UI parti
+    finally:
+        ser.close()
+        if recorder is not None:
+            recorder.close()
+        ring.close()
+    return 0
+
+
+def _row_to_state(r: List[float]) -> HandState:
+    return HandState(int(r[0]), int(r[1]), int(r[2]), int(r[3]), int(r[4]),
+                     r[5], r[6], r[7], r[8], r[9], r[10])
+
+
+# ---------- Côté UI ----------
+
+class _CommandPipe:
+    """`ser` de DeviceCommands : les commandes partent sur le stdin du process lecteur."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data: bytes):
+        try:
+            self.stream.write(data)
+        except (OSError, ValueError):
+            pass   # process lecteur arrêté
+
+
+class SharedHandReader(DeviceCommands):
+    """
+    Remplaçant de SerialHandReader : le port est lu par un process séparé.
+    Un thread léger recopie les nouveaux échantillons de l'anneau et appelle
+    les listeners (comme SerialHandReader, depuis un thread). Les réponses du
+    gant, relayées sur stdout, nourrissent _lines (configuration suivie).
+    """
+
+    records = True   # la séance est écrite par le process lecteur (cf. GantJeuApp.attach_stream)
+
+    def __init__(self, port: str, baudrate: int = 115200, capacity: int = RING_CAPACITY):
+        self.port_name = port
+        self.baudrate = baudrate
+        self.capacity = capacity
+        self.record_path: Optional[str] = None
+        self.ring: Optional[ShmRing] = None
+        self.process = None
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self.lost = 0
+        self._lines = FrameDecoder()
+
+        self._latest_state: Optional[HandState] = None
+        self._listeners: List[Callable[[HandState], None]] = []
+        self._seq = 0
+
+    def add_listener(self, fn: Callable[[HandState], None]):
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    def remove_listener(self, fn: Callable[[HandState], None]):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def start(self):
+        """Lance le process lecteur ; lève serial.SerialException si le port ne s'ouvre pas."""
+        self.ring = ShmRing.create(self.capacity)
+        # interpréteur neuf (pas de fork du process Kivy, et pas de réimport de
+        # main.py comme avec multiprocessing "spawn", qui rouvrirait une fenêtre)
+        args = [sys.executable, os.path.abspath(__file__), "--serve", self.port_name,
+                "--baud", str(self.baudrate), "--shm", self.ring.name,
+                "--capacity", str(self.capacity)]
+        if self.record_path:
+            args += ["--record", self.record_path]
+        self.process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+
+        reply = self.process.stdout.readline().strip() or b"ERR process lecteur interrompu"
+        if reply != b"OK":
+            self._cleanup()
+            raise serial.SerialException(reply.decode(errors="ignore")[4:])
+
+        self._seq = 0
+        self.lost = 0
+        self._lines.clear()
+        self.ser = _CommandPipe(self.process.stdin)
+        self._sync_device()
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.ser = None
+        if self.process is not None:
+            self.process.stdin.close()   # le process lecteur s'arrête, son stdout se ferme
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        self._cleanup()
+
+    def _cleanup(self):
+        if self.process is not None:
+            if not self.process.stdin.closed:
+                self.process.stdin.close()
+            try:
+                self.process.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process.stdout.close()
+            self.process = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def _loop(self):
+        ring = self.ring
+        header = ring.header
+        fd = self.process.stdout.fileno()
+        while self.running:
+            self._drain()
+            # dort jusqu'au prochain échantillon (réveil demandé au process lecteur)
+            header[_UI_WAITING] = 1
+            _fence()
+            if ring.written != self._seq:
+                header[_UI_WAITING] = 0
+                continue
+            if not select.select([fd], [], [], WAKE_TIMEOUT_S)[0]:
+                continue   # réveil perdu ou gant muet : on revérifie l'anneau
+            try:
+                data = os.read(fd, 4096)
+            except OSError:
+                break
+            if not data:
+                break   # process lecteur arrêté
+            replies = data.replace(b"\x01", b"")
+            if replies:
+                self._lines.feed(replies)
+        self._drain()
+
+    def _drain(self):
+        self._seq, rows, lost = self.ring.read_since(self._seq)
+        self.lost += lost
+        for r in rows.tolist():
+            state = _row_to_state(r)
+            self._latest_state = state
+            for fn in self._listeners:
+                fn(state)
+
+    def get_latest_state(self) -> Optional[HandState]:
+        return self._latest_state
+
+    def latest_rows(self, n: int) -> np.ndarray:
+        """Derniers échantillons bruts (colonnes FIELDS + réception), vue numpy."""
+        if self.ring is None:
+            return np.empty((0, N_COLS))
+        return self.ring.latest_rows(n)
+
+    @property
+    def rejected(self) -> int:
+        return int(self.ring.header[_REJECTED]) if self.ring is not None else 0
+
+
+# ---------- Bench ----------
+
+def _fake_device(master_fd: int, rate_hz: float, seconds: float):
+    """Écrit des lignes au format du firmware ; t_ms = horloge monotonic (ms) à l'écriture."""
+    period = 1.0 / rate_hz
+    t0 = time.monotonic()
+    k = 0
+    last_ms = 0
+    while True:
+        now = time.monotonic()
+        if now - t0 > seconds:
+            break
+        target = t0 + k * period
+        if target > now:
+            time.sleep(target - now)
+        t_ms = max(last_ms + 1, int(time.monotonic() * 1000))   # le firmware n'envoie pas deux fois la même ms
+        last_ms = t_ms
+        line = f"{t_ms},{700 + k % 50},{800 + k % 90},{510},{3},0.01,-0.02,0.98,0.5,-0.1,0.2\n"
+        os.write(master_fd, line.encode())
+        k += 1
+
+
+def _ui_load(work_ms: float) -> int:
+    """
+    Travail Python pur (garde le GIL) pendant work_ms, comme une reconstruction
+    de graphe. Renvoie le nombre de tours faits : moins de tours = temps pris
+    par le lecteur.
+    """
+    end = time.perf_counter() + work_ms / 1000.0
+    x = 0
+    n = 0
+    while time.perf_counter() < end:
+        for i in range(200):
+            x += i * i
+        n += 1
+    return n
+
+
+def bench_mode(mode: str, rate_hz: float, seconds: float, ui_work_ms: float, fps: float = 60.0) -> dict:
+    import tty  # Unix seulement
+    from serial_reader import SerialHandReader
+
+    master, slave = os.openpty()
+    tty.setraw(slave)   # pas d'écho ni de mode ligne : le pty se comporte comme un port USB
+    port = os.ttyname(slave)
+    reader = None
+    if mode != "none":   # "none" : référence, ni gant ni lecteur
+        reader = SharedHandReader(port) if mode == "process" else SerialHandReader(port)
+
+    latencies: List[float] = []
+    if reader is not None:
+        reader.add_listener(lambda s: latencies.append(time.monotonic() * 1000.0 - s.t_ms))
+        reader.start()
+
+    device = None
+    if reader is not None:
+        device = mp.get_context("fork").Process(target=_fake_device, args=(master, rate_hz, seconds), daemon=True)
+        device.start()
+
+    # boucle "UI" : ui_work_ms de calcul par frame, cadence fps
+    frame = 1.0 / fps
+    works: List[int] = []
+    t_end = time.perf_counter() + seconds
+    next_frame = time.perf_counter()
+    while time.perf_counter() < t_end:
+        works.append(_ui_load(ui_work_ms))
+        next_frame += frame
+        delay = next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_frame = time.perf_counter()
+    if device is not None:
+        device.join()
+    time.sleep(0.3)
+    if reader is not None:
+        reader.stop()
+    os.close(master)
+    os.close(slave)
+
+    lat = np.asarray(latencies, dtype=np.float64)
+    w = np.asarray(works, dtype=np.float64)
+    return {
+        "mode": mode,
+        "received": int(lat.size),
+        "expected": int(rate_hz * seconds),
+        "lat_mean_ms": round(float(lat.mean()), 2) if lat.size else 0.0,
+        "lat_p99_ms": round(float(np.percentile(lat, 99)), 2) if lat.size else 0.0,
+        "lat_max_ms": round(float(lat.max()), 2) if lat.size else 0.0,
+        "ui_work": round(float(w.mean()), 1),   # tours de calcul UI par frame
+        "frames": int(w.size),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Process lecteur du gant (mémoire partagée).")
+    parser.add_argument("--serve", metavar="PORT", help="process lecteur (lancé par SharedHandReader)")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--shm", help="nom du segment de mémoire partagée")
+    parser.add_argument("--capacity", type=int, default=RING_CAPACITY)
+    parser.add_argument("--record", help="fichier de séance (ajout)")
+    parser.add_argument("--bench", action="store_true", help="compare thread et process sur un port simulé")
+    parser.add_argument("--rate", type=float, default=500.0, help="lignes/s du gant simulé")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--ui-work-ms", type=float, default=12.0, help="calcul Python par frame UI (60 fps)")
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        return acquire_main(args.serve, args.baud, args.shm, args.capacity, args.record)
+    if not args.bench:
+        parser.print_help()
+        return 0
+
+    print(f"gant simulé {args.rate:.0f} Hz, UI {args.ui_work_ms:.0f} ms de calcul par frame à 60 fps, "
+          f"{args.seconds:.0f} s, {os.cpu_count()} cœur(s)")
+    print(f"{'mode':>8} {'reçus':>12} {'lat. moy':>9} {'p99':>8} {'max':>8} {'frames':>7} {'calcul UI':>10}")
+    base = None
+    for mode in ("none", "thread", "process"):
+        r = bench_mode(mode, args.rate, args.seconds, args.ui_work_ms)
+        base = base or r["ui_work"]
+        print(f"{r['mode']:>8} {r['received']:>5}/{r['expected']:<6} {r['lat_mean_ms']:>7.1f}ms "
+              f"{r['lat_p99_ms']:>6.1f}ms {r['lat_max_ms']:>6.1f}ms {r['frames']:>7} "
+              f"{100.0 * r['ui_work'] / base:>9.0f}%")
+    print("calcul UI : travail fait par frame, en % du cas sans lecteur (none)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+# sd_download.py
+"""
+Récupère les séances enregistrées sur la carte SD du gant (exercices à la
+maison, sans ordinateur) et les convertit en séances CSV (session.py),
+analysables comme les autres (batch_analytics.py, FollowUpScreen).
+
+    python sd_download.py --patient p01        # gant trouvé tout seul (port_discovery.py)
+    python sd_download.py /dev/cu.usbmodem1201 --patient p01 --delete
+    python sd_download.py --convert sd_logs/LOG00003_58029.BIN -o sessions/p01/maison.csv
+
+Transfert (commandes de main.cpp) : !IDLE arrête l'acquisition, !LS liste
+les fichiers, puis !GET les lit par blocs de --block octets (8 ko au plus)
+suivis de leur CRC-32. Un bloc au CRC faux, tronqué ou sans réponse est
+redemandé (--retries fois). Les blocs vérifiés sont ajoutés à
+<out>/<NOM>_<taille>.part : après une coupure (câble arraché, batterie,
+Ctrl+C), relancer la commande reprend à la taille du .part ; un port qui
+disparaît en cours de route est rouvert pendant --reconnect s.
+
+Fichier complet : renommé en .BIN, converti en
+<sessions>/<patient>/sd_<NOM>_<taille>.csv (une seule fois : relancer la
+commande ne duplique pas les séances), effacé du gant avec --delete.
+!RESET à la fin relance l'acquisition (et un nouveau fichier sur la carte).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import struct
+import sys
+import time
+import zlib
+from typing import List, Optional, Tuple
+
+import serial
+
+from device_protocol import SD_GET_MAX, FrameDecoder
+from serial_reader import SERIAL_BAUD, default_port
+from session import SESSION_DIR, SessionRecorder
+
+CRC = struct.Struct("<I")
+DEFAULT_OUT = "sd_logs"
+
+
+class SdTransferError(IOError):
+    pass
+
+
+class SdLink:
+    """Requêtes / réponses avec le gant, acquisition arrêtée (!IDLE)."""
+
+    def __init__(self, ser, timeout: float = 2.0, retries: int = 5, block: int = SD_GET_MAX):
+        self.ser = ser
+        self.timeout = timeout
+        self.retries = retries
+        self.block = max(512, min(block, SD_GET_MAX))
+        self.ser.timeout = timeout
+        self.bad_blocks = 0          # blocs redemandés (CRC, troncature, silence)
+        self.bytes = 0               # octets vérifiés reçus
+
+    # ----- Lignes -----
+
+    def _line(self) -> str:
+        raw = self.ser.read_until(b"\n")
+        return raw.decode("ascii", errors="ignore").strip()
+
+    def _drain(self):
+        """Jette ce qui reste d'une réponse ratée avant de redemander."""
+        time.sleep(min(0.05, self.timeout))
+        self.ser.reset_input_buffer()
+
+    def idle(self):
+        """Arrête l'acquisition ; les échantillons déjà en route sont ignorés."""
+        self.ser.reset_input_buffer()
+        self.ser.write(b"!IDLE\n")
+        deadline = time.perf_counter() + self.timeout * 2
+        while time.perf_counter() < deadline:
+            if "#OK IDLE" in self._line():
+                self.ser.reset_input_buffer()
+                return
+        raise SdTransferError("le gant ne répond pas à !IDLE (firmware sans carte SD ?)")
+
+    def resume(self):
+        self.ser.write(b"!RESET\n")
+
+    def command(self, command: str) -> str:
+        """Envoie une commande, renvoie sa réponse "#OK <CMD> ..." (SdTransferError sinon)."""
+        key = command.split()[0].lstrip("!")
+        self.ser.write(command.encode("ascii") + b"\n")
+        deadline = time.perf_counter() + self.timeout
+        while time.perf_counter() < deadline:
+            line = self._line()
+            if line.startswith(f"#OK {key}"):
+                return line
+            if line.startswith("#ERR"):
+                raise SdTransferError(f"{command} : {line}")
+        raise SdTransferError(f"{command} : pas de réponse")
+
+    # ----- Fichiers -----
+
+    def list_files(self) -> List[Tuple[str, int]]:
+        """[(nom, taille)] des fichiers de la carte, par pages de 8."""
+        files = []
+        while True:
+            words = self.command(f"!LS {len(files)}").split()
+            total = int(words[3])
+            for item in words[4:]:
+                name, _, size = item.rpartition(":")
+                files.append((name, int(size)))
+            if len(files) >= total or len(words) <= 4:
+                return files
+
+    def get_block(self, name: str, offset: int) -> Optional[bytes]:
+        """Un bloc vérifié (CRC-32), ou None s'il faut le redemander."""
+        self.ser.write(f"!GET {name} {offset} {self.block}\n".encode("ascii"))
+        head = self._line().split()
+        if len(head) != 4 or head[:2] != ["#OK", "GET"]:
+            return None
+        try:
+            at, n = int(head[2]), int(head[3])
+        except ValueError:
+            return None                  # en-tête abîmé sur la ligne : on redemande
+        if at != offset:
+            return None
+        raw = self.ser.read(n + CRC.size)
+        if len(raw) != n + CRC.size:
+            return None
+        data = raw[:n]
+        if zlib.crc32(data) != CRC.unpack_from(raw, n)[0]:
+            return None
+        return data
+
+    def download(self, name: str, size: int, out_dir: str, progress=None) -> str:
+        """Télécharge name dans out_dir (reprise sur le .part) ; renvoie le chemin du .BIN."""
+        os.makedirs(out_dir, exist_ok=True)
+        stem = os.path.splitext(name)[0]
+        final = os.path.join(out_dir, f"{stem}_{size}.BIN")
+        if os.path.exists(final):
+            return final
+        part = os.path.join(out_dir, f"{stem}_{size}.part")
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        with open(part, "ab") as f:
+            while offset < size:
+                for _ in range(self.retries + 1):
+                    data = self.get_block(name, offset)
+                    if data:
+                        break
+                    self.bad_blocks += 1
+                    self._drain()
+                else:
+                    raise SdTransferError(f"{name} : bloc {offset} illisible après {self.retries} essais")
+                f.write(data)
+                f.flush()            # le .part ne contient que des blocs vérifiés
+                offset += len(data)
+                self.bytes += len(data)
+                if progress is not None:
+                    progress(name, offset, size)
+        os.replace(part, final)
+        return final
+
+    def remove(self, name: str):
+        self.command(f"!RM {name}")
+
+
+# ---------- Conversion ----------
+
+def convert_log(bin_path: str, session_path: str, chunk: int = 1 << 16) -> int:
+    """Fichier binaire de la carte -> séance CSV ; renvoie le nombre d'échantillons."""
+    decoder = FrameDecoder()
+    # écrite à côté puis renommée : une séance .csv présente est toujours complète
+    tmp = session_path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    recorder = SessionRecorder(tmp)
+    n = 0
+    with open(bin_path, "rb") as f:
+        while True:
+            data = f.read(chunk)
+            if not data:
+                break
+            for state in decoder.feed(data):
+                recorder.write_state(state)
+                n += 1
+    recorder.close()
+    if n:
+        os.replace(tmp, session_path)
+    if decoder.rejected:
+        print(f"  {os.path.basename(bin_path)} : {decoder.rejected} trame(s) invalide(s) ignorée(s)")
+    return n
+
+
+def session_path_for(bin_path: str, session_dir: str) -> str:
+    """Séance d'un fichier de la carte : nom tiré du fichier (<NOM>_<taille>), pas de l'heure."""
+    stem = os.path.splitext(os.path.basename(bin_path))[0]
+    return os.path.join(session_dir, f"sd_{stem}.csv")
+
+
+# ---------- Outil en ligne de commande ----------
+
+def _open(port: str, baud: int, reconnect_s: float) -> serial.Serial:
+    deadline = time.perf_counter() + reconnect_s
+    while True:
+        try:
+            return serial.Serial(port, baud, timeout=1)
+        except serial.SerialException:
+            if time.perf_counter() >= deadline:
+                raise
+            time.sleep(1.0)
+
+
+def _progress(name: str, offset: int, size: int):
+    print(f"\r  {name} {100 * offset // max(1, size):3d} % ({offset}/{size})", end="", flush=True)
+
+
+def pull(args) -> int:
+    session_dir = os.path.join(args.sessions, args.patient) if args.patient else args.sessions
+    ser = _open(args.port, args.baud, args.reconnect)
+    link = SdLink(ser, timeout=args.timeout, retries=args.retries, block=args.block)
+    t0 = time.perf_counter()
+    done = 0
+    try:
+        link.idle()
+        files = link.list_files()
+        print(f"{len(files)} fichier(s) sur la carte, {sum(s for _, s in files)} octets")
+        for name, size in files:
+            while True:
+                try:
+                    path = link.download(name, size, args.out, _progress)
+                    break
+                except (serial.SerialException, OSError) as e:
+                    if isinstance(e, SdTransferError) or args.reconnect <= 0:
+                        raise
+                    # port disparu (câble) : on le rouvre et on reprend au .part
+                    print(f"\n  port perdu ({e}), reconnexion...")
+                    ser.close()
+                    ser = _open(args.port, args.baud, args.reconnect)
+                    link.ser = ser
+                    ser.timeout = args.timeout
+                    link.idle()
+            print()
+            session = session_path_for(path, session_dir)
+            if os.path.exists(session):
+                print(f"  -> {session} (déjà convertie)")
+            else:
+                n = convert_log(path, session)
+                print(f"  -> {session} ({n} échantillons)")
+            if args.delete:
+                link.remove(name)
+            done += 1
+    except SdTransferError as e:
+        print(f"\nErreur : {e} ; relancer la commande pour reprendre")
+        return 1
+    except KeyboardInterrupt:
+        print("\nInterrompu ; relancer la commande pour reprendre")
+        return 1
+    finally:
+        try:
+            link.resume()
+            ser.close()
+        except (serial.SerialException, OSError):
+            pass
+    elapsed = time.perf_counter() - t0
+    print(f"{done} séance(s), {link.bytes} octets en {elapsed:.1f} s "
+          f"({link.bytes / 1024 / max(elapsed, 1e-6):.0f} ko/s), {link.bad_blocks} bloc(s) redemandé(s)")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Télécharge les séances de la carte SD du gant.")
+    parser.add_argument("port", nargs="?", default=None, help="port du gant (défaut : recherche automatique)")
+    parser.add_argument("--baud", type=int, default=SERIAL_BAUD)
+    parser.add_argument("--patient", default="", help="sous-dossier patient des séances")
+    parser.add_argument("--sessions", default=SESSION_DIR, help="dossier des séances CSV")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="dossier des fichiers bruts (.BIN, .part)")
+    parser.add_argument("--block", type=int, default=SD_GET_MAX, help="octets par bloc (8192 max)")
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--reconnect", type=float, default=30.0, help="s d'attente si le port disparaît (0 : non)")
+    parser.add_argument("--delete", action="store_true", help="efface du gant les fichiers téléchargés")
+    parser.add_argument("--convert", metavar="BIN", help="convertit seulement un fichier déjà téléchargé")
+    parser.add_argument("-o", "--output", help="séance CSV de --convert")
+    args = parser.parse_args(argv)
+
+    if args.convert:
+        out = args.output or session_path_for(args.convert, args.sessions)
+        print(f"{out} : {convert_log(args.convert, out)} échantillons")
+        return 0
+    args.port = args.port or default_port(args.baud)
+    return pull(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
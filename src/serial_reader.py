@@ -1,16 +1,45 @@
 # serial_reader.py
 
+import os
+import sys
 import threading
-from typing import Optional
+from typing import Callable, List, Optional
 
 import serial
 
+from device_protocol import DeviceCommands, FrameDecoder
 from hand_state import HandState
 
+# Port du gant principal : GANT_PORT pour l'imposer, sinon recherche
+# automatique (default_port, port_discovery.py) ; plusieurs gants :
+# devices.txt, cf. gloves.py
+SERIAL_PORT = os.environ.get("GANT_PORT", "")
+SERIAL_BAUD = 115200
+# Port supposé si aucun gant n'est trouvé (ancienne valeur par défaut, selon le système)
+FALLBACK_PORT = {"darwin": "/dev/cu.usbmodem1201", "win32": "COM3"}.get(sys.platform, "/dev/ttyACM0")
 
-class SerialHandReader:
+_default_port: Optional[str] = None
+
+
+def default_port(baudrate: int = SERIAL_BAUD) -> str:
     """
-    Lit en continu les lignes du port série et expose le dernier HandState.
+    Port du gant principal : GANT_PORT, sinon le gant trouvé par
+    port_discovery (port mémorisé sondé d'abord), sinon FALLBACK_PORT.
+    Un gant trouvé n'est plus recherché pendant le reste du processus.
+    """
+    global _default_port
+    if SERIAL_PORT:
+        return SERIAL_PORT
+    if _default_port is None:
+        from port_discovery import find_glove
+        _default_port = find_glove(baudrate)
+    return _default_port or FALLBACK_PORT
+
+
+class SerialHandReader(DeviceCommands):
+    """
+    Lit en continu le port série et expose le dernier HandState.
+    Commandes vers le gant (fréquence, canaux, format) : device_protocol.DeviceCommands.
     """
 
     def __init__(self, port: str, baudrate: int = 115200):
@@ -22,12 +51,30 @@ class SerialHandReader:
 
         self._lock = threading.Lock()
         self._latest_state: Optional[HandState] = None
+        self._lines = FrameDecoder()
+
+        # Callbacks appelés (dans le thread de lecture) pour CHAQUE état reçu
+        self._listeners: List[Callable[[HandState], None]] = []
+
+    def add_listener(self, fn: Callable[[HandState], None]):
+        """
+        Abonne fn à tous les états reçus (pas seulement le dernier).
+        Attention : fn est appelé depuis le thread de lecture.
+        """
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    def remove_listener(self, fn: Callable[[HandState], None]):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
 
     def start(self):
         """
         Ouvre le port série et lance le thread de lecture.
         """
         self.ser = serial.Serial(self.port_name, self.baudrate, timeout=1)
+        self._lines.clear()
+        self._sync_device()
         self.running = True
         self.thread = threading.Thread(target=self._loop, daemon=True)
         self.thread.start()
@@ -52,14 +99,15 @@ class SerialHandReader:
         assert self.ser is not None
         while self.running:
             try:
-                raw = self.ser.readline()
+                # octets bruts : lignes CSV ou trames binaires (device_protocol)
+                raw = self.ser.read(self.ser.in_waiting or 1)
                 if not raw:
                     continue
-                line = raw.decode(errors="ignore").strip()
-                state = HandState.from_csv_line(line)
-                if state is not None:
+                for state in self._lines.feed(raw):
                     with self._lock:
                         self._latest_state = state
+                    for fn in self._listeners:
+                        fn(state)
             except Exception:
                 # On ignore simplement les erreurs de parsing ou de lecture
                 continue
@@ -70,3 +118,26 @@ class SerialHandReader:
         """
         with self._lock:
             return self._latest_state
+
+
+def open_reader(port: Optional[str] = None, baudrate: int = SERIAL_BAUD):
+    """
+    Lecteur d'un gant pour les écrans (le gant principal si port est None) :
+
+      - par défaut, son flux dans la boucle d'E/S commune à tous les gants
+        (gloves.MultiGloveReader, un seul thread)
+      - GANT_READER=thread (ou Windows) : un SerialHandReader, un thread par port
+      - GANT_READER=process : SharedHandReader (process séparé + mémoire
+        partagée, reader_process.py)
+    """
+    from gloves import shared_reader
+    gloves = shared_reader()
+    stream = gloves.primary if port is None else gloves.stream_for(port, baudrate)
+
+    mode = os.environ.get("GANT_READER", "")
+    if mode == "process":
+        from reader_process import SharedHandReader
+        return SharedHandReader(stream.port_name, stream.baudrate)
+    if mode == "thread" or sys.platform == "win32":
+        return SerialHandReader(stream.port_name, stream.baudrate)
+    return stream
@@ -0,0 +1,143 @@
+# session.py
+"""
+Enregistrement et relecture des séances du gant.
+
+Une séance = un fichier CSV au même format que la sortie série du firmware
+(ligne d'en-tête "t_ms,flex_thumb,..." puis une ligne par échantillon), ou
+un dossier de blocs chunk_00000.csv, chunk_00001.csv... (ingest_server.py),
+relus bout à bout comme un seul fichier.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from hand_state import HandState
+from metrics import states_to_columns
+
+
+CSV_HEADER = "t_ms,flex_thumb,flex_index,fsr_thumb,fsr_index,ax_g,ay_g,az_g,gx_dps,gy_dps,gz_dps"
+SESSION_DIR = "sessions"
+CHUNK_PREFIX = "chunk_"
+FLUSH_S = 1.0           # au plus ~1 s de séance perdue si le programme s'arrête net
+
+
+def is_chunk(name: str) -> bool:
+    return name.startswith(CHUNK_PREFIX) and name.endswith(".csv")
+
+
+def is_session_csv(path: str) -> bool:
+    """
+    Vrai si le fichier est une séance : 1re ligne = en-tête du firmware ou
+    déjà un échantillon (capture sans en-tête). Écarte les autres CSV posés
+    à côté (résumés de batch_analytics.py, scores et événements de headless.py).
+    """
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            first = f.readline()
+    except OSError:
+        return False
+    return first.startswith("t_ms,") or HandState.from_csv_line(first) is not None
+
+
+def session_files(path: str) -> List[str]:
+    """Fichiers d'une séance, dans l'ordre : le CSV lui-même, ou les blocs d'un dossier de séance."""
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, name) for name in os.listdir(path) if is_chunk(name))
+    return [path]
+
+
+def new_session_path(directory: str = SESSION_DIR) -> str:
+    return os.path.join(directory, time.strftime("session_%Y%m%d_%H%M%S.csv"))
+
+
+class SessionRecorder:
+    """
+    Écrit chaque HandState reçu dans un fichier de séance.
+    Le fichier n'est créé qu'au premier échantillon (pas de séance vide),
+    et vidé sur le disque toutes les flush_s secondes.
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_s: float = FLUSH_S):
+        self.path = path or new_session_path()
+        self.flush_s = flush_s
+        self._file = None
+        self._flushed_at = 0.0
+        self._lock = threading.Lock()
+
+    def write_state(self, state: HandState):
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                # ajout : le process lecteur (reader_process.py) rouvre la séance à chaque écran
+                new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+                self._file = open(self.path, "a", encoding="utf-8")
+                if new:
+                    self._file.write(CSV_HEADER + "\n")
+                self._flushed_at = time.monotonic()
+            self._file.write(state.to_csv_line() + "\n")
+            now = time.monotonic()
+            if now - self._flushed_at >= self.flush_s:
+                self._file.flush()
+                self._flushed_at = now
+
+    def mark(self, text: str):
+        """Ligne de commentaire (ignorée à la relecture) ; rien si la séance n'est pas encore créée."""
+        with self._lock:
+            if self._file is not None:
+                self._file.write(f"# {text}\n")
+
+    def mark_stream(self, nominal: bool, config: dict):
+        """Le gant quitte (ou retrouve) le flux par défaut : ces échantillons ne sont pas enregistrés."""
+        if nominal:
+            self.mark("reprise : flux par défaut")
+        else:
+            self.mark(f"pause : gant à {config['rate_hz']} Hz, canaux {'/'.join(config['channels'])}")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_session(path: str) -> List[HandState]:
+    """Relit une séance complète (lignes invalides ignorées)."""
+    states = []
+    for name in session_files(path):
+        with open(name, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                state = HandState.from_csv_line(line)
+                if state is not None:
+                    states.append(state)
+    return states
+
+
+def load_session_columns(path: str) -> Dict[str, np.ndarray]:
+    """Relit une séance sous forme de colonnes numpy (pour le calcul batch)."""
+    return states_to_columns(read_session(path))
+
+
+def iter_session_chunks(path: str, chunk_size: int = 50_000) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Relit une séance par blocs de chunk_size échantillons (mémoire bornée).
+    Chaque bloc est un dict de colonnes numpy, à passer à MetricsEngine.update_arrays.
+    """
+    states: List[HandState] = []
+    for name in session_files(path):
+        with open(name, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                state = HandState.from_csv_line(line)
+                if state is None:
+                    continue
+                states.append(state)
+                if len(states) >= chunk_size:
+                    yield states_to_columns(states)
+                    states = []
+    if states:
+        yield states_to_columns(states)
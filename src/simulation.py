@@ -0,0 +1,174 @@
+# simulation.py
+"""
+Pas de simulation fixe, commun aux jeux.
+
+La logique de jeu avance toujours par pas de `step_s` (1/120 s par défaut),
+quelle que soit la cadence d'affichage. Les échantillons du gant sont mis en
+tampon avec leur horodatage (t_ms du firmware) et chaque pas reçoit ceux dont
+l'horodatage est <= au temps simulé : le résultat d'une partie ne dépend que
+du flux du gant, pas du PC (30 fps portable ou écran 144 Hz).
+
+  - gant présent : le temps simulé est l'heure de lecture du tampon de
+    gigue (jitter_buffer.py) : horloge du gant, retard fixe delay_ms,
+    avancée régulière sur l'horloge du PC même quand l'USB livre par rafales
+  - gant absent  : le temps simulé suit le dt de Kivy (clavier, démo)
+  - interpolate=True : chaque pas reçoit un seul état, interpolé entre les
+    échantillons qui encadrent le temps simulé (commande continue : voiture)
+  - predictor (prediction.InputPredictor) : cet état est plutôt celui prévu
+    à l'heure d'affichage (temps simulé + delay_ms + horizon), gant présent
+    et en temps réel seulement
+
+advance() renvoie alpha (0..1), la fraction de pas restante, pour interpoler
+l'affichage entre l'état du pas précédent et celui du pas courant.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from hand_state import HandState
+from jitter_buffer import PLAYOUT_MS, RESET_MS, JitterBuffer
+
+
+STEP_HZ = 120.0
+
+
+class FixedStepClock:
+
+    def __init__(
+        self,
+        on_step: Callable[[float, List[HandState]], None],
+        step_s: float = 1.0 / STEP_HZ,
+        delay_ms: float = PLAYOUT_MS,
+        max_steps: int = 12,
+        stale_s: float = 0.5,
+        realtime: bool = True,
+        interpolate: bool = False,
+        predictor=None,
+    ):
+        self.on_step = on_step
+        self.step_s = step_s
+        self.step_ms = step_s * 1000.0
+        self.delay_ms = delay_ms     # retard de lecture du tampon de gigue (latence contre fluidité)
+        self.max_steps = max_steps   # au-delà, on lâche du temps (PC saturé)
+        self.stale_s = stale_s       # plus de données depuis stale_s -> horloge Kivy
+        self.realtime = realtime     # False : rejeu (headless.py), ni coupure ni limite de pas
+        self.interpolate = interpolate
+        self.predictor = predictor if realtime else None
+        # rejeu : toute la séance est poussée d'avance, pas de limite de taille
+        self.buffer = JitterBuffer(playout_ms=delay_ms, capacity=512 if realtime else None)
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.buffer.reset()
+        if self.predictor is not None:
+            self.predictor.reset()
+        with self._lock:
+            self._newest_t: Optional[float] = None
+            self._first_t: Optional[float] = None
+            self._last_push = -1e9
+        self.sim_ms: Optional[float] = None   # temps simulé, dans l'horloge du gant
+        self.steps = 0
+        self.dropped_ms = 0.0
+        self._acc_ms = 0.0
+        self._was_device = False
+
+    # ----- Entrée (thread série) -----
+
+    def push(self, state: HandState):
+        """Listener de SerialHandReader : range l'échantillon dans le tampon de gigue."""
+        self.buffer.push(state)
+        if self.predictor is not None:
+            self.predictor.observe(state)
+        with self._lock:
+            if self._first_t is None or state.t_ms < self._newest_t - RESET_MS:
+                self._first_t = state.t_ms   # 1er échantillon, ou gant redémarré
+                self._newest_t = state.t_ms
+            self._newest_t = max(self._newest_t, state.t_ms)
+            self._last_push = time.monotonic()
+
+    @property
+    def device_driven(self) -> bool:
+        if self._newest_t is None:
+            return False
+        return not self.realtime or time.monotonic() - self._last_push < self.stale_s
+
+    # ----- Boucle (thread Kivy, ou boucle headless) -----
+
+    def advance(self, frame_dt: float) -> float:
+        device = self.device_driven
+        if device:
+            target = self.buffer.playout_time() if self.realtime else self._newest_t - self.delay_ms
+            if self.sim_ms is None:
+                # grille de pas ancrée sur le 1er échantillon : indépendante des frames
+                self.sim_ms = self._first_t - self.step_ms
+            elif not self._was_device or abs(target - self.sim_ms) > RESET_MS:
+                self.sim_ms = target  # recalage après une coupure ou un redémarrage du gant
+            budget = target - self.sim_ms
+        else:
+            if self.sim_ms is None:
+                self.sim_ms = 0.0 if self._newest_t is None else self._newest_t
+            self._acc_ms += frame_dt * 1000.0
+            budget = self._acc_ms
+            self._acc_ms = 0.0
+
+        n = int(budget // self.step_ms)
+        if self.realtime and n > self.max_steps:
+            skipped = (n - self.max_steps) * self.step_ms
+            self.dropped_ms += skipped
+            self.sim_ms += skipped
+            budget -= skipped
+            n = self.max_steps
+
+        for _ in range(n):
+            self.sim_ms += self.step_ms
+            samples = self.buffer.take(self.sim_ms)
+            if self.predictor is not None and device:
+                state = self.predictor.predict(self.sim_ms + self.delay_ms + self.predictor.horizon_ms)
+                samples = [state] if state is not None else samples
+            elif self.interpolate:
+                state = self.buffer.sample(self.sim_ms)
+                samples = [state] if state is not None else []
+            self.on_step(self.step_s, samples)
+            self.steps += 1
+        rest = budget - n * self.step_ms
+        if not device:
+            self._acc_ms = rest
+        self._was_device = device
+        return max(0.0, min(1.0, rest / self.step_ms))
+
+    @property
+    def playing(self) -> bool:
+        """Des échantillons reçus attendent encore leur heure de lecture."""
+        return self.buffer.occupancy > 0
+
+
+class RenderState:
+    """
+    Valeurs affichées interpolées entre deux pas de simulation.
+    Dans on_step : begin() puis set(nom, valeur) ; à l'affichage : get(nom, alpha).
+    """
+
+    def __init__(self):
+        self._prev: Dict[str, float] = {}
+        self._cur: Dict[str, float] = {}
+
+    def begin(self):
+        self._prev.update(self._cur)
+
+    def set(self, name: str, value: float):
+        self._cur[name] = value
+        self._prev.setdefault(name, value)
+
+    def snap(self, name: str, value: float):
+        """Change sans interpolation (téléportation, reset)."""
+        self._cur[name] = value
+        self._prev[name] = value
+
+    def get(self, name: str, alpha: float) -> float:
+        prev = self._prev[name]
+        return prev + (self._cur[name] - prev) * alpha
@@ -0,0 +1,245 @@
+# spectral.py
+"""
+Analyse spectrale / tremblement sur l'IMU et les capteurs de flexion.
+
+  - TremorDetector : FFT glissante en live (fenêtre + saut "hop"), coût par
+    échantillon O(1), une FFT seulement tous les hop échantillons.
+  - welch_psd / session_tremor : DSP de Welch vectorisée sur une séance.
+  - SessionTremor : la même DSP de Welch, séance lue par blocs
+    (iter_session_chunks) ; colonnes tremor_* de batch_analytics.py.
+
+Les deux utilisent la même normalisation de DSP (fenêtre de Hann, une face),
+donc la puissance de bande live et batch sont comparables.
+
+Canaux vectoriels (gyro, accel) : DSP de chaque axe (signal signé), sommées.
+La norme du vecteur redresserait l'oscillation et doublerait sa fréquence
+(un tremblement à 5 Hz sur gx apparaîtrait à 10 Hz) ; la somme des axes
+garde la bonne fréquence et ne dépend pas de l'orientation du poignet.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from hand_state import HandState, HandCalibrator
+from metrics import NOMINAL_FS
+
+
+TREMOR_BAND = (3.0, 12.0)  # Hz
+CHANNELS = ("gyro", "accel", "flex_index", "flex_thumb")
+
+
+@dataclass
+class TremorResult:
+    freq_hz: float = 0.0       # fréquence dominante dans la bande
+    band_power: float = 0.0    # puissance dans la bande (unité²)
+    amplitude: float = 0.0     # RMS dans la bande (= sqrt(band_power))
+    band_ratio: float = 0.0    # part de la puissance totale dans la bande
+
+
+# ---------- Extraction des canaux ----------
+
+AXES = {"gyro": ("gx", "gy", "gz"), "accel": ("ax", "ay", "az")}
+
+
+def channel_axes(channel: str) -> Sequence[str]:
+    """Colonnes d'un canal : trois axes signés pour l'IMU, une seule sinon."""
+    return AXES.get(channel, (channel,))
+
+
+def _offsets(channel: str, calib: Optional[HandCalibrator]) -> Tuple[float, ...]:
+    if channel == "gyro" and calib is not None:
+        return (calib.gx_offset, calib.gy_offset, calib.gz_offset)
+    return (0.0,) * len(channel_axes(channel))
+
+
+def channel_value(state: HandState, channel: str, calib: Optional[HandCalibrator] = None) -> Tuple[float, ...]:
+    """Valeurs d'un canal pour un échantillon (une par axe, gyro corrigé du biais)."""
+    return tuple(float(getattr(state, axis)) - off
+                 for axis, off in zip(channel_axes(channel), _offsets(channel, calib)))
+
+
+def channel_array(cols: Dict[str, np.ndarray], channel: str, calib: Optional[HandCalibrator] = None) -> np.ndarray:
+    """Même chose que channel_value, en vectorisé sur des colonnes : (axes, n)."""
+    return np.stack([np.asarray(cols[axis], dtype=np.float64) - off
+                     for axis, off in zip(channel_axes(channel), _offsets(channel, calib))])
+
+
+# ---------- DSP ----------
+
+def _band_result(freqs: np.ndarray, psd: np.ndarray, band: Tuple[float, float]) -> TremorResult:
+    df = freqs[1] - freqs[0] if freqs.size > 1 else 0.0
+    total = float(psd[1:].sum() * df)  # sans la composante continue
+    sel = (freqs >= band[0]) & (freqs <= band[1])
+    if not np.any(sel) or total <= 0.0:
+        return TremorResult()
+    band_psd = psd[sel]
+    power = float(band_psd.sum() * df)
+    return TremorResult(
+        freq_hz=float(freqs[sel][int(np.argmax(band_psd))]),
+        band_power=power,
+        amplitude=math.sqrt(power),
+        band_ratio=power / total,
+    )
+
+
+def _onesided_psd(spectra: np.ndarray, window: np.ndarray, fs: float, nperseg: int) -> np.ndarray:
+    """
+    |X|² -> DSP une face (densité), moyennée sur les segments (avant-dernier
+    axe) puis sommée sur les axes du canal s'il y en a (premier axe).
+    """
+    psd = (np.abs(spectra) ** 2).mean(axis=-2) / (fs * np.sum(window * window))
+    if psd.ndim > 1:
+        psd = psd.sum(axis=0)
+    if nperseg % 2 == 0:
+        psd[1:-1] *= 2.0
+    else:
+        psd[1:] *= 2.0
+    return psd
+
+
+def welch_psd(x: np.ndarray, fs: float = NOMINAL_FS, nperseg: int = 256,
+              noverlap: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    DSP de Welch (fenêtre de Hann, moyenne retirée par segment).
+    x : un signal (n,) ou plusieurs axes (axes, n), dont les DSP sont sommées.
+    Tous les segments sont traités en une seule FFT vectorisée.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = x.shape[-1]
+    if n < nperseg:
+        nperseg = n
+    if nperseg < 2:
+        return np.zeros(1), np.zeros(1)
+    if noverlap is None:
+        noverlap = nperseg // 2
+    step = nperseg - noverlap
+
+    segments = sliding_window_view(x, nperseg, axis=-1)[..., ::step, :]
+    segments = segments - segments.mean(axis=-1, keepdims=True)
+    window = np.hanning(nperseg)
+    spectra = np.fft.rfft(segments * window, axis=-1)
+    freqs = np.fft.rfftfreq(nperseg, 1.0 / fs)
+    return freqs, _onesided_psd(spectra, window, fs, nperseg)
+
+
+def session_tremor(cols: Dict[str, np.ndarray], calib: Optional[HandCalibrator] = None,
+                   channels=("gyro", "flex_index"), fs: float = NOMINAL_FS,
+                   nperseg: int = 256, band: Tuple[float, float] = TREMOR_BAND) -> Dict[str, TremorResult]:
+    """Tremblement sur une séance complète, pour chaque canal demandé."""
+    out = {}
+    for channel in channels:
+        freqs, psd = welch_psd(channel_array(cols, channel, calib), fs, nperseg)
+        out[channel] = _band_result(freqs, psd, band)
+    return out
+
+
+class SessionTremor:
+    """
+    session_tremor au fil des blocs d'une séance (mémoire bornée) : les
+    segments de Welch sont les mêmes que sur la séance entière, les
+    nperseg - 1 derniers échantillons d'un bloc étant gardés pour le suivant.
+    """
+
+    def __init__(self, calib: Optional[HandCalibrator] = None, channels=("gyro", "flex_index"),
+                 fs: float = NOMINAL_FS, nperseg: int = 256, band: Tuple[float, float] = TREMOR_BAND):
+        self.calib = calib
+        self.channels = tuple(channels)
+        self.fs = fs
+        self.nperseg = nperseg
+        self.step = nperseg - nperseg // 2
+        self.band = band
+        self._window = np.hanning(nperseg)
+        self._tail: Dict[str, np.ndarray] = {}
+        self._power: Dict[str, np.ndarray] = {}   # somme des |X|² des segments, par axe
+        self._segments: Dict[str, int] = {}
+
+    def update_arrays(self, cols: Dict[str, np.ndarray]):
+        for channel in self.channels:
+            x = channel_array(cols, channel, self.calib)
+            if channel in self._tail:
+                x = np.concatenate([self._tail[channel], x], axis=-1)
+            k = (x.shape[-1] - self.nperseg) // self.step + 1 if x.shape[-1] >= self.nperseg else 0
+            if k:
+                segments = sliding_window_view(x, self.nperseg, axis=-1)[..., :k * self.step:self.step, :]
+                segments = segments - segments.mean(axis=-1, keepdims=True)
+                spectra = np.fft.rfft(segments * self._window, axis=-1)
+                power = (np.abs(spectra) ** 2).sum(axis=-2)
+                self._power[channel] = self._power.get(channel, 0.0) + power
+                self._segments[channel] = self._segments.get(channel, 0) + k
+            self._tail[channel] = x[..., k * self.step:]
+
+    def results(self) -> Dict[str, TremorResult]:
+        out = {}
+        for channel in self.channels:
+            segments = self._segments.get(channel, 0)
+            if not segments:
+                # séance plus courte qu'une fenêtre : welch_psd réduit nperseg
+                tail = self._tail.get(channel)
+                if tail is None:
+                    out[channel] = TremorResult()
+                    continue
+                freqs, psd = welch_psd(tail, self.fs, self.nperseg)
+            else:
+                mean = self._power[channel][:, np.newaxis, :] / segments
+                psd = _onesided_psd(np.sqrt(mean), self._window, self.fs, self.nperseg)
+                freqs = np.fft.rfftfreq(self.nperseg, 1.0 / self.fs)
+            out[channel] = _band_result(freqs, psd, self.band)
+        return out
+
+
+# ---------- Live ----------
+
+class TremorDetector:
+    """
+    Indicateur de tremblement live sur un canal.
+
+    update() écrit l'échantillon dans un tampon circulaire préalloué ; tous
+    les `hop` échantillons, une FFT de la dernière fenêtre met à jour `result`.
+    `result` est remplacé d'un bloc, on peut le lire depuis l'UI sans verrou.
+    """
+
+    def __init__(self, channel: str = "gyro", calib: Optional[HandCalibrator] = None,
+                 window: int = 256, hop: int = 25, fs: float = NOMINAL_FS,
+                 band: Tuple[float, float] = TREMOR_BAND):
+        if channel not in CHANNELS:
+            raise ValueError(f"canal inconnu: {channel}")
+        self.channel = channel
+        self.calib = calib
+        self.window = window
+        self.hop = hop
+        self.fs = fs
+        self.band = band
+
+        self._buf = np.zeros((len(channel_axes(channel)), window))
+        self._hann = np.hanning(window)
+        self._freqs = np.fft.rfftfreq(window, 1.0 / fs)
+        self._pos = 0
+        self._count = 0
+        self.result = TremorResult()
+
+    def reset(self):
+        self._buf[:, :] = 0.0
+        self._pos = 0
+        self._count = 0
+        self.result = TremorResult()
+
+    def update(self, state: HandState):
+        self._buf[:, self._pos] = channel_value(state, self.channel, self.calib)
+        self._pos = (self._pos + 1) % self.window
+        self._count += 1
+        if self._count >= self.window and self._count % self.hop == 0:
+            self._compute()
+
+    def _compute(self):
+        # remet la fenêtre dans l'ordre chronologique
+        x = np.roll(self._buf, -self._pos, axis=1)
+        x = x - x.mean(axis=1, keepdims=True)
+        spectrum = np.fft.rfft(x * self._hann, axis=1)
+        psd = _onesided_psd(spectrum[:, np.newaxis, :], self._hann, self.fs, self.window)
+        self.result = _band_result(self._freqs, psd, self.band)
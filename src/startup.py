@@ -0,0 +1,71 @@
+# startup.py
+"""
+Chronométrage du démarrage de l'app, par étapes (imports, KV, build,
+écrans, 1re frame). Sans Kivy : main.py l'importe en tout premier pour
+mesurer aussi l'import de Kivy. GANT_STARTUP_LOG=1 affiche le détail.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+class StartupProfile:
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self._last = self.t0
+        self.steps: List[Tuple[str, float]] = []   # démarrage, dans l'ordre
+        self.lazy: List[Tuple[str, float]] = []    # construits plus tard (écrans)
+        self.finished_at = None
+
+    @staticmethod
+    def enabled() -> bool:
+        return os.environ.get("GANT_STARTUP_LOG", "") not in ("", "0")
+
+    def lap(self, name: str):
+        """Clôt l'étape `name` : temps écoulé depuis l'étape précédente."""
+        now = time.perf_counter()
+        self.steps.append((name, now - self._last))
+        self._last = now
+
+    @contextmanager
+    def section(self, name: str):
+        """Chronomètre un bloc hors séquence de démarrage (ex. écran construit à la demande)."""
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.lazy.append((name, time.perf_counter() - t))
+
+    def finish(self, name: str = "1re frame"):
+        if self.finished_at is not None:
+            return
+        self.lap(name)
+        self.finished_at = time.perf_counter()
+        if self.enabled():
+            print(self.report())
+        else:
+            print(f"[STARTUP] 1er écran affiché en {1000 * self.total():.0f} ms")
+
+    def total(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.t0
+
+    def report(self) -> str:
+        lines = [f"[STARTUP] {'étape':<28} {'ms':>8}"]
+        for name, dt in self.steps:
+            lines.append(f"[STARTUP] {name:<28} {1000 * dt:>8.1f}")
+        lines.append(f"[STARTUP] {'total (1er écran affiché)':<28} {1000 * self.total():>8.1f}")
+        if self.lazy:
+            lines.append("[STARTUP] construits à la demande / au repos :")
+        for name, dt in self.lazy:
+            lines.append(f"[STARTUP]   {name:<26} {1000 * dt:>8.1f}")
+        return "\n".join(lines)
+
+
+# créé à l'import, le plus tôt possible (main.py l'importe en premier)
+PROFILE = StartupProfile()
@@ -0,0 +1,453 @@
+# telemetry.py
+"""
+Télémétrie en direct vers le poste du thérapeute, en UDP sur le réseau local.
+
+Le poste patient publie le flux du gant (normalisé avec la calibration) et
+les événements des jeux ; le thérapeute lance le récepteur sur son poste :
+
+    GANT_TELEMETRY=192.168.1.20:9750 python main.py       # poste patient
+    python telemetry.py receive --port 9750               # poste thérapeute
+    python telemetry.py demo --rate 1000 --loss 0.1       # tout en boucle locale
+
+Coût côté patient : on_state (listener du lecteur) ajoute l'échantillon à
+un lot ; toutes les period_s (ou lot plein), le lot est encodé d'un bloc
+(numpy, 22 octets par échantillon au lieu de ~60 en CSV) et envoyé en un
+datagramme non bloquant. Pas de thread, pas d'attente réseau.
+
+Paquet (little-endian) : en-tête 16 octets
+    "GT", version, type (1 échantillons, 2 événements), seq u32,
+    envoi u32 (ms, horloge de l'émetteur), nombre u16, décimation u16
+  échantillons : t0 u32 (t_ms du 1er) puis FRAME_DTYPE par échantillon
+  événements   : t_ms u32, value f32, kind et label (longueur u8 + utf-8)
+
+Adaptation du débit : le récepteur renvoie toutes les report_s un rapport
+(paquets reçus / perdus). Pertes > 5 % ou datagramme refusé -> décimation
+x2 (un échantillon sur 2, 4...) ; quatre rapports sans perte -> /2, tant
+que le débit reste sous max_kbps.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from hand_state import HandCalibrator, HandState
+
+DEFAULT_PORT = 9750
+VERSION = 1
+FRAMES, EVENTS = 1, 2
+
+HEADER = struct.Struct("<2sBBIIHH")
+REPORT = struct.Struct("<2sII")          # "GR", paquets reçus, paquets perdus (depuis le rapport précédent)
+T0 = struct.Struct("<I")
+EVENT_HEAD = struct.Struct("<If")
+
+# flexions / FSR normalisés 0..1 -> u16 ; accéléro en mg, gyro en 0,1 °/s
+FRAME_DTYPE = np.dtype([("dt", "<u2"), ("flex", "<u2", 2), ("fsr", "<u2", 2),
+                        ("acc", "<i2", 3), ("gyr", "<i2", 3)])
+MAX_PAYLOAD = 1200                        # sous la MTU : pas de fragmentation IP
+MAX_FRAMES = (MAX_PAYLOAD - HEADER.size - T0.size) // FRAME_DTYPE.itemsize
+
+
+def parse_address(text: str) -> Tuple[str, int]:
+    host, _, port = text.rpartition(":")
+    return (host or "127.0.0.1"), int(port or DEFAULT_PORT)
+
+
+def _now_ms() -> int:
+    return int(time.monotonic() * 1000) & 0xFFFFFFFF
+
+
+# ---------- Poste patient ----------
+
+class TelemetryPublisher:
+    """
+    Listener de lecteur (on_state, thread de lecture) + publish_event (thread
+    Kivy). Envoie des lots toutes les period_s.
+    """
+
+    def __init__(self, address: Tuple[str, int], calib: Optional[HandCalibrator] = None,
+                 period_s: float = 0.05, max_kbps: float = 256.0, max_decimation: int = 16):
+        self.address = address
+        self.calib = calib if calib is not None else HandCalibrator()
+        self.period_s = period_s
+        self.max_kbps = max_kbps
+        self.max_decimation = max_decimation
+        self.decimation = 1
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+
+        self.seq = 0
+        self.sent_packets = 0
+        self.sent_bytes = 0
+        self.samples = 0              # échantillons reçus du gant
+        self.published = 0            # échantillons envoyés (après décimation)
+        self.send_errors = 0
+        self.adaptations: List[Tuple[float, int]] = []   # (instant, nouvelle décimation)
+
+        self._lock = threading.Lock()
+        self._frames: List[HandState] = []
+        self._events: list = []
+        self._skip = 0
+        self._last_flush = time.perf_counter()
+        self._clean_reports = 0
+        self._window_bytes = 0
+        self._window_t = time.perf_counter()
+
+    @classmethod
+    def from_env(cls, calib: Optional[HandCalibrator] = None) -> Optional["TelemetryPublisher"]:
+        """GANT_TELEMETRY=hôte:port active la publication ; None sinon."""
+        target = os.environ.get("GANT_TELEMETRY", "").strip()
+        return cls(parse_address(target), calib) if target else None
+
+    # ----- Entrées -----
+
+    def on_state(self, state: HandState):
+        """Listener du lecteur : garde un échantillon sur `decimation`, envoie si le lot est dû."""
+        self.samples += 1
+        self._skip += 1
+        if self._skip < self.decimation:
+            return
+        self._skip = 0
+        with self._lock:
+            self._frames.append(state)
+            due = len(self._frames) >= MAX_FRAMES or time.perf_counter() - self._last_flush >= self.period_s
+        if due:
+            self.flush()
+
+    def publish_event(self, event, game: str = ""):
+        """Événement de jeu (game_logic.GameEvent), envoyé avec le prochain lot."""
+        with self._lock:
+            self._events.append((event, game))
+            due = time.perf_counter() - self._last_flush >= self.period_s
+        if due:
+            self.flush()
+
+    # ----- Envoi -----
+
+    def flush(self):
+        with self._lock:
+            frames, self._frames = self._frames, []
+            events, self._events = self._events, []
+            self._last_flush = time.perf_counter()
+        if frames:
+            self._send(FRAMES, len(frames), self.encode_frames(frames))
+        if events:
+            self._send(EVENTS, len(events), self.encode_events(events))
+        self._poll_reports()
+
+    def encode_frames(self, frames: List[HandState]) -> bytes:
+        calib = self.calib
+        n = len(frames)
+        raw = np.array([(s.t_ms, s.flex_thumb, s.flex_index, s.fsr_thumb, s.fsr_index,
+                         s.ax, s.ay, s.az, s.gx, s.gy, s.gz) for s in frames], dtype=np.float64)
+        lo = np.array([calib.flex_thumb_min, calib.flex_index_min, calib.fsr_thumb_min, calib.fsr_index_min])
+        hi = np.array([calib.flex_thumb_max, calib.flex_index_max, calib.fsr_thumb_max, calib.fsr_index_max])
+        norm = np.clip((raw[:, 1:5] - lo) / np.maximum(hi - lo, 1e-9), 0.0, 1.0)
+
+        out = np.empty(n, dtype=FRAME_DTYPE)
+        t0 = raw[0, 0]
+        out["dt"] = np.clip(raw[:, 0] - t0, 0, 65535)
+        q = np.rint(norm * 65535.0)
+        out["flex"] = q[:, 0:2]
+        out["fsr"] = q[:, 2:4]
+        out["acc"] = np.clip(np.rint(raw[:, 5:8] * 1000.0), -32768, 32767)
+        out["gyr"] = np.clip(np.rint(raw[:, 8:11] * 10.0), -32768, 32767)
+        return T0.pack(int(t0) & 0xFFFFFFFF) + out.tobytes()
+
+    @staticmethod
+    def encode_events(events) -> bytes:
+        parts = []
+        for event, game in events:
+            kind = f"{game}:{event.kind}" if game else event.kind
+            parts.append(EVENT_HEAD.pack(int(max(0.0, event.t_ms)) & 0xFFFFFFFF, float(event.value)))
+            for text in (kind, event.label):
+                b = text.encode("utf-8")[:255]
+                parts.append(bytes((len(b),)) + b)
+        return b"".join(parts)
+
+    def _send(self, kind: int, count: int, payload: bytes):
+        packet = HEADER.pack(b"GT", VERSION, kind, self.seq, _now_ms(), count, self.decimation) + payload
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        try:
+            self.sock.sendto(packet, self.address)
+        except (BlockingIOError, OSError):
+            # tampon d'envoi plein ou réseau absent : on allège
+            self.send_errors += 1
+            self._adapt(self.decimation * 2)
+            return
+        self.sent_packets += 1
+        self.sent_bytes += len(packet)
+        if kind == FRAMES:
+            self.published += count
+        self._window_bytes += len(packet) + 28   # + en-têtes IP/UDP
+
+    # ----- Adaptation -----
+
+    @property
+    def kbps(self) -> float:
+        dt = time.perf_counter() - self._window_t
+        return self._window_bytes * 8 / 1000.0 / dt if dt > 0 else 0.0
+
+    def _poll_reports(self):
+        while True:
+            try:
+                data = self.sock.recv(64)
+            except (BlockingIOError, OSError):
+                break
+            if len(data) == REPORT.size:
+                magic, received, lost = REPORT.unpack(data)
+                if magic == b"GR":
+                    self._on_report(received, lost)
+
+        kbps = self.kbps
+        if time.perf_counter() - self._window_t >= 1.0:
+            if kbps > self.max_kbps:
+                self._adapt(self.decimation * 2)
+            self._window_bytes = 0
+            self._window_t = time.perf_counter()
+
+    def _on_report(self, received: int, lost: int):
+        total = received + lost
+        if not total:
+            return   # rien reçu depuis le rapport précédent : aucune preuve d'un lien propre
+        if lost / total > 0.05:
+            self._clean_reports = 0
+            self._adapt(self.decimation * 2)
+            return
+        self._clean_reports += 1
+        # on remonte si le débit, doublé, tient dans le budget
+        if self._clean_reports >= 4 and self.decimation > 1 and self.kbps * 2 <= self.max_kbps:
+            self._clean_reports = 0
+            self._adapt(self.decimation // 2)
+
+    def _adapt(self, decimation: int):
+        decimation = max(1, min(self.max_decimation, decimation))
+        if decimation != self.decimation:
+            self.decimation = decimation
+            self.adaptations.append((time.perf_counter(), decimation))
+
+    def close(self):
+        self.flush()
+        self.sock.close()
+
+    def stats(self) -> dict:
+        return {"samples": self.samples, "published": self.published, "packets": self.sent_packets,
+                "bytes": self.sent_bytes, "decimation": self.decimation,
+                "send_errors": self.send_errors}
+
+
+# ---------- Poste thérapeute ----------
+
+class TelemetryReceiver:
+    """
+    Décode les paquets, compte les pertes (trous dans seq) et renvoie un
+    rapport à l'émetteur toutes les report_s. on_frames(array) reçoit les
+    échantillons décodés (t_ms, flex[2], fsr[2] normalisés, acc en g, gyr en °/s),
+    on_event(t_ms, kind, value, label) les événements.
+    """
+
+    def __init__(self, host: str = "0.0.0.0", port: int = DEFAULT_PORT, report_s: float = 0.5,
+                 on_frames: Optional[Callable[[np.ndarray], None]] = None,
+                 on_event: Optional[Callable[[int, str, float, str], None]] = None,
+                 drop: float = 0.0):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.settimeout(0.1)
+        self.report_s = report_s
+        self.on_frames = on_frames
+        self.on_event = on_event
+        self.drop = drop              # perte simulée (démo de l'adaptation)
+
+        self.packets = 0
+        self.frames = 0
+        self.events = 0
+        self.lost = 0
+        self.bytes = 0
+        self.delays_ms: List[int] = []   # envoi -> réception (même machine seulement)
+        self.decimation = 1
+        self.latest: Optional[np.ndarray] = None
+
+        self._expected: Optional[int] = None
+        self._sender = None
+        self._win_received = 0
+        self._win_lost = 0
+        self._last_report = time.perf_counter()
+        self._rng = np.random.default_rng(0)
+
+    @property
+    def port(self) -> int:
+        return self.sock.getsockname()[1]
+
+    def poll(self):
+        """Attend au plus 0,1 s un paquet, le traite, et envoie le rapport s'il est dû."""
+        try:
+            data, addr = self.sock.recvfrom(65536)
+        except socket.timeout:
+            data = None
+        if data is not None and not (self.drop and self._rng.random() < self.drop):
+            self._sender = addr
+            self.handle(data)
+        if self._sender is not None and time.perf_counter() - self._last_report >= self.report_s:
+            self.sock.sendto(REPORT.pack(b"GR", self._win_received, self._win_lost), self._sender)
+            self._win_received = self._win_lost = 0
+            self._last_report = time.perf_counter()
+
+    def handle(self, data: bytes):
+        if len(data) < HEADER.size:
+            return
+        magic, version, kind, seq, sent_ms, count, decimation = HEADER.unpack_from(data)
+        if magic != b"GT" or version != VERSION:
+            return
+        if self._expected is not None:
+            gap = (seq - self._expected) & 0xFFFFFFFF
+            if 0 < gap < 1 << 16:
+                self.lost += gap
+                self._win_lost += gap
+        self._expected = (seq + 1) & 0xFFFFFFFF
+        self.packets += 1
+        self._win_received += 1
+        self.bytes += len(data)
+        self.decimation = decimation
+        self.delays_ms.append((_now_ms() - sent_ms) & 0xFFFFFFFF)
+        body = memoryview(data)[HEADER.size:]
+        if kind == FRAMES:
+            self._frames(body, count)
+        elif kind == EVENTS:
+            self._events(body, count)
+
+    def _frames(self, body, count: int):
+        (t0,) = T0.unpack_from(body)
+        raw = np.frombuffer(body, dtype=FRAME_DTYPE, count=count, offset=T0.size)
+        out = np.empty((count, 11), dtype=np.float64)
+        out[:, 0] = t0 + raw["dt"]
+        out[:, 1:3] = raw["flex"] / 65535.0
+        out[:, 3:5] = raw["fsr"] / 65535.0
+        out[:, 5:8] = raw["acc"] / 1000.0
+        out[:, 8:11] = raw["gyr"] / 10.0
+        self.frames += count
+        self.latest = out[-1]
+        if self.on_frames is not None:
+            self.on_frames(out)
+
+    def _events(self, body, count: int):
+        off = 0
+        for _ in range(count):
+            t_ms, value = EVENT_HEAD.unpack_from(body, off)
+            off += EVENT_HEAD.size
+            texts = []
+            for _ in range(2):
+                n = body[off]
+                texts.append(bytes(body[off + 1:off + 1 + n]).decode("utf-8", errors="replace"))
+                off += 1 + n
+            self.events += 1
+            if self.on_event is not None:
+                self.on_event(t_ms, texts[0], value, texts[1])
+
+    def close(self):
+        self.sock.close()
+
+
+# ---------- Outils en ligne de commande ----------
+
+def _bar(x: float, width: int = 20) -> str:
+    n = int(round(max(0.0, min(1.0, x)) * width))
+    return "#" * n + "." * (width - n)
+
+
+def _receive(args) -> int:
+    def on_event(t_ms, kind, value, label):
+        print(f"  [{t_ms}] {kind} {label} {value:.2f}")
+
+    rx = TelemetryReceiver(port=args.port, on_event=on_event)
+    print(f"Écoute UDP :{rx.port} (Ctrl+C pour quitter)")
+    last = time.perf_counter()
+    frames0 = bytes0 = 0
+    try:
+        while True:
+            rx.poll()
+            now = time.perf_counter()
+            if now - last >= 1.0 and rx.latest is not None:
+                s = rx.latest
+                print(f"{(rx.frames - frames0) / (now - last):6.0f} éch/s {(rx.bytes - bytes0) * 8 / 1000 / (now - last):6.1f} kbit/s "
+                      f"perdus {rx.lost:4d} déc. {rx.decimation:2d}  pouce {_bar(s[1])}  index {_bar(s[2])}")
+                frames0, bytes0, last = rx.frames, rx.bytes, now
+    except KeyboardInterrupt:
+        pass
+    rx.close()
+    return 0
+
+
+def _demo(args) -> int:
+    """Gant synthétique -> publieur -> récepteur, sur 127.0.0.1 dans le même process."""
+    rx = TelemetryReceiver("127.0.0.1", 0, drop=args.loss)
+    stop = threading.Event()
+    thread = threading.Thread(target=lambda: [rx.poll() for _ in iter(stop.is_set, True)], daemon=True)
+    thread.start()
+
+    pub = TelemetryPublisher(("127.0.0.1", rx.port), max_kbps=args.max_kbps)
+    period = 1.0 / args.rate
+    n = int(args.rate * args.seconds)
+    cost = 0.0
+    t0 = time.perf_counter()
+    for k in range(n):
+        phase = math.sin(2 * math.pi * 0.5 * k * period)
+        state = HandState(k * 1000 // int(args.rate), 500 + int(300 * phase), 500 - int(300 * phase),
+                          400, 300, 0.01, -0.02, 0.98, 12.5 * phase, -3.0, 0.5)
+        c0 = time.perf_counter()
+        pub.on_state(state)
+        if k % int(args.rate) == 0:
+            pub.publish_event(_DemoEvent(state.t_ms, "jump", phase, "index"), "jump")
+        cost += time.perf_counter() - c0
+        delay = t0 + (k + 1) * period - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    pub.close()
+    time.sleep(0.3)
+    stop.set()
+    thread.join(timeout=1.0)
+
+    csv_bytes = sum(len(HandState(k, 500, 500, 400, 300, 0.01, -0.02, 0.98, 12.5, -3.0, 0.5).to_csv_line()) + 1
+                    for k in range(100)) / 100.0
+    delays = np.asarray(rx.delays_ms, dtype=np.float64)
+    print(f"gant {args.rate:.0f} Hz pendant {args.seconds:.0f} s, perte simulée {100 * args.loss:.0f} %")
+    print(f"publieur : {pub.stats()}")
+    print(f"  coût par échantillon {1e6 * cost / n:.1f} µs, {pub.sent_bytes / max(1, pub.published):.1f} octets/échantillon "
+          f"(CSV : {csv_bytes:.0f}), adaptations {[d for _, d in pub.adaptations]}")
+    print(f"récepteur : {rx.frames} échantillons, {rx.events} événements, {rx.packets} paquets, {rx.lost} perdus, "
+          f"délai médian {np.median(delays) if delays.size else 0:.0f} ms")
+    rx.close()
+    return 0
+
+
+class _DemoEvent:
+    def __init__(self, t_ms, kind, value, label):
+        self.t_ms, self.kind, self.value, self.label = t_ms, kind, value, label
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Télémétrie du gant (UDP)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("receive", help="affiche le flux reçu (poste thérapeute)")
+    rec.add_argument("--port", type=int, default=DEFAULT_PORT)
+    demo = sub.add_parser("demo", help="publieur + récepteur en boucle locale")
+    demo.add_argument("--rate", type=float, default=500.0)
+    demo.add_argument("--seconds", type=float, default=5.0)
+    demo.add_argument("--loss", type=float, default=0.0, help="perte simulée côté récepteur (0..1)")
+    demo.add_argument("--max-kbps", type=float, default=256.0)
+    args = parser.parse_args(argv)
+    return _receive(args) if args.cmd == "receive" else _demo(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+# textures.py
+"""
+Sources des textures et préchargement en arrière-plan.
+
+  - texture_source(src) : image à utiliser à la place de src selon la
+    variante (atlas ou fond réduit produits par build_assets.py), ou src
+    lui-même si le build n'a pas été fait. Utilisé dans les .kv :
+        #:import tex textures.texture_source
+        source: tex("assets/background.png")
+  - TexturePreloader : décode les images dans un thread, crée les textures
+    GPU sur le thread Kivy (une par frame) et les met dans le cache de Kivy,
+    où Image(source=...) et Rectangle(source=...) les retrouvent sans rien
+    recharger.
+
+GANT_TEXTURES=sd|hd force la variante, GANT_TEXTURES=off les images d'origine.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from kivy.cache import Cache
+from kivy.clock import Clock
+from kivy.core.image import Image as CoreImage, ImageLoader
+from kivy.resources import resource_find
+
+MANIFEST = "assets/build/manifest.json"
+HD_MIN_SIZE = 1600   # plus grand côté de la fenêtre (px) à partir duquel on prend "hd"
+
+_sources: Optional[Dict[str, str]] = None
+
+
+def texture_variant() -> str:
+    forced = os.environ.get("GANT_TEXTURES", "")
+    if forced:
+        return forced
+    from kivy.core.window import Window
+    return "hd" if max(Window.size) >= HD_MIN_SIZE else "sd"
+
+
+def _manifest() -> Dict[str, str]:
+    global _sources
+    if _sources is None:
+        _sources = {}
+        variant = texture_variant()
+        if variant != "off" and os.path.exists(MANIFEST):
+            try:
+                with open(MANIFEST, "r", encoding="utf-8") as f:
+                    _sources = json.load(f).get("variants", {}).get(variant, {})
+            except (OSError, ValueError) as e:
+                print(f"[TEXTURES] manifest illisible ({e}) : images d'origine")
+    return _sources
+
+
+def texture_source(src: str) -> str:
+    """Source à charger pour l'image src (atlas://... ou fond réduit si disponibles)."""
+    return _manifest().get(src, src)
+
+
+def _cache_uid(path: str) -> str:
+    # même clé que kivy.core.image.Image (fichier résolu | mipmap | index)
+    return f"{resource_find(path) or path}|0|0"
+
+
+class TexturePreloader:
+
+    def __init__(self, workers: int = 1):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="textures")
+        self._images: Dict[str, CoreImage] = {}   # textures gardées en vie
+        self._loading: Dict[str, List[Callable[[], None]]] = {}
+        self._uploads: deque = deque()             # (chemin, image décodée ou None)
+        self.gpu_bytes = 0                         # estimation RGBA des textures créées
+
+    def is_ready(self, sources: Iterable[str]) -> bool:
+        return all(texture_source(s) in self._images for s in sources)
+
+    def preload(self, sources: Iterable[str], on_done: Optional[Callable[[], None]] = None):
+        """Charge ces images en arrière-plan ; on_done() sur le thread Kivy quand tout est prêt."""
+        paths = []
+        for src in sources:
+            path = texture_source(src)
+            if path not in self._images and path not in paths:
+                paths.append(path)
+        if not paths:
+            if on_done is not None:
+                Clock.schedule_once(lambda dt: on_done(), 0)
+            return
+
+        remaining = [len(paths)]
+
+        def one_done():
+            remaining[0] -= 1
+            if remaining[0] == 0 and on_done is not None:
+                on_done()
+
+        for path in paths:
+            if path in self._loading:
+                self._loading[path].append(one_done)
+                continue
+            self._loading[path] = [one_done]
+            if path.startswith("atlas://"):
+                # un atlas se charge d'un bloc (json + pages) : directement sur le thread Kivy
+                self._queue_upload(path, None)
+            else:
+                future = self._pool.submit(self._decode, path)
+                future.add_done_callback(lambda f, p=path: self._decoded(p, f))
+
+    def pin(self, sources: Iterable[str]):
+        """Remet les textures dans le cache de Kivy (expiré entre-temps) juste avant usage."""
+        for src in sources:
+            path = texture_source(src)
+            image = self._images.get(path)
+            if image is not None and not path.startswith("atlas://"):
+                Cache.append("kv.texture", _cache_uid(path), image.texture)
+
+    # ----- Thread de décodage -----
+
+    @staticmethod
+    def _decode(path: str):
+        return ImageLoader.load(resource_find(path) or path, keep_data=False, mipmap=False)
+
+    def _decoded(self, path: str, future):
+        try:
+            image = future.result()
+        except Exception as e:
+            print(f"[TEXTURES] {path} : {e}")
+            image = None
+        self._queue_upload(path, image)
+
+    # ----- Thread Kivy : création des textures GPU -----
+
+    def _queue_upload(self, path: str, image):
+        self._uploads.append((path, image))
+        Clock.schedule_once(self._upload_next, 0)
+
+    def _upload_next(self, dt):
+        if not self._uploads:
+            return
+        path, image = self._uploads.popleft()
+        try:
+            core = CoreImage(image) if image is not None else CoreImage(path)
+            texture = core.texture
+            self._images[path] = core
+            if not path.startswith("atlas://"):
+                self.gpu_bytes += texture.width * texture.height * 4
+        except Exception as e:
+            print(f"[TEXTURES] {path} : {e}")
+        for callback in self._loading.pop(path, []):
+            callback()
+        if self._uploads:
+            Clock.schedule_once(self._upload_next, 0)
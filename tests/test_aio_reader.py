@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from aio_reader import AsyncHandReader
+from hand_state import HandState
+
+
+def _session(path, n):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("t_ms,flex_thumb,flex_index,fsr_thumb,fsr_index,ax,ay,az,gx,gy,gz\n")
+        for k in range(n):
+            f.write(HandState(k, 500, 500, 400, 300, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0).to_csv_line() + "\n")
+    return str(path)
+
+
+async def _consume(reader):
+    t_ms = []
+    async for batch in reader.frames():
+        t_ms.extend(s.t_ms for s in batch)
+    return t_ms
+
+
+@pytest.mark.parametrize("policy", ["block", "drop"])
+def test_fast_replay_delivers_everything_to_a_keeping_up_consumer(tmp_path, policy):
+    source = _session(tmp_path / "seance.csv", 20000)
+    reader = AsyncHandReader(source, speed=0, policy=policy)
+    t_ms = asyncio.run(_consume(reader))
+    assert t_ms == list(range(20000))
+    assert reader.dropped == 0
+
+
+def test_drop_policy_drops_for_a_slow_consumer(tmp_path):
+    source = _session(tmp_path / "seance.csv", 5000)
+    reader = AsyncHandReader(source, speed=0, policy="drop", queue_size=2, max_batch=50)
+
+    async def slow():
+        n = 0
+        async for batch in reader.frames():
+            n += len(batch)
+            await asyncio.sleep(0.002)
+        return n
+
+    delivered = asyncio.run(slow())
+    assert reader.dropped > 0
+    assert delivered + reader.dropped == 5000
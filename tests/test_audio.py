@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+import audio
+from audio import AudioEngine, Mixer
+
+
+def test_latency_is_measured_at_the_output_not_echoed_from_the_target():
+    mixer = Mixer(rate=1000)                       # 1 frame = 1 ms
+    buf = np.ones((50, 2), dtype=np.float32)
+    mixer.trigger("a", buf, start_t=0.030, event_t=0.0)   # cible 30 ms
+    mixer.render(10, 0.012)                        # 1er bloc disponible : sort au DAC à 12 ms
+    mixer.render(10, 0.022)                        # la note part à 30 ms, à l'heure
+    mixer.trigger("b", buf, start_t=0.070, event_t=0.040)
+    mixer.render(10, 0.072)                        # reçue trop tard pour sa cible : 2 ms de retard
+    assert list(mixer.latencies_ms) == pytest.approx([12.0, 32.0])
+    assert list(mixer.delays_ms) == pytest.approx([0.0, 2.0]) and mixer.late == 1
+
+
+def test_a_failed_sound_output_is_not_retried(monkeypatch, capsys):
+    opened = []
+
+    class _Broken:
+        @staticmethod
+        def OutputStream(**kwargs):
+            opened.append(kwargs)
+            raise OSError("pas de carte son")
+
+    monkeypatch.setattr(audio, "sounddevice", _Broken)
+    engine = AudioEngine()
+    for _ in range(3):                             # trois entrées sur l'écran piano
+        engine.start()
+        assert engine.backend == "kivy"
+    assert len(opened) == 1
+    assert capsys.readouterr().out.count("sortie indisponible") == 1
@@ -0,0 +1,44 @@
+import math
+
+import pytest
+
+from batch_analytics import bench, main, run
+from hand_state import HandState
+from session import SessionRecorder
+
+
+def _record(path, seconds, phase):
+    recorder = SessionRecorder(str(path))
+    for k in range(int(seconds * 100)):
+        t = k / 100
+        flex = 500 + 250 * math.sin(2 * math.pi * 0.5 * t + phase)
+        gx = 30 * math.sin(2 * math.pi * 5.0 * t)
+        recorder.write_state(HandState(10 * k, 480, int(flex), 200, 300, 0.0, 0.0, 1.0, gx, 0.0, 0.0))
+    recorder.close()
+
+
+def test_parallel_run_gives_the_same_rows(tmp_path):
+    _record(tmp_path / "p01" / "a.csv", 20, 0.0)
+    _record(tmp_path / "p02" / "b.csv", 12, 1.0)
+
+    serial = run(str(tmp_path), workers=1, chunk_size=700)
+    parallel = run(str(tmp_path), workers=2, chunk_size=700)
+    assert [(r["patient"], r["session"]) for r in serial] == [("p01", "a.csv"), ("p02", "b.csv")]
+    assert serial == parallel
+    assert [r["n_samples"] for r in serial] == [2000, 1200]
+    assert [r["tremor_gyro_hz"] for r in serial] == [pytest.approx(5.0, abs=0.4)] * 2
+
+    out = tmp_path / "resume.csv"
+    assert main([str(tmp_path), "-j", "2", "-o", str(out)]) == 0
+    assert len(out.read_text().splitlines()) == 3
+
+    # nuit suivante : le résumé et les scores de headless.py, posés dans l'arbre, ne sont pas des séances
+    (tmp_path / "p01" / "scores.csv").write_text("patient,session,score\np01,a.csv,12\n")
+    assert [(r["patient"], r["session"]) for r in run(str(tmp_path), workers=1)] == [("p01", "a.csv"), ("p02", "b.csv")]
+    assert main([str(tmp_path), "-o", str(out)]) == 0
+    assert len(out.read_text().splitlines()) == 3
+
+
+def test_bench_on_an_empty_directory(tmp_path, capsys):
+    bench(str(tmp_path), 2, None, 1000)
+    assert "aucune séance" in capsys.readouterr().out
@@ -0,0 +1,105 @@
+import math
+import os
+import time
+
+import pytest
+
+from device_protocol import FLEX_ONLY, FrameDecoder, NominalGate, SimulatedGlove
+from serial_reader import SerialHandReader
+from session import SessionRecorder
+from spectral import TremorDetector
+
+
+def _values(k):
+    return [500 + k, 400 - k, 300, 200, 0.01, -0.02, 0.98, 12.5, -3.0, 0.5]
+
+
+def test_decoder_follows_the_device_configuration_in_stream():
+    glove = SimulatedGlove()
+    decoder = FrameDecoder("gant")
+    stream = glove.frame(0, _values(0))
+    stream += glove.receive(b"!CH 3\n!HELLO\n") + glove.frame(10, _values(1))
+    stream += glove.receive(b"!FMT BIN\n") + glove.frame(20, _values(2)) + b"\x00bruit" + glove.frame(30, _values(3))
+    stream += glove.receive(b"!RESET\n") + glove.frame(40, _values(4))
+
+    states = []
+    for i in range(0, len(stream), 5):   # trames et lignes coupées n'importe où
+        states.extend(decoder.feed(stream[i:i + 5]))
+
+    assert [s.t_ms for s in states] == [0, 10, 20, 30, 40]
+    assert [(s.flex_thumb, s.flex_index) for s in states] == [(500 + k, 400 - k) for k in range(5)]
+    # canaux coupés : dernière valeur reçue
+    assert states[2].fsr_thumb == 300 and states[3].gx == pytest.approx(12.5)
+    assert states[3].ax == pytest.approx(0.01)
+    assert decoder.info.max_hz == 1000 and decoder.rejected == 1
+    assert decoder.mask == 0x3FF and decoder.fmt == "csv"
+
+
+@pytest.mark.skipif(not hasattr(os, "openpty"), reason="pty POSIX")
+def test_reader_configures_a_simulated_glove():
+    glove = SimulatedGlove()
+    reader = SerialHandReader(glove.serve_pty())
+    states = []
+    reader.add_listener(states.append)
+    reader.start()
+    try:
+        info = reader.handshake(timeout=1.0)
+        assert info is not None and info.proto == 1
+        assert reader.configure(rate_hz=500, channels=FLEX_ONLY, fmt="bin", timeout=1.0)
+        assert reader.device_config == {"rate_hz": 500, "channels": list(FLEX_ONLY), "fmt": "bin"}
+        del states[:]
+        time.sleep(0.5)
+        n = len(states)
+    finally:
+        reader.stop()
+        glove.stop()
+    assert 150 <= n <= 300
+    assert glove.commands[0] == "!RESET"
+    assert reader._lines.rejected == 0
+
+
+def _tremor(t):
+    """Tremblement de 5 Hz sur le gyroscope, flexions lentes."""
+    s = math.sin(2 * math.pi * 0.5 * t)
+    return [500 + 250 * s, 500 - 250 * s, 400, 300, 0.01, -0.02, 0.98,
+            50 * math.sin(2 * math.pi * 5 * t), -1.0, 0.5]
+
+
+@pytest.mark.skipif(not hasattr(os, "openpty"), reason="pty POSIX")
+def test_piano_reconfiguration_suspends_fixed_rate_analyses(tmp_path):
+    glove = SimulatedGlove(signal=_tremor)
+    reader = SerialHandReader(glove.serve_pty())
+    tremor = TremorDetector("gyro", window=128, hop=10)
+    recorder = SessionRecorder(str(tmp_path / "seance.csv"))
+    gate = NominalGate(reader, recorder.mark_stream)
+    for fn in (tremor.update, recorder.write_state, tremor.update):
+        reader.add_listener(gate.wrap(fn))       # même enveloppant : pas de doublon
+    reader.start()
+    try:
+        time.sleep(1.6)
+        before = tremor.result.freq_hz
+        # comme PianoGameScreen.on_pre_enter / on_leave
+        assert reader.configure(rate_hz=500, channels=FLEX_ONLY, fmt="bin", timeout=1.0)
+        time.sleep(0.5)
+        during = tremor.result.freq_hz
+        assert reader.reset_device(timeout=1.0)
+        time.sleep(1.4)                           # une fenêtre entière après le piano
+        after = tremor.result.freq_hz
+    finally:
+        reader.stop()
+        glove.stop()
+        recorder.close()
+
+    assert before == pytest.approx(5.0, abs=0.5)
+    assert during == before and after == pytest.approx(before, abs=0.4)
+    assert gate.skipped > 150 and gate.nominal
+
+    with open(tmp_path / "seance.csv", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    marks = [line for line in lines if line.startswith("#")]
+    # la marque décrit la 1re configuration hors défaut (les accusés RATE, CH, FMT arrivent un à un)
+    assert len(marks) == 2 and marks[0].startswith("# pause : gant à 500 Hz, canaux flex_thumb/flex_index")
+    assert marks[1] == "# reprise : flux par défaut"
+    t = [int(line.split(",")[0]) for line in lines[1:] if not line.startswith("#")]
+    steps = [b - a for a, b in zip(t, t[1:])]
+    assert min(steps) >= 9 and max(steps) > 400   # rien à 500 Hz, un trou pendant le piano
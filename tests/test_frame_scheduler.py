@@ -0,0 +1,37 @@
+import os
+import threading
+
+import pytest
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")          # Kivy ne lit pas les arguments de pytest
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+Clock = pytest.importorskip("kivy.clock").Clock
+
+from frame_scheduler import StreamWaker  # noqa: E402
+
+
+def test_stream_waker_coalesces_a_burst_into_one_frame():
+    frames = []
+    waker = StreamWaker(frames.append)
+    waker.start()
+    Clock.tick()
+    assert frames == []                              # sans échantillon, rien n'est planifié
+
+    # rafale USB : trois threads série, 50 échantillons chacun, dans la même frame
+    threads = [threading.Thread(target=lambda: [waker.on_state() for _ in range(50)]) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    Clock.tick()
+    assert len(frames) == 1 and waker.frames == 1 and waker.wakeups == 150
+    Clock.tick()
+    assert len(frames) == 1                          # pas de frame de plus après la rafale
+
+    waker.on_state()
+    Clock.tick()
+    assert len(frames) == 2
+    waker.stop()
+    waker.on_state()
+    Clock.tick()
+    assert len(frames) == 2 and waker.wakeups == 151
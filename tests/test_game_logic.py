@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from game_logic import ObstaclePool, RhythmCore
+from hand_state import HandState
+
+
+def test_obstacle_pool_reuses_slots_at_capacity():
+    pool = ObstaclePool([1.0, 0.5], capacity=4)
+    arrays = (pool.x, pool.y, pool.active)
+    assert all(pool.spawn(100.0 * k, 500.0, 40.0, k % 2) for k in range(4))
+    assert pool.count == 4 and not pool.spawn(0.0, 500.0, 40.0, 0)   # plein : refusé, rien n'est écrasé
+    assert sorted(pool.x[pool.active].tolist()) == [0.0, 100.0, 200.0, 300.0]
+    assert pool.y[pool.active].tolist() == [500.0, 510.0, 500.0, 510.0]   # ratio 0.5 : centré en hauteur
+
+    # un obstacle touché libère sa case, réutilisée par le suivant
+    assert pool.collide(90.0, 500.0, 150.0, 540.0) == 1
+    freed = int(np.flatnonzero(~pool.active)[0])
+    assert pool.count == 3 and pool.spawn(400.0, 600.0, 40.0, 1)
+    assert pool.active[freed] and pool.x[freed] == 400.0 and pool.h[freed] == 20.0
+
+    # régime établi : on fait tomber et on remplace sans fin, les tableaux ne bougent pas
+    spawned = 0
+    for frame in range(1000):
+        pool.step(25.0)
+        while pool.spawn(float(frame), 700.0, 40.0, frame % 2):
+            spawned += 1
+        assert pool.count == 4
+    assert spawned > 100
+    assert (pool.x, pool.y, pool.active) == arrays and pool.x.shape == (4,)
+    assert sorted(pool._free + np.flatnonzero(pool.active).tolist()) == [0, 1, 2, 3]
+
+    pool.clear()
+    assert pool.count == 0 and not pool.active.any()
+
+
+@pytest.mark.parametrize("latency_ms", [0.0, 40.0])
+def test_rhythm_judges_presses_at_device_timestamps(latency_ms):
+    core = RhythmCore(seed=1, fingers=("index",), latency_ms=latency_ms)
+    core.start(0.0)                        # notes à 2000, 2250, 2500... ms (120 bpm, croches)
+    assert [n.target_ms for n in list(core.notes)[:3]] == [2000.0, 2250.0, 2500.0]
+    at = lambda t_ms: t_ms + latency_ms   # horodatage gant d'une flexion entendue à t_ms
+
+    core.press("index", at(2010.0))
+    core.press("majeur", at(2250.0))       # mauvais doigt : aucune note à portée
+    core.press("index", at(2300.0))
+    core.press("index", at(2400.0))        # 2250 déjà jouée, 2500 à -100 ms : hors fenêtre
+    assert [(e.kind, e.value, e.t_ms) for e in core.events] == [
+        ("perfect", 10.0, at(2010.0)), ("stray", 0.0, at(2250.0)),
+        ("good", 50.0, at(2300.0)), ("stray", 0.0, at(2400.0))]
+    assert (core.score, core.combo, core.stray) == (3, 2, 2)
+
+    # 2500 non jouée : jugeable jusqu'à cible + good_ms (entendu), manquée au-delà
+    core.now_ms = at(2580.0)
+    core._expire()
+    assert core.misses == 0 and core.notes[0].target_ms == 2500.0
+    core.now_ms = at(2581.0)
+    core._expire()
+    assert core.misses == 1 and core.combo == 0 and core.events[-1].kind == "miss"
+    assert [n.target_ms for n in core.notes][:1] == [2750.0]   # notes jugées retirées aussi
+
+    core.press("index", at(2740.0))
+    assert core.events[-1].kind == "perfect" and core.events[-1].value == -10.0
+    assert core.stats()["perfect"] == 2 and core.stats()["good"] == 1 and core.stats()["miss"] == 1
+    assert core.offsets == [10.0, 50.0, -10.0]
+
+
+def test_rhythm_latency_shifts_the_judgement_window():
+    early, late = RhythmCore(fingers=("index",)), RhythmCore(fingers=("index",), latency_ms=60.0)
+    for core in (early, late):
+        core.start(0.0)
+        core.press("index", 2060.0)
+    assert early.events[-1][1:3] == ("good", 60.0)
+    assert late.events[-1][1:3] == ("perfect", 0.0)
+
+
+def test_rhythm_resync_counts_the_notes_left_unplayed():
+    core = RhythmCore(seed=3, fingers=("index",))
+    core.start(0.0)
+    core.step(2.05, [HandState(2050, 0, 0, 0, 0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0)])
+    assert core.misses == 0 and core.notes[0].target_ms == 2000.0   # 2000 encore jugeable (+80 ms)
+
+    # gant rebranché : horloge repartie de zéro
+    core.step(0.01, [HandState(5, 0, 0, 0, 0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0)])
+    assert core.misses == 1 and core.counts["miss"] == 1   # 2000 manquée ; 2250 pas encore due
+    assert [e.kind for e in core.events] == ["miss"]
+    assert core.notes[0].target_ms == 2005.0 and not core.notes[0].judgement
@@ -0,0 +1,71 @@
+import math
+
+import numpy as np
+import pytest
+
+import gestures
+from gestures import (BAND_RADIUS, TEMPLATE_LEN, GestureLibrary, GestureTemplate, dtw_distance,
+                      envelope, lb_keogh)
+
+
+def _gesture(warp=0.0, offset=0.0):
+    """Pince puis rotation (TEMPLATE_LEN x 7) ; warp déforme le temps (décalage max ~ warp x 49 points)."""
+    u = np.linspace(0.0, 1.0, TEMPLATE_LEN)
+    u = u + warp * np.sin(np.pi * u)
+    flex = 0.5 - 0.4 * np.cos(2 * np.pi * u)
+    press = np.clip(np.sin(np.pi * u), 0.0, None) ** 2
+    gyro = 0.3 * np.sin(4 * np.pi * u)
+    zeros = np.zeros_like(u)
+    return np.stack([flex, flex, press, press, gyro, zeros, zeros], axis=1) + offset
+
+
+def _library(*templates):
+    library = GestureLibrary()
+    library.templates = [GestureTemplate(name, data) for name, data in templates]
+    return library
+
+
+def test_identical_template_matches_at_zero_distance():
+    data = _gesture()
+    tpl = GestureTemplate("pince", data)
+    assert lb_keogh(data, tpl.upper, tpl.lower) == 0.0
+    assert dtw_distance(data, data) == 0.0
+
+    best, dist = _library(("pince", data), ("autre", _gesture(offset=0.5))).match(data.copy())
+    assert best.name == "pince" and dist == 0.0
+
+
+def test_time_stretched_gesture_matches_within_the_band():
+    template, query = _gesture(), _gesture(warp=0.06)   # ~3 points de décalage < BAND_RADIUS
+    euclid = float(np.sum((template - query) ** 2))
+    warped = dtw_distance(query, template)
+    assert warped < 0.2 * euclid
+    best, dist = _library(("pince", template)).match(query)
+    assert best.name == "pince" and dist < best.threshold
+
+    # hors de la bande, l'alignement n'est plus permis : la distance remonte
+    assert dtw_distance(query, template, radius=0) == pytest.approx(euclid)
+    assert dtw_distance(_gesture(warp=0.3), template) > 5 * dtw_distance(_gesture(warp=0.3), template, radius=20)
+
+
+def test_pruned_candidate_is_rejected_without_its_dtw(monkeypatch):
+    query = _gesture(warp=0.04)
+    near, far = _gesture(), _gesture(offset=0.4)
+    upper, lower = envelope(far)
+    near_d = dtw_distance(query, near)
+    far_lb = lb_keogh(query, upper, lower)
+    # LB_Keogh est bien une borne inférieure, et elle suffit à écarter le modèle lointain
+    assert far_lb <= dtw_distance(query, far)
+    assert far_lb > near_d
+    assert dtw_distance(query, far, best_so_far=near_d) == math.inf   # abandon anticipé
+
+    calls = []
+
+    def counted(a, b, radius=BAND_RADIUS, best_so_far=math.inf):
+        calls.append(b)
+        return dtw_distance(a, b, radius, best_so_far)
+
+    monkeypatch.setattr(gestures, "dtw_distance", counted)
+    best, dist = _library(("loin", far), ("pince", near)).match(query)
+    assert best.name == "pince" and dist == pytest.approx(near_d / TEMPLATE_LEN)
+    assert len(calls) == 1 and calls[0] is best.data
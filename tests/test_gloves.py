@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+
+import pytest
+
+from device_protocol import SimulatedGlove
+from gloves import MultiGloveReader
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "openpty"), reason="pty POSIX")
+
+
+@pytest.fixture
+def two_gloves(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)                  # pas de calibration.txt du poste
+    gloves = [SimulatedGlove(), SimulatedGlove()]
+    reader = MultiGloveReader()
+    for name, glove in zip(("droite", "gauche"), gloves):
+        reader.add_device(name, glove.serve_pty())
+    yield reader, gloves
+    reader.stop()
+    for glove in gloves:
+        glove.stop()
+
+
+def _wait_until(cond, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return cond()
+
+
+def _io_threads():
+    return [t for t in threading.enumerate() if t.name == "gloves"]
+
+
+def test_one_selector_thread_reads_every_glove(two_gloves):
+    reader, gloves = two_gloves
+    right, left = reader.streams["droite"], reader.streams["gauche"]
+    merged = []
+    reader.add_listener(merged.append)
+    right.start()
+    left.start()
+    time.sleep(0.4)
+    assert len(_io_threads()) == 1
+    assert right.lines > 20 and left.lines > 20
+    assert {s.device for s in merged} == {"droite", "gauche"}
+    t = [s.t_ms for s in merged]
+    assert t == sorted(t)                        # horloge commune, croissante d'un gant à l'autre
+    assert all(g.commands[:2] == ["!RESET", "!HELLO"] for g in gloves)
+
+    right.stop()
+    left.stop()
+    assert _wait_until(lambda: not _io_threads())
+
+
+def test_listeners_are_deduplicated(two_gloves):
+    reader, _ = two_gloves
+    stream = reader.streams["droite"]
+    seen, merged = [], []
+    for _ in range(2):
+        stream.add_listener(seen.append)
+        reader.add_listener(merged.append)
+    stream.start()
+    time.sleep(0.3)
+    stream.stop()
+    assert seen and len({s.t_ms for s in seen}) == len(seen) == stream.lines
+    assert len(merged) == len(seen)
+
+    stream.remove_listener(seen.append)
+    stream.remove_listener(seen.append)          # déjà retiré : sans effet
+    stream.start()
+    time.sleep(0.1)
+    stream.stop()
+    assert len(seen) < stream.lines
+
+
+def test_start_and_stop_are_counted(two_gloves):
+    reader, _ = two_gloves
+    stream = reader.streams["droite"]
+    stream.start()
+    stream.start()                               # l'écran suivant entre avant que l'autre ne sorte
+    stream.stop()
+    assert stream.running and stream.users == 1
+    n = stream.lines
+    assert _wait_until(lambda: stream.lines > n + 5)
+
+    stream.stop()
+    assert not stream.running and stream.users == 0
+    assert _wait_until(lambda: not _io_threads())
+    stream.stop()                                # stop de trop : sans effet
+    assert stream.users == 0
+
+    stream.start()                               # la boucle repart à la réouverture
+    n = stream.lines
+    assert _wait_until(lambda: stream.lines > n + 5) and len(_io_threads()) == 1
+    stream.stop()
+
+
+def test_a_raising_listener_does_not_stop_the_io_thread(two_gloves, capsys):
+    # régression 0000751 : une exception dans un listener arrêtait la lecture de tous les gants
+    reader, _ = two_gloves
+    right, left = reader.streams["droite"], reader.streams["gauche"]
+
+    def broken(state):
+        raise ValueError("listener cassé")
+
+    ok = []
+    right.add_listener(broken)
+    right.add_listener(ok.append)
+    reader.add_listener(broken)
+    left.start()
+    right.start()
+    time.sleep(0.3)
+    n = len(ok)
+    assert n > 10 and _wait_until(lambda: len(ok) > n + 5)
+    assert len(_io_threads()) == 1 and left.lines > 10
+    right.stop()
+    left.stop()
+    out = capsys.readouterr().out
+    assert out.count("erreur dans le listener") == 1   # signalé une fois, pas à chaque échantillon
+
+
+def test_a_listener_can_open_and_close_a_glove(two_gloves):
+    # les listeners sont appelés hors du verrou de la boucle : start()/stop() depuis le thread d'E/S
+    reader, _ = two_gloves
+    right, left = reader.streams["droite"], reader.streams["gauche"]
+    toggles = []
+
+    def toggle_left(state):
+        if len(toggles) < 6:
+            (left.stop if left.running else left.start)()
+            toggles.append(left.running)
+
+    right.add_listener(toggle_left)
+    right.start()
+    assert _wait_until(lambda: len(toggles) == 6)
+    n = right.lines
+    assert _wait_until(lambda: right.lines > n + 5)   # la boucle n'est pas bloquée
+    assert toggles == [True, False] * 3
+    right.stop()
+
+
+def test_an_unplugged_glove_is_reopened_by_the_next_start(two_gloves):
+    reader, gloves = two_gloves
+    stream = reader.streams["droite"]
+    stream.start()
+    stream.start()                               # deux écrans l'utilisent
+    assert _wait_until(lambda: stream.lines > 5)
+    gloves[0].stop()                             # débranché
+    assert _wait_until(lambda: not stream.running) and stream.users == 2
+
+    replug = SimulatedGlove()
+    stream.port_name = replug.serve_pty()        # rebranché (nouveau pty)
+    try:
+        stream.start()                           # l'écran suivant rouvre le port
+        n = stream.lines
+        assert _wait_until(lambda: stream.lines > n + 5)
+        assert replug.commands[:2] == ["!RESET", "!HELLO"]
+        stream.stop()
+        stream.stop()
+        assert stream.running                    # encore un utilisateur
+        stream.stop()
+        assert not stream.running and stream.users == 0
+    finally:
+        replug.stop()
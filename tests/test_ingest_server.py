@@ -0,0 +1,96 @@
+import asyncio
+import os
+
+from batch_analytics import find_sessions, run
+from device_protocol import SimulatedGlove
+from hand_state import HandState
+from ingest_server import IngestServer, SessionStore
+from session import read_session
+
+
+def _lines(n):
+    return "".join(HandState(k, 500 + k % 7, 500, 400, 300, 0.0, 0.0, 1.0, 0.5, 0.0, 0.0).to_csv_line() + "\n"
+                   for k in range(n)).encode()
+
+
+async def _ingest(root, **options):
+    server = IngestServer(str(root), commit_ms=5.0, **options)
+    await server.start("127.0.0.1", 0)
+
+    async def station(hello, payload, pieces=7):
+        _, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        data = hello + payload
+        step = len(data) // pieces + 1
+        for i in range(0, len(data), step):   # lignes coupées entre deux envois
+            writer.write(data[i:i + step])
+            await writer.drain()
+            await asyncio.sleep(0.002)
+        await asyncio.sleep(0.05)
+        stats = server.stats()
+        writer.close()
+        await writer.wait_closed()
+        return stats
+
+    stats = await asyncio.gather(station(b"#GANT station=p01 session=s1\n", _lines(2500)),
+                                 station(b"#GANT station=../p02 session=s1\n", _lines(300) + b"n'importe quoi\n"))
+    await server.close()
+    return server, stats
+
+
+def test_streams_are_group_committed_into_per_session_chunks(tmp_path):
+    server, stats = asyncio.run(_ingest(tmp_path, chunk_samples=1000))
+
+    p01 = tmp_path / "p01" / "s1"
+    assert sorted(os.listdir(p01)) == ["chunk_00000.csv", "chunk_00001.csv", "chunk_00002.csv"]
+    t_ms = [s.t_ms for name in sorted(os.listdir(p01)) for s in read_session(str(p01 / name))]
+    assert t_ms == list(range(2500))
+    assert [s.t_ms for s in read_session(str(tmp_path / "p02" / "s1" / "chunk_00000.csv"))] == list(range(300))
+
+    assert server.committed == 2800
+    assert server.commits < 2800 // 10          # écritures groupées, pas une par ligne
+    conns = {c["station"]: c for s in stats for c in s["connections"]}
+    assert conns["p02"]["rejected"] == 1
+    assert conns["p01"]["samples"] <= 2500 and "lag_ms" in conns["p01"]
+
+    # le dossier de blocs est une séance : une seule ligne par séance dans l'analyse nocturne
+    assert [s.t_ms for s in read_session(str(p01))] == list(range(2500))
+    assert find_sessions(str(tmp_path)) == [("p01", str(p01)), ("p02", str(tmp_path / "p02" / "s1"))]
+    rows = run(str(tmp_path), workers=1, chunk_size=700)
+    assert [(r["patient"], r["session"], r["n_samples"]) for r in rows] == [("p01", "s1", 2500), ("p02", "s1", 300)]
+
+
+def test_a_raw_bridge_gets_reset_and_binary_frames_are_decoded(tmp_path):
+    glove = SimulatedGlove()
+    glove.binary, glove.mask = True, 0x3       # gant resté en !FMT BIN, flexions seules
+    payload = b"".join(glove.frame(10 * k, [500 + k, 400 - k] + [0] * 8) for k in range(200))
+
+    async def bridge():
+        server = IngestServer(str(tmp_path), commit_ms=5.0)
+        await server.start("127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        for i in range(0, len(payload), 97):   # trames coupées entre deux envois
+            writer.write(payload[i:i + 97])
+            await writer.drain()
+        command = await asyncio.wait_for(reader.readline(), 1.0)
+        await asyncio.sleep(0.05)
+        writer.close()
+        await writer.wait_closed()
+        await server.close()
+        return command
+
+    assert asyncio.run(bridge()) == b"!RESET\n"
+    (station,) = os.listdir(tmp_path)
+    (session,) = os.listdir(tmp_path / station)
+    states = read_session(str(tmp_path / station / session))
+    assert [(s.t_ms, s.flex_thumb, s.flex_index) for s in states] == [(10 * k, 500 + k, 400 - k) for k in range(200)]
+
+
+def test_a_chunk_created_by_another_worker_is_not_overwritten(tmp_path):
+    # l'autre worker a créé chunk_00001 entre notre listdir et notre open : même index calculé
+    (tmp_path / "chunk_00001.csv").write_text("autre worker\n")
+    store = SessionStore(str(tmp_path), chunk_samples=2)
+    store.write(["1,a", "2,a", "3,a"])
+    store.close()
+    assert (tmp_path / "chunk_00001.csv").read_text() == "autre worker\n"
+    assert sorted(os.listdir(tmp_path)) == ["chunk_00001.csv", "chunk_00002.csv", "chunk_00003.csv"]
+    assert (tmp_path / "chunk_00002.csv").read_text().splitlines()[1:] == ["1,a", "2,a"]
@@ -0,0 +1,70 @@
+import pytest
+
+from hand_state import HandState
+from jitter_buffer import JitterBuffer
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+
+def _state(t_ms):
+    return HandState(t_ms, 500, t_ms, 300, 200, 0.0, 0.0, 1.0, t_ms / 10.0, 0.0, 0.0)
+
+
+def _play(playout_ms, bursts=50):
+    """100 Hz livrés par rafales de 4 trames toutes les 40 ms ; lecture à 60 fps."""
+    clock = FakeClock()
+    buf = JitterBuffer(playout_ms=playout_ms, clock=clock)
+    start = clock.t
+    frames = []
+    t_frame = start
+    for b in range(bursts):
+        arrival = start + 0.040 * b + 0.012
+        while t_frame < arrival:
+            clock.t = t_frame
+            t = buf.playout_time()
+            if t is not None:
+                buf.take(t)
+                state = buf.sample(t)
+                if state is not None:
+                    frames.append(state.flex_index)
+            t_frame += 1 / 60
+        clock.t = arrival
+        for k in range(4):
+            buf.push(_state(40 * b + 10 * k))
+    return buf, frames
+
+
+def test_steady_playout_absorbs_usb_bursts():
+    buf, frames = _play(playout_ms=45)
+    steps = [b - a for a, b in zip(frames[10:], frames[11:])]
+    # une valeur par frame, qui avance de ~1/60 s à chaque frame, sans à-coup
+    assert steps and all(15.0 < s < 18.4 for s in steps)
+    assert buf.underruns == 0
+
+    buf, frames = _play(playout_ms=5)
+    assert buf.underruns > 10          # retard trop court : la lecture rattrape les rafales
+    assert buf.stats()["underruns"] == buf.underruns
+
+
+def test_order_duplicates_late_and_interpolation():
+    clock = FakeClock()
+    buf = JitterBuffer(playout_ms=20, clock=clock)
+    for t in (0, 20, 10, 20, 30):
+        buf.push(_state(t))
+    assert (buf.received, buf.reordered, buf.duplicates) == (4, 1, 1)
+    assert [s.t_ms for s in buf.take(15)] == [0, 10]
+    assert buf.sample(15).flex_index == pytest.approx(15.0)
+    assert buf.sample(15).gx == pytest.approx(1.5)
+    buf.push(_state(5))
+    assert buf.late == 1 and buf.occupancy == 2
+
+    buf.push(_state(5000))
+    assert len(buf.take(5000)) == 3
+    buf.push(_state(3))                # gant redémarré (millis() repart de 0) : nouvelle horloge
+    assert buf.late == 1 and [s.t_ms for s in buf.take(3)] == [3]
@@ -0,0 +1,62 @@
+import random
+
+from level import CHUNK_W, LevelStream
+
+
+def _stream(seed=7, **options):
+    return LevelStream(lambda s: 400.0 * s, ground_y=100.0, seed=seed, **options)
+
+
+def _snapshot(stream):
+    return {c.index: list(zip(c.kind, c.x, c.y, c.w, c.h, c.strength)) for c in stream.chunks}
+
+
+def test_same_seed_gives_the_same_chunks_whatever_the_screen():
+    a, b, other = _stream(), _stream(view_w=800.0), _stream(seed=8)
+    for scroll in (0.0, 5000.0, 40000.0):
+        for s in (a, b, other):
+            s.update(scroll)
+        snap_a, snap_b = _snapshot(a), _snapshot(b)
+        common = snap_a.keys() & snap_b.keys()
+        assert common and all(snap_a[i] == snap_b[i] and snap_a[i] for i in common)
+        assert _snapshot(other) != snap_a
+
+    a.reset()
+    a.update(0.0)
+    fresh = _stream()
+    fresh.update(0.0)
+    assert _snapshot(a) == _snapshot(fresh)      # après reset, le même début de niveau
+
+
+def test_recycled_chunks_stay_bounded_over_a_long_session():
+    stream = _stream()
+    seen = set()
+    for step in range(20000):                    # ~240 tronçons défilés
+        stream.update(step * 15.0)
+        seen.update(id(c) for c in stream.chunks)
+        assert len(stream.chunks) <= 4
+    assert stream.generated > 200
+    assert len(seen) <= 4 + 1                    # pool_size, et au plus un tronçon alloué en plus
+    assert [c.index for c in stream.chunks] == list(range(stream._next - len(stream.chunks), stream._next))
+
+
+def test_spatial_index_collisions_match_brute_force():
+    stream = _stream()
+    rng = random.Random(3)
+    stream.update(30000.0)
+    hits = 0
+    for chunk in stream.chunks:                  # quelques éléments déjà ramassés / touchés
+        for i in range(len(chunk)):
+            chunk.alive[i] = rng.random() > 0.2
+
+    for _ in range(2000):
+        left = 30000.0 + rng.uniform(-200.0, 2 * CHUNK_W)
+        bottom = rng.uniform(0.0, 500.0)
+        right, top = left + rng.uniform(10.0, 300.0), bottom + rng.uniform(10.0, 300.0)
+        brute = {(c.index, i) for c in stream.chunks for i in range(len(c))
+                 if c.alive[i] and c.x[i] < right and c.x[i] + c.w[i] > left
+                 and c.y[i] < top and c.y[i] + c.h[i] > bottom}
+        fast = [(c.index, i) for c, i in stream.overlaps(left, bottom, right, top)]
+        assert len(fast) == len(set(fast)) and set(fast) == brute
+        hits += bool(brute)
+    assert hits > 100
@@ -0,0 +1,66 @@
+import math
+import time
+
+import numpy as np
+
+from hand_state import HandCalibrator, HandState
+from metrics import MetricsEngine
+from session import SessionRecorder, iter_session_chunks, load_session_columns, read_session
+
+
+def _record_session(path, seconds=30.0, fs=100.0):
+    """Séance synthétique : flexions, appuis et rotations du poignet, avec un peu de bruit."""
+    rng = np.random.default_rng(1)
+    recorder = SessionRecorder(str(path))
+    for k in range(int(seconds * fs)):
+        t = k / fs
+        flex = 500 + 280 * math.sin(2 * math.pi * 0.4 * t) + rng.normal(0, 5)
+        fsr = max(0.0, 600 * math.sin(2 * math.pi * 0.25 * t)) + 60
+        gx = 40 * math.sin(2 * math.pi * 0.5 * t) + rng.normal(0, 2)
+        recorder.write_state(HandState(
+            int(1000 * t + rng.integers(0, 3)), 480, int(flex), int(fsr), 300,
+            0.01, -0.02, 0.98, round(gx, 2), -1.0, 0.5))
+    recorder.close()
+    return str(path)
+
+
+def test_live_and_batch_paths_give_the_same_snapshot(tmp_path):
+    path = _record_session(tmp_path / "seance.csv")
+    calib = HandCalibrator()
+
+    live = MetricsEngine(calib)
+    for state in read_session(path):
+        live.update(state)
+
+    batch = MetricsEngine(calib)
+    batch.update_arrays(load_session_columns(path))
+
+    chunked = MetricsEngine(calib)
+    for cols in iter_session_chunks(path, chunk_size=777):
+        chunked.update_arrays(cols)
+
+    expected = live.snapshot()
+    assert expected.repetitions > 0 and expected.sparc != 0.0
+    assert batch.snapshot() == expected
+    assert chunked.snapshot() == expected
+
+
+def test_listeners_are_called_after_each_live_update():
+    engine = MetricsEngine()
+    seen = []
+    engine.add_listener(lambda state: seen.append(engine.snapshot().n_samples))
+    for k in range(3):
+        engine.update(HandState(10 * k, 500, 500, 400, 300, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0))
+    assert seen == [1, 2, 3]
+
+
+def test_recorder_flushes_periodically_before_close(tmp_path):
+    path = tmp_path / "seance.csv"
+    recorder = SessionRecorder(str(path), flush_s=0.05)
+    state = HandState(0, 480, 500, 60, 300, 0.01, -0.02, 0.98, 0.0, -1.0, 0.5)
+    recorder.write_state(state)
+    assert path.read_text() == ""                 # tamponné
+    time.sleep(0.06)
+    recorder.write_state(state)
+    assert len(read_session(str(path))) == 2      # sur le disque sans close()
+    recorder.close()
@@ -0,0 +1,52 @@
+import os
+import time
+
+import pytest
+
+from device_protocol import SimulatedGlove
+from port_discovery import discover, load_cache, probe
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "openpty"), reason="pty POSIX")
+
+
+def _silent_pty():
+    master, slave = os.openpty()
+    return master, os.ttyname(slave), slave
+
+
+def test_glove_found_among_silent_ports_then_cached(tmp_path):
+    glove = SimulatedGlove()
+    port = glove.serve_pty()
+    silent = [_silent_pty() for _ in range(3)]
+    cache = str(tmp_path / "port_cache.txt")
+    try:
+        ports = [name for _, name, _ in silent] + [port]
+        t0 = time.perf_counter()
+        results = discover(ports=ports, timeout=0.5, cache_path=cache)
+        assert time.perf_counter() - t0 < 0.5       # sondes en parallèle, on n'attend pas les ports muets
+        assert [r.port for r in results if r.found] == [port]
+        assert list(load_cache(cache).values()) == [port]
+
+        results = discover(ports=ports, timeout=0.5, cache_path=cache)
+        assert [r.port for r in results] == [port]  # port mémorisé : seul sondé
+    finally:
+        glove.stop()
+        for master, _, slave in silent:
+            os.close(master)
+            os.close(slave)
+
+
+def test_idle_glove_answers_hello_and_silent_port_times_out():
+    glove = SimulatedGlove()
+    glove.idle = True
+    port = glove.serve_pty()
+    master, name, slave = _silent_pty()
+    try:
+        result = probe(port, timeout=0.5)
+        assert result.found and result.how == "hello" and result.info.firmware == 3
+        result = probe(name, timeout=0.2, hello=False)
+        assert not result.found and 0.2 <= result.elapsed_s < 0.4
+    finally:
+        glove.stop()
+        os.close(master)
+        os.close(slave)
@@ -0,0 +1,40 @@
+import csv
+import math
+
+from hand_state import HandState
+from prediction import InputPredictor
+
+
+def _state(t_ms, gx, flex=500.0):
+    return HandState(t_ms, 500, flex, 300, 200, 0.0, 0.0, 1.0, gx, 0.0, 0.0)
+
+
+def test_prediction_beats_latest_value_and_logs_its_error(tmp_path):
+    log = str(tmp_path / "prediction.csv")
+    predictor = InputPredictor(horizon_ms=30.0, log_path=log)
+    for k in range(300):
+        t = 10 * k
+        # rotation du poignet à 0.8 Hz, flexion lente
+        predictor.observe(_state(t, 150 * math.sin(2 * math.pi * 0.8 * t / 1000), 300 + 0.15 * t))
+        predictor.predict(t + 30.0)
+    predictor.close()
+
+    stats = predictor.stats()
+    assert stats["predictions"] == 300 and stats["mean_extrapolation_ms"] == 30.0
+    assert stats["gx"]["rms"] < 0.5 * stats["gx"]["rms_latest"]
+    assert stats["flex_index"]["rms"] < 0.2 * stats["flex_index"]["rms_latest"]
+    with open(log, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == stats["gx"]["n"] * len(predictor.channels)
+    assert {r["channel"] for r in rows} >= {"gx", "flex_index", "fsr_index"}
+
+
+def test_horizon_and_sensor_limits_are_clamped():
+    predictor = InputPredictor(max_ms=40.0)
+    assert predictor.predict(0.0) is None
+    for k in range(5):
+        predictor.observe(_state(10 * k, 1900.0 + 50 * k, 900.0 + 30 * k))
+    state = predictor.predict(1000.0)       # gant muet : 40 ms au plus
+    assert state.t_ms == 80.0
+    assert state.gx == 2000.0 and state.flex_index == 1023.0
+    assert predictor.clamped >= 2
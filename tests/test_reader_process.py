@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from device_protocol import FLEX_ONLY, SimulatedGlove
+from reader_process import _UI_WAITING, N_COLS, SharedHandReader, ShmRing
+
+pty = pytest.mark.skipif(not hasattr(os, "openpty"), reason="pty POSIX")
+
+
+def _write(ring, first, n):
+    for k in range(first, first + n):
+        ring.write([k] + [k % 7] * (N_COLS - 1))
+
+
+def test_shm_ring_wraps_around_and_detects_overruns():
+    ring = ShmRing.create(8)
+    try:
+        _write(ring, 0, 5)
+        end, rows, lost = ring.read_since(0)
+        assert (end, rows[:, 0].tolist(), lost) == (5, [0, 1, 2, 3, 4], 0)
+
+        _write(ring, 5, 6)                   # séquences 5..10 : cases 5, 6, 7 puis 0, 1, 2
+        end, rows, lost = ring.read_since(end)
+        assert (end, rows[:, 0].tolist(), lost) == (11, [5, 6, 7, 8, 9, 10], 0)
+        assert rows[:, 1].tolist() == [k % 7 for k in range(5, 11)]
+        assert ring.read_since(end)[1].shape == (0, N_COLS)
+
+        # lecteur en retard de plus d'un tour : les plus anciennes sont perdues, comptées
+        _write(ring, 11, 20)
+        end, rows, lost = ring.read_since(end)
+        assert (end, rows[:, 0].tolist(), lost) == (31, list(range(23, 31)), 12)
+
+        # case en cours de réécriture (-1) pendant la copie : écartée et comptée
+        _write(ring, 31, 3)
+        ring.seqs[33 % 8] = -1
+        end, rows, lost = ring.read_since(end)
+        assert (end, rows[:, 0].tolist(), lost) == (34, [31, 32], 1)
+
+        view = ring.latest_rows(2)           # séquences 32, 33 : cases 0, 1, contiguës
+        assert view[:, 0].tolist() == [32, 33] and np.shares_memory(view, ring.rows)
+        wrapped = ring.latest_rows(4)        # cases 6, 7, 0, 1 : à cheval sur la fin
+        assert wrapped[:, 0].tolist() == [30, 31, 32, 33]
+        del view, wrapped
+    finally:
+        ring.close()
+
+
+@pty
+def test_shared_reader_resets_a_glove_left_in_binary_and_forwards_commands():
+    glove = SimulatedGlove()
+    glove.binary, glove.mask = True, 0x3       # configuration laissée par une autre séance
+    reader = SharedHandReader(glove.serve_pty())
+    states = []
+    reader.add_listener(states.append)
+    reader.start()
+    try:
+        assert reader.handshake(timeout=2.0) is not None
+        assert glove.commands[0] == "!RESET"
+        time.sleep(0.3)
+        assert states and states[-1].fsr_index == 300    # tous les canaux, en CSV
+        assert reader.configure(rate_hz=500, channels=FLEX_ONLY, fmt="bin", timeout=2.0)
+        assert reader.device_config == {"rate_hz": 500, "channels": list(FLEX_ONLY), "fmt": "bin"}
+        del states[:]
+        time.sleep(0.5)
+        n = len(states)
+    finally:
+        reader.stop()
+        glove.stop()
+    assert 150 <= n <= 300
+    assert reader.rejected == 0
+
+
+@pty
+def test_a_lost_wakeup_only_delays_the_ui():
+    # le process lecteur publie un échantillon sans l'octet de réveil (réveil perdu)
+    reader = SharedHandReader("/dev/null", capacity=8)
+    reader.ring = ShmRing.create(8)
+    rfd, wfd = os.pipe()
+
+    class _Process:
+        stdout = os.fdopen(rfd, "rb", buffering=0)
+
+    reader.process = _Process()
+    states = []
+    reader.add_listener(states.append)
+    reader.running = True
+    thread = threading.Thread(target=reader._loop, daemon=True)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 1.0
+        while not reader.ring.header[_UI_WAITING] and time.monotonic() < deadline:
+            time.sleep(0.001)
+        _write(reader.ring, 0, 1)
+        deadline = time.monotonic() + 1.0
+        while not states and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert [s.t_ms for s in states] == [0]
+    finally:
+        reader.running = False
+        os.close(wfd)                        # EOF : la boucle se termine
+        thread.join(timeout=1.0)
+        _Process.stdout.close()
+        reader.ring.close()
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+import serial
+
+from device_protocol import SimulatedGlove
+from sd_download import SdLink, SdTransferError, convert_log, main as sd_main
+from session import read_session
+
+
+@pytest.mark.skipif(not hasattr(os, "openpty"), reason="pty POSIX")
+def test_download_resumes_after_interruption_and_converts(tmp_path):
+    glove = SimulatedGlove()
+    glove.record_sd("LOG00001.BIN", 3000)
+    glove.record_sd("LOG00002.BIN", 10, t0_ms=5)
+    expected = glove.sd_files["LOG00001.BIN"]
+    glove.corrupt_gets = {2}
+    glove.mute_after = 5            # le gant se tait : câble arraché
+    ser = serial.Serial(glove.serve_pty(), timeout=1)
+    out = str(tmp_path / "brut")
+    try:
+        link = SdLink(ser, timeout=0.2, retries=1, block=4096)
+        link.idle()
+        files = link.list_files()
+        assert files == [("LOG00001.BIN", 3000 * 29), ("LOG00002.BIN", 290)]
+        with pytest.raises(SdTransferError):
+            link.download(*files[0], out)
+        part = os.path.join(out, "LOG00001_87000.part")
+        assert os.path.getsize(part) == 4 * 4096    # blocs vérifiés seulement
+        assert link.bad_blocks >= 1
+
+        glove.mute_after = None
+        link = SdLink(ser, timeout=0.2, retries=1, block=4096)
+        link.idle()
+        path = link.download(*files[0], out)
+        assert link.bytes == 87000 - 4 * 4096       # reprise au .part
+        link.remove("LOG00001.BIN")
+        assert [name for name, _ in link.list_files()] == ["LOG00002.BIN"]
+    finally:
+        ser.close()
+        glove.stop()
+
+    with open(path, "rb") as f:
+        assert f.read() == expected
+    session = str(tmp_path / "p01" / "maison.csv")
+    assert convert_log(path, session) == 3000
+    states = read_session(session)
+    assert [s.t_ms for s in states] == [k * 10 for k in range(3000)]
+    assert states[25].gx == pytest.approx(glove.signal(0.25)[7], abs=0.05)
+
+
+@pytest.mark.skipif(not hasattr(os, "openpty"), reason="pty POSIX")
+def test_rerunning_the_download_does_not_duplicate_sessions(tmp_path, capsys):
+    glove = SimulatedGlove()
+    glove.record_sd("LOG00001.BIN", 200)
+    glove.record_sd("LOG00002.BIN", 50, t0_ms=5)
+    port = glove.serve_pty()
+    args = [port, "--patient", "p01", "--sessions", str(tmp_path / "sessions"),
+            "--out", str(tmp_path / "brut"), "--timeout", "0.5", "--reconnect", "0"]
+    try:
+        assert sd_main(args) == 0
+        first = sorted(os.listdir(tmp_path / "sessions" / "p01"))
+        assert sd_main(args) == 0       # relance : tout est déjà là
+    finally:
+        glove.stop()
+    assert first == ["sd_LOG00001_5800.csv", "sd_LOG00002_1450.csv"]
+    assert sorted(os.listdir(tmp_path / "sessions" / "p01")) == first
+    assert len(read_session(str(tmp_path / "sessions" / "p01" / first[0]))) == 200
+    assert "déjà convertie" in capsys.readouterr().out
+
+
+def test_a_garbled_block_header_asks_for_the_block_again():
+    class _Line:
+        timeout = None
+
+        def __init__(self, reply):
+            self.reply = reply
+
+        def write(self, data):
+            pass
+
+        def read_until(self, end):
+            return self.reply
+
+    for reply in (b"#OK GET 4O96 4096\n", b"#OK GET 4096 4x96\n", b"#OK GET 0 4096\n"):
+        assert SdLink(_Line(reply), block=4096).get_block("LOG00001.BIN", 4096) is None
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from hand_state import HandState
+from spectral import SessionTremor, TremorDetector, session_tremor
+
+FS = 100.0
+
+
+def _tremor_cols(freq_hz: float, seconds: float = 20.0, axis: str = "gx"):
+    t = np.arange(int(seconds * FS)) / FS
+    cols = {name: np.zeros_like(t) for name in ("gx", "gy", "gz", "ax", "ay")}
+    cols["az"] = np.ones_like(t)
+    cols[axis] = 40.0 * np.sin(2 * np.pi * freq_hz * t)
+    cols["flex_index"] = 500.0 + 30.0 * np.sin(2 * np.pi * freq_hz * t)
+    return cols
+
+
+@pytest.mark.parametrize("axis", ["gx", "gz"])
+def test_session_tremor_reports_input_frequency(axis):
+    cols = _tremor_cols(5.0, axis=axis)
+    result = session_tremor(cols, channels=("gyro", "flex_index"), fs=FS)
+    assert result["gyro"].freq_hz == pytest.approx(5.0, abs=0.4)
+    assert result["flex_index"].freq_hz == pytest.approx(5.0, abs=0.4)
+
+
+def test_live_detector_reports_input_frequency():
+    cols = _tremor_cols(5.0, seconds=5.0)
+    detector = TremorDetector("gyro", fs=FS)
+    for k in range(cols["gx"].size):
+        detector.update(HandState(int(10 * k), 500, 500, 400, 300, 0.0, 0.0, 1.0,
+                                  float(cols["gx"][k]), 0.0, 0.0))
+    assert detector.result.freq_hz == pytest.approx(5.0, abs=0.4)
+    assert detector.result.band_ratio > 0.9
+
+
+def test_session_tremor_by_chunks_matches_the_whole_session():
+    cols = _tremor_cols(6.0, seconds=30.0)
+    cols["gy"] = np.random.default_rng(0).normal(0.0, 3.0, cols["gx"].size)
+    whole = session_tremor(cols, fs=FS)
+    chunked = SessionTremor(fs=FS)
+    for i in range(0, cols["gx"].size, 777):
+        chunked.update_arrays({k: v[i:i + 777] for k, v in cols.items()})
+    for channel, result in chunked.results().items():
+        assert result.freq_hz == whole[channel].freq_hz
+        assert result.band_power == pytest.approx(whole[channel].band_power, rel=1e-9)
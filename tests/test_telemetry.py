@@ -0,0 +1,98 @@
+import math
+
+import numpy as np
+import pytest
+
+from game_logic import GameEvent
+from hand_state import HandState
+from telemetry import MAX_FRAMES, TelemetryPublisher, TelemetryReceiver
+
+
+def _state(k):
+    """Gant à 1 kHz : t_ms = k."""
+    phase = math.sin(2 * math.pi * 0.5 * k / 1000.0)
+    return HandState(k, 500 + int(300 * phase), 500 - int(300 * phase), 400, 300,
+                     0.01, -0.02, 0.98, 12.5 * phase, -3.0, 0.5)
+
+
+@pytest.fixture
+def link():
+    frames, events = [], []
+    rx = TelemetryReceiver("127.0.0.1", 0, report_s=0.0,
+                           on_frames=lambda out: frames.append((rx.decimation, out)),
+                           on_event=lambda *e: events.append(e))
+    # lots envoyés à la main (flush) ; débit sans plafond : seule la perte fait décimer
+    pub = TelemetryPublisher(("127.0.0.1", rx.port), period_s=1e9, max_kbps=1e9)
+    yield pub, rx, frames, events
+    pub.sock.close()
+    rx.close()
+
+
+def _batch(pub, rx, first, n=20):
+    for k in range(first, first + n):
+        pub.on_state(_state(k))
+    pub.flush()
+    rx.poll()                                    # traite le lot, renvoie un rapport (report_s=0)
+    return first + n
+
+
+def test_decoded_values_match_the_published_states(link):
+    pub, rx, frames, events = link
+    states = [_state(k) for k in range(2 * MAX_FRAMES + 7)]
+    for s in states:
+        pub.on_state(s)                          # lots pleins envoyés d'eux-mêmes
+    pub.publish_event(GameEvent(1.5, "jump", 0.75, "index", 123.0), "jump")
+    pub.flush()
+    for _ in range(4):
+        rx.poll()
+
+    out = np.concatenate([f for _, f in frames])
+    assert rx.packets == 4 and rx.lost == 0 and rx.frames == len(states)
+    assert out[:, 0].tolist() == [s.t_ms for s in states]
+    calib = pub.calib
+    flex = [(s.flex_thumb - calib.flex_thumb_min) / (calib.flex_thumb_max - calib.flex_thumb_min) for s in states]
+    assert out[:, 1] == pytest.approx(np.clip(flex, 0.0, 1.0), abs=1 / 65535)
+    assert out[:, 3] == pytest.approx((400 - 50) / 850, abs=1 / 65535)
+    assert out[:, 5:8] == pytest.approx(np.tile([0.01, -0.02, 0.98], (len(states), 1)), abs=1e-3)
+    assert out[:, 8] == pytest.approx([s.gx for s in states], abs=0.05)
+    assert events == [(123, "jump:jump", pytest.approx(0.75), "index")]
+    assert pub.sent_bytes / pub.published < 25   # ~22 octets par échantillon, en-têtes compris
+
+
+def test_lost_packets_are_counted_from_sequence_gaps(link):
+    pub, rx, frames, _ = link
+    for k in range(12):
+        pub.on_state(_state(k))
+        pub.flush()
+        packet, _ = rx.sock.recvfrom(65536)
+        if k % 3 != 1:                           # un paquet sur trois se perd
+            rx.handle(packet)
+    assert rx.packets == 8 and rx.lost == 4
+    assert [f[0, 0] for _, f in frames] == [k for k in range(12) if k % 3 != 1]
+
+
+def test_loss_reports_raise_decimation_then_clean_ones_lower_it(link):
+    pub, rx, frames, _ = link
+    k = 0
+    for i in range(12):
+        rx.drop = 1.0 if i % 2 else 0.0          # un lot sur deux perdu côté récepteur
+        k = _batch(pub, rx, k)
+    assert rx.lost == 5 and pub.decimation == pub.max_decimation == 16   # le dernier lot perdu : pas encore vu
+    assert [d for _, d in pub.adaptations] == [2, 4, 8, 16]
+    assert pub.published < pub.samples
+    # après décimation, les échantillons reçus sont espacés de `décimation` ms
+    assert {d for d, _ in frames} == {1, 2, 4, 8, 16}
+    for decimation, out in frames:
+        assert np.all(np.diff(out[:, 0]) == decimation)
+
+    # coupure totale : des rapports vides ne sont pas des rapports propres
+    rx.drop = 1.0
+    for _ in range(10):
+        k = _batch(pub, rx, k)
+    assert pub.decimation == 16
+
+    rx.drop = 0.0
+    for _ in range(4 * 4 + 2):                   # quatre rapports propres par division
+        k = _batch(pub, rx, k)
+    assert pub.decimation == 1
+    assert [d for _, d in pub.adaptations] == [2, 4, 8, 16, 8, 4, 2, 1]